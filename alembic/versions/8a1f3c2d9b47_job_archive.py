@@ -0,0 +1,28 @@
+"""job_archive
+
+Revision ID: 8a1f3c2d9b47
+Revises: 4ce656722c5d
+Create Date: 2026-10-19 10:12:41.204518
+
+"""
+from alembic import op
+#the archive tables refer to session and config, their tables must be known
+import tuna.miopen.db.tables  # pylint: disable=unused-import
+from tuna.miopen.db.convolutionjob_tables import ConvJobArchive
+from tuna.miopen.db.batch_norm_tables import BNJobArchive
+
+# revision identifiers, used by Alembic.
+revision = '8a1f3c2d9b47'
+down_revision = '4ce656722c5d'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+  ConvJobArchive.__table__.create(bind=op.get_bind(), checkfirst=True)
+  BNJobArchive.__table__.create(bind=op.get_bind(), checkfirst=True)
+
+
+def downgrade() -> None:
+  op.drop_table('bn_job_archive')
+  op.drop_table('conv_job_archive')
@@ -0,0 +1,28 @@
+"""golden_watermark
+
+High-water mark of the conv_find_db rows of a session merged into a golden
+version, read by update_golden --incremental.
+
+Revision ID: b4d7e2a19c35
+Revises: e7c3a9d15b62
+Create Date: 2026-10-19 18:21:07.518342
+
+"""
+from alembic import op
+#the watermark refers to session, its table must be known
+import tuna.miopen.db.tables  # pylint: disable=unused-import
+from tuna.miopen.db.convolutionjob_tables import ConvGoldenWatermark
+
+# revision identifiers, used by Alembic.
+revision = 'b4d7e2a19c35'
+down_revision = 'e7c3a9d15b62'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+  ConvGoldenWatermark.__table__.create(bind=op.get_bind(), checkfirst=True)
+
+
+def downgrade() -> None:
+  op.drop_table('conv_golden_watermark')
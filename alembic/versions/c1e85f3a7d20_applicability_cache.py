@@ -0,0 +1,29 @@
+"""applicability_cache
+
+Session independent solver applicability of configs, used by fin to skip
+configs it has already checked.
+
+Revision ID: c1e85f3a7d20
+Revises: b4d7e2a19c35
+Create Date: 2026-10-19 18:47:33.902164
+
+"""
+from alembic import op
+from tuna.miopen.db.convolutionjob_tables import ConvApplicabilityCache
+from tuna.miopen.db.batch_norm_tables import BNApplicabilityCache
+
+# revision identifiers, used by Alembic.
+revision = 'c1e85f3a7d20'
+down_revision = 'b4d7e2a19c35'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+  ConvApplicabilityCache.__table__.create(bind=op.get_bind(), checkfirst=True)
+  BNApplicabilityCache.__table__.create(bind=op.get_bind(), checkfirst=True)
+
+
+def downgrade() -> None:
+  op.drop_table('bn_applicability_cache')
+  op.drop_table('conv_applicability_cache')
@@ -0,0 +1,82 @@
+"""partition_jobs
+
+Optional, only applied with: alembic -x partition_jobs=<N> upgrade head
+Splits conv_job and bn_job into N hash partitions on session so the claim
+queries only touch the partition of the session being tuned. MySQL does not
+allow foreign keys on partitioned tables, the job table keys and the job_cache
+keys referencing them are dropped and the primary key becomes (id, session).
+
+Revision ID: c5e07b6a2f13
+Revises: 8a1f3c2d9b47
+Create Date: 2026-10-19 11:03:17.582230
+
+"""
+from alembic import op, context
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'c5e07b6a2f13'
+down_revision = '8a1f3c2d9b47'
+branch_labels = None
+depends_on = None
+
+#job table: cache tables holding a foreign key to its id
+JOB_TABLES = {
+    'conv_job': ['conv_job_cache', 'conv_job_cache_fin'],
+    'bn_job': ['bn_job_cache', 'bn_job_cache_fin'],
+}
+
+
+def num_partitions() -> int:
+  """partition count requested on the command line, 0 if none"""
+  return int(
+      context.get_x_argument(as_dictionary=True).get('partition_jobs', 0))
+
+
+def is_partitioned(table: str) -> bool:
+  """check information_schema for existing partitions of table"""
+  query = "select count(*) from information_schema.partitions"\
+  f" where table_schema=database() and table_name='{table}'"\
+  " and partition_name is not null;"
+  return op.get_bind().execute(sa.text(query)).scalar() > 0
+
+
+def drop_foreign_keys(table: str, referred: str = None) -> None:
+  """drop the foreign keys of table, only those to referred if given"""
+  for fkey in sa.inspect(op.get_bind()).get_foreign_keys(table):
+    if referred is None or fkey['referred_table'] == referred:
+      op.drop_constraint(fkey['name'], table, type_='foreignkey')
+
+
+def upgrade() -> None:
+  partitions = num_partitions()
+  if not partitions:
+    return
+  for job_table, cache_tables in JOB_TABLES.items():
+    if is_partitioned(job_table):
+      continue
+    for cache_table in cache_tables:
+      drop_foreign_keys(cache_table, job_table)
+    drop_foreign_keys(job_table)
+    op.execute(f"alter table {job_table} drop primary key,"
+               " add primary key (id, session);")
+    op.execute(f"alter table {job_table} partition by hash(session)"
+               f" partitions {partitions};")
+
+
+def downgrade() -> None:
+  for job_table, cache_tables in JOB_TABLES.items():
+    if not is_partitioned(job_table):
+      continue
+    op.execute(f"alter table {job_table} remove partitioning;")
+    op.execute(f"alter table {job_table} drop primary key,"
+               " add primary key (id);")
+    op.create_foreign_key(None, job_table, 'session', ['session'], ['id'])
+    op.create_foreign_key(None, job_table, job_table.replace('job', 'config'),
+                          ['config'], ['id'])
+    op.create_foreign_key(None, cache_tables[0], job_table, ['job_id'], ['id'])
+    op.create_foreign_key(None,
+                          cache_tables[1],
+                          job_table, ['job_id'], ['id'],
+                          onupdate='CASCADE',
+                          ondelete='CASCADE')
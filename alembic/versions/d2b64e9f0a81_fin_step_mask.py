@@ -0,0 +1,58 @@
+"""fin_step_mask
+
+Numeric copy of the fin_step SET column and the claim index on job tables.
+
+Revision ID: d2b64e9f0a81
+Revises: c5e07b6a2f13
+Create Date: 2026-10-19 14:26:05.913372
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy import Column, Integer, Computed
+
+# revision identifiers, used by Alembic.
+revision = 'd2b64e9f0a81'
+down_revision = 'c5e07b6a2f13'
+branch_labels = None
+depends_on = None
+
+JOB_TABLES = ['conv_job', 'bn_job']
+ARCHIVE_TABLES = ['conv_job_archive', 'bn_job_archive']
+CLAIM_COLS = ['session', 'state', 'fin_step_mask', 'retries', 'config']
+
+
+def has_column(table: str, column: str) -> bool:
+  """archive tables created from the models already have the column"""
+  return column in [
+      col['name'] for col in sa.inspect(op.get_bind()).get_columns(table)
+  ]
+
+
+def has_index(table: str, index: str) -> bool:
+  """check for an index by name"""
+  return index in [
+      idx['name'] for idx in sa.inspect(op.get_bind()).get_indexes(table)
+  ]
+
+
+def upgrade() -> None:
+  for table in JOB_TABLES + ARCHIVE_TABLES:
+    if not has_column(table, 'fin_step_mask'):
+      op.add_column(
+          table,
+          Column('fin_step_mask', Integer, Computed('fin_step+0',
+                                                    persisted=True)))
+  for table in JOB_TABLES:
+    if not has_index(table, 'get_job_claim'):
+      op.create_index('get_job_claim', table, CLAIM_COLS)
+  for table in ARCHIVE_TABLES:
+    if not has_index(table, 'idx_session'):
+      op.create_index('idx_session', table, ['session', 'state'])
+
+
+def downgrade() -> None:
+  for table in JOB_TABLES:
+    op.drop_index('get_job_claim', table)
+  for table in JOB_TABLES + ARCHIVE_TABLES:
+    op.drop_column(table, 'fin_step_mask')
@@ -0,0 +1,32 @@
+"""kernel_group_index
+
+Index used by the deferred kernel cache clean-up to find the invalidated rows
+of a kernel group.
+
+Revision ID: e7c3a9d15b62
+Revises: d2b64e9f0a81
+Create Date: 2026-10-19 16:48:52.370615
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'e7c3a9d15b62'
+down_revision = 'd2b64e9f0a81'
+branch_labels = None
+depends_on = None
+
+KERNEL_TABLES = ['conv_kernel_cache', 'bn_kernel_cache']
+
+
+def upgrade() -> None:
+  for table in KERNEL_TABLES:
+    indexes = sa.inspect(op.get_bind()).get_indexes(table)
+    if 'idx_kgroup_valid' not in [idx['name'] for idx in indexes]:
+      op.create_index('idx_kgroup_valid', table, ['kernel_group', 'valid'])
+
+
+def downgrade() -> None:
+  for table in KERNEL_TABLES:
+    op.drop_index('idx_kgroup_valid', table)
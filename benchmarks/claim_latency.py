@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+
+###############################################################################
+#
+# MIT License
+#
+# Copyright (c) 2024 Advanced Micro Devices, Inc.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+"""Time the job claim query of MIOpenLib.compose_work_objs on a conv_job
+table holding --rows finished jobs of a closed session, before and after
+archive_jobs moved them out. Each is timed with the fin_step_mask condition
+of the claim index and with the earlier fin_step LIKE pattern. Seeds two
+scratch sessions in the configured MySQL DB by repeatedly doubling an
+INSERT ... SELECT, and removes them and their archived jobs at the end.
+Needs imported conv_config rows.
+
+Example: python3 benchmarks/claim_latency.py --rows 50000000
+"""
+
+import time
+import logging
+import statistics
+
+from tuna.parse_args import setup_arg_parser
+from tuna.dbBase.sql_alchemy import DbSession
+from tuna.miopen.db.session import Session
+from tuna.miopen.db.mixin_tables import FinStep, fin_step_cond
+from tuna.miopen.utils.config_type import ConfigType
+from tuna.miopen.subcmd.archive_jobs import run_archive_jobs
+from tuna.utils.utility import SimpleDict
+from tuna.utils.logger import setup_logger
+
+LABEL = 'bench_claim'
+JOB_COLS = 'session, config, solver, state, reason, fin_step, update_ts'
+
+
+def add_session(tag: str) -> int:
+  """Scratch session"""
+  sess_args = SimpleDict(label=LABEL,
+                         docker_name='miopentuna',
+                         arch='gfx90a',
+                         num_cu=104,
+                         rocm_v='bench',
+                         miopen_v='bench',
+                         ticket=tag)
+  return Session().add_new_session(sess_args, None)
+
+
+def seed_jobs(session, sid: int, rows: int, state: str, fin_step: str,
+              age: int) -> int:
+  """Insert one job per config, then double until rows are reached, the
+  solver column keeps (config, solver, session) unique"""
+  session.execute(
+      f"insert into conv_job ({JOB_COLS}) select {sid}, id, 'seed', '{state}',"
+      f" '{LABEL}', '{fin_step}', now() - interval {age} day from conv_config"
+      f" where valid=1 limit {rows};")
+  session.commit()
+  count = session.execute(
+      f"select count(*) from conv_job where session={sid}").scalar()
+  rnd = 0
+  while 0 < count < rows:
+    rnd += 1
+    session.execute(
+        f"insert into conv_job ({JOB_COLS}) select session, config,"
+        f" concat('r{rnd}_', id), state, reason, fin_step, update_ts"
+        f" from conv_job where session={sid} limit {rows - count};")
+    session.commit()
+    count = session.execute(
+        f"select count(*) from conv_job where session={sid}").scalar()
+  return count
+
+
+def time_claim(session, sid: int, fin_cond: str, claim_num: int,
+               repeat: int) -> float:
+  """Median seconds of the claim query, the locks are released each run"""
+  query = "select id, config, solver from conv_job"\
+  f" where session={sid} and valid=1 and reason='{LABEL}' and retries<3"\
+  f" and state in ('new') and {fin_cond}"\
+  f" order by retries,config asc limit {claim_num} for update skip locked;"
+  times = []
+  for _ in range(repeat):
+    start = time.perf_counter()
+    session.execute(query).fetchall()
+    times.append(time.perf_counter() - start)
+    session.rollback()
+  return statistics.median(times)
+
+
+def cleanup(sids) -> None:
+  """Remove the scratch sessions and their jobs"""
+  sess_list = ', '.join(map(str, sids))
+  with DbSession() as session:
+    for table in ('conv_job_archive', 'conv_job'):
+      session.execute(f"delete from {table} where session in ({sess_list})")
+    session.execute(f"delete from session where id in ({sess_list})")
+    session.commit()
+
+
+def main():
+  """Seed, time the claim, archive, time again"""
+  parser = setup_arg_parser('Benchmark job claims against archived history', [],
+                            with_yaml=False)
+  parser.add_argument('--rows',
+                      dest='rows',
+                      type=int,
+                      default=1000000,
+                      help='Finished jobs of the closed session')
+  parser.add_argument('--active',
+                      dest='active',
+                      type=int,
+                      default=10000,
+                      help='New jobs of the session being tuned')
+  parser.add_argument('--fin_step',
+                      dest='fin_step',
+                      default='miopen_find_compile',
+                      choices=list(FinStep.__members__),
+                      help='fin_step of all seeded jobs')
+  parser.add_argument('--claim_num',
+                      dest='claim_num',
+                      type=int,
+                      default=5,
+                      help='Jobs claimed per query')
+  parser.add_argument('--repeat',
+                      dest='repeat',
+                      type=int,
+                      default=20,
+                      help='Runs of the claim query')
+  parser.add_argument('--chunk_size',
+                      dest='chunk_size',
+                      type=int,
+                      default=10000,
+                      help='archive_jobs chunk size')
+  args = parser.parse_args()
+
+  logger = setup_logger('bench_claim_latency')
+  logger.setLevel(logging.WARNING)
+
+  tag = f'{LABEL}_{int(time.time())}'
+  closed = add_session(f'{tag}_closed')
+  active = add_session(f'{tag}_active')
+  conds = {
+      'fin_step_mask': fin_step_cond([args.fin_step]),
+      'fin_step like': f"fin_step like '%{args.fin_step}%'"
+  }
+  try:
+    with DbSession() as session:
+      rows = seed_jobs(session, closed, args.rows, 'evaluated', args.fin_step,
+                       30)
+      seed_jobs(session, active, args.active, 'new', args.fin_step, 0)
+      before = {
+          name: time_claim(session, active, cond, args.claim_num, args.repeat)
+          for name, cond in conds.items()
+      }
+
+    start = time.perf_counter()
+    run_archive_jobs(
+        SimpleDict(config_type=ConfigType.convolution,
+                   session_id=[closed],
+                   min_age=1,
+                   chunk_size=args.chunk_size,
+                   dry_run=False), logger)
+    archive_t = time.perf_counter() - start
+
+    with DbSession() as session:
+      after = {
+          name: time_claim(session, active, cond, args.claim_num, args.repeat)
+          for name, cond in conds.items()
+      }
+  finally:
+    cleanup([closed, active])
+
+  print(f"closed session jobs: {rows}, active session jobs: {args.active}")
+  print(f"{'claim condition':16} {'before archive':>16} {'after archive':>16}")
+  for name in conds:
+    print(
+        f"{name:16} {before[name] * 1000:14.2f}ms {after[name] * 1000:14.2f}ms")
+  print(f"archive_jobs:         {archive_t:8.2f}s"
+        f"  ({rows / archive_t:.0f} jobs/s)")
+
+
+if __name__ == '__main__':
+  main()
@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+
+###############################################################################
+#
+# MIT License
+#
+# Copyright (c) 2024 Advanced Micro Devices, Inc.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+"""Random lookup throughput on a kdb: per-key queries on a plain sqlite3
+connection, as the merge and analysis scripts do, against SQLiteReader single
+and batched lookups. A synthetic kdb of --rows kernels with --blob_size byte
+blobs is generated unless --kdb names an existing file.
+
+Example: python3 -m benchmarks.kdb_lookup --rows 2000000 --blob_size 1024
+"""
+
+import os
+import time
+import sqlite3
+import argparse
+import tempfile
+import statistics
+from typing import Callable, List, Tuple
+
+from tuna.miopen.utils.sqlite_reader import SQLiteReader, KDB_KEYS
+
+KEY_COLS = KDB_KEYS['kern_db']
+INSERT_BATCH = 10000
+
+
+def parse_args():
+  """Benchmark arguments"""
+  parser = argparse.ArgumentParser(description='Benchmark kdb lookups')
+  parser.add_argument('--kdb',
+                      dest='kdb',
+                      type=str,
+                      default=None,
+                      help='Existing kdb file, else a synthetic one is built')
+  parser.add_argument('--rows',
+                      dest='rows',
+                      type=int,
+                      default=2000000,
+                      help='Kernels in the synthetic kdb')
+  parser.add_argument('--blob_size',
+                      dest='blob_size',
+                      type=int,
+                      default=1024,
+                      help='Bytes per synthetic kernel blob')
+  parser.add_argument('--lookups',
+                      dest='lookups',
+                      type=int,
+                      default=20000,
+                      help='Random keys looked up per run')
+  parser.add_argument('--repeat',
+                      dest='repeat',
+                      type=int,
+                      default=3,
+                      help='Runs per lookup method')
+  return parser.parse_args()
+
+
+def build_kdb(path: str, rows: int, blob_size: int) -> None:
+  """Synthetic kdb with the export_db schema"""
+  cnx = sqlite3.connect(path)
+  cnx.execute("CREATE TABLE `kern_db` (`id` INTEGER PRIMARY KEY ASC,"
+              "`kernel_name` TEXT NOT NULL,`kernel_args` TEXT NOT NULL,"
+              "`kernel_blob` BLOB NOT NULL,`kernel_hash` TEXT NOT NULL,"
+              "`uncompressed_size` INT NOT NULL);")
+  cnx.execute("CREATE UNIQUE INDEX `idx_kern_db` ON kern_db(kernel_name,"
+              " kernel_args);")
+  blob = os.urandom(blob_size)
+  for start in range(0, rows, INSERT_BATCH):
+    cnx.executemany(
+        "INSERT INTO kern_db (kernel_name, kernel_args, kernel_blob,"
+        " kernel_hash, uncompressed_size) VALUES (?, ?, ?, ?, ?)",
+        [(f'naive_conv_{idx % 97}.o', f'-DIDX={idx} -mcpu=gfx90a', blob,
+          f'{idx:040x}', blob_size)
+         for idx in range(start, min(start + INSERT_BATCH, rows))])
+  cnx.commit()
+  cnx.close()
+
+
+def plain_lookup(path: str, keys: List[Tuple]) -> int:
+  """One query per key on a default connection"""
+  cnx = sqlite3.connect(path)
+  found = 0
+  for key in keys:
+    row = cnx.execute(
+        'SELECT kernel_blob FROM kern_db WHERE kernel_name=?'
+        ' AND kernel_args=?', key).fetchone()
+    found += row is not None
+  cnx.close()
+  return found
+
+
+def reader_lookup(path: str, keys: List[Tuple]) -> int:
+  """One SQLiteReader.get per key"""
+  with SQLiteReader(path, KDB_KEYS) as reader:
+    return sum(
+        reader.get('kern_db', KEY_COLS, key, ['kernel_blob']) is not None
+        for key in keys)
+
+
+def reader_get_many(path: str, keys: List[Tuple]) -> int:
+  """Batched SQLiteReader.get_many"""
+  with SQLiteReader(path, KDB_KEYS) as reader:
+    return len(reader.get_many('kern_db', KEY_COLS, keys, ['kernel_blob']))
+
+
+def run(method: Callable, path: str, keys: List[Tuple], repeat: int) -> float:
+  """Median lookups per second of @method"""
+  runs = []
+  for _ in range(repeat):
+    start = time.perf_counter()
+    found = method(path, keys)
+    runs.append(time.perf_counter() - start)
+    assert found == len(keys)
+  return len(keys) / statistics.median(runs)
+
+
+def main():
+  """Time each lookup method"""
+  args = parse_args()
+  with tempfile.TemporaryDirectory() as tmp:
+    path = args.kdb
+    if not path:
+      path = f'{tmp}/bench.kdb'
+      start = time.perf_counter()
+      build_kdb(path, args.rows, args.blob_size)
+      print(f'built kdb in {time.perf_counter() - start:.1f} s')
+    with SQLiteReader(path, KDB_KEYS) as reader:
+      keys = list(
+          reader.query(
+              f"SELECT {', '.join(KEY_COLS)} FROM kern_db"
+              " ORDER BY random() LIMIT ?", [args.lookups]))
+    print(f'{os.path.getsize(path) / 2**30:.2f} GiB kdb,'
+          f' {len(keys)} random lookups:')
+    for name, method in (('plain', plain_lookup), ('reader', reader_lookup),
+                         ('get_many', reader_get_many)):
+      rate = run(method, path, keys, args.repeat)
+      print(f'  {name:8} {rate:10.0f} lookups/s')
+
+
+if __name__ == '__main__':
+  main()
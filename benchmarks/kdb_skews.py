@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+
+###############################################################################
+#
+# MIT License
+#
+# Copyright (c) 2024 Advanced Micro Devices, Inc.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+"""Bytes written and wall time of a multi-skew kdb export: write_kdb once per
+num_cu skew, as separate export_db --kern_db runs do, against write_kdb_skews
+writing full per-skew kdbs or thin kdbs plus one shared blob file. The
+kernel_cache rows are synthetic; --shared of each skew's kernels are common
+to all skews, the DB queries selecting them are the same in every mode and
+left out.
+
+Example: python3 -m benchmarks.kdb_skews --kernels 5000 --blob_size 65536
+"""
+
+import os
+import time
+import base64
+import logging
+import argparse
+import tempfile
+from typing import Any, Dict, List, Tuple
+
+from tuna.miopen.subcmd.export_db import write_kdb, write_kdb_skews
+from tuna.utils.utility import SimpleDict
+
+ARCH = 'gfx90a'
+SKEWS = [52, 64, 104, 110]
+LOGGER = logging.getLogger('kdb_skews')
+
+
+def parse_args():
+  """Benchmark arguments"""
+  parser = argparse.ArgumentParser(description='Benchmark multi-skew export')
+  parser.add_argument('--kernels',
+                      dest='kernels',
+                      type=int,
+                      default=2000,
+                      help='Kernels per skew')
+  parser.add_argument('--blob_size',
+                      dest='blob_size',
+                      type=int,
+                      default=65536,
+                      help='Bytes per synthetic kernel blob')
+  parser.add_argument('--shared',
+                      dest='shared',
+                      type=float,
+                      default=0.8,
+                      help='Fraction of kernels common to all skews')
+  return parser.parse_args()
+
+
+def synthetic_skews(kernels: int, blob_size: int,
+                    shared: float) -> List[Tuple[int, List[Any]]]:
+  """kernel_cache rows per skew, each skew fetches its own copy of the rows
+  as build_miopen_kdb does"""
+  common = int(kernels * shared)
+  skews = []
+  for skew_idx, num_cu in enumerate(SKEWS):
+    rows = []
+    for idx in range(kernels):
+      kid = idx if idx < common else (skew_idx + 1) * kernels + idx
+      blob = kid.to_bytes(8, 'little') * (blob_size // 8)
+      rows.append(
+          SimpleDict(id=kid,
+                     kernel_name=f'naive_conv_{kid}',
+                     kernel_args=f'-DIDX={kid}',
+                     kernel_blob=base64.b64encode(blob),
+                     kernel_hash=f'{kid:032x}',
+                     uncompressed_size=blob_size))
+    skews.append((num_cu, rows))
+  return skews
+
+
+def timed_bytes(func, *args) -> Tuple[float, int]:
+  """Wall time of func(*args) and bytes of the files it returns"""
+  start = time.perf_counter()
+  files = func(*args)
+  elapsed = time.perf_counter() - start
+  return elapsed, sum(os.path.getsize(name) for name in files)
+
+
+def main():
+  """Time each export mode"""
+  args = parse_args()
+  skews = synthetic_skews(args.kernels, args.blob_size, args.shared)
+  results: Dict[str, Tuple[float, int]] = {}
+  with tempfile.TemporaryDirectory() as tmp:
+    os.chdir(tmp)
+    results['per-skew write_kdb'] = timed_bytes(
+        lambda:
+        [write_kdb(ARCH, num_cu, rows, LOGGER) for num_cu, rows in skews])
+    results['write_kdb_skews'] = timed_bytes(write_kdb_skews, ARCH, skews,
+                                             LOGGER)
+    results['shared blobs'] = timed_bytes(write_kdb_skews, ARCH, skews, LOGGER,
+                                          True)
+  print(f'{len(SKEWS)} skews x {args.kernels} kernels of'
+        f' {args.blob_size / 1024:.0f} KiB, {args.shared:.0%} shared:')
+  for name, (elapsed, size) in results.items():
+    print(f'  {name:20} {elapsed:8.2f} s {size / 2**20:10.1f} MiB')
+
+
+if __name__ == '__main__':
+  main()
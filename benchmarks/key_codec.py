@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+
+###############################################################################
+#
+# MIT License
+#
+# Copyright (c) 2024 Advanced Micro Devices, Inc.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+"""Microbenchmark for the perf db key codec: decodes keys drawn at random
+from the F/B/W keys of the bundled utils/configs convolution corpora, with
+and without the LRU, and as columns through parse_many.
+"""
+
+import os
+import time
+import random
+import argparse
+
+from tuna.miopen.utils.parsing import get_fds_from_cmd, get_pdb_key
+from tuna.miopen.utils.parsing import parse_pdb_key
+from tuna.miopen.utils.key_codec import decode_pdb_key, parse_many
+
+CONFIGS_DIR = os.path.join(os.path.dirname(__file__), '..', 'utils', 'configs')
+CORPORA = ('conv_configs_NCHW.txt', 'conv_configs_NHWC.txt')
+
+
+def corpus_keys():
+  """Distinct pdb keys of all driver commands in the conv corpora"""
+  keys = set()
+  for corpus in CORPORA:
+    with open(os.path.join(CONFIGS_DIR, corpus), 'r', encoding='utf-8') as fin:
+      for line in fin:
+        if 'MIOpenDriver' in line:
+          fds, precision, _ = get_fds_from_cmd(line)
+          keys.update(
+              get_pdb_key(fds, precision, direction)
+              for direction in ('F', 'B', 'W'))
+  return sorted(keys)
+
+
+def timed_loop(func, keys):
+  """Seconds to call @func on every key"""
+  start = time.perf_counter()
+  for key in keys:
+    func(key)
+  return time.perf_counter() - start
+
+
+def main():
+  """main"""
+  parser = argparse.ArgumentParser(description=__doc__)
+  parser.add_argument('--num_keys', type=int, default=10000000)
+  args = parser.parse_args()
+
+  distinct = corpus_keys()
+  random.seed(42)
+  keys = random.choices(distinct, k=args.num_keys)
+  print(f"{args.num_keys} keys, {len(distinct)} distinct")
+
+  uncached_t = timed_loop(decode_pdb_key.__wrapped__, keys)
+  print(f"uncached decode:   {uncached_t:8.2f}s")
+  cached_t = timed_loop(parse_pdb_key, keys)
+  print(f"parse_pdb_key:     {cached_t:8.2f}s ({uncached_t / cached_t:.1f}x)")
+  start = time.perf_counter()
+  parse_many(keys)
+  many_t = time.perf_counter() - start
+  print(f"parse_many:        {many_t:8.2f}s ({uncached_t / many_t:.1f}x)")
+  print(decode_pdb_key.cache_info())
+
+
+if __name__ == '__main__':
+  main()
@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+
+###############################################################################
+#
+# MIT License
+#
+# Copyright (c) 2024 Advanced Micro Devices, Inc.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+"""Time the report.py data path on a synthetic 2M row golden table: building
+the frames from fetched rows vs loading the parquet cache and merging a delta,
+and the old per-row solver lookup vs the vectorized compare_fastest. No DB is
+needed, row tuples stand in for the DB fetch so the uncached numbers are a
+lower bound of the real cost.
+"""
+
+import os
+import time
+import tempfile
+import argparse
+
+import numpy as np
+import pandas as pd
+
+from tuna.miopen.scripts.report import upsert_rows, compare_fastest
+
+COLUMNS = ['id', 'config', 'solver', 'ktime']
+
+
+def synthetic_rows(rng, nrows, nconfigs, id_start=0):
+  """Random (id, config, solver, ktime) rows"""
+  return pd.DataFrame({
+      'id': np.arange(id_start, id_start + nrows),
+      'config': rng.integers(0, nconfigs, nrows),
+      'solver': rng.integers(0, 100, nrows),
+      'ktime': rng.random(nrows)
+  })
+
+
+def timed(func, *args):
+  """Return seconds taken by func(*args) and its result"""
+  start = time.perf_counter()
+  ret = func(*args)
+  return time.perf_counter() - start, ret
+
+
+def compare_by_row(dfr):
+  """The previous per-row lookup of the fastest solvers"""
+  df_compare = dfr.replace(-1, np.nan).groupby('config')[['ktime_x',
+                                                          'ktime_y']].idxmin()
+  df_compare.columns = ['idx_x', 'idx_y']
+  df_compare['solver_x'] = df_compare['idx_x'].apply(dfr['solver'].get)
+  df_compare['solver_y'] = df_compare['idx_y'].apply(dfr['solver'].get)
+  df_compare['ktime_x'] = df_compare['idx_x'].apply(dfr['ktime_x'].get)
+  df_compare['ktime_y'] = df_compare['idx_y'].apply(dfr['ktime_y'].get)
+  return df_compare
+
+
+def time_cache(args, golden, rng):
+  """Time building the golden frame from rows vs the parquet cache"""
+  rows = list(golden.itertuples(index=False, name=None))
+  delta = synthetic_rows(rng, args.delta_rows, golden['config'].max() + 1)
+  delta['id'] = rng.choice(args.golden_rows, args.delta_rows, replace=False)
+
+  with tempfile.TemporaryDirectory() as tmp:
+    cache_file = os.path.join(tmp, 'golden.parquet')
+    golden.to_parquet(cache_file, index=False)
+
+    print(
+        f"frame from fetched rows: {timed(pd.DataFrame, rows, None, COLUMNS)[0]:8.3f}s"
+    )
+    cached_t, cached = timed(pd.read_parquet, cache_file)
+    print(f"parquet cache load:      {cached_t:8.3f}s")
+    print(
+        f"delta upsert:            {timed(upsert_rows, cached, delta)[0]:8.3f}s"
+    )
+    csv_file = os.path.join(tmp, 'golden.csv')
+    print(f"write csv:               {timed(golden.to_csv, csv_file)[0]:8.3f}s")
+    print(
+        f"write parquet:           {timed(golden.to_parquet, cache_file)[0]:8.3f}s"
+    )
+
+
+def time_compare(args, golden, rng):
+  """Time the per-row vs vectorized fastest solver lookup"""
+  session = synthetic_rows(rng, args.session_rows,
+                           golden['config'].max() + 1).drop(columns='id')
+  dfr = pd.merge(session.drop_duplicates(['config', 'solver']),
+                 golden.drop(columns='id').drop_duplicates(['config',
+                                                            'solver']),
+                 on=['config', 'solver'],
+                 how='outer')
+  print(f"merged rows: {dfr.shape[0]}")
+  by_row_t, _ = timed(compare_by_row, dfr)
+  vector_t, _ = timed(compare_fastest, dfr)
+  print(f"per-row solver lookup:   {by_row_t:8.3f}s")
+  print(f"vectorized lookup:       {vector_t:8.3f}s "
+        f"({by_row_t / vector_t:.1f}x)")
+
+
+def main():
+  """main"""
+  parser = argparse.ArgumentParser(description=__doc__)
+  parser.add_argument('--golden_rows', type=int, default=2000000)
+  parser.add_argument('--session_rows', type=int, default=200000)
+  parser.add_argument('--delta_rows', type=int, default=10000)
+  args = parser.parse_args()
+
+  rng = np.random.default_rng(42)
+  golden = synthetic_rows(rng, args.golden_rows, args.golden_rows // 20)
+  print(f"golden rows: {args.golden_rows}, delta rows: {args.delta_rows}")
+  time_cache(args, golden, rng)
+  time_compare(args, golden, rng)
+
+
+if __name__ == '__main__':
+  main()
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+
+###############################################################################
+#
+# MIT License
+#
+# Copyright (c) 2024 Advanced Micro Devices, Inc.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+"""Per-result overhead of the consume result spool: one add before and one
+mark after storing each result, plus the purge at the end of consume. Results
+are synthetic find eval fin results from gen_workload, no DB or redis needed.
+
+Example: python3 -m benchmarks.result_spool --results 5000 --blob_size 65536
+"""
+
+import json
+import time
+import tempfile
+import argparse
+import statistics
+
+from tuna.miopen.scripts.gen_workload import fin_result
+from tuna.utils.result_spool import ResultSpool
+
+
+def parse_args():
+  """Benchmark arguments"""
+  parser = argparse.ArgumentParser(description='Benchmark the result spool')
+  parser.add_argument('--results',
+                      dest='results',
+                      type=int,
+                      default=2000,
+                      help='Results spooled per run')
+  parser.add_argument('--blob_size',
+                      dest='blob_size',
+                      type=int,
+                      default=4096,
+                      help='Bytes per synthetic kernel blob')
+  parser.add_argument('--repeat',
+                      dest='repeat',
+                      type=int,
+                      default=3,
+                      help='Runs per synchronous level')
+  return parser.parse_args()
+
+
+def spool_run(results, synchronous: str) -> float:
+  """Seconds to spool, mark and purge all results in a fresh spool"""
+  with tempfile.TemporaryDirectory() as tmp:
+    spool = ResultSpool(f'{tmp}/spool.db', synchronous)
+    start = time.perf_counter()
+    for key, data in results:
+      spool.add(key, data)
+      spool.mark(key)
+    spool.purge()
+    elapsed = time.perf_counter() - start
+    spool.close()
+  return elapsed
+
+
+def main():
+  """Time each synchronous level"""
+  args = parse_args()
+  results = [(f'celery-task-meta-bench-{idx}',
+              json.dumps({
+                  'result': {
+                      'ret':
+                          fin_result(0, '', idx, 'ConvBench',
+                                     'miopen_find_eval', args.blob_size)
+                  }
+              })) for idx in range(args.results)]
+  size = statistics.mean(len(data) for _, data in results)
+  print(f'{args.results} results, {size / 1024:.1f} KiB each:')
+  for synchronous in ('OFF', 'NORMAL', 'FULL'):
+    runs = [spool_run(results, synchronous) for _ in range(args.repeat)]
+    per_result = statistics.median(runs) / args.results
+    print(f'  synchronous={synchronous:6} {per_result * 1e6:8.1f} us/result')
+
+
+if __name__ == '__main__':
+  main()
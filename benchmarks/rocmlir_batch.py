@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+
+###############################################################################
+#
+# MIT License
+#
+# Copyright (c) 2024 Advanced Micro Devices, Inc.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+"""Benchmark one tuningRunner.py process per config against a single batched
+--configs_file call, using a stub runner with a configurable startup cost.
+
+Example: python3 benchmarks/rocmlir_batch.py --configs 64 --startup_cost 0.5
+"""
+
+import os
+import sys
+import subprocess
+import tempfile
+import time
+
+from tuna.parse_args import setup_arg_parser
+from tuna.rocmlir.rocmlir_worker import parse_batch_output
+
+STUB_RUNNER = """
+import sys
+import time
+startup_cost, config_cost = float(sys.argv[1]), float(sys.argv[2])
+time.sleep(startup_cost)
+args = dict(a.split('=', 1) for a in sys.argv[3:] if '=' in a)
+if '--configs_file' in args:
+  with open(args['--configs_file']) as f:
+    configs = f.read().splitlines()
+else:
+  configs = [args['--config']]
+for config in configs:
+  time.sleep(config_cost)
+  print(f"gfx908\\t104\\t{config}\\tv2:64,64,8,16,16,4,1,1,1\\t42.0")
+"""
+
+
+def run_stub(stub, args, config_arg):
+  """Run the stub runner once, returns its stdout"""
+  cmd = [
+      sys.executable, stub,
+      str(args.startup_cost),
+      str(args.config_cost), config_arg
+  ]
+  return subprocess.run(cmd, check=True, capture_output=True, text=True).stdout
+
+
+def bench_single(stub, args, configs):
+  """One process per config, the current --batch_size 1 path"""
+  start = time.perf_counter()
+  results = {}
+  for config in configs:
+    results.update(
+        parse_batch_output(run_stub(stub, args, f"--config={config}")))
+  return time.perf_counter() - start, len(results)
+
+
+def bench_batched(stub, args, configs):
+  """One process per --batch_size configs"""
+  start = time.perf_counter()
+  results = {}
+  for i in range(0, len(configs), args.batch_size):
+    with tempfile.NamedTemporaryFile('w', suffix='.txt') as cfg_file:
+      cfg_file.write('\n'.join(configs[i:i + args.batch_size]))
+      cfg_file.flush()
+      results.update(
+          parse_batch_output(
+              run_stub(stub, args, f"--configs_file={cfg_file.name}")))
+  return time.perf_counter() - start, len(results)
+
+
+def main():
+  """Run both modes and print the timings"""
+  parser = setup_arg_parser('Benchmark batched tuningRunner.py calls', [],
+                            with_yaml=False)
+  parser.add_argument('--configs',
+                      dest='configs',
+                      type=int,
+                      default=64,
+                      help='Number of configs to tune')
+  parser.add_argument('--batch_size',
+                      dest='batch_size',
+                      type=int,
+                      default=16,
+                      help='Configs per tuningRunner.py call in batch mode')
+  parser.add_argument('--startup_cost',
+                      dest='startup_cost',
+                      type=float,
+                      default=0.5,
+                      help='Seconds spent by the stub runner on startup')
+  parser.add_argument('--config_cost',
+                      dest='config_cost',
+                      type=float,
+                      default=0.01,
+                      help='Seconds spent by the stub runner per config')
+  args = parser.parse_args()
+
+  configs = [
+      f"-t f16 -transA false -transB false -g 1 -m {64 * (i + 1)} -n 64 -k 64"
+      for i in range(args.configs)
+  ]
+  with tempfile.TemporaryDirectory() as tmp_dir:
+    stub = os.path.join(tmp_dir, 'tuningRunner.py')
+    with open(stub, 'w', encoding='utf-8') as fout:
+      fout.write(STUB_RUNNER)
+
+    single_t, single_n = bench_single(stub, args, configs)
+    batch_t, batch_n = bench_batched(stub, args, configs)
+
+  assert single_n == batch_n == len(configs)
+  print(f"configs={len(configs)} batch_size={args.batch_size} "
+        f"startup_cost={args.startup_cost}s config_cost={args.config_cost}s")
+  print(f"single:  {single_t:8.2f}s  {len(configs) / single_t:8.1f} configs/s")
+  print(f"batched: {batch_t:8.2f}s  {len(configs) / batch_t:8.1f} configs/s")
+  print(f"speedup: {single_t / batch_t:8.2f}x")
+
+
+if __name__ == '__main__':
+  main()
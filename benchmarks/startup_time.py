@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+
+###############################################################################
+#
+# MIT License
+#
+# Copyright (c) 2024 Advanced Micro Devices, Inc.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+"""Report python -X importtime totals and wall time for the --help path of
+each go_fish subcommand and a few standalone scripts. The broker env vars are
+removed so commands that still need them at import time show up as failures.
+
+Example: python3 benchmarks/startup_time.py --repeat 3
+"""
+
+import os
+import sys
+import time
+import argparse
+import subprocess
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+GO_FISH = os.path.join('tuna', 'go_fish.py')
+COMMANDS = [
+    [GO_FISH, 'miopen'],
+    [GO_FISH, 'miopen', 'import_configs'],
+    [GO_FISH, 'miopen', 'load_job'],
+    [GO_FISH, 'miopen', 'export_db'],
+    [GO_FISH, 'miopen', 'update_golden'],
+    [GO_FISH, 'rocmlir'],
+    [GO_FISH, 'example'],
+    [os.path.join('tuna', 'rocmlir', 'export_configs.py')],
+    [os.path.join('tuna', 'miopen', 'scripts', 'report.py')],
+]
+#heavy packages that should not be imported just to print the help
+WATCHED = ('celery', 'aioredis', 'paramiko', 'pandas', 'logstash_async')
+
+
+def parse_importtime(stderr):
+  """Total self import time in ms and the set of imported module names"""
+  total_us = 0
+  modules = set()
+  for line in stderr.splitlines():
+    if not line.startswith('import time:') or 'self [us]' in line:
+      continue
+    self_us, _, name = line[len('import time:'):].split('|')
+    total_us += int(self_us)
+    modules.add(name.strip())
+  return total_us / 1000, modules
+
+
+def run_cmd(cmd, env):
+  """Run @cmd --help once, returns (returncode, wall ms, import ms, modules)"""
+  start = time.perf_counter()
+  proc = subprocess.run([sys.executable, '-X', 'importtime'] + cmd + ['--help'],
+                        cwd=ROOT,
+                        env=env,
+                        capture_output=True,
+                        text=True,
+                        check=False)
+  wall_ms = (time.perf_counter() - start) * 1000
+  import_ms, modules = parse_importtime(proc.stderr)
+  return proc.returncode, wall_ms, import_ms, modules
+
+
+def main():
+  """main"""
+  parser = argparse.ArgumentParser(description=__doc__)
+  parser.add_argument('--repeat',
+                      type=int,
+                      default=3,
+                      help='Runs per command, the fastest is reported')
+  parser.add_argument('--keep_broker_env',
+                      action='store_true',
+                      help='Keep the celery broker env vars')
+  args = parser.parse_args()
+
+  env = dict(os.environ)
+  env['PYTHONPATH'] = ROOT
+  env.setdefault('TUNA_DB_NAME', 'startup_bench')
+  if not args.keep_broker_env:
+    env.pop('TUNA_CELERY_BROKER_USER', None)
+    env.pop('TUNA_CELERY_BROKER_PWD', None)
+
+  print(f"{'command':45} {'rc':>3} {'wall ms':>9} {'import ms':>10}  heavy")
+  for cmd in COMMANDS:
+    runs = [run_cmd(cmd, env) for _ in range(args.repeat)]
+    ret, wall_ms, import_ms, modules = min(runs, key=lambda run: run[1])
+    heavy = ','.join(mod for mod in WATCHED if mod in modules) or '-'
+    name = ' '.join([os.path.basename(cmd[0])] + cmd[1:])
+    print(f"{name:45} {ret:>3} {wall_ms:9.0f} {import_ms:10.0f}  {heavy}")
+
+
+if __name__ == '__main__':
+  main()
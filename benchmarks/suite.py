@@ -0,0 +1,559 @@
+#!/usr/bin/env python3
+
+###############################################################################
+#
+# MIT License
+#
+# Copyright (c) 2024 Advanced Micro Devices, Inc.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+"""Reproducible timings of the MIOpen tuning data path, written as JSON so runs
+on different commits can be compared. A scratch session is seeded in the MySQL
+DB named by TUNA_DB_* from the config files in utils/configs and removed at the
+end. Fin results come from tuna.miopen.scripts.gen_workload and are served to
+the consumer from fakeredis, no GPU, broker or redis server is needed. The
+solver table must be populated (go_fish.py miopen --update_solvers).
+
+Stages, in pipeline order: import_configs, load_job, get_jobs,
+process_eval_results, consume, fin_input, fin_input_cached, export_fdb,
+export_kdb, export_pdb, merge_fdb, merge_kdb, merge_pdb, app_cfgs,
+app_cfgs_delta. consume includes the one second redis poll interval of
+MITunaInterface.consume. The items of the fin_input stages are the total size
+of the eval inputs in bytes. The app_cfgs stages select the configs an
+--update_applicability re-run hands to fin, without and with
+--delta_applicability, after every tenth config lost its applicability.
+
+Example:
+  python3 -m benchmarks.suite --out base.json
+  python3 -m benchmarks.suite --out new.json --compare base.json
+"""
+
+import os
+import sys
+import json
+import time
+import socket
+import asyncio
+import logging
+import platform
+import tempfile
+import statistics
+import subprocess
+from datetime import datetime
+from multiprocessing import Value
+from typing import Any, Callable, Dict, List
+
+import fakeredis
+from fakeredis import aioredis as fake_aioredis
+from redis import exceptions as redis_exceptions
+
+from tuna import mituna_interface
+from tuna.parse_args import setup_arg_parser
+from tuna.libraries import Operation
+from tuna.dbBase.sql_alchemy import DbSession
+from tuna.miopen.miopen_lib import MIOpen
+from tuna.miopen.db.session import Session
+from tuna.miopen.db.solver import Solver, get_id_solvers
+from tuna.miopen.db.tables import MIOpenDBTables
+from tuna.miopen.driver.convolution import DriverConvolution
+from tuna.miopen.utils.config_type import ConfigType
+from tuna.miopen.subcmd.import_configs import import_cfgs
+from tuna.miopen.subcmd.load_job import add_jobs
+from tuna.miopen.subcmd.export_db import export_fdb, export_kdb, export_pdb
+from tuna.miopen.subcmd.merge_db import merge_files
+from tuna.miopen.worker.fin_input import FinInputBuilder
+from tuna.miopen.worker.fin_class import query_app_cfgs
+from tuna.miopen.scripts.gen_workload import fdb_key, fin_result
+from tuna.utils.utility import SimpleDict
+from tuna.utils.logger import setup_logger
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CONFIG_FILES = [
+    os.path.join(REPO_DIR, 'utils/configs/conv_configs_NCHW.txt'),
+    os.path.join(REPO_DIR, 'utils/configs/conv_configs_NHWC.txt')
+]
+LABEL = 'tuna_bench_suite'
+ARCH = 'gfx90a'
+NUM_CU = 104
+
+
+class BenchMIOpen(MIOpen):
+  """MIOpen lib that builds celery contexts without probing local GPUs"""
+
+  def get_context_items(self):
+    return {
+        'gpu_id': 0,
+        'envmt': [],
+        'label': self.args.label,
+        'docker_name': self.args.docker_name,
+        'session_id': self.args.session_id
+    }
+
+
+class StageTimes():
+  """Run times and item counts per benchmark stage"""
+
+  def __init__(self) -> None:
+    self.stages: Dict[str, Dict[str, Any]] = {}
+
+  def timed(self, name: str, func: Callable, *args, **kwargs) -> Any:
+    """Run func(*args, **kwargs) and record its duration under @name"""
+    start = time.perf_counter()
+    ret = func(*args, **kwargs)
+    stage = self.stages.setdefault(name, {'runs': [], 'items': None})
+    stage['runs'].append(time.perf_counter() - start)
+    return ret
+
+  def set_items(self, name: str, items: int) -> None:
+    """Number of configs, jobs or rows the stage handled"""
+    self.stages[name]['items'] = items
+
+  def summary(self) -> Dict[str, Dict[str, Any]]:
+    """Runs with their min and median in seconds"""
+    return {
+        name:
+            dict(stage,
+                 min=min(stage['runs']),
+                 median=statistics.median(stage['runs']))
+        for name, stage in self.stages.items()
+    }
+
+
+def parse_args():
+  """Suite arguments"""
+  parser = setup_arg_parser('Benchmark the MIOpen tuning data path', [],
+                            with_yaml=False)
+  parser.add_argument('--out',
+                      dest='out',
+                      default='tuna_bench.json',
+                      help='JSON result file')
+  parser.add_argument('--compare',
+                      dest='compare',
+                      default=None,
+                      help='Earlier result file to compare medians against')
+  parser.add_argument('--threshold',
+                      dest='threshold',
+                      type=float,
+                      default=1.1,
+                      help='Median slowdown reported as a regression')
+  parser.add_argument('--config_file',
+                      dest='config_files',
+                      action='append',
+                      default=None,
+                      help='MIOpenDriver command file to import, may repeat')
+  parser.add_argument('--batches',
+                      dest='batches',
+                      default='1,2,4,8,16,32,64,128,256,512',
+                      help='Batch sizes each config is imported with')
+  parser.add_argument('--solvers',
+                      dest='solvers',
+                      type=int,
+                      default=20,
+                      help='Applicable solvers per config')
+  parser.add_argument('--blob_size',
+                      dest='blob_size',
+                      type=int,
+                      default=4096,
+                      help='Bytes per synthetic kernel blob')
+  parser.add_argument('--repeat',
+                      dest='repeat',
+                      type=int,
+                      default=3,
+                      help='Runs of each stage')
+  parser.add_argument('--keep',
+                      dest='keep',
+                      action='store_true',
+                      default=False,
+                      help='Keep the seeded session for inspection')
+  args = parser.parse_args()
+  args.config_files = args.config_files or CONFIG_FILES
+  args.batch_list = [int(x) for x in args.batches.split(',')]
+  args.tag = f'{LABEL}_{os.getpid()}'
+  return args
+
+
+def add_session(args) -> int:
+  """Scratch session, the ticket keeps it apart from earlier runs"""
+  sess_args = SimpleDict(label=LABEL,
+                         docker_name='miopentuna',
+                         arch=ARCH,
+                         num_cu=NUM_CU,
+                         rocm_v='bench',
+                         miopen_v='bench',
+                         ticket=args.tag)
+  return Session().add_new_session(sess_args, None)
+
+
+def bench_import(args, times: StageTimes, logger) -> None:
+  """Import and tag the configs, later runs only find and tag them"""
+  dbt = MIOpenDBTables(config_type=ConfigType.convolution)
+  cfg_args = SimpleDict(config_type=ConfigType.convolution,
+                        command=None,
+                        batch_list=args.batch_list,
+                        mark_recurrent=False,
+                        tag=args.tag,
+                        tag_only=False)
+
+  def import_all() -> set:
+    tagged: set = set()
+    for cfg_file in args.config_files:
+      cfg_args.file_name = cfg_file
+      tagged |= import_cfgs(cfg_args, dbt, logger)['cnt_tagged_configs']
+    return tagged
+
+  for _ in range(args.repeat):
+    tagged = times.timed('import_configs', import_all)
+  times.set_items('import_configs', len(tagged))
+
+
+def add_applicability(args, sid: int) -> int:
+  """Mark the first --solvers convolution solvers applicable to each config"""
+  with DbSession() as session:
+    solvers = [
+        row.id for row in session.query(Solver.id).filter(
+            Solver.valid == 1, Solver.config_type ==
+            ConfigType.convolution).order_by(Solver.id).limit(args.solvers)
+    ]
+    if not solvers:
+      raise ValueError('No solvers found, run go_fish.py miopen'
+                       ' --update_solvers first')
+    configs = [
+        row[0] for row in session.execute(
+            "select config from conv_config_tags where tag=:tag",
+            {'tag': args.tag})
+    ]
+    dbt = MIOpenDBTables(config_type=ConfigType.convolution)
+    session.bulk_insert_mappings(dbt.solver_app, [{
+        'config': cfg,
+        'solver': slv,
+        'session': sid,
+        'applicable': 1
+    } for cfg in configs for slv in solvers])
+    session.commit()
+
+  return len(configs) * len(solvers)
+
+
+def bench_load_job(args, sid: int, times: StageTimes, logger) -> None:
+  """Create one find compile+eval job per applicable solver"""
+  dbt = MIOpenDBTables(session_id=sid, config_type=ConfigType.convolution)
+  job_args = SimpleDict(tag=args.tag,
+                        session_id=sid,
+                        label=LABEL,
+                        fin_steps={'miopen_find_compile', 'miopen_find_eval'},
+                        solvers=[('', None)],
+                        config_type=ConfigType.convolution,
+                        cmd=None,
+                        tunable=False,
+                        only_dynamic=False,
+                        algo=None)
+  for _ in range(args.repeat):
+    with DbSession() as session:
+      session.execute(f"delete from conv_job where session={sid}")
+      session.commit()
+    count = times.timed('load_job', add_jobs, job_args, dbt, logger)
+  times.set_items('load_job', count)
+
+
+def get_fdb_keys(args) -> Dict[int, str]:
+  """Find db key of each tagged config, as fin would return it"""
+  keys = {}
+  dbt = MIOpenDBTables(config_type=ConfigType.convolution)
+  with DbSession() as session:
+    query = session.query(dbt.config_table)\
+        .filter(dbt.config_table.id == dbt.config_tags_table.config)\
+        .filter(dbt.config_tags_table.tag == args.tag)
+    for cfg in query.all():
+      try:
+        keys[cfg.id] = fdb_key(DriverConvolution(db_obj=cfg))
+      except ValueError:
+        #no key encoding for this precision, jobs of the config fail eval
+        continue
+
+  return keys
+
+
+def reset_results(sid: int) -> None:
+  """Drop results of the session and mark its jobs compiled again"""
+  with DbSession() as session:
+    session.execute("delete from conv_kernel_cache where kernel_group in"
+                    f" (select id from conv_find_db where session={sid})")
+    session.execute(f"delete from conv_find_db where session={sid}")
+    session.execute("update conv_job set state='compiled', retries=0"
+                    f" where session={sid}")
+    session.commit()
+
+
+def bench_get_jobs(miopen: BenchMIOpen, sid: int, times: StageTimes,
+                   repeat: int) -> List[Any]:
+  """Claim all compiled jobs for evaluation"""
+  for _ in range(repeat):
+    reset_results(sid)
+    with DbSession() as session:
+      jobs = times.timed('get_jobs', miopen.get_jobs, session, {'compiled'},
+                         'eval_start', sid)
+  times.set_items('get_jobs', len(jobs))
+  return jobs
+
+
+def bench_eval(miopen: BenchMIOpen, results: List[dict], times: StageTimes,
+               repeat: int) -> None:
+  """Store synthetic eval results directly, without redis"""
+
+  def process_all():
+    with DbSession() as session:
+      for data in results:
+        miopen.process_eval_results(session, data['ret'], data['context'])
+
+  for _ in range(repeat):
+    reset_results(miopen.args.session_id)
+    times.timed('process_eval_results', process_all)
+  times.set_items('process_eval_results', len(results))
+
+
+def bench_consume(miopen: BenchMIOpen, results: List[dict], times: StageTimes,
+                  repeat: int) -> None:
+  """Store the results in fakeredis like the celery backend does and run the
+  consumer until every job is parsed"""
+  server = fakeredis.FakeServer()
+  values = [
+      json.dumps({
+          'result': result
+      }, default=str).encode('utf-8') for result in results
+  ]
+  real_aioredis = mituna_interface.aioredis
+  mituna_interface.aioredis = SimpleDict(
+      from_url=lambda url: fake_aioredis.FakeRedis(server=server),
+      exceptions=redis_exceptions)
+  try:
+    for _ in range(repeat):
+      reset_results(miopen.args.session_id)
+      backend = fakeredis.FakeStrictRedis(server=server)
+      for idx, value in enumerate(values):
+        backend.set(f'celery-task-meta-{miopen.prefix}-{idx}', value)
+      job_counter = Value('i', len(values))
+      times.timed('consume', asyncio.run,
+                  miopen.consume(job_counter, miopen.prefix))
+  finally:
+    mituna_interface.aioredis = real_aioredis
+  times.set_items('consume', len(values))
+
+
+def bench_fin_input(miopen: BenchMIOpen, contexts: List[dict],
+                    times: StageTimes, repeat: int) -> None:
+  """Build the find eval fin input of every job, without and with the local
+  input cache"""
+  jobs = [(SimpleDict(**ctx['job']), {
+      'config_tuna_id': ctx['config']['id']
+  }) for ctx in contexts]
+
+  def build_all(builder):
+    return sum(
+        len(builder.fin_input(job, fjob, 'miopen_find_eval'))
+        for job, fjob in jobs)
+
+  _, id_solver_map = get_id_solvers()
+  with tempfile.TemporaryDirectory() as tmp:
+    for name, cache_dir in (('fin_input', None), ('fin_input_cached', tmp)):
+      builder = FinInputBuilder(miopen.dbt, id_solver_map, miopen.logger,
+                                cache_dir)
+      #the first cached run fills the cache
+      if cache_dir:
+        build_all(builder)
+      for _ in range(repeat):
+        size = times.timed(name, build_all, builder)
+      times.set_items(name, size)
+
+
+def bench_export(args, sid: int, times: StageTimes, logger) -> None:
+  """Export fdb, kdb and pdb of the session and merge each into a copy"""
+  dbt = MIOpenDBTables(session_id=sid, config_type=ConfigType.convolution)
+  exp_args = SimpleDict(session_id=sid,
+                        config_type=ConfigType.convolution,
+                        golden_v=None,
+                        arch=ARCH,
+                        num_cu=NUM_CU,
+                        opencl=False,
+                        config_tag=None,
+                        filename=None,
+                        src_table=dbt.find_db_table)
+  cwd = os.getcwd()
+  with tempfile.TemporaryDirectory() as tmp:
+    os.chdir(tmp)
+    try:
+      for name, func in (('fdb', export_fdb), ('kdb', export_kdb),
+                         ('pdb', export_pdb)):
+        for _ in range(args.repeat):
+          out_file = times.timed(f'export_{name}', func, dbt, exp_args, logger)
+        times.set_items(f'export_{name}', os.path.getsize(out_file))
+        for _ in range(args.repeat):
+          times.timed(f'merge_{name}', merge_files, os.path.abspath(out_file),
+                      False, False, os.path.abspath(out_file))
+        times.set_items(f'merge_{name}', os.path.getsize(out_file))
+    finally:
+      os.chdir(cwd)
+
+
+def bench_applicability(args, sid: int, times: StageTimes) -> None:
+  """Select the configs of an applicability re-run, in full and delta mode"""
+  dbt = MIOpenDBTables(session_id=sid, config_type=ConfigType.convolution)
+  with DbSession() as session:
+    session.execute(
+        f"delete from conv_solver_applicability where session={sid}"
+        " and config in (select config from conv_config_tags"
+        " where tag=:tag and mod(config, 10)=0)", {'tag': args.tag})
+    session.commit()
+
+  for name, delta in (('app_cfgs', False), ('app_cfgs_delta', True)):
+    for _ in range(args.repeat):
+      with DbSession() as session:
+        query = query_app_cfgs(session, dbt, sid, args.tag, delta)
+        rows = times.timed(name, query.all)
+    times.set_items(name, len(rows))
+
+
+def cleanup(args, sid: int) -> None:
+  """Remove everything the suite added"""
+  reset_results(sid)
+  with DbSession() as session:
+    session.execute("delete from conv_job_cache_fin where job_id in"
+                    f" (select id from conv_job where session={sid})")
+    session.execute(f"delete from conv_job where session={sid}")
+    session.execute(
+        f"delete from conv_solver_applicability where session={sid}")
+    session.execute("delete from conv_config_tags where tag=:tag",
+                    {'tag': args.tag})
+    session.execute(f"delete from session where id={sid}")
+    session.commit()
+
+
+def git_commit() -> Any:
+  """HEAD of the checkout being benchmarked"""
+  try:
+    return subprocess.check_output(['git', 'rev-parse', 'HEAD'],
+                                   cwd=REPO_DIR,
+                                   text=True,
+                                   stderr=subprocess.DEVNULL).strip()
+  except (OSError, subprocess.CalledProcessError):
+    return None
+
+
+def compare(stages: Dict[str, Any], old_file: str, threshold: float) -> bool:
+  """Print median ratios against an earlier run, False on a regression"""
+  with open(old_file, 'r', encoding='utf-8') as infile:
+    old = json.load(infile)
+  print(f"compared to {old.get('commit')}:")
+  passed = True
+  for name, stage in stages.items():
+    if name not in old['results']:
+      continue
+    ratio = stage['median'] / old['results'][name]['median']
+    flag = ''
+    if ratio > threshold:
+      flag = '  REGRESSION'
+      passed = False
+    print(f"  {name:22} {ratio:6.2f}x{flag}")
+  return passed
+
+
+def run_suite(args, logger) -> StageTimes:
+  """Seed a session, run all stages, clean up"""
+  times = StageTimes()
+  bench_import(args, times, logger)
+  sid = add_session(args)
+  try:
+    num_app = add_applicability(args, sid)
+    logger.warning('session %s, %s applicable solvers', sid, num_app)
+    bench_load_job(args, sid, times, logger)
+
+    miopen = BenchMIOpen()
+    miopen.args = SimpleDict(session_id=sid,
+                             label=LABEL,
+                             docker_name='miopentuna',
+                             fin_steps=['miopen_find_eval'],
+                             config_type=ConfigType.convolution)
+    miopen.dbt = MIOpenDBTables(session_id=sid,
+                                config_type=ConfigType.convolution)
+    miopen.operation = Operation.EVAL
+    miopen.prefix = f"d_{miopen.db_name}_sess_{sid}_miopen_find_eval"
+    miopen.logger.setLevel(logging.WARNING)
+
+    jobs = bench_get_jobs(miopen, sid, times, args.repeat)
+    with DbSession() as session:
+      contexts = miopen.get_context_list(session, jobs)
+    keys = get_fdb_keys(args)
+    results = [{
+        'ret':
+            fin_result(0, keys.get(ctx['config']['id'], ''),
+                       ctx['config']['id'], ctx['job']['solver'],
+                       'miopen_find_eval', args.blob_size),
+        'context':
+            ctx
+    } for ctx in contexts]
+
+    bench_eval(miopen, results, times, args.repeat)
+    bench_consume(miopen, results, times, args.repeat)
+    bench_fin_input(miopen, contexts, times, args.repeat)
+    bench_export(args, sid, times, logger)
+    bench_applicability(args, sid, times)
+  finally:
+    if not args.keep:
+      cleanup(args, sid)
+
+  return times
+
+
+def main():
+  """Run the suite, write and optionally compare results"""
+  args = parse_args()
+  logger = setup_logger('bench_suite')
+  logger.setLevel(logging.WARNING)
+  for name in ('parse_results', 'db_utility', 'helper', 'merge_pdb',
+               'driver_conv', 'MIOpenDriver_driver_base'):
+    logging.getLogger(name).setLevel(logging.WARNING)
+
+  stages = run_suite(args, logger).summary()
+  report = {
+      'commit': git_commit(),
+      'time': datetime.now().isoformat(timespec='seconds'),
+      'host': socket.gethostname(),
+      'python': platform.python_version(),
+      'params': {
+          'config_files': args.config_files,
+          'batches': args.batch_list,
+          'solvers': args.solvers,
+          'blob_size': args.blob_size,
+          'repeat': args.repeat
+      },
+      'results': stages
+  }
+  with open(args.out, 'w', encoding='utf-8') as outfile:
+    json.dump(report, outfile, indent=2)
+
+  for name, stage in stages.items():
+    print(f"{name:24} {stage['median']:9.3f}s  items: {stage['items']}")
+  print(f"results written to {args.out}")
+
+  if args.compare and not compare(stages, args.compare, args.threshold):
+    sys.exit(1)
+
+
+if __name__ == '__main__':
+  main()
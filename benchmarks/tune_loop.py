@@ -0,0 +1,236 @@
+#!/usr/bin/env python3
+
+###############################################################################
+#
+# MIT License
+#
+# Copyright (c) 2024 Advanced Micro Devices, Inc.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+"""End-to-end jobs/sec of the MITunaInterface.tune eval loop, with the
+process based enqueue/consume/cleanup and with --async_tune. Celery is
+replaced by a pool of stub workers that answer each enqueued context after
+--task_time seconds with a synthetic fin result written to fakeredis, so no
+broker, redis server or GPU is needed. Seeds a scratch session in the MySQL
+DB named by TUNA_DB_* like benchmarks.suite and removes it at the end.
+
+The process mode runs its enqueue and consume steps in threads, fakeredis
+can not be shared between processes.
+
+Example: python3 -m benchmarks.tune_loop --workers 16 --task_time 0.01
+"""
+
+import json
+import time
+import uuid
+import asyncio
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import fakeredis
+from fakeredis import aioredis as fake_aioredis
+from redis import exceptions as redis_exceptions
+
+from benchmarks.suite import BenchMIOpen, StageTimes, CONFIG_FILES, LABEL
+from benchmarks.suite import add_session, bench_import, add_applicability
+from benchmarks.suite import bench_load_job, get_fdb_keys, reset_results, cleanup
+from tuna import mituna_interface, tune_loop
+from tuna.parse_args import setup_arg_parser
+from tuna.libraries import Operation
+from tuna.miopen.db.tables import MIOpenDBTables
+from tuna.miopen.utils.config_type import ConfigType
+from tuna.miopen.scripts.gen_workload import fin_result
+from tuna.tune_loop import AsyncTuneLoop
+from tuna.celery_app.backpressure import Backpressure, result_backlog
+from tuna.utils.utility import SimpleDict
+from tuna.utils.logger import setup_logger
+
+Q_NAME = 'tuna_bench_tune_loop'
+
+
+class StubWorkerMIOpen(BenchMIOpen):  #pylint: disable=too-many-instance-attributes
+  """MIOpen lib whose celery tasks run on a local thread pool"""
+
+  def __init__(self, server, workers: int, task_time: float,
+               fdb_keys: dict) -> None:
+    super().__init__()
+    self.server = server
+    self.pool = ThreadPoolExecutor(workers)
+    self.task_time = task_time
+    self.fdb_keys = fdb_keys
+
+  def work(self, context):
+    """Stub celery task, stores its result like the celery redis backend"""
+    time.sleep(self.task_time)
+    ret = fin_result(0, self.fdb_keys.get(context['config']['id'],
+                                          ''), context['config']['id'],
+                     context['job']['solver'], 'miopen_find_eval', 1024)
+    backend = fakeredis.FakeStrictRedis(server=self.server)
+    backend.set(
+        f'celery-task-meta-{self.prefix}-{uuid.uuid4()}',
+        json.dumps({
+            'result': {
+                'ret': ret,
+                'context': context
+            }
+        }, default=str).encode('utf-8'))
+
+  def get_backpressure(self, q_name, job_batch_size):
+    #tasks not yet picked up by a stub worker stand for the broker queue
+    return Backpressure(
+        self.pool._work_queue.qsize,  #pylint: disable=protected-access
+        lambda: result_backlog(self.prefix,
+                               fakeredis.FakeStrictRedis(server=self.server)),
+        job_batch_size)
+
+  def celery_enqueue_call(self, context, q_name, task_id=False):
+    self.pool.submit(self.work, context)
+
+
+class ThreadProc(threading.Thread):
+  """multiprocessing.Process stand-in for the process mode"""
+  pid = None
+
+
+def parse_args():
+  """Benchmark arguments"""
+  parser = setup_arg_parser('Benchmark end-to-end tuning jobs/sec', [],
+                            with_yaml=False)
+  parser.add_argument('--workers',
+                      dest='workers',
+                      type=int,
+                      default=8,
+                      help='Stub celery workers')
+  parser.add_argument('--task_time',
+                      dest='task_time',
+                      type=float,
+                      default=0.0,
+                      help='Seconds each stub task takes')
+  parser.add_argument('--job_batch_size',
+                      dest='job_batch_size',
+                      type=int,
+                      default=1000,
+                      help='Jobs claimed per fetch')
+  parser.add_argument('--poll_interval',
+                      dest='poll_interval',
+                      type=float,
+                      default=1.0,
+                      help='Seconds between job fetches once none are left')
+  parser.add_argument('--solvers',
+                      dest='solvers',
+                      type=int,
+                      default=5,
+                      help='Applicable solvers per config')
+  parser.add_argument('--batches',
+                      dest='batches',
+                      default='1,16,256',
+                      help='Batch sizes each config is imported with')
+  parser.add_argument('--repeat',
+                      dest='repeat',
+                      type=int,
+                      default=3,
+                      help='Runs of each mode')
+  args = parser.parse_args()
+  args.config_files = CONFIG_FILES
+  args.batch_list = [int(x) for x in args.batches.split(',')]
+  args.tag = f'{LABEL}_tune_loop_{int(time.time())}'
+  return args
+
+
+def run_process(miopen, args) -> None:
+  """MITunaInterface.process_tune with threads for processes"""
+  real_proc = mituna_interface.Process
+  real_poll = mituna_interface.ENQUEUE_POLL_INTERVAL
+  setattr(mituna_interface, 'Process', ThreadProc)
+  setattr(mituna_interface, 'ENQUEUE_POLL_INTERVAL', args.poll_interval)
+  try:
+    miopen.process_tune(args.job_batch_size, Q_NAME)
+  finally:
+    setattr(mituna_interface, 'Process', real_proc)
+    setattr(mituna_interface, 'ENQUEUE_POLL_INTERVAL', real_poll)
+
+
+def run_async(miopen, args) -> None:
+  """The --async_tune loop"""
+  asyncio.run(
+      AsyncTuneLoop(miopen,
+                    Q_NAME,
+                    args.job_batch_size,
+                    poll_interval=args.poll_interval).run())
+
+
+def main():
+  """Seed a session, time both modes, clean up"""
+  args = parse_args()
+  logger = setup_logger('bench_tune_loop')
+  logger.setLevel(logging.WARNING)
+  for name in ('parse_results', 'db_utility', 'helper', 'driver_conv',
+               'MIOpenDriver_driver_base'):
+    logging.getLogger(name).setLevel(logging.WARNING)
+
+  seed = StageTimes()
+  bench_import(SimpleDict(**dict(vars(args), repeat=1)), seed, logger)
+  sid = add_session(args)
+  server = fakeredis.FakeServer()
+  fake = SimpleDict(from_url=lambda url: fake_aioredis.FakeRedis(server=server),
+                    exceptions=redis_exceptions)
+  real_aioredis = (mituna_interface.aioredis, tune_loop.aioredis)
+  mituna_interface.aioredis, tune_loop.aioredis = fake, fake
+  try:
+    add_applicability(args, sid)
+    bench_load_job(SimpleDict(**dict(vars(args), repeat=1)), sid, seed, logger)
+    jobs = seed.stages['load_job']['items']
+
+    miopen = StubWorkerMIOpen(server, args.workers, args.task_time,
+                              get_fdb_keys(args))
+    miopen.args = SimpleDict(session_id=sid,
+                             label=LABEL,
+                             docker_name='miopentuna',
+                             fin_steps=['miopen_find_eval'],
+                             config_type=ConfigType.convolution)
+    miopen.dbt = MIOpenDBTables(session_id=sid,
+                                config_type=ConfigType.convolution)
+    miopen.operation = Operation.EVAL
+    miopen.fetch_state = {'compiled'}
+    miopen.set_state = 'eval_start'
+    miopen.prefix = f"d_{miopen.db_name}_sess_{sid}_miopen_find_eval"
+    miopen.logger.setLevel(logging.WARNING)
+
+    times = StageTimes()
+    for _ in range(args.repeat):
+      for name, func in (('process', run_process), ('async', run_async)):
+        reset_results(sid)
+        times.timed(name, func, miopen, args)
+        times.set_items(name, jobs)
+    miopen.pool.shutdown()
+  finally:
+    mituna_interface.aioredis, tune_loop.aioredis = real_aioredis
+    cleanup(args, sid)
+
+  print(f'{jobs} jobs, {args.workers} stub workers,'
+        f' {args.task_time}s per task:')
+  for name, stage in times.summary().items():
+    print(f"  {name:8} {stage['median']:8.2f}s"
+          f" {jobs / stage['median']:10.1f} jobs/s")
+
+
+if __name__ == '__main__':
+  main()
@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+
+###############################################################################
+#
+# MIT License
+#
+# Copyright (c) 2024 Advanced Micro Devices, Inc.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+"""Benchmark a full golden update against an incremental one when only a
+small delta of a large tuning session changed. Runs against the configured
+MySQL DB and only writes to a scratch golden version, which is removed at
+the end. The delta is made by touching update_ts, no tuning data changes.
+
+Example: python3 benchmarks/update_golden_incremental.py --session_id 12 \
+  --delta 1000
+"""
+
+import time
+import logging
+
+from tuna.parse_args import setup_arg_parser
+from tuna.dbBase.sql_alchemy import DbSession
+from tuna.miopen.utils.config_type import ConfigType
+from tuna.miopen.subcmd.update_golden import run_update_golden
+from tuna.utils.utility import SimpleDict
+from tuna.utils.logger import setup_logger
+
+
+def timed_update(args, logger, **kwargs):
+  """Run update_golden with the given overrides, returns seconds taken"""
+  run_args = SimpleDict(**vars(args))
+  run_args.__dict__.update(kwargs)
+  start = time.perf_counter()
+  ret = run_update_golden(run_args, logger)
+  return time.perf_counter() - start, ret
+
+
+def main():
+  """Full merge, touch a delta, then time full and incremental re-merges"""
+  parser = setup_arg_parser('Benchmark incremental update_golden', [],
+                            with_yaml=False)
+  parser.add_argument('--session_id',
+                      dest='session_id',
+                      type=int,
+                      required=True,
+                      help='Tuning session with conv_find_db data')
+  parser.add_argument('--delta',
+                      dest='delta',
+                      type=int,
+                      default=1000,
+                      help='Number of find_db rows to touch between runs')
+  parser.add_argument('--scratch_golden_v',
+                      dest='golden_v',
+                      type=int,
+                      default=9999,
+                      help='Golden version used for the benchmark, deleted'
+                      ' afterwards')
+  args = parser.parse_args()
+  args.config_type = ConfigType.convolution
+  args.base_golden_v = None
+  args.overwrite = True
+  args.create_perf_table = False
+  args.incremental = False
+  args.report = False
+
+  logger = setup_logger('bench_update_golden')
+  logger.setLevel(logging.WARNING)
+
+  with DbSession() as session:
+    session.execute(
+        f"delete from conv_golden where golden_miopen_v={args.golden_v}")
+    session.execute("delete from conv_golden_watermark where"
+                    f" golden_miopen_v={args.golden_v}")
+    session.commit()
+
+  try:
+    seed_t, _ = timed_update(args, logger)
+    #make sure the touched rows are strictly newer than the watermark
+    time.sleep(1)
+    with DbSession() as session:
+      session.execute("update conv_find_db set update_ts=now()"
+                      f" where session={args.session_id} and valid=1"
+                      f" and kernel_time>=0 limit {args.delta}")
+      session.commit()
+
+    report_full_t, full = timed_update(args, logger, report=True)
+    report_inc_t, inc = timed_update(args,
+                                     logger,
+                                     report=True,
+                                     incremental=True)
+    inc_t, _ = timed_update(args, logger, incremental=True)
+    full_t, _ = timed_update(args, logger)
+  finally:
+    with DbSession() as session:
+      session.execute(
+          f"delete from conv_golden where golden_miopen_v={args.golden_v}")
+      session.execute("delete from conv_golden_watermark where"
+                      f" golden_miopen_v={args.golden_v}")
+      session.commit()
+
+  print(f"session {args.session_id}: {full['scanned']} golden rows,"
+        f" delta {inc['scanned']} rows")
+  print(f"initial full merge:  {seed_t:8.2f}s")
+  print(f"full report:         {report_full_t:8.2f}s")
+  print(f"incremental report:  {report_inc_t:8.2f}s")
+  print(f"full re-merge:       {full_t:8.2f}s")
+  print(f"incremental merge:   {inc_t:8.2f}s  ({full_t / inc_t:.1f}x)")
+
+
+if __name__ == '__main__':
+  main()
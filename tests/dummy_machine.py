@@ -40,6 +40,7 @@ class DummyMachine:
     self.num_cu = 120
     self.id = 1
     self.machine = Machine(local_machine=True)
+    self.local_machine = True
 
   def set_gpu_state(self, _gpu_state):
     self.gpu_state = _gpu_state
@@ -0,0 +1,85 @@
+###############################################################################
+#
+# MIT License
+#
+# Copyright (c) 2022 Advanced Micro Devices, Inc.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+###############################################################################
+
+import sys
+import logging
+from tuna.miopen.subcmd.archive_jobs import closed_sessions, run_archive_jobs
+from tuna.miopen.db.tables import MIOpenDBTables
+from tuna.dbBase.sql_alchemy import DbSession
+from tuna.miopen.utils.config_type import ConfigType
+from utils import add_test_session, DummyArgs
+
+sys.path.append("../tuna")
+sys.path.append("tuna")
+
+logger = logging.getLogger("archive_jobs_test_logger")
+
+
+def add_jobs(session_id, states, age):
+  """one job per state, last changed age days ago"""
+  with DbSession() as session:
+    for idx, state in enumerate(states):
+      session.execute(
+          "insert into conv_job (session, config, solver, state, reason,"
+          f" update_ts) values ({session_id}, 1, 'archive_{idx}', '{state}',"
+          f" 'pytest_archive', now() - interval {age} day)")
+    session.commit()
+
+
+def count_jobs(table, session_id):
+  with DbSession() as session:
+    return session.execute(
+        f"select count(*) from {table} where session={session_id}").scalar()
+
+
+def test_archive_jobs():
+  closed = add_test_session(label='pytest_archive_closed')
+  still_open = add_test_session(label='pytest_archive_open')
+  recent = add_test_session(label='pytest_archive_recent')
+  add_jobs(closed, ['evaluated', 'errored', 'compile_error'], 10)
+  add_jobs(still_open, ['evaluated', 'new'], 10)
+  add_jobs(recent, ['evaluated'], 0)
+
+  dbt = MIOpenDBTables(config_type=ConfigType.convolution)
+  with DbSession() as session:
+    sessions = closed_sessions(session, dbt, 7, [closed, still_open, recent])
+  assert sessions == [closed]
+
+  args = DummyArgs()
+  args.config_type = ConfigType.convolution
+  args.session_id = [closed, still_open, recent]
+  args.min_age = 7
+  args.chunk_size = 2
+  args.dry_run = True
+  assert run_archive_jobs(args, logger) == {closed: 3}
+  assert count_jobs('conv_job', closed) == 3
+
+  args.dry_run = False
+  assert run_archive_jobs(args, logger) == {closed: 3}
+  assert count_jobs('conv_job', closed) == 0
+  assert count_jobs('conv_job_archive', closed) == 3
+  assert count_jobs('conv_job', still_open) == 2
+  assert count_jobs('conv_job', recent) == 1
@@ -0,0 +1,118 @@
+###############################################################################
+#
+# MIT License
+#
+# Copyright (c) 2022 Advanced Micro Devices, Inc.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+###############################################################################
+
+import fakeredis
+from celery import Celery
+from kombu import Queue
+
+from tuna.celery_app.celery_app import queue_depth
+from tuna.celery_app.backpressure import Backpressure, result_backlog
+
+
+class FakeQueue():
+  """Broker queue and redis backlog the test drains by hand"""
+
+  def __init__(self):
+    self.depth = 0
+    self.backlog = 0
+    self.now = 0.0
+
+  def enqueue(self, bp, num):
+    self.depth += num
+    bp.record_enqueued(num)
+
+  def drain(self, num, secs):
+    self.depth -= num
+    self.now += secs
+
+
+def test_backpressure():
+  fake = FakeQueue()
+  bp = Backpressure(lambda: fake.depth,
+                    lambda: fake.backlog,
+                    1000,
+                    low_water=100,
+                    high_water=500,
+                    horizon=10,
+                    clock=lambda: fake.now)
+
+  #nothing drained yet, full batch up to the high-water mark
+  assert bp.next_batch() == 500
+  fake.enqueue(bp, 500)
+  assert bp.next_batch() == 0
+
+  #results waiting in redis count as well
+  fake.drain(420, 10)
+  fake.backlog = 30
+  assert bp.next_batch() == 0
+  fake.backlog = 0
+
+  #drain rate averaged over both samples, a claim covers 10s of it
+  fake.drain(0, 1)
+  batch = bp.next_batch()
+  assert bp.rate is not None and 20 < bp.rate < 40
+  assert batch == int(bp.rate * 10)
+
+  #without a depth reading the enqueue is not held back
+  bp.depth = lambda: 1 / 0
+  assert bp.next_batch() == 1000
+
+
+def test_wait_batch():
+  fake = FakeQueue()
+  fake.depth = 200
+  bp = Backpressure(lambda: fake.depth, lambda: 0, 50, low_water=100)
+  sleeps = []
+
+  def sleep(secs):
+    sleeps.append(secs)
+    fake.depth -= 60
+
+  assert bp.wait_batch(1, sleep) == 50
+  assert sleeps == [1, 1]
+
+
+def test_queue_depth():
+  app = Celery('test_backpressure', broker='memory://')
+  app.conf.task_queues = [Queue('test_bp_q')]
+
+  @app.task
+  def add(num):
+    return num
+
+  assert queue_depth('test_bp_missing', app) == 0
+  for num in range(3):
+    add.apply_async((num,), queue='test_bp_q')
+  assert queue_depth('test_bp_q', app) == 3
+
+
+def test_result_backlog():
+  client = fakeredis.FakeStrictRedis()
+  for idx in range(5):
+    client.set(f'celery-task-meta-pfx-{idx}', 'x')
+  client.set('celery-task-meta-other-0', 'x')
+  assert result_backlog('pfx', client) == 5
+  assert result_backlog(None, client) == 6
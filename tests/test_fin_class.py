@@ -29,12 +29,16 @@ import sys
 import json
 import os
 import tempfile
+from io import StringIO
 
 from dummy_machine import DummyMachine
 from tuna.miopen.utils.config_type import ConfigType
 from multiprocessing import Value, Lock, Queue
 from tuna.utils.metadata import LOG_TIMEOUT
 from tuna.miopen.worker.fin_class import FinClass
+from tuna.miopen.db.mixin_tables import APP_CACHE_CHECKED
+from tuna.dbBase.sql_alchemy import DbSession
+from utils import add_cfgs, add_test_session
 
 sys.path.append("../tuna")
 sys.path.append("tuna")
@@ -105,3 +109,121 @@ def test_set_all_configs():
   assert (sample3['config']['mode'] == 1)
   assert (sample3['config']['batchsize'] == 256)
   assert (sample3['direction'] == 4)
+
+
+class FakeFin(FinClass):
+  """answers the fin applicability step itself, configs with an id in
+  no_solvers have no applicable solvers"""
+
+  def __init__(self, **kwargs):
+    super().__init__(**kwargs)
+    self.no_solvers = set()
+    self.fin_calls = []
+
+  def exec_docker_cmd(self, cmd):
+    with open(self.local_file) as fin_in:
+      cfg_ids = [req['config_tuna_id'] for req in json.load(fin_in)]
+    self.fin_calls.append(cfg_ids)
+    solver = next(iter(self.solver_id_map))
+    with open(self.local_output, 'w') as fin_out:
+      json.dump([{
+          'input': {
+              'config_tuna_id': cfg_id
+          },
+          'applicable_solvers': [] if cfg_id in self.no_solvers else [solver]
+      } for cfg_id in cfg_ids], fin_out)
+    return 0, '', StringIO()
+
+
+def app_worker(label, session_id, worker=FinClass, **kwargs):
+  return worker(machine=DummyMachine(False),
+                gpu_id=0,
+                num_procs=Value('i', 1),
+                bar_lock=Lock(),
+                envmt=["MIOPEN_LOG_LEVEL=7"],
+                reset_interval=False,
+                app_test=False,
+                label=label,
+                fin_steps=['applicability'],
+                use_tuner=False,
+                job_queue=Queue(),
+                queue_lock=Lock(),
+                fetch_state=['compiled'],
+                end_jobs=Value('i', 0),
+                config_type=ConfigType.convolution,
+                session_id=session_id,
+                **kwargs)
+
+
+def test_applicability_cache():
+  label = 'tuna_pytest_app_cache'
+  session_id = add_test_session(label=label)
+  fin_worker = app_worker(label, session_id, FakeFin)
+  dbt = add_cfgs(label, 'conv_configs_NCHW.txt', label)
+  cfgs = fin_worker.query_cfgs(label).all()
+  cfg_ids = [cfg.id for cfg in cfgs]
+  app_cache = dbt.app_cache
+  with DbSession() as session:
+    session.query(app_cache)\
+        .filter(app_cache.config_md5.in_([cfg.md5 for cfg in cfgs]))\
+        .filter(app_cache.arch == fin_worker.dbt.session.arch)\
+        .filter(app_cache.num_cu == fin_worker.dbt.session.num_cu)\
+        .delete(synchronize_session=False)
+    session.commit()
+
+  #empty cache, every config goes to fin, the first has no applicable solvers
+  fin_worker.no_solvers = {cfg_ids[0]}
+  assert fin_worker.applicability()
+  assert fin_worker.app_cache_stats == (0, len(cfg_ids))
+  assert fin_worker.fin_calls == [cfg_ids]
+
+  #a second run finds every config in the cache, fin is not called again
+  with DbSession() as session:
+    session.query(dbt.solver_app)\
+        .filter(dbt.solver_app.session == session_id)\
+        .delete(synchronize_session=False)
+    session.commit()
+  assert fin_worker.applicability()
+  assert fin_worker.app_cache_stats == (len(cfg_ids), len(cfg_ids))
+  assert len(fin_worker.fin_calls) == 1
+  with DbSession() as session:
+    res = session.query(dbt.solver_app.config)\
+        .filter(dbt.solver_app.session == session_id).all()
+    assert sorted(row[0] for row in res) == cfg_ids[1:]
+
+    #the config without solvers is cached by its checked row
+    marks = session.query(app_cache)\
+        .filter(app_cache.config_md5 == cfgs[0].md5)\
+        .filter(app_cache.arch == fin_worker.dbt.session.arch)\
+        .filter(app_cache.num_cu == fin_worker.dbt.session.num_cu)\
+        .filter(app_cache.solver == APP_CACHE_CHECKED).count()
+    assert marks == 1
+
+
+def test_delta_applicability():
+  label = 'tuna_pytest_app_delta'
+  session_id = add_test_session(label=label)
+  fin_worker = app_worker(label, session_id, delta_applicability=True)
+  dbt = add_cfgs(label, 'conv_configs_NCHW.txt', label)
+  solver_id = next(iter(fin_worker.solver_id_map.values()))
+
+  num_cfgs = fin_worker.query_cfgs(label).count()
+  assert fin_worker.query_cfgs(label, True).count() == num_cfgs
+
+  cfg_ids = [row.id for row in fin_worker.query_cfgs(label).limit(2).all()]
+  with DbSession() as session:
+    for cfg_id in cfg_ids:
+      session.add(
+          dbt.solver_app(session=session_id, config=cfg_id, solver=solver_id))
+    session.commit()
+  assert fin_worker.query_cfgs(label, True).count() == num_cfgs - 2
+
+  #configs updated after their applicability was set are stale
+  with DbSession() as session:
+    session.execute(f"update {dbt.config_table.__tablename__} set"
+                    " update_ts=now() + interval 1 minute"
+                    f" where id={cfg_ids[0]}")
+    session.commit()
+  delta_ids = [row.id for row in fin_worker.query_cfgs(label, True).all()]
+  assert cfg_ids[0] in delta_ids
+  assert cfg_ids[1] not in delta_ids
@@ -38,7 +38,7 @@ from tuna.miopen.miopen_lib import MIOpen
 from tuna.miopen.subcmd.import_configs import import_cfgs
 from tuna.miopen.subcmd.load_job import add_jobs
 from tuna.miopen.utils.config_type import ConfigType
-from tuna.miopen.utils.metadata import ALG_SLV_MAP
+from tuna.miopen.utils.metadata import ALG_SLV_MAP, FIN_INPUT_CACHE
 from tuna.miopen.worker.fin_class import FinClass
 from tuna.miopen.db.solver import get_solver_ids
 from tuna.utils.db_utility import connect_db
@@ -237,6 +237,11 @@ def test_fin_evaluator():
   # test get_fin_input
   file_name = fin_eval.get_fin_input()
   assert file_name
+  fin_input = fin_eval.machine.read_file(file_name)
+  assert json.loads(fin_input)[0]['miopen_find_compile_result']
+  #a retry with unchanged compiled rows reuses the local input
+  assert fin_eval.machine.read_file(fin_eval.get_fin_input()) == fin_input
+  assert os.listdir(FIN_INPUT_CACHE)
 
   find_eval_file = f"{this_path}/../utils/test_files/fin_output_find_eval.json"
   fin_json = json.loads(machine.read_file(find_eval_file))[1:]
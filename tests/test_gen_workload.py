@@ -0,0 +1,99 @@
+###############################################################################
+#
+# MIT License
+#
+# Copyright (c) 2022 Advanced Micro Devices, Inc.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+###############################################################################
+
+import os
+import json
+
+from tuna.utils.utility import SimpleDict
+from tuna.miopen.driver.convolution import DriverConvolution
+from tuna.miopen.driver.batchnorm import DriverBatchNorm
+from tuna.miopen.utils.config_type import ConfigType
+from tuna.miopen.utils.parsing import parse_pdb_key
+from tuna.miopen.worker.fin_utils import get_fin_slv_status
+from tuna.miopen.scripts.gen_workload import gen_configs, gen_jobs, fdb_key
+from tuna.miopen.scripts.gen_workload import fin_result, write_workload
+
+
+def test_configs():
+  configs = gen_configs(7, 50, ConfigType.convolution)
+  assert [line for _, line in configs
+         ] == [line for _, line in gen_configs(7, 50, ConfigType.convolution)]
+  assert [line for _, line in configs
+         ] != [line for _, line in gen_configs(8, 50, ConfigType.convolution)]
+
+  for driver, line in configs:
+    #lines import to the same config, keys decode to its layout
+    assert fdb_key(DriverConvolution(line)) == fdb_key(driver)
+    fds, vals, _, _ = parse_pdb_key(fdb_key(driver))
+    assert dict(zip(fds, vals))['out_layout'] == driver.out_layout
+
+  for driver, line in gen_configs(7, 20, ConfigType.batch_norm):
+    assert DriverBatchNorm(line) == driver
+
+
+def test_jobs_results():
+  jobs = list(gen_jobs(3, 10, 4, ConfigType.convolution))
+  assert len(jobs) == 40
+  assert len(set(jobs)) == 40
+  assert jobs == list(gen_jobs(3, 10, 4, ConfigType.convolution))
+
+  config, solver = jobs[5]
+  key = '256-28-28-3x3-128-28-28-64-1x1-1x1-1x1-0-NHWC-FP32-F'
+  res = fin_result(3, key, config, solver, 'miopen_find_eval', 100)
+  assert res == fin_result(3, key, config, solver, 'miopen_find_eval', 100)
+  assert res['db_key'] == key
+  entry = res['miopen_find_eval_result'][0]
+  assert get_fin_slv_status(entry, 'evaluated') == {
+      'solver': solver,
+      'success': True,
+      'result': 'Success'
+  }
+  assert entry['time'] > 0
+  for kern in entry['kernel_objects']:
+    assert len(kern['blob']) == 100
+
+  res = fin_result(3, key, config, solver, 'miopen_perf_compile', 0)
+  assert res['miopen_perf_compile_result'][0]['perf_compiled']
+
+
+def test_write_workload(tmp_path):
+  args = SimpleDict(out_dir=str(tmp_path),
+                    seed=1,
+                    num_configs=5,
+                    solvers=2,
+                    blob_size=8,
+                    config_type=ConfigType.convolution,
+                    fin_steps=['miopen_find_compile', 'miopen_find_eval'])
+  assert write_workload(args) == {'configs': 5, 'jobs': 10}
+  assert sorted(os.listdir(tmp_path)) == [
+      'configs.txt', 'jobs.jsonl', 'miopen_find_compile.jsonl',
+      'miopen_find_eval.jsonl'
+  ]
+  with open(tmp_path / 'miopen_find_compile.jsonl', encoding='utf-8') as infile:
+    results = [json.loads(line) for line in infile]
+  assert len(results) == 10
+  assert results[0]['config_tuna_id'] == 1
+  assert results[0]['miopen_find_compile_result'][0]['find_compiled']
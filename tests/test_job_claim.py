@@ -0,0 +1,82 @@
+###############################################################################
+#
+# MIT License
+#
+# Copyright (c) 2022 Advanced Micro Devices, Inc.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+###############################################################################
+
+import sys
+from tuna.dbBase.sql_alchemy import DbSession
+from tuna.miopen.db.tables import MIOpenDBTables
+from tuna.miopen.db.mixin_tables import FinStep, fin_step_bit, fin_step_cond
+from tuna.miopen.utils.config_type import ConfigType
+from utils import add_test_session
+
+sys.path.append("../tuna")
+sys.path.append("tuna")
+
+
+def test_fin_step_cond():
+  bits = [fin_step_bit(step) for step in FinStep.__members__]
+  assert len(set(bits)) == len(FinStep)
+  assert fin_step_cond() == f"fin_step_mask={fin_step_bit('not_fin')}"
+
+  bit = fin_step_bit('miopen_find_eval')
+  cond = fin_step_cond(['miopen_find_eval', 'miopen_perf_eval'])
+  masks = [int(mask) for mask in cond.split('(')[1].strip(')').split(',')]
+  assert bit in masks and bit | fin_step_bit('miopen_find_compile') in masks
+  assert all(mask & bit for mask in masks)
+
+
+def test_claim_explain():
+  session_id = add_test_session(label='pytest_job_claim')
+  dbt = MIOpenDBTables(session_id=session_id,
+                       config_type=ConfigType.convolution)
+  table = dbt.job_table.__tablename__
+  with DbSession() as session:
+    for idx in range(200):
+      state = 'new' if idx % 4 == 0 else 'evaluated'
+      fin_step = 'miopen_find_compile' if idx % 2 else 'miopen_find_eval'
+      session.execute(
+          f"insert into {table} (session, config, solver, state, reason,"
+          f" fin_step) values ({session_id}, 1, 'claim_{idx}', '{state}',"
+          f" 'pytest_job_claim', '{fin_step}')")
+    session.commit()
+
+    #the mask column mirrors the SET column
+    rows = session.execute(
+        f"select fin_step, fin_step_mask from {table}"
+        f" where session={session_id} and reason='pytest_job_claim'").fetchall(
+        )
+    for fin_step, mask in rows:
+      assert mask == sum(fin_step_bit(step) for step in fin_step.split(","))
+
+    #same shape as MIOpen.get_job_objs/compose_work_objs
+    query = f"SELECT id, config FROM {table} WHERE session={session_id}"\
+    " AND valid=1 AND reason='pytest_job_claim' AND retries<3"\
+    f" AND state in ('new') AND {fin_step_cond(['miopen_find_eval'])}"\
+    " ORDER BY retries,config ASC LIMIT 5 FOR UPDATE SKIP LOCKED"
+    plan = session.execute(f"EXPLAIN {query}").fetchall()
+    assert plan[0]['key'] == 'get_job_claim'
+    assert plan[0]['type'] == 'range'
+    assert len(session.execute(query).fetchall()) == 5
+    session.rollback()
@@ -0,0 +1,84 @@
+###############################################################################
+#
+# MIT License
+#
+# Copyright (c) 2022 Advanced Micro Devices, Inc.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+###############################################################################
+
+import os
+import base64
+import logging
+import sqlite3
+
+from tuna.miopen.subcmd.export_db import write_kdb_skews, expand_thin_kdb
+from tuna.utils.utility import SimpleDict
+
+logger = logging.getLogger("kdb_skews_test_logger")
+
+
+def kernel(kid, name, blob):
+  return SimpleDict(id=kid,
+                    kernel_name=name,
+                    kernel_args='-O3',
+                    kernel_blob=base64.b64encode(blob),
+                    kernel_hash=f'md5_{kid}',
+                    uncompressed_size=len(blob))
+
+
+def read_kdb(path):
+  cnx = sqlite3.connect(path)
+  rows = cnx.execute("SELECT kernel_name, kernel_args, kernel_blob,"
+                     " kernel_hash, uncompressed_size FROM kern_db"
+                     " ORDER BY kernel_name").fetchall()
+  cnx.close()
+  return rows
+
+
+def skews():
+  shared = kernel(1, 'conv_a', b'A' * 64)
+  #same binary in another kernel_cache row
+  copy = kernel(2, 'conv_a', b'A' * 64)
+  return [(60, [shared, kernel(3, 'conv_b', b'B' * 32)]),
+          (64, [copy, kernel(4, 'conv_c', b'C' * 16)]),
+          (120, [shared, kernel(5, 'conv_b.o', b'B' * 32)])]
+
+
+def test_write_kdb_skews(tmp_path, caplog, monkeypatch):
+  monkeypatch.chdir(tmp_path)
+  with caplog.at_level(logging.INFO):
+    full = write_kdb_skews('gfx906', skews(), logger)
+  assert 'Blob bytes: 272 over all skews, 112 unique' in caplog.text
+  assert [os.path.basename(path) for path in full
+         ] == ['gfx906_60.kdb', 'gfx906_64.kdb', 'gfx90678.kdb']
+  rows = read_kdb(full[0])
+  assert rows == [('conv_a.o', '-O3 -mcpu=gfx906', b'A' * 64, 'md5_1', 64),
+                  ('conv_b.o', '-O3 -mcpu=gfx906', b'B' * 32, 'md5_3', 32)]
+
+  thin = write_kdb_skews('gfx906', skews(), logger, shared_blobs=True)
+  assert os.path.basename(thin[-1]) == 'gfx906.kblob'
+  cnx = sqlite3.connect(thin[-1])
+  assert cnx.execute("SELECT count(*) FROM blob_db").fetchone()[0] == 3
+  cnx.close()
+  for full_kdb, thin_kdb in zip(full, thin):
+    assert thin_kdb.endswith('.thin.kdb')
+    out = expand_thin_kdb(thin_kdb, thin[-1], str(tmp_path / 'expanded.kdb'))
+    assert read_kdb(out) == read_kdb(full_kdb)
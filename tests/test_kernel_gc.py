@@ -0,0 +1,83 @@
+###############################################################################
+#
+# MIT License
+#
+# Copyright (c) 2022 Advanced Micro Devices, Inc.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+###############################################################################
+
+import sys
+from tuna.dbBase.sql_alchemy import DbSession
+from tuna.miopen.db.tables import MIOpenDBTables
+from tuna.miopen.utils.config_type import ConfigType
+from tuna.miopen.utils.kernel_gc import KernelCacheGC, id_ranges
+
+sys.path.append("../tuna")
+sys.path.append("tuna")
+
+
+def test_id_ranges():
+  assert id_ranges([4]) == 'id=4'
+  assert id_ranges([1, 2, 3, 7, 9, 10]) ==\
+      'id between 1 and 3 or id=7 or id between 9 and 10'
+
+
+def test_gc_due():
+  kernel_gc = KernelCacheGC(None, batch_size=3, interval=3600)
+  assert not kernel_gc.due()
+  kernel_gc.record([1, 2])
+  assert not kernel_gc.due()
+  kernel_gc.record([2, 3], job_id=5)
+  assert kernel_gc.groups == {1, 2, 3} and kernel_gc.jobs == {5}
+  assert kernel_gc.due()
+
+  kernel_gc = KernelCacheGC(None, interval=0)
+  assert not kernel_gc.due()
+  kernel_gc.record(job_id=1)
+  assert kernel_gc.due()
+
+
+def test_gc_sweep():
+  dbt = MIOpenDBTables(config_type=ConfigType.convolution)
+  kernel_table = dbt.kernel_cache.__tablename__
+  with DbSession() as session:
+    group = session.execute(
+        f"select coalesce(max(kernel_group), 0) + 1000 from {kernel_table}"
+    ).scalar()
+    for idx in range(7):
+      session.execute(
+          f"insert into {kernel_table} (kernel_group, valid, kernel_name,"
+          " kernel_args, kernel_blob, kernel_hash, uncompressed_size)"
+          f" values ({group}, {int(idx >= 5)}, 'gc_{idx}', '', '', '', 0)")
+    session.commit()
+
+  kernel_gc = KernelCacheGC(dbt, batch_size=2)
+  kernel_gc.record([group])
+  reclaimed = kernel_gc.sweep()
+  assert reclaimed[kernel_table] == 5
+  assert not kernel_gc.groups
+
+  with DbSession() as session:
+    rows = session.execute(f"select valid from {kernel_table}"
+                           f" where kernel_group={group}").fetchall()
+    assert [row[0] for row in rows] == [1, 1]
+    session.execute(f"delete from {kernel_table} where kernel_group={group}")
+    session.commit()
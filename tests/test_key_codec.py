@@ -0,0 +1,88 @@
+###############################################################################
+#
+# MIT License
+#
+# Copyright (c) 2022 Advanced Micro Devices, Inc.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+###############################################################################
+
+from tuna.miopen.utils.metadata import FDS_2D, FDS_3D
+from tuna.miopen.utils.parsing import parse_pdb_key, get_pdb_key
+from tuna.miopen.utils.key_codec import parse_many, FDS_2D_KEY, FDS_3D_KEY
+
+KEY_2D = '256-28-28-3x3-128-28-28-64-1x1-1x1-1x1-0-NCHW-FP32-F'
+KEY_3D = '64-16-56-56-1x3x3-32-16-56-56-4-0x1x1-1x1x1-1x1x1-0-NCDHW-FP16-W'
+
+
+def test_parse_pdb_key():
+  fds_2d, fds_3d = list(FDS_2D), list(FDS_3D)
+
+  fds, vals, precision, direction = parse_pdb_key(KEY_2D)
+  assert fds == FDS_2D_KEY
+  res = dict(zip(fds, vals))
+  assert res['in_channels'] == 256 and res['out_channels'] == 128
+  assert res['batchsize'] == 64 and res['group_count'] == 1
+  assert res['out_layout'] == 'NCHW' and res['spatial_dim'] == 2
+  assert precision == 'FP32' and direction == 1
+
+  fds, vals, precision, direction = parse_pdb_key(KEY_3D + '_g2')
+  assert fds == FDS_3D_KEY
+  res = dict(zip(fds, vals))
+  #non forward keys start with the output tensor
+  assert res['out_channels'] == 64 and res['in_channels'] == 32
+  assert res['fil_d'] == 1 and res['pad_d'] == 0 and res['group_count'] == 2
+  assert res['spatial_dim'] == 3
+  assert precision == 'FP16' and direction == 4
+
+  key_3l = '256-28-28-3x3-128-28-28-64-1x1-1x1-1x1-0-NHWC-NCHW-NCHW-FP32-F'
+  fds, vals, _, _ = parse_pdb_key(key_3l)
+  assert vals[fds.index('in_layout')] == 'NHWC'
+  assert vals[fds.index('out_layout')] == 'NCHW'
+
+  #repeated calls hit the cache and leave the metadata lists untouched
+  assert parse_pdb_key(KEY_2D)[1] is parse_pdb_key(KEY_2D)[1]
+  assert FDS_2D == fds_2d and FDS_3D == fds_3d
+
+  for bad_key in (KEY_2D + '=1', KEY_2D + '_x2', '1-2-3'):
+    try:
+      parse_pdb_key(bad_key)
+      assert False
+    except ValueError:
+      pass
+
+
+def test_get_pdb_key():
+  fds, vals, precision, _ = parse_pdb_key(KEY_2D)
+  fds_dict = dict(zip(fds, vals))
+  assert get_pdb_key(fds_dict, precision, 'F') == KEY_2D
+  assert get_pdb_key(fds_dict, precision, 'B').startswith('128-28-28-3x3-256')
+  fds_dict['group_count'] = 4
+  assert get_pdb_key(fds_dict, precision, 'W').endswith('-FP32-W_g4')
+
+
+def test_parse_many():
+  keys = [KEY_2D, KEY_3D, KEY_2D]
+  cols = parse_many(keys)
+  assert cols['in_channels'] == [256, 32, 256]
+  assert cols['fil_d'] == [None, 1, None]
+  assert cols['precision'] == ['FP32', 'FP16', 'FP32']
+  assert cols['direction'] == [1, 4, 1]
+  assert parse_many([])['spatial_dim'] == []
@@ -37,8 +37,8 @@ from tuna.miopen.subcmd.merge_db import parse_jobline, parse_text_fdb_name, pars
 from tuna.miopen.subcmd.merge_db import target_merge
 from tuna.miopen.subcmd.merge_db import update_master_list, write_merge_results
 from tuna.miopen.subcmd.merge_db import merge_text_file
-from tuna.miopen.subcmd.merge_db import get_sqlite_table
-from tuna.miopen.subcmd.merge_db import get_sqlite_row, get_sqlite_data, load_master_list
+from tuna.miopen.subcmd.merge_db import get_sqlite_data, load_master_list
+from tuna.miopen.utils.analyze_parse_db import get_sqlite_row, get_sqlite_table
 from tuna.miopen.utils.helper import prune_cfg_dims
 
 
@@ -0,0 +1,104 @@
+###############################################################################
+#
+# MIT License
+#
+# Copyright (c) 2022 Advanced Micro Devices, Inc.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+###############################################################################
+
+import os
+import sys
+import socket
+import subprocess
+from prometheus_client import CollectorRegistry
+
+from tuna.utils import metrics
+from tuna.utils.metrics import TunaMetrics, db_timer
+
+#forks a worker and scrapes the parent's endpoint, run in a fresh interpreter
+#as multiprocess mode has to be chosen before prometheus_client is imported
+SERVE_SCRIPT = """
+import sys
+from multiprocessing import Process
+from urllib.request import urlopen
+from tuna.utils.metrics import setup_metrics, count_jobs, observe_batch
+
+def work():
+  count_jobs('enqueued', 3)
+  observe_batch(3)
+
+port = setup_metrics()
+proc = Process(target=work)
+proc.start()
+proc.join()
+count_jobs('claimed', 2)
+sys.stdout.write(urlopen(f'http://localhost:{port}/metrics').read().decode())
+"""
+
+
+def test_metrics_registry():
+  registry = CollectorRegistry()
+  metrics = TunaMetrics(registry)
+
+  metrics.jobs['claimed'].inc(10)
+  metrics.jobs['failed'].inc()
+  metrics.batch_size.observe(10)
+  metrics.db_latency.labels('get_job_list').observe(0.02)
+  metrics.redis_backlog.set(7)
+
+  assert registry.get_sample_value('tuna_jobs_claimed_total') == 10
+  assert registry.get_sample_value('tuna_jobs_failed_total') == 1
+  assert registry.get_sample_value('tuna_jobs_retried_total') == 0
+  assert registry.get_sample_value('tuna_job_batch_size_count') == 1
+  assert registry.get_sample_value('tuna_job_batch_size_bucket',
+                                   {'le': '10.0'}) == 1
+  assert registry.get_sample_value('tuna_db_latency_seconds_count',
+                                   {'op': 'get_job_list'}) == 1
+  assert registry.get_sample_value('tuna_redis_backlog') == 7
+
+
+def test_metrics_endpoint():
+  with socket.socket() as sock:
+    sock.bind(('localhost', 0))
+    port = sock.getsockname()[1]
+  env = dict(os.environ, TUNA_METRICS_PORT=str(port))
+  env.pop('PROMETHEUS_MULTIPROC_DIR', None)
+  res = subprocess.run([sys.executable, '-c', SERVE_SCRIPT],
+                       env=env,
+                       capture_output=True,
+                       text=True,
+                       timeout=60,
+                       check=True)
+
+  assert 'tuna_jobs_enqueued_total 3.0' in res.stdout
+  assert 'tuna_jobs_claimed_total 2.0' in res.stdout
+  assert 'tuna_job_batch_size_count 1.0' in res.stdout
+
+
+def test_db_timer_disabled(monkeypatch):
+  monkeypatch.delenv('TUNA_METRICS_PORT', raising=False)
+
+  def no_metrics():
+    raise AssertionError('metrics used while disabled')
+
+  monkeypatch.setattr(metrics, 'get_metrics', no_metrics)
+  with db_timer('session_retry'):
+    pass
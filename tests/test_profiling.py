@@ -0,0 +1,132 @@
+###############################################################################
+#
+# MIT License
+#
+# Copyright (c) 2022 Advanced Micro Devices, Inc.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+###############################################################################
+
+import os
+import sys
+import time
+import pstats
+import asyncio
+import subprocess
+
+from tuna.utils import profiling
+from tuna.utils.profiling import profiled, StackSampler, PROFILE_STATS
+
+#on SIGUSR1 the registry and the cProfile are dumped, run in a fresh
+#interpreter so the handler and profiler stay out of the test process
+SIGNAL_SCRIPT = """
+import os
+import signal
+from tuna.utils.profiling import setup_profiling, profiled
+
+@profiled('work')
+def work():
+  return sum(range(1000))
+
+def later():
+  return sum(range(1000))
+
+assert setup_profiling()
+work()
+os.kill(os.getpid(), signal.SIGUSR1)
+#still profiled after the dump, the exit dump overwrites the first one
+later()
+"""
+
+
+def busy(secs):
+  end = time.perf_counter() + secs
+  while time.perf_counter() < end:
+    pass
+
+
+def test_profiled_off(monkeypatch):
+  monkeypatch.delenv('TUNA_PROFILE', raising=False)
+  assert profiled('busy')(busy) is busy
+
+
+def test_profiled(monkeypatch, tmp_path):
+  monkeypatch.setenv('TUNA_PROFILE', 'stats')
+  PROFILE_STATS.clear()
+
+  func = profiled('test_busy')(busy)
+  assert func is not busy
+  for _ in range(3):
+    func(0.01)
+
+  @profiled('test_async')
+  async def async_busy():
+    await asyncio.sleep(0.01)
+
+  asyncio.run(async_busy())
+
+  stat = PROFILE_STATS['test_busy']
+  assert stat.calls == 3 and stat.wall >= 0.03 and stat.cpu > 0
+  stat = PROFILE_STATS['test_async']
+  assert stat.calls == 1 and stat.wall >= 0.01
+
+  files = profiling.dump_profile(str(tmp_path))
+  assert files == [str(tmp_path / f'tuna_profile_{os.getpid()}.txt')]
+  with open(files[0], encoding='utf-8') as out:
+    lines = out.read().splitlines()
+  assert lines[1].split()[:2] == ['test_busy', '3']
+  PROFILE_STATS.clear()
+
+
+def test_stack_sampler():
+  sampler = StackSampler(interval=0.001)
+  sampler.start()
+  busy(0.1)
+  sampler.stop()
+  sampler.join()
+
+  assert sampler.stacks
+  assert any(
+      stack.endswith('test_profiling.py:busy') for stack in sampler.stacks)
+
+
+def test_profile_signal(tmp_path):
+  env = dict(os.environ,
+             TUNA_PROFILE='cprofile',
+             TUNA_PROFILE_DIR=str(tmp_path))
+  subprocess.run([sys.executable, '-c', SIGNAL_SCRIPT],
+                 env=env,
+                 timeout=60,
+                 check=True)
+
+  names = sorted(os.listdir(tmp_path))
+  assert len(names) == 2
+  assert names[0].endswith('.pstats') and names[1].endswith('.txt')
+  with open(tmp_path / names[1], encoding='utf-8') as out:
+    assert 'work' in out.read()
+  funcs = pstats.Stats(str(tmp_path / names[0])).stats  #type: ignore
+  assert any(func[2] == 'later' for func in funcs)
+
+
+def test_dump_in_record(tmp_path):
+  #a signal can arrive while _record holds the registry lock
+  with profiling._STATS_LOCK:  #pylint: disable=protected-access
+    files = profiling.dump_profile(str(tmp_path))
+  assert os.path.isfile(files[0])
@@ -0,0 +1,101 @@
+###############################################################################
+#
+# MIT License
+#
+# Copyright (c) 2022 Advanced Micro Devices, Inc.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+###############################################################################
+
+import os
+import numpy as np
+import pandas as pd
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from tuna.miopen.scripts.report import load_cached, fastest_idx
+
+ROWS = [(1, 10, 1, 0.5, '2024-01-01 00:00:00'),
+        (2, 10, 2, 0.3, '2024-01-01 00:00:00'),
+        (3, 11, 1, 0.7, '2024-01-01 00:00:00')]
+
+
+def ktimes(dfr):
+  return dict(zip(dfr['id'], dfr['ktime']))
+
+
+def test_load_cached(tmp_path):
+  engine = create_engine(f"sqlite:///{tmp_path / 'report.db'}")
+  session = sessionmaker(bind=engine)()
+  session.execute("create table find_db (id integer primary key,"
+                  " config integer, solver integer, kernel_time float,"
+                  " session integer, update_ts text)")
+  for row in ROWS:
+    session.execute(f"insert into find_db values ({row[0]}, {row[1]},"
+                    f" {row[2]}, {row[3]}, 1, '{row[4]}')")
+  session.execute("insert into find_db values (4, 10, 3, 0.1, 2,"
+                  " '2024-01-01 00:00:00')")
+  session.commit()
+  cache_file = str(tmp_path / 'find_db.parquet')
+
+  dfr = load_cached(session, 'find_db', 'session=1', cache_file)
+  assert ktimes(dfr) == {1: 0.5, 2: 0.3, 3: 0.7}
+
+  #unchanged table, the cache is used and not rewritten
+  mtime = os.stat(cache_file).st_mtime_ns
+  dfr = load_cached(session, 'find_db', 'session=1', cache_file)
+  assert ktimes(dfr) == {1: 0.5, 2: 0.3, 3: 0.7}
+  assert os.stat(cache_file).st_mtime_ns == mtime
+
+  #updated and new rows are merged into the cache
+  session.execute("update find_db set kernel_time=0.2,"
+                  " update_ts='2024-01-02 00:00:00' where id=1")
+  session.execute("insert into find_db values (5, 12, 1, 0.9, 1,"
+                  " '2024-01-02 00:00:00')")
+  session.commit()
+  dfr = load_cached(session, 'find_db', 'session=1', cache_file)
+  assert ktimes(dfr) == {1: 0.2, 2: 0.3, 3: 0.7, 5: 0.9}
+
+  #a deleted row forces a full fetch
+  session.execute("delete from find_db where id=2")
+  session.commit()
+  dfr = load_cached(session, 'find_db', 'session=1', cache_file)
+  assert ktimes(dfr) == {1: 0.2, 3: 0.7, 5: 0.9}
+  session.close()
+
+
+def test_fastest_idx():
+  dfr = pd.DataFrame({
+      'config': [3, 1, 1, 2, 3, 1, 2, 4, 3],
+      'ktime': [0.5, -1, 0.4, np.nan, 0.5, 0.2, 0.8, -1, 0.1]
+  })
+  fastest = fastest_idx(dfr['config'], dfr['ktime'])
+
+  valid = dfr.loc[dfr['ktime'].ne(-1) & dfr['ktime'].notna()]
+  expected = valid.groupby('config')['ktime'].idxmin()
+  assert fastest.dropna().astype(int).to_dict() == expected.to_dict()
+  assert fastest.to_dict()[1] == 5 and fastest.to_dict()[3] == 8
+  #configs without a valid kernel time have no fastest row
+  assert list(fastest.index) == [1, 2, 3, 4]
+  assert np.isnan(fastest[4])
+
+  #ties go to the first row, as with idxmin
+  ties = pd.Series([0.5, 0.5], index=[7, 3])
+  assert fastest_idx(pd.Series([1, 1], index=[7, 3]), ties).to_dict() == {1: 7}
@@ -0,0 +1,128 @@
+###############################################################################
+#
+# MIT License
+#
+# Copyright (c) 2022 Advanced Micro Devices, Inc.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+###############################################################################
+
+import os
+import json
+import asyncio
+import multiprocessing
+from multiprocessing import Value
+
+import fakeredis
+from fakeredis import aioredis as fake_aioredis
+
+from tuna.mituna_interface import MITunaInterface
+from tuna.utils.result_spool import ResultSpool, spool_path, FAILED
+
+
+class SpoolLib(MITunaInterface):
+  """Stores results in a list, dies on the job given as crash_on"""
+
+  def __init__(self, crash_on=None):
+    super().__init__()
+    self.server = fakeredis.FakeServer()
+    self.prefix = 'spool'
+    self.crash_on = crash_on
+    self.stored = []
+
+  async def get_redis(self):
+    return fake_aioredis.FakeRedis(server=self.server)
+
+  def store_result(self, data):
+    job = json.loads(data)['result']['job']
+    if job == self.crash_on:
+      #the consumer process dies before the DB commit
+      os._exit(1)
+    if job == 'poison':
+      raise ValueError('bad result')
+    self.stored.append(job)
+    return True
+
+
+def consume_until_crash(spool_dir):
+  os.environ['TUNA_SPOOL_DIR'] = spool_dir
+  lib = SpoolLib(crash_on=3)
+  backend = fakeredis.FakeStrictRedis(server=lib.server)
+  for job in range(5):
+    backend.set(f'celery-task-meta-spool-{job}',
+                json.dumps({'result': {
+                    'job': job
+                }}))
+  asyncio.run(lib.consume(Value('i', 5), lib.prefix))
+
+
+def test_spool_crash(tmp_path):
+  path = str(tmp_path / 'spool.db')
+  spool = ResultSpool(path)
+  spool.add(b'k1', '{"result": 1}')
+  spool.add('k2', b'{"result": 2}')
+  spool.mark('k1')
+  #no close, as after a crash
+  reopened = ResultSpool(path)
+  assert list(reopened.pending()) == [('k2', '{"result": 2}')]
+  assert reopened.purge() == 1
+  spool.close()
+  reopened.close()
+
+
+def test_consume_crash(monkeypatch, tmp_path):
+  monkeypatch.setenv('TUNA_SPOOL_DIR', str(tmp_path))
+  proc = multiprocessing.get_context('fork').Process(target=consume_until_crash,
+                                                     args=(str(tmp_path),))
+  proc.start()
+  proc.join()
+  assert proc.exitcode == 1
+
+  #the result being stored at the crash survives in the spool
+  spool = ResultSpool(spool_path('spool'))
+  pending = [json.loads(data)['result']['job'] for _, data in spool.pending()]
+  spool.close()
+  assert 3 in pending
+
+  #and is stored by the next start before stale results are dropped
+  lib = SpoolLib()
+  asyncio.run(lib.cleanup_redis_results(lib.prefix))
+  assert 3 in lib.stored
+  spool = ResultSpool(spool_path('spool'))
+  assert not list(spool.pending())
+  spool.close()
+
+
+def test_replay_failed(monkeypatch, tmp_path):
+  monkeypatch.setenv('TUNA_SPOOL_DIR', str(tmp_path))
+  spool = ResultSpool(spool_path('spool'))
+  spool.add('bad', json.dumps({'result': {'job': 'poison'}}))
+  spool.add('good', json.dumps({'result': {'job': 7}}))
+  spool.close()
+
+  lib = SpoolLib()
+  assert lib.replay_spool() == 1
+  assert lib.stored == [7]
+  #a result that fails to store is kept, but not replayed again
+  assert lib.replay_spool() == 0
+  spool = ResultSpool(spool_path('spool'))
+  assert spool.conn.execute('select key from spool where state=?',
+                            (FAILED,)).fetchall() == [('bad',)]
+  spool.close()
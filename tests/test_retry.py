@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+
+###############################################################################
+#
+# MIT License
+#
+# Copyright (c) 2024 Advanced Micro Devices, Inc.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+import socket
+import pymysql
+from prometheus_client import REGISTRY
+from sqlalchemy.exc import OperationalError
+
+from tuna.utils.retry import RetryPolicy, RETRY_CLASSES
+from tuna.utils.retry import classify_error, classify_cmd_error
+
+
+def op_error(code):
+  return OperationalError('select 1', {},
+                          pymysql.err.OperationalError(code, 'mysql error'))
+
+
+def retries(name, error, gave_up=False):
+  metric = 'tuna_retry_giveups_total' if gave_up else 'tuna_retries_total'
+  return REGISTRY.get_sample_value(metric, {'op': name, 'error': error}) or 0
+
+
+def test_classify():
+  assert classify_error(op_error(1213)) == 'deadlock'
+  assert classify_error(pymysql.err.OperationalError(1205, '')) == 'lock_wait'
+  assert classify_error(op_error(2013)) == 'connection'
+  assert classify_error(op_error(1146)) == 'fatal'
+  assert classify_error(op_error(1317)) == 'unknown'
+  assert classify_error(socket.timeout()) == 'connection'
+  assert classify_error(ValueError('x')) == 'unknown'
+  assert classify_cmd_error('sqlite: disk I/O error') == 'transient'
+  assert classify_cmd_error('Segmentation fault') == 'fatal'
+
+
+def test_backoff():
+  policy = RetryPolicy('test_backoff', max_retries=50, budget=1000)
+  deadlock = RETRY_CLASSES['deadlock']
+  last = deadlock.base
+  for _ in range(20):
+    delay = policy.backoff(op_error(1213))
+    assert deadlock.base <= delay <= min(deadlock.cap, 3 * last)
+    last = delay
+  assert policy.retries == 20
+  assert retries('test_backoff', 'deadlock') == 20
+
+  #classes back off independently
+  lock_wait = RETRY_CLASSES['lock_wait']
+  assert lock_wait.base <= policy.backoff(op_error(1205)) <= 3 * lock_wait.base
+
+  #fatal errors are never retried, unknown ones only a few times
+  assert policy.backoff(op_error(1064)) is None
+  assert retries('test_backoff', 'fatal', gave_up=True) == 1
+  for _ in range(RETRY_CLASSES['unknown'].max_retries):
+    assert policy.backoff(op_error(1317)) is not None
+  assert policy.backoff(op_error(1317)) is None
+
+
+def test_budget():
+  policy = RetryPolicy('test_budget', max_retries=3, budget=1000)
+  for _ in range(3):
+    assert policy.backoff(op_error(1213)) is not None
+  assert policy.backoff(op_error(1213)) is None
+
+  #the total sleep may not exceed the budget
+  policy = RetryPolicy('test_budget', max_retries=100, budget=5)
+  while policy.backoff(op_error(2013)) is not None:
+    pass
+  assert policy.slept <= 5
+  assert retries('test_budget', 'connection', gave_up=True) == 1
+
+
+def test_wait():
+  policy = RetryPolicy('test_wait', budget=0.5)
+  assert policy.wait(op_error(1213))
+  assert not policy.wait(op_error(1146))
@@ -25,6 +25,7 @@
 ###############################################################################
 
 import os
+import gzip
 import sys
 
 sys.path.append("../tuna")
@@ -43,12 +44,24 @@ from tuna.rocmlir.rocmlir_tables import SessionRocMLIR, ConvolutionJob, RocMLIRD
 from tuna.rocmlir.load_job import add_jobs
 from tuna.rocmlir.import_configs import import_cfgs
 from tuna.rocmlir.config_type import ConfigType
-from tuna.rocmlir.rocmlir_worker import RocMLIRWorker
+from tuna.rocmlir.rocmlir_worker import RocMLIRWorker, parse_batch_output
+from tuna.rocmlir.rocmlir_worker import match_batch_results
+from tuna.utils.metadata import MAX_JOB_RETRIES
 
 SAMPLE_CONV_CONFIGS = """
 -F 1 -n 256 -c 1024 -H 14 -W 14 -k 2048 -y 1 -x 1 -p 0 -q 0 -u 2 -v 2 -l 1 -j 1 -m conv -g 1 -t 1
 """
 
+#stands in for rocMLIR's bin/tuningRunner.py, one TSV line per config
+STUB_BATCH_RUNNER = """
+import sys
+fname = [a.split('=', 1)[1] for a in sys.argv if a.startswith('--configs_file=')][0]
+print("# arch\\tnumCUs\\ttestVector\\tperfConfig\\tTFlops")
+with open(fname) as f:
+  for config in f.read().splitlines():
+    print(f"gfx908\\t12\\t{config}\\tv2:64,64,8,16,16,4,1,1,1\\t42.0")
+"""
+
 
 def test_rocmlir():
   logger = setup_logger('test_rocmlir')
@@ -70,6 +83,7 @@ def test_rocmlir():
   rocmlir.args.init_session = True
   rocmlir.args.label = 'test_rocmlir'
   rocmlir.args.load_factor = 1
+  rocmlir.args.batch_size = 1
   rocmlir.args.config_type = ConfigType.convolution
   # Fake up a machine.  CI doesn't give access to GPU, thus no arch info.
   machine = Machine(hostname="test",
@@ -117,3 +131,108 @@ def test_rocmlir():
     #assert len(res) == 6, f"Should be 6 'error' jobs and there are {len(res)}"
 
   return True
+
+
+def test_rocmlir_batch(tmp_path, monkeypatch):
+  out = "# arch\tnumCUs\ttestVector\tperfConfig\tTFlops\n"\
+        "gfx908\t12\t-t f32 -m 1\tv2:1,2\t1.5\n"\
+        "gfx908\t12\t-t f16 -m 1\tv2:3,4\t-inf\n"
+  rows = parse_batch_output(out)
+  assert rows == [('-t f32 -m 1', 'v2:1,2', '1.5'),
+                  ('-t f16 -m 1', 'v2:3,4', '-inf')]
+  #jobs with the same config each get their own row, whitespace is ignored
+  assert match_batch_results([(1, '-t f32  -m 1'), (2, '-t f16 -m 1'),
+                              (3, '-t f32 -m 1')], rows + rows[:1]) == {
+                                  1: ('v2:1,2', '1.5'),
+                                  2: ('v2:3,4', '-inf'),
+                                  3: ('v2:1,2', '1.5')
+                              }
+
+  logger = setup_logger('test_rocmlir_batch')
+  dbt = RocMLIRDBTables(session_id=None, config_type=ConfigType.convolution)
+
+  rocmlir = RocMLIR()
+  assert rocmlir.add_tables()
+  clear_tables(ConfigType.convolution)
+
+  cfg_file = os.path.join(tmp_path, "test-conv-configs")
+  with open(cfg_file, 'w') as f:
+    f.write(SAMPLE_CONV_CONFIGS)
+  args = CfgImportArgs
+  args.file_name = cfg_file
+  assert import_cfgs(args, dbt, logger) == 6
+
+  rocmlir.args = ExampleArgs()
+  rocmlir.args.init_session = True
+  rocmlir.args.label = 'test_rocmlir_batch'
+  rocmlir.args.load_factor = 1
+  rocmlir.args.batch_size = 4
+  rocmlir.args.config_type = ConfigType.convolution
+  machine = Machine(hostname="test",
+                    local_machine=True,
+                    arch='gfx908',
+                    arch_full='gfx908',
+                    num_cu=12,
+                    avail_gpus=[0])
+  worker = RocMLIRWorker(config_type=rocmlir.args.config_type,
+                         session_id=None,
+                         machine=machine,
+                         num_procs=Value('i', 0))
+  session_id = SessionRocMLIR().add_new_session(rocmlir.args, worker)
+
+  rocmlir.args.init_session = False
+  rocmlir.args.session_id = session_id
+  rocmlir.args.execute = True
+  rocmlir.args.config = 1
+  assert add_jobs(rocmlir.args, dbt) == 6
+
+  os.makedirs(os.path.join(tmp_path, 'bin'))
+  with open(os.path.join(tmp_path, 'bin', 'tuningRunner.py'), 'w') as f:
+    f.write(STUB_BATCH_RUNNER)
+  monkeypatch.chdir(tmp_path)
+
+  #a job out of retries is not claimed
+  with DbSession() as session:
+    retry_job = session.query(ConvolutionJob)\
+        .filter(ConvolutionJob.session == session_id)\
+        .order_by(ConvolutionJob.id).first()
+    retry_id = retry_job.id
+    retry_job.retries = MAX_JOB_RETRIES
+    session.commit()
+
+  worker = RocMLIRWorker(config_type=ConfigType.convolution,
+                         session_id=session_id,
+                         machine=machine,
+                         gpu_id=0,
+                         label='test_rocmlir_batch',
+                         batch_size=4,
+                         num_procs=Value('i', 0))
+  #two calls of 4 and 1 configs
+  assert worker.step()
+  assert worker.step()
+
+  with DbSession() as session:
+    count = session.query(ConvolutionJob).filter(ConvolutionJob.session==session_id)\
+                                         .filter(ConvolutionJob.state=='completed').count()
+    assert count == 5
+    retry_job = session.query(ConvolutionJob)\
+        .filter(ConvolutionJob.id == retry_id).one()
+    assert retry_job.state == 'new'
+    rdbt = RocMLIRDBTables(session_id=session_id,
+                           config_type=ConfigType.convolution)
+    res = session.query(
+        rdbt.results).filter(rdbt.results.session == session_id).all()
+    assert len(res) == 5
+    assert all(row.perf_config == 'v2:64,64,8,16,16,4,1,1,1' for row in res)
+
+  #testing export_as_tsv on the batch results
+  tsv_file = os.path.join(tmp_path, 'results.tsv.gz')
+  assert rdbt.results().export_as_tsv(tsv_file, rdbt, best_only=True) == 5
+  with gzip.open(tsv_file, 'rt') as f:
+    lines = f.read().splitlines()
+  assert lines[0].startswith('# arch')
+  assert len(lines) == 6
+  assert all(line.split('\t')[1] == '104' for line in lines[1:])
+  assert rdbt.results().export_as_tsv(os.path.join(tmp_path, 'none.tsv'),
+                                      rdbt,
+                                      arch='gfx000') == 0
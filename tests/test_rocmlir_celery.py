@@ -0,0 +1,210 @@
+###############################################################################
+#
+# MIT License
+#
+# Copyright (c) 2024 Advanced Micro Devices, Inc.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+###############################################################################
+
+import os
+import sys
+import copy
+import json
+
+sys.path.append("../tuna")
+sys.path.append("tuna")
+
+this_path = os.path.dirname(__file__)
+
+from utils import ExampleArgs, CfgImportArgs
+from multiprocessing import Value
+
+from tuna.utils.logger import setup_logger
+from tuna.libraries import Operation
+from tuna.machine import Machine
+from tuna.dbBase.sql_alchemy import DbSession
+from tuna.rocmlir.rocmlir_lib import RocMLIR
+from tuna.rocmlir.rocmlir_tables import SessionRocMLIR, ConvolutionJob, JobEnum
+from tuna.rocmlir.rocmlir_tables import RocMLIRDBTables, clear_tables
+from tuna.rocmlir.load_job import add_jobs
+from tuna.rocmlir.import_configs import import_cfgs
+from tuna.rocmlir.config_type import ConfigType
+from tuna.rocmlir.rocmlir_worker import RocMLIRWorker
+from tuna.rocmlir.celery_tuning.celery_tasks import prep_worker
+from tuna.utils.db_utility import gen_select_objs
+
+SAMPLE_CONV_CONFIGS = """
+-F 1 -n 256 -c 1024 -H 14 -W 14 -k 2048 -y 1 -x 1 -p 0 -q 0 -u 2 -v 2 -l 1 -j 1 -m conv -g 1 -t 1
+"""
+
+#stands in for rocMLIR's bin/tuningRunner.py, echoes the config it was given
+STUB_TUNING_RUNNER = """
+import sys
+config = [a.split('=', 1)[1] for a in sys.argv if a.startswith('--config=')][0]
+print(f"gfx908\\t12\\t{config}\\tv2:64,64,8,16,16,4,1,1,1\\t42.0")
+"""
+
+
+def test_rocmlir_celery(tmp_path, monkeypatch):
+  logger = setup_logger('test_rocmlir_celery')
+  dbt = RocMLIRDBTables(session_id=None, config_type=ConfigType.convolution)
+
+  rocmlir = RocMLIR()
+  assert rocmlir.add_tables()
+  clear_tables(ConfigType.convolution)
+
+  cfg_file = os.path.join(tmp_path, "test-conv-configs")
+  with open(cfg_file, 'w') as f:
+    f.write(SAMPLE_CONV_CONFIGS)
+  args = CfgImportArgs
+  args.file_name = cfg_file
+  count = import_cfgs(args, dbt, logger)
+  assert count == 6
+
+  rocmlir.args = ExampleArgs()
+  rocmlir.args.init_session = True
+  rocmlir.args.label = 'test_rocmlir_celery'
+  rocmlir.args.load_factor = 1
+  rocmlir.args.config_type = ConfigType.convolution
+  rocmlir.args.tuning_space = 'quick'
+  # Fake up a machine.  CI doesn't give access to GPU, thus no arch info.
+  machine = Machine(hostname="test",
+                    local_machine=True,
+                    arch='gfx908',
+                    arch_full='gfx908',
+                    num_cu=12,
+                    avail_gpus=[0])
+  worker = RocMLIRWorker(config_type=rocmlir.args.config_type,
+                         session_id=None,
+                         machine=machine,
+                         num_procs=Value('i', 0))
+  session_id = SessionRocMLIR().add_new_session(rocmlir.args, worker)
+
+  rocmlir.args.init_session = False
+  rocmlir.args.session_id = session_id
+  rocmlir.args.config = 1
+  num_jobs = add_jobs(rocmlir.args, dbt)
+  assert num_jobs == 6
+
+  rocmlir.args.tune = True
+  rocmlir.args.shutdown_workers = False
+  rocmlir.args.enqueue_only = True
+  rocmlir.dbt = RocMLIRDBTables(session_id=session_id,
+                                config_type=ConfigType.convolution)
+  rocmlir.db_name = "test_db"
+
+  #testing update_operation, set_prefix and has_tunable_operation
+  rocmlir.update_operation()
+  assert rocmlir.operation == Operation.EVAL
+  assert 'new' in rocmlir.fetch_state
+  assert rocmlir.set_state == 'running'
+  rocmlir.set_prefix()
+  assert rocmlir.prefix == f"d_test_db_sess_{session_id}_convolution"
+  assert rocmlir.has_tunable_operation()
+
+  #testing get_jobs, jobs are claimed in a single batch
+  with DbSession() as session:
+    jobs = rocmlir.get_jobs(session, rocmlir.fetch_state, rocmlir.set_state,
+                            session_id, 10)
+    assert len(jobs) == num_jobs
+    assert not rocmlir.get_jobs(session, rocmlir.fetch_state, rocmlir.set_state,
+                                session_id, 10)
+
+    #testing reset_job_state_on_ctrl_c
+    assert rocmlir.reset_job_state_on_ctrl_c()
+    count = session.query(ConvolutionJob).filter(ConvolutionJob.session==session_id)\
+                                         .filter(ConvolutionJob.state=='new').count()
+    assert count == num_jobs
+
+    #invalidated jobs are not claimed
+    invalid = session.query(ConvolutionJob).filter(ConvolutionJob.session==session_id)\
+                                           .order_by(ConvolutionJob.id).first()
+    invalid.valid = 0
+    session.commit()
+    jobs = rocmlir.get_jobs(session, rocmlir.fetch_state, rocmlir.set_state,
+                            session_id, 10)
+    assert len(jobs) == num_jobs - 1
+    assert invalid.id not in [job.id for job in jobs]
+    assert rocmlir.reset_job_state_on_ctrl_c()
+    invalid.valid = 1
+    session.commit()
+
+    jobs = rocmlir.get_jobs(session, rocmlir.fetch_state, rocmlir.set_state,
+                            session_id, 10)
+    #testing serialize_jobs, build_context and get_context_list
+    serialized_jobs = rocmlir.serialize_jobs(session, jobs)
+    assert len(serialized_jobs) == num_jobs
+    assert rocmlir.build_context(serialized_jobs)
+    context_list = rocmlir.get_context_list(session, jobs)
+    assert len(context_list) == num_jobs
+  assert rocmlir.get_context_items()['config_type'] == 'convolution'
+  #the context is sent as json
+  assert json.loads(json.dumps(context_list, default=str))
+
+  #run the celery task body against a stub tuningRunner.py
+  os.makedirs(os.path.join(tmp_path, 'bin'))
+  with open(os.path.join(tmp_path, 'bin', 'tuningRunner.py'), 'w') as f:
+    f.write(STUB_TUNING_RUNNER)
+  monkeypatch.chdir(tmp_path)
+
+  res_set = []
+  for context in context_list:
+    context['kwargs']['gpu_id'] = 0
+    context['job']['gpu_id'] = 0
+    worker = prep_worker(copy.deepcopy(context))
+    ret = worker.run()
+    assert ret['retcode'] == 0
+    assert context['config']['id'] is not None
+    res_set.append((ret, context))
+
+  #testing process_eval_results
+  with DbSession() as session:
+    for ret, context in res_set:
+      assert rocmlir.process_eval_results(session, ret, context)
+    count = session.query(ConvolutionJob).filter(ConvolutionJob.session==session_id)\
+                                         .filter(ConvolutionJob.state=='completed').count()
+    assert count == num_jobs
+    count = session.query(
+        dbt.results).filter(dbt.results.session == session_id).count()
+    assert count == num_jobs
+
+  #a failing run is recorded as an error
+  with DbSession() as session:
+    _, context = res_set[0]
+    assert not rocmlir.process_eval_results(session, {
+        'retcode': 1,
+        'output': "can't run: missing GPU"
+    }, context)
+    count = session.query(ConvolutionJob).filter(ConvolutionJob.session==session_id)\
+                                         .filter(ConvolutionJob.state=='error').count()
+    assert count == 1
+
+  #a claimed job without a config is failed instead of left claimed
+  with DbSession() as session:
+    job = gen_select_objs(session, rocmlir.get_job_attr(),
+                          ConvolutionJob.__tablename__,
+                          f"WHERE id={context['job']['id']}")[0]
+    job.config = -1
+    assert not rocmlir.serialize_jobs(session, [job])
+    row = session.query(ConvolutionJob).filter(
+        ConvolutionJob.id == job.id).one()
+    assert row.state == JobEnum.error
+    assert row.result == 'Config -1 not found'
@@ -0,0 +1,230 @@
+###############################################################################
+#
+# MIT License
+#
+# Copyright (c) 2022 Advanced Micro Devices, Inc.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+###############################################################################
+
+import logging
+import threading
+import pytest
+from sqlalchemy import event
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import QueuePool
+
+from tuna.dbBase.base_class import BASE
+from tuna.dbBase.sql_alchemy import DbSession
+from tuna.db_engine import ENGINE, SESSION_FACTORY, use_engine_pool
+from tuna.dbBase.dialect import create_db_engine, claim_lock, days_ago
+from tuna.miopen.db.tables import ConvolutionJob, ConvolutionGolden
+from tuna.miopen.db.convolutionjob_tables import (ConvolutionConfig,
+                                                  ConvolutionConfigTags,
+                                                  ConvSolverApplicability)
+from tuna.miopen.worker.fin_class import query_app_cfgs, count_app_cfgs
+from tuna.utils.utility import SimpleDict
+from tuna.miopen.db.mixin_tables import FinStep, fin_step_bit, fin_step_cond
+from tuna.miopen.subcmd.update_golden import (gold_session_update,
+                                              gold_base_update, set_watermark,
+                                              get_watermark,
+                                              golden_change_report)
+from tuna.utils.db_utility import get_job_rows, gen_update_query
+from utils import build_fdb_entry
+
+logger = logging.getLogger("sqlite_backend_test_logger")
+JOB_TABLE = ConvolutionJob.__tablename__
+
+
+@pytest.fixture(name='db_session')
+def fixture_db_session(tmp_path, monkeypatch):
+  monkeypatch.setenv('TUNA_DB_BACKEND', 'sqlite')
+  engine = create_db_engine(f"sqlite:///{tmp_path / 'tuna.db'}")
+  #the tests fill single tables without their referenced rows
+  event.listen(engine, 'connect',
+               lambda conn, _rec: conn.execute('PRAGMA foreign_keys=OFF'))
+  BASE.metadata.create_all(engine)
+  session = sessionmaker(bind=engine)()
+  session.execute("insert into session (id, arch, num_cu, miopen_v, rocm_v,"
+                  " reason, docker) values (1, 'gfx908', 120, '1',"
+                  " '1', 'pytest_sqlite', 'docker')")
+  session.commit()
+  yield session
+  session.close()
+  engine.dispose()
+
+
+def add_jobs(session, fin_steps):
+  for idx, fin_step in enumerate(fin_steps):
+    session.execute(
+        f"insert into {JOB_TABLE} (session, config, solver, state, reason,"
+        f" fin_step) values (1, 1, 'solver_{idx}', 'new', 'pytest_sqlite',"
+        f" '{fin_step}')")
+  session.commit()
+
+
+def test_fin_step_mask(db_session):
+  add_jobs(db_session, [
+      'not_fin', 'miopen_find_eval', 'miopen_find_compile,miopen_perf_compile'
+  ])
+  rows = db_session.execute(
+      f"select fin_step, fin_step_mask from {JOB_TABLE} order by id").fetchall(
+      )
+  for fin_step, mask in rows:
+    assert mask == sum(fin_step_bit(step) for step in fin_step.split(','))
+  assert len(FinStep) == 9
+
+  cond = f"WHERE {fin_step_cond(['miopen_find_compile'])} and state='new'"
+  ret = get_job_rows(db_session, ['id', 'fin_step'], JOB_TABLE,
+                     f"{cond} LIMIT 5 FOR UPDATE SKIP LOCKED")
+  assert [row[1] for row in ret] == ['miopen_find_compile,miopen_perf_compile']
+  db_session.commit()
+
+
+def test_claim_lock(db_session, tmp_path):
+  cond = "WHERE state='new' LIMIT 5 FOR UPDATE SKIP LOCKED"
+  assert claim_lock(db_session, JOB_TABLE, cond) == "WHERE state='new' LIMIT 5"
+  assert claim_lock(db_session, JOB_TABLE, "WHERE id=1") == "WHERE id=1"
+
+  #a second claim waits until the first transaction commits
+  assert 'database is locked' in claim_in_thread(tmp_path, cond)
+  db_session.commit()
+  assert claim_in_thread(tmp_path, cond) == 'claimed'
+
+
+def claim_in_thread(tmp_path, cond):
+  """claim with a connection of its own in another thread, without waiting
+  for locks"""
+  result = []
+
+  def claim():
+    engine = create_db_engine(f"sqlite:///{tmp_path / 'tuna.db'}")
+    other = sessionmaker(bind=engine)()
+    other.execute('PRAGMA busy_timeout=0')
+    try:
+      claim_lock(other, JOB_TABLE, cond)
+      other.commit()
+      result.append('claimed')
+    except OperationalError as err:
+      result.append(str(err))
+      other.rollback()
+    other.close()
+    engine.dispose()
+
+  thread = threading.Thread(target=claim)
+  thread.start()
+  thread.join()
+  return result[0]
+
+
+def test_update_ts(db_session):
+  add_jobs(db_session, ['not_fin'])
+  db_session.execute(f"update {JOB_TABLE} set update_ts='2000-01-01 00:00:00'")
+  db_session.commit()
+  job = db_session.query(ConvolutionJob).first()
+  assert str(job.update_ts).startswith('2000-01-01')
+
+  job.state = 'compiling'
+  db_session.execute(gen_update_query(job, ['state'], JOB_TABLE))
+  db_session.commit()
+  db_session.refresh(job)
+  assert job.state.name == 'compiling'
+  assert not str(job.update_ts).startswith('2000-01-01')
+  old = db_session.execute(
+      f"select count(*) from {JOB_TABLE} where update_ts < {days_ago(1)}")
+  assert old.scalar() == 0
+
+
+def test_update_golden(db_session):
+  db_session.add(build_fdb_entry(1))
+  db_session.commit()
+
+  assert gold_session_update(db_session, 1, 1, logger)
+  assert golden_change_report(db_session, 1, 1)['new'] == 0
+  db_session.execute("update conv_find_db set params='param2'")
+  db_session.commit()
+  assert golden_change_report(db_session, 1, 1)['changed'] == 1
+
+  assert gold_session_update(db_session, 1, 1, logger)
+  gold = db_session.query(ConvolutionGolden).all()
+  assert len(gold) == 1 and gold[0].params == 'param2'
+
+  assert gold_base_update(db_session, 2, 1, logger, True)
+  assert gold_base_update(db_session, 2, 1, logger, True)
+  gold = db_session.query(ConvolutionGolden).filter(
+      ConvolutionGolden.golden_miopen_v == 2).all()
+  assert len(gold) == 1 and gold[0].params == 'param2'
+
+  assert set_watermark(db_session, 1, 1, '2020-01-01 00:00:00', 3, logger)
+  assert set_watermark(db_session, 1, 1, '2021-01-01 00:00:00', 2, logger)
+  db_session.commit()
+  assert str(get_watermark(db_session, 1, 1)).startswith('2021-01-01')
+  merged = db_session.execute("select merged_rows from conv_golden_watermark")
+  assert merged.scalar() == 5
+
+  #the merge records the mark of the rows it merged and how many it wrote
+  db_session.execute("update conv_find_db set update_ts='2022-01-01 00:00:00'")
+  assert gold_session_update(db_session, 3, 1, logger, watermark=True)
+  assert str(get_watermark(db_session, 3, 1)).startswith('2022-01-01')
+  merged = db_session.execute("select merged_rows from conv_golden_watermark"
+                              " where golden_miopen_v=3")
+  assert merged.scalar() == 1
+
+
+def test_engine_pool(db_session, tmp_path, monkeypatch):
+  monkeypatch.setenv('TUNA_DB_SQLITE_PATH', str(tmp_path / 'tuna.db'))
+  use_engine_pool(2)
+  try:
+    engine = SESSION_FACTORY.kw['bind']
+    assert isinstance(engine.pool, QueuePool)
+    assert engine.pool.size() == 2
+    for _ in range(3):
+      with DbSession() as session:
+        assert session.execute('select count(*) from session').scalar() == 1
+    #sessions return their connection to the pool instead of closing it
+    assert engine.pool.checkedin() == 1
+  finally:
+    SESSION_FACTORY.configure(bind=ENGINE)
+
+
+def test_count_app_cfgs(db_session):
+  dbt = SimpleDict(config_table=ConvolutionConfig,
+                   config_tags_table=ConvolutionConfigTags,
+                   solver_app=ConvSolverApplicability)
+  for cfg in range(1, 5):
+    db_session.execute(
+        "insert into conv_config (id, direction, input_tensor, weight_tensor,"
+        f" md5) values ({cfg}, 'F', 1, 1, 'md5_{cfg}')")
+    db_session.execute("insert into conv_config_tags (config, tag) values"
+                       f" ({cfg}, 'pytest_sqlite')")
+  #config 1 has applicability, config 2 was updated after it was set
+  for cfg in (1, 2):
+    db_session.execute("insert into conv_solver_applicability (config, solver,"
+                       f" session) values ({cfg}, 1, 1)")
+  db_session.execute("update conv_config set update_ts=datetime('now', '+1"
+                     " day') where id=2")
+  db_session.commit()
+
+  delta = query_app_cfgs(db_session, dbt, 1, 'pytest_sqlite', delta=True)
+  assert [cfg.id for cfg in delta] == [2, 3, 4]
+  assert count_app_cfgs(db_session, dbt, 1, 'pytest_sqlite') == (4, 3)
+  assert count_app_cfgs(db_session, dbt, 1) == (4, 3)
+  assert count_app_cfgs(db_session, dbt, 2) == (4, 4)
@@ -0,0 +1,114 @@
+###############################################################################
+#
+# MIT License
+#
+# Copyright (c) 2022 Advanced Micro Devices, Inc.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+###############################################################################
+
+import sqlite3
+import pytest
+
+from tuna.miopen.utils.metadata import SQLITE_CONFIG_COLS
+from tuna.miopen.utils.sqlite_reader import SQLiteReader, KDB_KEYS, PDB_KEYS
+from tuna.miopen.subcmd.merge_db import merge_sqlite_pdb
+
+KDB_COLS = ['kernel_name', 'kernel_args']
+
+
+def make_kdb(path, count):
+  cnx = sqlite3.connect(path)
+  cnx.execute("CREATE TABLE kern_db (id INTEGER PRIMARY KEY ASC,"
+              " kernel_name TEXT NOT NULL, kernel_args TEXT NOT NULL,"
+              " kernel_blob BLOB NOT NULL, kernel_hash TEXT NOT NULL,"
+              " uncompressed_size INT NOT NULL);")
+  cnx.executemany(
+      "INSERT INTO kern_db (kernel_name, kernel_args, kernel_blob,"
+      " kernel_hash, uncompressed_size) VALUES (?, ?, ?, ?, ?)",
+      [(f'kern_{idx % 7}.o', f'-DIDX={idx}', bytes([idx % 256]) * 16,
+        f'hash_{idx}', 16) for idx in range(count)])
+  cnx.commit()
+  cnx.close()
+
+
+def make_pdb(path, cfgs, solver, params):
+  cols = ', '.join(f'{col} {"TEXT" if idx < 3 else "INT"} NOT NULL'
+                   for idx, col in enumerate(SQLITE_CONFIG_COLS))
+  cnx = sqlite3.connect(path)
+  cnx.execute(f"CREATE TABLE config (id INTEGER PRIMARY KEY ASC, {cols})")
+  cnx.execute("CREATE TABLE perf_db (id INTEGER PRIMARY KEY ASC,"
+              " solver TEXT NOT NULL, config INTEGER NOT NULL,"
+              " params TEXT NOT NULL)")
+  cnx.execute(f"CREATE UNIQUE INDEX idx_config ON config"
+              f" ({', '.join(SQLITE_CONFIG_COLS)})")
+  cnx.execute("CREATE UNIQUE INDEX idx_perf_db ON perf_db(solver, config)")
+  for batchsize in cfgs:
+    vals = ['NCHW', 'F', 'FP32', 2] + [1] * (len(SQLITE_CONFIG_COLS) - 4)
+    vals[SQLITE_CONFIG_COLS.index('batchsize')] = batchsize
+    cur = cnx.execute(
+        f"INSERT INTO config ({', '.join(SQLITE_CONFIG_COLS)})"
+        f" VALUES ({', '.join(['?'] * len(vals))})", vals)
+    cnx.execute("INSERT INTO perf_db (solver, config, params) VALUES (?, ?, ?)",
+                (solver, cur.lastrowid, f'{params}_{batchsize}'))
+  cnx.commit()
+  cnx.close()
+
+
+def test_kdb_lookup(tmp_path):
+  path = str(tmp_path / 'gfx90a68.kdb')
+  make_kdb(path, 100)
+
+  with SQLiteReader(path, build_index=False) as reader:
+    assert not reader.has_index('kern_db', KDB_COLS)
+  with SQLiteReader(path, KDB_KEYS) as reader:
+    assert reader.has_index('kern_db', KDB_COLS)
+    keys = [(f'kern_{idx % 7}.o', f'-DIDX={idx}') for idx in (5, 50, 99)]
+    found = reader.get_many('kern_db',
+                            KDB_COLS,
+                            keys + [('kern_0.o', '-DIDX=1000')],
+                            ['kernel_hash', 'kernel_blob'],
+                            batch=2)
+    assert sorted(found) == sorted(keys)
+    assert found[keys[1]] == ('hash_50', bytes([50]) * 16)
+    assert reader.get('kern_db', ['id'], 1, ['kernel_hash']) == ('hash_0',)
+
+    rows = list(reader.scan('kern_db', ['id'], 'kernel_name=?', ['kern_3.o']))
+    assert len(rows) == len(range(3, 100, 7))
+    assert len(list(reader.scan('kern_db', batch=7))) == 100
+
+    #opened read-only
+    with pytest.raises(sqlite3.OperationalError):
+      reader.cnx.execute("DELETE FROM kern_db")
+
+
+def test_merge_pdb(tmp_path):
+  dst, src = str(tmp_path / 'dst.db'), str(tmp_path / 'src.db')
+  make_pdb(dst, [1, 2], 'ConvA', 'old')
+  make_pdb(src, [2, 3, 4], 'ConvA', 'new')
+  with SQLiteReader(src, PDB_KEYS) as reader:
+    assert reader.has_index('config', SQLITE_CONFIG_COLS)
+
+  cnx = sqlite3.connect(dst)
+  merge_sqlite_pdb(cnx, [src])
+  rows = cnx.execute("SELECT c.batchsize, p.params FROM perf_db p"
+                     " JOIN config c ON c.id=p.config ORDER BY 1").fetchall()
+  cnx.close()
+  assert rows == [(1, 'old_1'), (2, 'new_2'), (3, 'new_3'), (4, 'new_4')]
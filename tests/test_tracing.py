@@ -0,0 +1,102 @@
+###############################################################################
+#
+# MIT License
+#
+# Copyright (c) 2022 Advanced Micro Devices, Inc.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+###############################################################################
+
+import time
+from celery.app.task import Context
+from opentelemetry.sdk.trace.export.in_memory_span_exporter import InMemorySpanExporter
+
+from tuna.utils.celery_utils import run_worker
+from tuna.utils.tracing import setup_tracing, span, traced, trace_headers
+from tuna.utils.tracing import request_headers
+
+EXPORTER = InMemorySpanExporter()
+setup_tracing(EXPORTER)
+
+
+class DummyWorker():
+
+  @traced('worker.step')
+  def run(self):
+    time.sleep(0.01)
+    return True
+
+
+class DummyTask():
+
+  def __init__(self, headers):
+    #celery puts custom message headers on the task request
+    self.request = Context(id='task-1', task='celery_enqueue', **headers)
+
+
+def finished(name):
+  return [item for item in EXPORTER.get_finished_spans() if item.name == name]
+
+
+def test_job_trace():
+  EXPORTER.clear()
+  context = {'job': {'id': 7}, 'operation': 'compile', 'kwargs': {}}
+
+  with span('enqueue_jobs', queue='q'):
+    with span('celery_enqueue_call', queue='q', job=7):
+      headers = trace_headers()
+  assert 'traceparent' in headers
+
+  task = DummyTask(headers)
+  assert request_headers(task.request) == headers
+  result = run_worker(task, context, lambda ctx: DummyWorker())
+  assert result['ret'] and result['context'] == context
+
+  with span('parse_result', result['trace']):
+    with span('process_results'):
+      pass
+
+  enqueue, = finished('enqueue_jobs')
+  call, = finished('celery_enqueue_call')
+  task_span, = finished('celery_enqueue')
+  step, = finished('worker.step')
+  parse, = finished('parse_result')
+  process, = finished('process_results')
+
+  assert len({item.context.trace_id for item in EXPORTER.get_finished_spans()
+             }) == 1
+  assert call.parent.span_id == enqueue.context.span_id
+  assert task_span.parent.span_id == call.context.span_id
+  assert step.parent.span_id == task_span.context.span_id
+  assert parse.parent.span_id == task_span.context.span_id
+  assert process.parent.span_id == parse.context.span_id
+  assert task_span.attributes['job'] == 7
+  assert step.end_time - step.start_time >= 10**7
+
+
+def test_span_attributes():
+  EXPORTER.clear()
+
+  with span('no_parent', None, job=None, queue='q'):
+    pass
+
+  item, = finished('no_parent')
+  assert item.parent is None
+  assert dict(item.attributes) == {'queue': 'q'}
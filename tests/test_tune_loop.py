@@ -0,0 +1,93 @@
+###############################################################################
+#
+# MIT License
+#
+# Copyright (c) 2022 Advanced Micro Devices, Inc.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+###############################################################################
+
+import json
+import asyncio
+
+import fakeredis
+from fakeredis import aioredis as fake_aioredis
+
+from tuna.mituna_interface import MITunaInterface
+from tuna.celery_app.backpressure import Backpressure, result_backlog
+from tuna.tune_loop import AsyncTuneLoop
+from tuna.utils.utility import SimpleDict
+
+
+class StubLib(MITunaInterface):
+  """Hands out jobs in batches, its celery tasks answer immediately"""
+
+  def __init__(self, num_jobs, batch_size):
+    super().__init__()
+    self.server = fakeredis.FakeServer()
+    self.backend = fakeredis.FakeStrictRedis(server=self.server)
+    self.args = SimpleDict(session_id=1)
+    self.prefix = 'stub'
+    self.set_state = 'eval_start'
+    self.jobs = list(range(num_jobs))
+    self.batch_size = batch_size
+    self.stored = []
+    self.done = False
+
+  def get_jobs(self, session, find_state, set_state, session_id, claim_num):
+    batch, self.jobs = self.jobs[:self.batch_size], self.jobs[self.batch_size:]
+    return batch
+
+  def get_context_list(self, session, batch_jobs):
+    return [{'job': job} for job in batch_jobs]
+
+  def celery_enqueue_call(self, context, q_name, task_id=False):
+    self.backend.set(f"celery-task-meta-stub-{context['job']}",
+                     json.dumps({'result': context}))
+
+  def get_backpressure(self, q_name, job_batch_size):
+    #results are written on enqueue, nothing waits in a broker
+    return Backpressure(lambda: 0,
+                        lambda: result_backlog('stub', self.backend),
+                        job_batch_size,
+                        low_water=15)
+
+  async def get_redis(self):
+    return fake_aioredis.FakeRedis(server=self.server)
+
+  def store_result(self, data):
+    self.stored.append(json.loads(data)['result']['job'])
+
+  def consume_done(self):
+    self.done = True
+
+
+def test_tune_loop(monkeypatch, tmp_path):
+  monkeypatch.setenv('TUNA_SPOOL_DIR', str(tmp_path))
+  lib = StubLib(25, 10)
+  lib.backend.set('celery-task-meta-stub-stale', json.dumps({'result': {}}))
+  loop = AsyncTuneLoop(lib, 'stub_q', 10, queue_size=4, poll_interval=0.1)
+  asyncio.run(loop.run())
+
+  #the stale result is cleaned up, every job stored once
+  assert sorted(lib.stored) == list(range(25))
+  assert lib.done
+  assert loop.pending == 0
+  assert not lib.backend.keys('*')
@@ -28,11 +28,12 @@ import sys
 import logging
 from tuna.miopen.subcmd.update_golden import (
     arg_update_golden, get_golden_query, gold_base_update, gold_session_update,
-    create_perf_table, verify_no_duplicates, latest_golden_v)
+    create_perf_table, verify_no_duplicates, latest_golden_v, run_update_golden,
+    get_watermark)
 from tuna.miopen.db.tables import MIOpenDBTables
 from tuna.dbBase.sql_alchemy import DbSession
 from tuna.miopen.utils.config_type import ConfigType
-from tuna.miopen.db.convolutionjob_tables import ConvolutionGolden
+from tuna.miopen.db.convolutionjob_tables import ConvolutionGolden, ConvGoldenWatermark
 from tuna.miopen.db.find_db import ConvolutionFindDB
 from utils import add_test_session, DummyArgs, build_fdb_entry
 
@@ -116,5 +117,64 @@ def test_update_golden():
   assert create_perf_table(args, logger)
 
 
+def test_update_golden_incremental():
+  inc_session = add_test_session(arch='gfx908',
+                                 num_cu=120,
+                                 label='pytest_update_golden_inc')
+  with DbSession() as session:
+    session.add(build_fdb_entry(inc_session))
+    session.commit()
+
+  inc_args = DummyArgs()
+  inc_args.session_id = inc_session
+  inc_args.config_type = ConfigType.convolution
+  inc_args.golden_v = latest_golden_v(dbt, logger) + 1
+  inc_args.base_golden_v = None
+  inc_args.overwrite = False
+  inc_args.create_perf_table = False
+  inc_args.incremental = True
+
+  #nothing merged yet, the report sees the whole session
+  inc_args.report = True
+  changes = run_update_golden(inc_args, logger)
+  assert changes['new'] == 1 and changes['changed'] == 0
+
+  inc_args.report = False
+  assert run_update_golden(inc_args, logger)
+  with DbSession() as session:
+    assert get_watermark(session, inc_args.golden_v, inc_session)
+    res = session.query(ConvolutionGolden)\
+                    .filter(ConvolutionGolden.golden_miopen_v == inc_args.golden_v)\
+                    .filter(ConvolutionGolden.session == inc_session).all()
+    assert len(res) == 1
+
+    session.query(ConvolutionFindDB)\
+        .filter(ConvolutionFindDB.session == inc_session)\
+        .update({ConvolutionFindDB.params: 'param2'})
+    session.commit()
+
+  inc_args.report = True
+  changes = run_update_golden(inc_args, logger)
+  assert changes['new'] == 0 and changes['changed'] == 1
+
+  inc_args.report = False
+  assert run_update_golden(inc_args, logger)
+  with DbSession() as session:
+    res = session.query(ConvolutionGolden)\
+                    .filter(ConvolutionGolden.golden_miopen_v == inc_args.golden_v)\
+                    .filter(ConvolutionGolden.session == inc_session).all()
+    assert len(res) == 1
+    assert res[0].params == 'param2'
+    #one row inserted by the first merge, one updated by the second
+    merged = session.query(ConvGoldenWatermark.merged_rows)\
+        .filter(ConvGoldenWatermark.session == inc_session)\
+        .filter(ConvGoldenWatermark.golden_miopen_v == inc_args.golden_v)
+    assert merged.scalar() == 2
+
+  inc_args.report = True
+  changes = run_update_golden(inc_args, logger)
+  assert changes['new'] == 0 and changes['changed'] == 0
+
+
 def copy(dest, src):
   dest.__dict__ = src.__dict__.copy()
@@ -125,6 +125,7 @@ class GoFishArgs():
   config_type = None
   reset_interval = None
   dynamic_solvers_only = False
+  delta_applicability = False
   label = 'pytest'
   docker_name = 'miopentuna'
   ticket = 'N/A'
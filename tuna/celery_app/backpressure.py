@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+
+###############################################################################
+#
+# MIT License
+#
+# Copyright (c) 2024 Advanced Micro Devices, Inc.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+"""Backpressure for the job enqueue. Jobs are only claimed while the tasks
+waiting in the broker queue plus the results waiting in redis stay below a
+low-water mark, and each claim is sized to the observed drain rate so the
+queue holds about a horizon worth of work. Keeps large sessions from locking
+jobs in compile_start/eval_start for hours."""
+
+import time
+from typing import Callable, Optional, TYPE_CHECKING
+
+from tuna.celery_app.celery_app import get_backend_env, queue_depth
+from tuna.utils.logger import setup_logger
+from tuna.utils.lazy_import import lazy_import
+from tuna.utils.metadata import BACKPRESSURE_LOW_WATER, BACKPRESSURE_HIGH_WATER
+from tuna.utils.metadata import BACKPRESSURE_HORIZON, BACKPRESSURE_POLL
+from tuna.utils.metrics import set_queue_depth, set_redis_backlog
+
+if TYPE_CHECKING:
+  import redis
+else:
+  redis = lazy_import('redis')
+
+LOGGER = setup_logger('backpressure')
+
+#weight of the newest drain rate sample
+RATE_ALPHA = 0.3
+
+
+def result_backlog(prefix: Optional[str], client=None) -> int:
+  """Number of celery results in redis not yet consumed"""
+  if client is None:
+    backend_port, backend_host = get_backend_env()
+    client = redis.Redis.from_url(f"redis://{backend_host}:{backend_port}/15")
+  match = f"*{prefix}*" if prefix else "*"
+  return sum(1 for _ in client.scan_iter(match=match, count=1000))
+
+
+class Backpressure():  #pylint: disable=too-many-instance-attributes
+  """Decides when and how many jobs to claim
+  @param depth: returns the number of tasks waiting in the broker queue
+  @param backlog: returns the number of results waiting in redis
+  @param max_batch: largest claim, the job batch size
+  @param low_water: claim only while depth plus backlog is below this
+  @param high_water: a claim never lifts depth plus backlog above this
+  @param horizon: seconds of draining each claim is sized for
+  @param clock: monotonic time source
+  """
+
+  def __init__(self,
+               depth: Callable[[], int],
+               backlog: Callable[[], int],
+               max_batch: int,
+               low_water: int = BACKPRESSURE_LOW_WATER,
+               high_water: int = BACKPRESSURE_HIGH_WATER,
+               horizon: float = BACKPRESSURE_HORIZON,
+               clock: Callable[[], float] = time.monotonic) -> None:
+    self.depth = depth
+    self.backlog = backlog
+    self.max_batch = max_batch
+    self.low_water = low_water
+    self.high_water = max(high_water, low_water)
+    self.horizon = horizon
+    self.clock = clock
+    #drained jobs per second, None until draining has been seen
+    self.rate: Optional[float] = None
+    self.last_time: Optional[float] = None
+    self.last_pending = 0
+    self.enqueued = 0
+
+  def record_enqueued(self, num: int) -> None:
+    """Count jobs enqueued since the last sample"""
+    self.enqueued += num
+
+  def pending(self) -> Optional[int]:
+    """Tasks in the broker plus results in redis, None if either can not be
+    read"""
+    try:
+      depth = self.depth()
+      backlog = self.backlog()
+    except Exception as err:  #pylint: disable=broad-exception-caught
+      LOGGER.warning('Could not read queue depth: %s', err)
+      return None
+    set_queue_depth(depth)
+    set_redis_backlog(backlog)
+    return depth + backlog
+
+  def sample(self) -> Optional[int]:
+    """Read the pending jobs and update the drain rate"""
+    pending = self.pending()
+    if pending is None:
+      return None
+    now = self.clock()
+    if self.last_time is not None and now > self.last_time:
+      drained = max(self.last_pending + self.enqueued - pending, 0)
+      if drained or self.rate is not None:
+        cur_rate = drained / (now - self.last_time)
+        self.rate = cur_rate if self.rate is None else (
+            RATE_ALPHA * cur_rate + (1 - RATE_ALPHA) * self.rate)
+    self.last_time = now
+    self.last_pending = pending
+    self.enqueued = 0
+    return pending
+
+  def next_batch(self) -> int:
+    """Jobs to claim now, 0 while the queue is above the low-water mark.
+    Without a depth reading the full batch is claimed."""
+    pending = self.sample()
+    if pending is None:
+      return self.max_batch
+    if pending >= self.low_water:
+      LOGGER.info('%s jobs pending, holding back the enqueue', pending)
+      return 0
+    batch = self.max_batch
+    if self.rate is not None:
+      batch = min(batch, int(self.rate * self.horizon))
+    return max(min(batch, self.high_water - pending), 1)
+
+  def wait_batch(self,
+                 poll_interval: float = BACKPRESSURE_POLL,
+                 sleep: Callable[[float], None] = time.sleep) -> int:
+    """Block until jobs may be claimed, returns how many"""
+    while True:
+      batch = self.next_batch()
+      if batch:
+        return batch
+      sleep(poll_interval)
+
+
+def get_backpressure(q_name: str, prefix: Optional[str],
+                     max_batch: int) -> Backpressure:
+  """Backpressure on celery queue @q_name and its results in redis"""
+  return Backpressure(lambda: queue_depth(q_name),
+                      lambda: result_backlog(prefix), max_batch)
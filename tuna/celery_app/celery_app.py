@@ -24,14 +24,15 @@
 # SOFTWARE.
 #
 ###############################################################################
-"""Module to define celery app"""
+"""Module to define celery app, the app is created on first use so importing
+this module needs neither celery nor a configured broker"""
 import os
 import subprocess
-from celery import Celery
-from celery.utils.log import get_task_logger
+from functools import lru_cache
 from tuna.custom_errors import CustomError
+from tuna.utils.logger import setup_logger
 
-LOGGER = get_task_logger("celery_app")
+LOGGER = setup_logger("celery_app")
 
 
 def get_broker_env():
@@ -75,23 +76,34 @@ def get_backend_env():
   return TUNA_CELERY_BACKEND_PORT, TUNA_CELERY_BACKEND_HOST
 
 
-TUNA_CELERY_BROKER_HOST, TUNA_CELERY_BROKER_PORT, TUNA_CELERY_BROKER_USER, TUNA_CELERY_BROKER_PWD = get_broker_env(
-)
+@lru_cache(1)
+def get_app():
+  """Create the celery app from the broker and backend env vars"""
+  from celery import Celery  #pylint: disable=import-outside-toplevel
 
-TUNA_CELERY_BACKEND_PORT, TUNA_CELERY_BACKEND_HOST = get_backend_env()
+  broker_host, broker_port, broker_user, broker_pwd = get_broker_env()
+  backend_port, backend_host = get_backend_env()
 
-#ampq borker & redis backend
-app = Celery(
-    'celery_app',
-    broker_url=
-    f"amqp://{TUNA_CELERY_BROKER_USER}:{TUNA_CELERY_BROKER_PWD}@{TUNA_CELERY_BROKER_HOST}:{TUNA_CELERY_BROKER_PORT}/",
-    result_backend=
-    f"redis://{TUNA_CELERY_BACKEND_HOST}:{TUNA_CELERY_BACKEND_PORT}/15",
-    broker_transport_options={"heartbeat": 60},
-    include=[
-        'tuna.miopen.celery_tuning.celery_tasks',
-        'tuna.example.celery_tuning.celery_tasks'
-    ])
+  #ampq borker & redis backend
+  return Celery(
+      'celery_app',
+      broker_url=
+      f"amqp://{broker_user}:{broker_pwd}@{broker_host}:{broker_port}/",
+      result_backend=f"redis://{backend_host}:{backend_port}/15",
+      broker_transport_options={"heartbeat": 60},
+      include=[
+          'tuna.miopen.celery_tuning.celery_tasks',
+          'tuna.example.celery_tuning.celery_tasks',
+          'tuna.rocmlir.celery_tuning.celery_tasks'
+      ])
+
+
+def __getattr__(name):
+  """Module level 'app' for the celery cli (-A tuna.celery_app.celery_app)
+  and the task modules"""
+  if name == 'app':
+    return get_app()
+  raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 def stop_active_workers():
@@ -99,6 +111,7 @@ def stop_active_workers():
 
   LOGGER.warning('Shutting down remote workers')
   try:
+    app = get_app()
     if app.control.inspect().active() is not None:
       app.control.shutdown()
   except Exception as err:  #pylint: disable=broad-exception-caught
@@ -113,7 +126,7 @@ def stop_named_worker(hostname):
   """Shutdown a specific worker"""
   LOGGER.warning('Shutting down remote worker: %s', hostname)
   try:
-    app.control.shutdown(destination=[hostname])
+    get_app().control.shutdown(destination=[hostname])
   except Exception as exp:  #pylint: disable=broad-exception-caught
     LOGGER.warning('Exception occured while trying to shutdown workers: %s',
                    exp)
@@ -137,3 +150,16 @@ def purge_queue(q_names):
       return False
 
   return True
+
+
+def queue_depth(q_name, app=None):
+  """Number of messages ready in the broker queue, by passive declare, 0 if
+  the queue does not exist yet"""
+  app = get_app() if app is None else app
+  with app.connection_for_read() as conn:
+    try:
+      _, count, _ = conn.default_channel.queue_declare(queue=q_name,
+                                                       passive=True)
+    except conn.channel_errors:
+      return 0
+  return count
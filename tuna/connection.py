@@ -25,21 +25,26 @@
 #
 ###############################################################################
 """Connection class represents a DB connection. Used by machine to establish new DB connections"""
+from __future__ import annotations
 import socket
 import subprocess
 import logging
-from random import randrange
 from subprocess import Popen, PIPE, STDOUT
-from time import sleep
 from io import StringIO
 
 from typing import Set, Any, Optional, Union, TextIO, IO, Tuple, List, Callable
-from paramiko.channel import ChannelFile, ChannelStderrFile, ChannelStdinFile
-from paramiko import SSHClient
-import paramiko
+from typing import TYPE_CHECKING
 
+from tuna.utils.lazy_import import lazy_import
 from tuna.utils.logger import setup_logger
 from tuna.abort import chk_abort_file
+from tuna.utils.retry import RetryPolicy
+
+if TYPE_CHECKING:
+  import paramiko
+  from paramiko.channel import ChannelFile, ChannelStderrFile, ChannelStdinFile
+else:
+  paramiko = lazy_import('paramiko')
 
 NUM_SSH_RETRIES = 40
 NUM_CMD_RETRIES = 30
@@ -65,7 +70,7 @@ class Connection():
     self.user = None
     self.password = None
 
-    self.ssh: paramiko.SSHClient = SSHClient()
+    self.ssh: paramiko.SSHClient = paramiko.SSHClient()
 
     self.chk_abort_file = chk_abort_file
 
@@ -84,6 +89,15 @@ class Connection():
     self.inst_bins = {'which': True, 'cd': True}
     self.connect(self.chk_abort_file)
 
+  def retry_policy(self, name: str, max_retries: int) -> RetryPolicy:
+    """Any ssh failure is a connection error, retried up to @max_retries
+    times with about half of SSH_TIMEOUT sleep on average each"""
+    return RetryPolicy(name,
+                       classify=lambda _: 'connection',
+                       max_retries=max_retries,
+                       budget=max_retries * SSH_TIMEOUT / 2,
+                       logger=self.logger)
+
   def check_binary(self, bin_str: str) -> bool:
     """Checking existence of binary"""
     if bin_str in self.inst_bins:
@@ -172,6 +186,7 @@ class Connection():
     if not self.is_connected():
       self.ssh = paramiko.SSHClient()
       self.ssh.set_missing_host_key_policy(paramiko.AutoAddPolicy())
+      policy = self.retry_policy('ssh_connect', NUM_SSH_RETRIES)
       for ssh_idx in range(NUM_SSH_RETRIES):
         if abort is not None and chk_abort_file(self.id, self.logger):
           self.logger.warning('Machine %s aborted ssh connection', self.id)
@@ -187,13 +202,12 @@ class Connection():
         except paramiko.ssh_exception.BadHostKeyException:
           self.logger.error('Bad host exception which connecting to host: %s',
                             self.hostname)
-        except (paramiko.ssh_exception.SSHException, socket.error):
-          retry_interval = randrange((int(SSH_TIMEOUT)))
+        except (paramiko.ssh_exception.SSHException, socket.error) as exc:
           self.logger.warning(
-              'Attempt %s to connect to machine %s (%s p%s) via ssh failed, \
-              sleeping for %s seconds', ssh_idx, self.id, self.hostname,
-              self.port, retry_interval)
-          sleep(retry_interval)
+              'Attempt %s to connect to machine %s (%s p%s) via ssh failed',
+              ssh_idx, self.id, self.hostname, self.port)
+          if not policy.wait(exc):
+            break
         else:
           self.logger.info(
               'SSH connection successfully established to machine %s', self.id)
@@ -237,6 +251,7 @@ class Connection():
     o_var: ChannelFile
     e_var: ChannelStderrFile
 
+    policy = self.retry_policy('exec_command', NUM_CMD_RETRIES)
     for cmd_idx in range(NUM_CMD_RETRIES):
       try:
 
@@ -247,9 +262,8 @@ class Connection():
                             cmd)
         self.logger.warning('Exception occurred %s', exc)
         self.logger.warning('Retrying ... %s', cmd_idx)
-        retry_interval = randrange(SSH_TIMEOUT)
-        self.logger.warning('sleeping for %s seconds', retry_interval)
-        sleep(retry_interval)
+        if not policy.wait(exc):
+          break
       else:
         self.out_channel = o_var.channel
         return i_var, o_var, e_var
@@ -30,9 +30,11 @@ from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.ext.declarative import DeclarativeMeta
 from sqlalchemy.sql import func as sqla_func
 from sqlalchemy.dialects.mysql import TINYINT
-from sqlalchemy import Column, Integer, DateTime, text
+from sqlalchemy import Column, Integer, DateTime
 from sqlalchemy.schema import Table
 
+from tuna.dbBase.dialect import OnUpdateTimestamp
+
 
 class BASE():
   """Base class for our own common functionalities among tables"""
@@ -43,10 +45,9 @@ class BASE():
 
   id = Column(Integer, primary_key=True)
   insert_ts = Column(DateTime, nullable=False, server_default=sqla_func.now())
-  update_ts = Column(
-      DateTime,
-      nullable=False,
-      server_default=text('CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP'))
+  update_ts = Column(DateTime,
+                     nullable=False,
+                     server_default=OnUpdateTimestamp())
   valid = Column(TINYINT(1), nullable=False, server_default="1")
 
   def to_dict(self,
@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+
+###############################################################################
+#
+# MIT License
+#
+# Copyright (c) 2024 Advanced Micro Devices, Inc.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+"""Database backend selection. TUNA_DB_BACKEND=mysql, the default, connects to
+the MySQL server named by the TUNA_DB_* variables. TUNA_DB_BACKEND=sqlite uses
+the file TUNA_DB_SQLITE_PATH, default <TUNA_DB_NAME>.db, so the models, query
+helpers and tuning hot paths run without a server. MySQL column types and SQL
+without a SQLite equivalent are translated here."""
+
+import os
+import re
+from datetime import datetime, timezone
+from typing import Any, Optional
+
+from sqlalchemy import create_engine, event, Table
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.expression import ColumnElement
+from sqlalchemy.schema import CreateIndex
+from sqlalchemy.dialects.mysql import TINYINT, MEDIUMBLOB, LONGBLOB, SET
+
+from tuna.utils.utility import get_env_vars
+
+BACKENDS = ('mysql', 'sqlite')
+
+#row locking suffix of a claim query, SQLite has no row locks
+LOCKING_CLAUSE = re.compile(r'\s+FOR UPDATE(\s+SKIP LOCKED)?', re.IGNORECASE)
+
+
+def db_backend() -> str:
+  """Backend named by TUNA_DB_BACKEND"""
+  backend = os.environ.get('TUNA_DB_BACKEND', 'mysql').lower()
+  if backend not in BACKENDS:
+    raise ValueError(f'TUNA_DB_BACKEND must be one of {BACKENDS}')
+  return backend
+
+
+def is_sqlite() -> bool:
+  """Running on the SQLite backend"""
+  return db_backend() == 'sqlite'
+
+
+def sqlite_path() -> str:
+  """SQLite DB file"""
+  return os.environ.get('TUNA_DB_SQLITE_PATH',
+                        f"{get_env_vars()['db_name'] or 'tuna'}.db")
+
+
+def db_url(with_db: bool = True) -> str:
+  """SQLAlchemy URL of the backend, with_db=False leaves out the MySQL
+  database so it can be created"""
+  if is_sqlite():
+    return f'sqlite:///{sqlite_path()}'
+  env = get_env_vars()
+  url = f"mysql+pymysql://{env['user_name']}:{env['user_password']}"\
+        f"@{env['db_hostname']}:3306"
+  return f"{url}/{env['db_name']}" if with_db else url
+
+
+def utc_now() -> str:
+  """now() for SQLite, in the UTC format of its CURRENT_TIMESTAMP"""
+  return datetime.now(timezone.utc).strftime('%Y-%m-%d %H:%M:%S')
+
+
+def setup_sqlite(dbapi_conn: Any, _conn_record: Any) -> None:
+  """WAL so readers do not block the writer, wait for locks like InnoDB
+  does, enforce foreign keys and provide the MySQL now()"""
+  cur = dbapi_conn.cursor()
+  cur.execute('PRAGMA journal_mode=WAL')
+  cur.execute('PRAGMA busy_timeout=60000')
+  cur.execute('PRAGMA foreign_keys=ON')
+  cur.close()
+  dbapi_conn.create_function('now', 0, utc_now)
+
+
+def create_db_engine(url: Optional[str] = None, **kwargs: Any) -> Engine:
+  """Engine for the configured backend"""
+  engine = create_engine(url or db_url(), **kwargs)
+  if engine.dialect.name == 'sqlite':
+    event.listen(engine, 'connect', setup_sqlite)
+  return engine
+
+
+def insert_ignore() -> str:
+  """INSERT that skips rows with duplicate keys"""
+  return 'insert or ignore' if is_sqlite() else 'insert ignore'
+
+
+def days_ago(days: int) -> str:
+  """SQL timestamp @days before now"""
+  if is_sqlite():
+    return f"datetime('now', '-{int(days)} day')"
+  return f"now() - interval {int(days)} day"
+
+
+def claim_lock(session: Any, tablename: str, cond_str: str) -> str:
+  """Claim queries lock their rows with FOR UPDATE [SKIP LOCKED]. SQLite has
+  no row locks, there the locking clause is dropped and the DB write lock is
+  taken instead, so claims of concurrent processes are serialized until the
+  claiming transaction commits."""
+  if not is_sqlite() or not LOCKING_CLAUSE.search(cond_str):
+    return cond_str
+  session.execute(f'UPDATE {tablename} SET id=id WHERE 0')
+  return LOCKING_CLAUSE.sub('', cond_str)
+
+
+@event.listens_for(Table, 'after_create')
+def update_ts_trigger(table: Table, conn: Any, **_kw: Any) -> None:
+  """ON UPDATE CURRENT_TIMESTAMP of update_ts as a trigger on SQLite, an
+  update that sets update_ts itself keeps its value"""
+  if conn.dialect.name != 'sqlite' or 'update_ts' not in table.c:
+    return
+  conn.execute(
+      f"CREATE TRIGGER IF NOT EXISTS {table.name}_update_ts AFTER UPDATE ON"
+      f" {table.name} FOR EACH ROW WHEN NEW.update_ts = OLD.update_ts BEGIN"
+      f" UPDATE {table.name} SET update_ts=CURRENT_TIMESTAMP"
+      " WHERE id=NEW.id; END")
+
+
+class OnUpdateTimestamp(ColumnElement):  #pylint: disable=too-many-ancestors
+  """server_default of update_ts columns, SQLite has no ON UPDATE so there
+  the update_ts_trigger() trigger sets it"""
+
+
+@compiles(OnUpdateTimestamp)
+def _on_update_timestamp(_element, _compiler, **_kw):
+  return 'CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP'
+
+
+@compiles(OnUpdateTimestamp, 'sqlite')
+def _on_update_timestamp_sqlite(_element, _compiler, **_kw):
+  return 'CURRENT_TIMESTAMP'
+
+
+@compiles(CreateIndex, 'sqlite')
+def _create_index_sqlite(create, compiler, **kw):
+  #MySQL index names are per table, SQLite ones per DB
+  index = create.element
+  name = compiler.preparer.quote(index.name)
+  return compiler.visit_create_index(create, **kw).replace(
+      f' {name} ON ', f' {index.table.name}_{index.name} ON ', 1)
+
+
+@compiles(TINYINT, 'sqlite')
+def _tinyint_sqlite(_type, _compiler, **_kw):
+  return 'INTEGER'
+
+
+@compiles(MEDIUMBLOB, 'sqlite')
+@compiles(LONGBLOB, 'sqlite')
+def _blob_sqlite(_type, _compiler, **_kw):
+  return 'BLOB'
+
+
+@compiles(SET, 'sqlite')
+def _set_sqlite(_type, _compiler, **_kw):
+  return 'VARCHAR'
@@ -25,13 +25,16 @@
 #
 ###############################################################################
 """ Database resource manager """
-from sqlalchemy import create_engine
-from sqlalchemy.pool import NullPool
+from sqlalchemy.pool import NullPool, QueuePool
 from sqlalchemy.orm import sessionmaker
-from tuna.utils.utility import get_env_vars
+from tuna.dbBase.dialect import create_db_engine
 
-ENV_VARS = get_env_vars()
-ENGINE = create_engine(f"mysql+pymysql://{ENV_VARS['user_name']}:{ENV_VARS['user_password']}" \
-                       f"@{ENV_VARS['db_hostname']}:3306/{ENV_VARS['db_name']}",
-                       poolclass=NullPool)
+ENGINE = create_db_engine(poolclass=NullPool)
 SESSION_FACTORY = sessionmaker(bind=ENGINE)
+
+
+def use_engine_pool(pool_size: int) -> None:
+  """Bind new sessions to an engine keeping pool_size connections open, for
+  processes running their DB calls on a fixed set of worker threads"""
+  SESSION_FACTORY.configure(bind=create_db_engine(
+      poolclass=QueuePool, pool_size=pool_size, pool_pre_ping=True))
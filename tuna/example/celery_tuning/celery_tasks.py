@@ -29,13 +29,14 @@
 import copy
 from celery.signals import celeryd_after_setup
 from celery.utils.log import get_task_logger
-from tuna.celery_app.celery_app import app
-from tuna.machine import Machine
+from tuna.celery_app.celery_app import get_app
 from tuna.utils.celery_utils import prep_default_kwargs, get_cached_worker
+from tuna.utils.celery_utils import get_cached_machine
 from tuna.example.example_lib import Q_NAME
 from tuna.example.example_worker import ExampleWorker
 
 logger = get_task_logger(__name__)
+app = get_app()
 
 
 @celeryd_after_setup.connect
@@ -44,12 +45,9 @@ def capture_worker_name(sender, instance, **kwargs):  #pylint: disable=unused-ar
   app.worker_name = sender
 
 
-cached_machine = Machine(local_machine=True)
-
-
 def prep_kwargs(kwargs, args):
   """Populate kwargs with serialized job and machine"""
-  return prep_default_kwargs(kwargs, args[0], cached_machine)
+  return prep_default_kwargs(kwargs, args[0], get_cached_machine())
 
 
 cached_worker = {}
@@ -65,7 +65,7 @@ class Example(MITunaInterface):
         TunaArgs.ARCH, TunaArgs.NUM_CU, TunaArgs.VERSION, TunaArgs.SESSION_ID,
         TunaArgs.MACHINES, TunaArgs.REMOTE_MACHINE, TunaArgs.LABEL,
         TunaArgs.RESTART_MACHINE, TunaArgs.DOCKER_NAME, TunaArgs.ENQUEUE_ONLY,
-        TunaArgs.SHUTDOWN_WORKERS
+        TunaArgs.ASYNC_TUNE, TunaArgs.SHUTDOWN_WORKERS
     ])
     group: argparse._MutuallyExclusiveGroup = parser.add_mutually_exclusive_group(
     )
@@ -32,6 +32,7 @@ import sys
 import logging
 from typing import Dict, List, Any, Union
 from tuna.utils.logger import setup_logger
+from tuna.utils.profiling import setup_profiling
 from tuna.libraries import Library
 from tuna.lib_utils import get_library
 from tuna.miopen.miopen_lib import MIOpen
@@ -74,6 +75,7 @@ def main() -> bool:
   args: Dict[str, Any]
   args = parse_args()
   clean_args()
+  setup_profiling()
 
   #case no yaml file
   library: Union[Example, MIOpen]
@@ -37,11 +37,10 @@ from subprocess import Popen, PIPE
 import logging
 
 from typing import Set, List, Optional, TextIO, Tuple, Dict, Union, Any, Callable
+from typing import TYPE_CHECKING
 from sqlalchemy import Text, Column, orm
 from sqlalchemy.dialects.mysql import TINYINT, INTEGER
 
-from paramiko import SSHClient
-import paramiko
 from tuna.machine_management_interface import MachineManagementInterface
 from tuna.utils.logger import setup_logger
 from tuna.connection import Connection
@@ -50,6 +49,12 @@ from tuna.abort import chk_abort_file
 from tuna.utils.utility import check_qts
 from tuna.miopen.utils.metadata import DOCKER_CMD
 from tuna.utils.metadata import LOG_TIMEOUT
+from tuna.utils.lazy_import import lazy_import
+
+if TYPE_CHECKING:
+  import paramiko
+else:
+  paramiko = lazy_import('paramiko')
 
 ROCMINFO: str = '/opt/rocm/bin/rocminfo'
 ROCMSMI: str = '/opt/rocm/bin/rocm-smi'
@@ -108,7 +113,7 @@ class Machine(BASE):  #pylint: disable=too-many-instance-attributes
     self.logger: logging.Logger
     self.mmi: MachineManagementInterface
     self.cnx: Connection
-    self.ssh: paramiko.SSHClient = SSHClient()
+    self.ssh: paramiko.SSHClient = paramiko.SSHClient()
 
     if self.local_machine:  # pylint: disable=no-member ; false alarm
       self.logger = setup_logger(f'Machine_{self.hostname}')
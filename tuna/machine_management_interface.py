@@ -26,23 +26,26 @@
 ###############################################################################
 """ Machine Management Module to restart machines remotely
     using BMC or IPMI """
+from __future__ import annotations
 import socket
 from time import sleep
 from enum import Enum
 import os
 from subprocess import Popen, PIPE
 from typing import Dict, List, Tuple, Union, Any, Optional, IO
+from typing import TYPE_CHECKING
 
 import logging
-import paramiko
-from paramiko.dsskey import DSSKey
-from paramiko.ecdsakey import ECDSAKey
-from paramiko.ed25519key import Ed25519Key
-from paramiko.rsakey import RSAKey
-from paramiko.agent import AgentKey
-from paramiko.channel import ChannelFile, ChannelStderrFile
 from tuna.utils.utility import get_mmi_env_vars
 from tuna.utils.logger import setup_logger
+from tuna.utils.lazy_import import lazy_import
+
+if TYPE_CHECKING:
+  import paramiko
+  from paramiko.agent import AgentKey
+  from paramiko.channel import ChannelFile, ChannelStderrFile
+else:
+  paramiko = lazy_import('paramiko')
 
 ENV_VARS: Dict = get_mmi_env_vars()
 
@@ -61,10 +64,10 @@ def key_from_file() -> Union[Tuple[AgentKey, ...], List]:
   keytype: Any[type]
 
   for keytype, name in [
-      (RSAKey, "rsa"),
-      (DSSKey, "dsa"),
-      (ECDSAKey, "ecdsa"),
-      (Ed25519Key, "ed25519"),
+      (paramiko.RSAKey, "rsa"),
+      (paramiko.DSSKey, "dsa"),
+      (paramiko.ECDSAKey, "ecdsa"),
+      (paramiko.Ed25519Key, "ed25519"),
   ]:
     # ~/ssh/ is for windows
     for directory in [".ssh", "ssh"]:
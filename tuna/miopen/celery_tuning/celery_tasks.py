@@ -26,69 +26,50 @@
 #
 ###############################################################################
 """Module to register MIOpen celery tasks"""
-import copy
-from celery.signals import celeryd_after_setup
 from celery.utils.log import get_task_logger
-from tuna.celery_app.celery_app import app
+from tuna.celery_app.celery_app import get_app
 from tuna.libraries import Operation
-from tuna.machine import Machine
 from tuna.miopen.utils.lib_helper import get_worker
-from tuna.utils.utility import SimpleDict
-from tuna.utils.celery_utils import prep_default_kwargs, get_cached_worker
+from tuna.utils.celery_utils import prep_config_kwargs, prep_cached_worker
+from tuna.utils.celery_utils import connect_worker_signals, set_worker_gpu
+from tuna.utils.celery_utils import run_worker
 from tuna.miopen.miopen_lib import Q_NAME
 
 logger = get_task_logger(__name__)
-
-
-@celeryd_after_setup.connect
-def capture_worker_name(sender, instance, **kwargs):  #pylint: disable=unused-argument
-  """Capture worker name"""
-  app.worker_name = sender
-
-
-cached_machine = Machine(local_machine=True)
+app = get_app()
+connect_worker_signals(app)
 
 
 def prep_kwargs(kwargs, args):
   """Populate kwargs with serialized job, config and machine"""
-  kwargs = prep_default_kwargs(kwargs, args[0], cached_machine)
-  kwargs["config"] = SimpleDict(**args[1])
-
-  return kwargs
+  return prep_config_kwargs(kwargs, args[0], args[1])
 
 
 cached_worker = {}
 
 
+def new_worker(context):
+  """Create the tuna worker of the operation in context"""
+  args = [context['job'], context['config'], context['operation']]
+  kwargs = prep_kwargs(context['kwargs'], args)
+  return get_worker(kwargs, args[2])
+
+
 def prep_worker(context):
   """Creating tuna worker object based on context"""
-  operation = context['operation']
-  if operation in cached_worker:
-    worker = get_cached_worker(context, cached_worker)
-    worker.config = SimpleDict(**context['config'])
-  else:
-    args = [context['job'], context['config'], context['operation']]
-    kwargs = prep_kwargs(context['kwargs'], args)
-    worker = get_worker(kwargs, args[2])
-    cached_worker[operation] = worker
-  return worker
+  return prep_cached_worker(context, cached_worker, new_worker)
 
 
 @app.task(trail=True, reply_to=Q_NAME)
 def celery_enqueue(context):
   """Defines a celery task"""
-  kwargs = context['kwargs']
   operation = context['operation']
 
   if operation == Operation.EVAL:
-    gpu_id = int((app.worker_name).split('gpu_id_')[1])
-    kwargs['gpu_id'] = gpu_id
-    context['job']['gpu_id'] = gpu_id
+    gpu_id = set_worker_gpu(context, app.worker_name)
     logger.info("Enqueueing worker %s: gpu(%s), job %s", app.worker_name,
                 gpu_id, context['job'])
   else:
     logger.info("Enqueueing worker %s: job %s", app.worker_name, context['job'])
 
-  worker = prep_worker(copy.deepcopy(context))
-  ret = worker.run()
-  return {"ret": ret, "context": context}
+  return run_worker(celery_enqueue, context, prep_worker)
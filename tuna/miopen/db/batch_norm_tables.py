@@ -27,11 +27,13 @@
 """Represents Batch normalization table definitions """
 
 from sqlalchemy import Column, Integer, String, UniqueConstraint, ForeignKey
+from sqlalchemy import Index
 from sqlalchemy.orm import relationship
 from tuna.dbBase.base_class import BASE
 from tuna.miopen.db.mixin_tables import BenchmarkMixin, CacheMixin
 from tuna.miopen.db.mixin_tables import ConfigTagMixin, KernelCacheMixin
 from tuna.miopen.db.mixin_tables import MIOpenJobMixin, SolverApplicabilityMixin
+from tuna.miopen.db.mixin_tables import ApplicabilityCacheMixin, APP_CACHE_KEY
 from tuna.miopen.utils.metadata import DIR_MAP
 
 COMMON_UNIQ_FDS = ["config", "solver", "session"]
@@ -43,7 +45,20 @@ COMMON_UNIQ_FDS = ["config", "solver", "session"]
 class BNJob(BASE, MIOpenJobMixin):
   """Represents batch norm job table"""
   __tablename__ = "bn_job"
-  __table_args__ = (UniqueConstraint(*COMMON_UNIQ_FDS, name="uq_idx"),)
+  __table_args__ = (UniqueConstraint(*COMMON_UNIQ_FDS, name="uq_idx"),
+                    Index('get_job_claim', 'session', 'state', 'fin_step_mask',
+                          'retries', 'config'))
+
+  config = Column(Integer,
+                  ForeignKey("bn_config.id"),
+                  nullable=False,
+                  index=True)
+
+
+class BNJobArchive(BASE, MIOpenJobMixin):
+  """Finished jobs of closed sessions, moved out of bn_job by archive_jobs"""
+  __tablename__ = "bn_job_archive"
+  __table_args__ = (Index('idx_session', 'session', 'state'),)
 
   config = Column(Integer,
                   ForeignKey("bn_config.id"),
@@ -107,6 +122,12 @@ class BNSolverApplicability(BASE, SolverApplicabilityMixin):
                   index=True)
 
 
+class BNApplicabilityCache(BASE, ApplicabilityCacheMixin):
+  """Represents bn_applicability_cache table"""
+  __tablename__ = "bn_applicability_cache"
+  __table_args__ = (UniqueConstraint(*APP_CACHE_KEY, "solver", name="uq_idx"),)
+
+
 class BNJobCache(BASE, CacheMixin):
   """Represents job_cache table for batch_norm"""
   __tablename__ = "bn_job_cache"
@@ -134,6 +155,7 @@ class BNFinJobCache(BASE, KernelCacheMixin):
 class BNKernelCache(BASE, KernelCacheMixin):
   """Represents kernel_cache table for batch_norm"""
   __tablename__ = "bn_kernel_cache"
+  __table_args__ = (Index('idx_kgroup_valid', 'kernel_group', 'valid'),)
 
   kernel_group = Column(Integer, nullable=True)
 
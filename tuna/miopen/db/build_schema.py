@@ -29,6 +29,7 @@ from sqlalchemy.exc import OperationalError
 from tuna.miopen.db.get_db_tables import get_miopen_tables
 from tuna.miopen.db.triggers import get_miopen_triggers, drop_miopen_triggers
 from tuna.db_engine import ENGINE
+from tuna.dbBase.dialect import is_sqlite
 from tuna.utils.logger import setup_logger
 from tuna.utils.db_utility import create_tables
 
@@ -38,6 +39,9 @@ LOGGER = setup_logger('miopen_db_tables')
 
 def recreate_triggers(drop_triggers, create_triggers):
   """Drop and recreate triggers"""
+  if is_sqlite():
+    LOGGER.info('Job state triggers are MySQL only, skipped on SQLite')
+    return True
 
   with ENGINE.connect() as conn:
     for dtg in drop_triggers:
@@ -28,12 +28,13 @@
 from sqlalchemy import Column, Integer, String, UniqueConstraint, ForeignKey
 from sqlalchemy.orm import relationship
 from sqlalchemy import Index
-from sqlalchemy import Float, BigInteger, Boolean
+from sqlalchemy import Float, BigInteger, Boolean, DateTime
 from tuna.dbBase.base_class import BASE
 from tuna.miopen.db.mixin_tables import BenchmarkMixin, CacheMixin
 from tuna.miopen.db.mixin_tables import ConfigTagMixin, GoldenMixin
 from tuna.miopen.db.mixin_tables import KernelCacheMixin, MIOpenJobMixin
 from tuna.miopen.db.mixin_tables import SolverAnalyticsMixin, SolverApplicabilityMixin
+from tuna.miopen.db.mixin_tables import ApplicabilityCacheMixin, APP_CACHE_KEY
 
 COMMON_UNIQ_FDS = ["config", "solver", "session"]
 
@@ -43,7 +44,9 @@ COMMON_UNIQ_FDS = ["config", "solver", "session"]
 class ConvolutionJob(BASE, MIOpenJobMixin):
   """Represents convolutions job table"""
   __tablename__ = "conv_job"
-  __table_args__ = (UniqueConstraint(*COMMON_UNIQ_FDS, name="uq_idx"),)
+  __table_args__ = (UniqueConstraint(*COMMON_UNIQ_FDS, name="uq_idx"),
+                    Index('get_job_claim', 'session', 'state', 'fin_step_mask',
+                          'retries', 'config'))
 
   config = Column(Integer,
                   ForeignKey("conv_config.id"),
@@ -57,6 +60,17 @@ class ConvolutionJob(BASE, MIOpenJobMixin):
                           'session')
 
 
+class ConvJobArchive(BASE, MIOpenJobMixin):
+  """Finished jobs of closed sessions, moved out of conv_job by archive_jobs"""
+  __tablename__ = "conv_job_archive"
+  __table_args__ = (Index('idx_session', 'session', 'state'),)
+
+  config = Column(Integer,
+                  ForeignKey("conv_config.id"),
+                  nullable=False,
+                  index=True)
+
+
 class ConvolutionConfig(BASE):
   """Represents convolution config table"""
   __tablename__ = "conv_config"
@@ -115,6 +129,12 @@ class ConvSolverApplicability(BASE, SolverApplicabilityMixin):
   sess_cfg = Index('sess_cfg', 'session', 'config')
 
 
+class ConvApplicabilityCache(BASE, ApplicabilityCacheMixin):
+  """Represents conv_applicability_cache table"""
+  __tablename__ = "conv_applicability_cache"
+  __table_args__ = (UniqueConstraint(*APP_CACHE_KEY, "solver", name="uq_idx"),)
+
+
 class ConvJobCache(BASE, CacheMixin):
   """Represents job_cache table for convolutions"""
   __tablename__ = "conv_job_cache"
@@ -144,10 +164,9 @@ class ConvFinJobCache(BASE, KernelCacheMixin):
 class ConvolutionKernelCache(BASE, KernelCacheMixin):
   """Represents kernel_cache table for convolutions"""
   __tablename__ = "conv_kernel_cache"
+  __table_args__ = (Index('idx_kgroup_valid', 'kernel_group', 'valid'),)
 
   kernel_group = Column(Integer, nullable=True)
-  idx_kgroup = Index('kernel_group')
-  idx_valid = Index('valid', 'kernel_group')
 
 
 class ConvolutionGolden(BASE, GoldenMixin):
@@ -172,6 +191,20 @@ class ConvolutionGolden(BASE, GoldenMixin):
   kernel_group = Column(Integer, nullable=True)
 
 
+class ConvGoldenWatermark(BASE):
+  """High-water mark of the conv_find_db rows of a session already merged
+  into a golden version, used by incremental update_golden"""
+  __tablename__ = "conv_golden_watermark"
+  __table_args__ = (UniqueConstraint("session",
+                                     "golden_miopen_v",
+                                     name="uq_idx"),)
+
+  session = Column(Integer, ForeignKey("session.id"), nullable=False)
+  golden_miopen_v = Column(Integer, nullable=False)
+  last_update_ts = Column(DateTime, nullable=True)
+  merged_rows = Column(Integer, nullable=False, server_default="0")
+
+
 class ConvolutionBenchmark(BASE, BenchmarkMixin):
   """benchmark table for framework and model parameters"""
   __tablename__ = "conv_benchmark"
@@ -34,17 +34,21 @@ from tuna.miopen.db.fusion_config_tables import SolverFusionApplicability
 from tuna.miopen.db.batch_norm_tables import BNBenchmark, BNConfig
 from tuna.miopen.db.batch_norm_tables import BNConfigTags, BNFinJobCache
 from tuna.miopen.db.batch_norm_tables import BNJob, BNJobCache, BNKernelCache
+from tuna.miopen.db.batch_norm_tables import BNJobArchive
+from tuna.miopen.db.batch_norm_tables import BNApplicabilityCache
 from tuna.miopen.db.batch_norm_tables import BNSolverApplicability
 from tuna.miopen.db.convolutionjob_tables import ConvFinJobCache
-from tuna.miopen.db.convolutionjob_tables import ConvJobCache
+from tuna.miopen.db.convolutionjob_tables import ConvJobCache, ConvJobArchive
 from tuna.miopen.db.convolutionjob_tables import ConvSolverAnalyticsAggregated
 from tuna.miopen.db.convolutionjob_tables import ConvSolverAnalyticsDetailed
 from tuna.miopen.db.convolutionjob_tables import ConvSolverApplicability
+from tuna.miopen.db.convolutionjob_tables import ConvApplicabilityCache
 from tuna.miopen.db.convolutionjob_tables import ConvolutionBenchmark
 from tuna.miopen.db.convolutionjob_tables import ConvolutionConfig
 from tuna.miopen.db.convolutionjob_tables import ConvolutionConfigTags
 from tuna.miopen.db.convolutionjob_tables import ConvolutionGolden, ConvolutionJob
 from tuna.miopen.db.convolutionjob_tables import ConvolutionKernelCache
+from tuna.miopen.db.convolutionjob_tables import ConvGoldenWatermark
 
 COMMON_UNIQ_FDS = ["config", "solver", "session"]
 
@@ -53,13 +57,16 @@ def add_conv_tables(miopen_tables):
   """ Append Convolution specific MIOpen DB tables """
   miopen_tables.append(ConvolutionConfig())
   miopen_tables.append(ConvolutionJob())
+  miopen_tables.append(ConvJobArchive())
   miopen_tables.append(ConvolutionConfigTags())
   miopen_tables.append(ConvSolverApplicability())
+  miopen_tables.append(ConvApplicabilityCache())
   miopen_tables.append(ConvolutionKernelCache())
   miopen_tables.append(ConvJobCache())
   miopen_tables.append(ConvFinJobCache())
   miopen_tables.append(ConvolutionFindDB())
   miopen_tables.append(ConvolutionGolden())
+  miopen_tables.append(ConvGoldenWatermark())
   miopen_tables.append(ConvSolverAnalyticsAggregated())
   miopen_tables.append(ConvSolverAnalyticsDetailed())
   miopen_tables.append(ConvolutionBenchmark())
@@ -79,8 +86,10 @@ def add_bn_tables(miopen_tables):
   """ Append BatchNorm specific MIOpen DB tables"""
   miopen_tables.append(BNConfig())
   miopen_tables.append(BNJob())
+  miopen_tables.append(BNJobArchive())
   miopen_tables.append(BNConfigTags())
   miopen_tables.append(BNSolverApplicability())
+  miopen_tables.append(BNApplicabilityCache())
   miopen_tables.append(BNKernelCache())
   miopen_tables.append(BNJobCache())
   miopen_tables.append(BNFinJobCache())
@@ -26,12 +26,15 @@
 ###############################################################################
 """Represents Mixin type table class definitions """
 import enum
+from typing import List, Optional
 from sqlalchemy.sql import func as sqla_func
 from sqlalchemy.databases import mysql
 from sqlalchemy import Float, Boolean
 from sqlalchemy.dialects.mysql import TINYINT, MEDIUMBLOB, LONGBLOB
 from sqlalchemy.ext.declarative import declared_attr
-from sqlalchemy import Column, Integer, String, ForeignKey, DateTime
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.expression import ColumnElement
+from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Computed
 
 from tuna.db.tuna_tables import JobMixin
 
@@ -52,6 +55,37 @@ class FinStep(enum.Enum):
   miopen_perf_eval = 9
 
 
+def fin_step_bit(step: str) -> int:
+  """bit of a fin step in the numeric value of the fin_step SET column"""
+  return 1 << list(FinStep.__members__).index(step)
+
+
+def fin_step_cond(fin_steps: Optional[List[str]] = None) -> str:
+  """job WHERE condition on fin_step_mask selecting jobs that include the first
+  of fin_steps, an IN list of all masks with its bit keeps it sargable"""
+  if not fin_steps:
+    return f"fin_step_mask={fin_step_bit('not_fin')}"
+  bit = fin_step_bit(fin_steps[0])
+  masks = [mask for mask in range(1 << len(FinStep)) if mask & bit]
+  return f"fin_step_mask in ({', '.join(map(str, masks))})"
+
+
+class FinStepMask(ColumnElement):  #pylint: disable=too-many-ancestors
+  """fin_step_mask expression, on SQLite the SET is a plain string"""
+
+
+@compiles(FinStepMask)
+def _fin_step_mask(_element, _compiler, **_kw):
+  return 'fin_step+0'
+
+
+@compiles(FinStepMask, 'sqlite')
+def _fin_step_mask_sqlite(_element, _compiler, **_kw):
+  return ' + '.join(
+      f"(instr(',' || fin_step || ',', ',{step},') > 0) * {fin_step_bit(step)}"
+      for step in FinStep.__members__)
+
+
 class MIOpenJobMixin(JobMixin):
   """Represents MIOpen Mixin class for job tables"""
 
@@ -67,6 +101,8 @@ class MIOpenJobMixin(JobMixin):
   fin_step = Column(mysql.MSSet(*(list(k for k in FinStep.__members__))),
                     nullable=False,
                     server_default="not_fin")
+  #numeric value of the SET, indexable unlike fin_step
+  fin_step_mask = Column(Integer, Computed(FinStepMask(), persisted=True))
 
 
 class ConfigTagMixin():
@@ -92,6 +128,26 @@ class SolverApplicabilityMixin():
   applicable = Column(TINYINT, nullable=False, server_default="1")
 
 
+class ApplicabilityCacheMixin():
+  """Solver applicability of a config independent of the session, keyed by
+  everything the fin applicability result depends on"""
+
+  config_md5 = Column(String(length=40), nullable=False)
+  arch = Column(String(length=20), nullable=False)
+  num_cu = Column(Integer, nullable=False)
+  miopen_v = Column(String(length=64), nullable=False)
+  solver_hash = Column(String(length=40), nullable=False)
+  #not a foreign key, APP_CACHE_CHECKED is not a solver id
+  solver = Column(Integer, nullable=False)
+  applicable = Column(TINYINT, nullable=False, server_default="1")
+
+
+APP_CACHE_KEY = ["config_md5", "arch", "num_cu", "miopen_v", "solver_hash"]
+#solver of the row marking a config as checked, part of the unique key so
+#unlike NULL it is not duplicated by repeated inserts
+APP_CACHE_CHECKED = 0
+
+
 class CacheMixin():
   """Represents job_cache table"""
 
@@ -29,15 +29,19 @@
 from tuna.miopen.db.batch_norm_tables import BNBenchmark, BNConfig
 from tuna.miopen.db.batch_norm_tables import BNConfigTags, BNFinJobCache
 from tuna.miopen.db.batch_norm_tables import BNJob, BNJobCache, BNKernelCache
+from tuna.miopen.db.batch_norm_tables import BNJobArchive
 from tuna.miopen.db.batch_norm_tables import BNSolverApplicability
+from tuna.miopen.db.batch_norm_tables import BNApplicabilityCache
 from tuna.miopen.db.find_db import ConvolutionFindDB, BNFindDB
-from tuna.miopen.db.convolutionjob_tables import ConvolutionJob
+from tuna.miopen.db.convolutionjob_tables import ConvolutionJob, ConvJobArchive
 from tuna.miopen.db.convolutionjob_tables import ConvolutionConfig
 from tuna.miopen.db.convolutionjob_tables import ConvolutionConfigTags
 from tuna.miopen.db.convolutionjob_tables import ConvJobCache
 from tuna.miopen.db.convolutionjob_tables import ConvSolverApplicability
+from tuna.miopen.db.convolutionjob_tables import ConvApplicabilityCache
 from tuna.miopen.db.convolutionjob_tables import ConvolutionGolden, ConvolutionBenchmark
 from tuna.miopen.db.convolutionjob_tables import ConvFinJobCache, ConvolutionKernelCache
+from tuna.miopen.db.convolutionjob_tables import ConvGoldenWatermark
 from tuna.miopen.db.convolutionjob_tables import ConvSolverAnalyticsAggregated
 from tuna.miopen.db.convolutionjob_tables import ConvSolverAnalyticsDetailed
 from tuna.miopen.db.solver import Solver
@@ -64,12 +68,15 @@ class MIOpenDBTables(DBTablesInterface):
     self.config_tags_table = None
     self.find_db_table = None
     self.solver_app = None
+    self.app_cache = None
+    self.job_archive = None
     self.cache_table = None
     self.fin_cache_table = None
     self.solver_table = None
     self.kernel_cache = None
     self.tensor_table = TensorTable
     self.golden_table = None
+    self.golden_watermark = None
     self.config_type = None
     self.solver_analytics_aggregated = None
     self.solver_analytics_detailed = None
@@ -89,24 +96,29 @@ class MIOpenDBTables(DBTablesInterface):
     super().set_tables(sess_class)
     if self.config_type == ConfigType.batch_norm:
       self.job_table = BNJob
+      self.job_archive = BNJobArchive
       self.config_table = BNConfig
       self.config_tags_table = BNConfigTags
       self.find_db_table = BNFindDB
       self.solver_app = BNSolverApplicability
+      self.app_cache = BNApplicabilityCache
       self.cache_table = BNJobCache
       self.fin_cache_table = BNFinJobCache
       self.kernel_cache = BNKernelCache
       self.benchmark = BNBenchmark
     else:
       self.job_table = ConvolutionJob
+      self.job_archive = ConvJobArchive
       self.config_table = ConvolutionConfig
       self.config_tags_table = ConvolutionConfigTags
       self.find_db_table = ConvolutionFindDB
       self.solver_app = ConvSolverApplicability
+      self.app_cache = ConvApplicabilityCache
       self.cache_table = ConvJobCache
       self.fin_cache_table = ConvFinJobCache
       self.kernel_cache = ConvolutionKernelCache
       self.golden_table = ConvolutionGolden
+      self.golden_watermark = ConvGoldenWatermark
       self.benchmark = ConvolutionBenchmark
       self.solver_analytics_aggregated = ConvSolverAnalyticsAggregated
       self.solver_analytics_detailed = ConvSolverAnalyticsDetailed
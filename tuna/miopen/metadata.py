@@ -37,7 +37,7 @@ MIOPEN_CELERY_STEPS = [
 ]
 
 MIOPEN_SUBCOMMANDS = [
-    'import_configs', 'load_job', 'export_db', 'update_golden'
+    'import_configs', 'load_job', 'export_db', 'update_golden', 'archive_jobs'
 ]
 
 #tuning steps with 1 argument (possibly also --session_id)
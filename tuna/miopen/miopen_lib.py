@@ -32,7 +32,6 @@ from typing import List, Tuple, Any
 from functools import lru_cache
 from collections.abc import Iterable
 
-from kombu.utils.uuid import uuid
 from sqlalchemy.inspection import inspect
 from sqlalchemy.exc import OperationalError, DataError, IntegrityError
 from tuna.mituna_interface import MITunaInterface
@@ -44,8 +43,9 @@ from tuna.tables_interface import DBTablesInterface
 from tuna.utils.utility import SimpleDict, serialize_chunk
 from tuna.utils.machine_utility import load_machines
 from tuna.utils.db_utility import gen_select_objs, has_attr_set, get_class_by_tablename
+from tuna.utils.tracing import span, trace_headers
 from tuna.miopen.db.get_db_tables import get_miopen_tables
-from tuna.miopen.db.mixin_tables import FinStep
+from tuna.miopen.db.mixin_tables import FinStep, fin_step_cond
 from tuna.miopen.utils.metadata import MIOPEN_ALG_LIST
 from tuna.miopen.metadata import MIOPEN_CELERY_STEPS
 from tuna.miopen.worker.fin_class import FinClass
@@ -54,15 +54,17 @@ from tuna.miopen.subcmd.import_configs import run_import_configs
 from tuna.miopen.subcmd.load_job import run_load_job
 from tuna.miopen.subcmd.export_db import run_export_db
 from tuna.miopen.subcmd.update_golden import run_update_golden
+from tuna.miopen.subcmd.archive_jobs import run_archive_jobs
 from tuna.miopen.parse_miopen_args import get_import_cfg_parser, get_load_job_parser
 from tuna.miopen.parse_miopen_args import get_export_db_parser, get_update_golden_parser
+from tuna.miopen.parse_miopen_args import get_archive_jobs_parser
 from tuna.miopen.db.build_schema import create_tables, recreate_triggers
 from tuna.miopen.db.triggers import drop_miopen_triggers, get_miopen_triggers
 from tuna.miopen.utils.config_type import ConfigType
 from tuna.miopen.db.tables import MIOpenDBTables
 #from tuna.miopen.celery_tuning.celery_tasks import celery_enqueue
 from tuna.miopen.utils.json_to_sql import process_fdb_w_kernels, process_pdb_compile
-from tuna.miopen.utils.json_to_sql import clean_cache_table
+from tuna.miopen.utils.kernel_gc import KernelCacheGC
 from tuna.miopen.utils.helper import set_job_state
 from tuna.miopen.worker.fin_utils import get_fin_result
 from tuna.miopen.db.solver import get_solver_ids
@@ -82,6 +84,7 @@ class MIOpen(MITunaInterface):
     super().__init__(library=Library.MIOPEN)
     self.args = None
     self.set_state = None
+    self.kernel_gc = None
 
   def parse_args(self):
     # pylint: disable=too-many-statements
@@ -92,7 +95,7 @@ class MIOpen(MITunaInterface):
             TunaArgs.CONFIG_TYPE, TunaArgs.SESSION_ID, TunaArgs.MACHINES,
             TunaArgs.REMOTE_MACHINE, TunaArgs.LABEL, TunaArgs.RESTART_MACHINE,
             TunaArgs.DOCKER_NAME, TunaArgs.SHUTDOWN_WORKERS,
-            TunaArgs.ENQUEUE_ONLY
+            TunaArgs.ENQUEUE_ONLY, TunaArgs.ASYNC_TUNE
         ])
     parser.add_argument(
         '--find_mode',
@@ -117,6 +120,13 @@ class MIOpen(MITunaInterface):
                         action='store_true',
                         default=False,
                         help='Only tune dynamic solvers.')
+    parser.add_argument(
+        '--delta_applicability',
+        dest='delta_applicability',
+        action='store_true',
+        default=False,
+        help='With --update_applicability, skip configs that already have'
+        ' up to date applicability in the session')
     parser.add_argument(
         '-B',
         '--blacklist',
@@ -154,6 +164,10 @@ class MIOpen(MITunaInterface):
                                get_update_golden_parser(),
                                required=False)
 
+    subcommands.add_subcommand('archive_jobs',
+                               get_archive_jobs_parser(),
+                               required=False)
+
     group = parser.add_mutually_exclusive_group()
     group.add_argument('--add_tables',
                        dest='add_tables',
@@ -359,7 +373,8 @@ class MIOpen(MITunaInterface):
         kwargs = self.get_kwargs(0, f_vals)
         kwargs['fin_steps'] = ['applicability']
         worker = FinClass(**kwargs)
-        query = worker.query_cfgs(self.args.label)
+        query = worker.query_cfgs(self.args.label,
+                                  self.args.delta_applicability)
         cfg_rows = query.all()
         len_rows = len(cfg_rows)
         proc_lim = (len_rows + 99) / 100
@@ -403,20 +418,17 @@ class MIOpen(MITunaInterface):
       self.add_tables()
       return None
 
-    if self.args.subcommand is not None and self.args.subcommand == 'import_configs':
-      run_import_configs(self.args.import_configs, self.logger)
-      return None
-
-    if self.args.subcommand is not None and self.args.subcommand == 'load_job':
-      run_load_job(self.args.load_job, self.logger)
-      return None
-
-    if self.args.subcommand is not None and self.args.subcommand == 'export_db':
-      run_export_db(self.args.export_db, self.logger)
-      return None
-
-    if self.args.subcommand is not None and self.args.subcommand == 'update_golden':
-      run_update_golden(self.args.update_golden, self.logger)
+    subcmd_runners = {
+        'import_configs': run_import_configs,
+        'load_job': run_load_job,
+        'export_db': run_export_db,
+        'update_golden': run_update_golden,
+        'archive_jobs': run_archive_jobs
+    }
+    if self.args.subcommand is not None and self.args.subcommand in subcmd_runners:
+      subcmd_runners[self.args.subcommand](getattr(self.args,
+                                                   self.args.subcommand),
+                                           self.logger)
       return None
 
     machines = load_machines(self.args)
@@ -451,6 +463,7 @@ class MIOpen(MITunaInterface):
     kwargs = super().get_kwargs(gpu_idx, f_vals, tuning)
     kwargs['fin_steps'] = self.args.fin_steps
     kwargs['dynamic_solvers_only'] = self.args.dynamic_solvers_only
+    kwargs['delta_applicability'] = self.args.delta_applicability
     kwargs['config_type'] = self.args.config_type
     kwargs['reset_interval'] = self.args.reset_interval
 
@@ -517,10 +530,7 @@ class MIOpen(MITunaInterface):
     @return List of MIFin work objects
     """
     job_entries = []
-    if fin_steps:
-      conds.append(f"fin_step like '%{fin_steps[0]}%'")
-    else:
-      conds.append("fin_step='not_fin'")
+    conds.append(fin_step_cond(fin_steps))
 
     cond_str = ' AND '.join(conds)
     if cond_str:
@@ -695,12 +705,15 @@ class MIOpen(MITunaInterface):
     #if import is moved to top it will result in circular imports
     Q_NAME = q_name  #pylint: disable=import-outside-toplevel,unused-variable,invalid-name,redefined-outer-name
     from tuna.miopen.celery_tuning.celery_tasks import celery_enqueue  #pylint: disable=import-outside-toplevel
+    from kombu.utils.uuid import uuid  #pylint: disable=import-outside-toplevel
 
-    return celery_enqueue.apply_async((context,),
-                                      task_id=('-').join([self.prefix,
-                                                          uuid()]),
-                                      queue=q_name,
-                                      reply_to=q_name)
+    with span('celery_enqueue_call', queue=q_name, job=context['job']['id']):
+      return celery_enqueue.apply_async(
+          (context,),
+          task_id=('-').join([self.prefix, uuid()]),
+          queue=q_name,
+          reply_to=q_name,
+          headers=trace_headers())
 
   def process_compile_results(self, session, fin_json, context):
     """! Process result from fin_build worker
@@ -711,6 +724,7 @@ class MIOpen(MITunaInterface):
     """
     job = SimpleDict(**context['job'])
     pending = []
+    invalidated = []
     solver_id_map = get_solver_ids()
 
     failed_job = False
@@ -719,9 +733,13 @@ class MIOpen(MITunaInterface):
     try:
       if fin_json:
         if 'miopen_find_compile_result' in fin_json:
-          status = process_fdb_w_kernels(session, fin_json,
-                                         copy.deepcopy(context), self.dbt,
-                                         context['fdb_attr'], pending)
+          status = process_fdb_w_kernels(session,
+                                         fin_json,
+                                         copy.deepcopy(context),
+                                         self.dbt,
+                                         context['fdb_attr'],
+                                         pending,
+                                         invalidated=invalidated)
 
         elif 'miopen_perf_compile_result' in fin_json:
           status = process_pdb_compile(session, fin_json, job, self.dbt,
@@ -749,9 +767,25 @@ class MIOpen(MITunaInterface):
                     'compiled',
                     False,
                     result=result_str)
+    self.clean_cache(invalidated)
 
     return True
 
+  def clean_cache(self, kernel_groups, job_id=None):
+    """! Queue cache rows for the deferred clean-up, sweeps when due
+    @param kernel_groups Kernel groups invalidated by the job results
+    @param job_id Job whose fin kernels are no longer needed
+    """
+    if self.kernel_gc is None:
+      self.kernel_gc = KernelCacheGC(self.dbt, self.logger)
+    self.kernel_gc.record(kernel_groups, job_id)
+    self.kernel_gc.maybe_sweep()
+
+  def consume_done(self):
+    """! Sweep the cache rows still queued once all results are in"""
+    if self.kernel_gc is not None:
+      self.kernel_gc.sweep()
+
   def process_eval_results(self, session, fin_json, context):
     """! Process fin_json result
     @param session DB session
@@ -763,6 +797,7 @@ class MIOpen(MITunaInterface):
     failed_job = True
     result_str = ''
     pending = []
+    invalidated = []
     orig_state = 'compiled'
 
     try:
@@ -775,7 +810,8 @@ class MIOpen(MITunaInterface):
                                          context['fdb_attr'],
                                          pending,
                                          result_str='miopen_find_eval_result',
-                                         check_str='evaluated')
+                                         check_str='evaluated',
+                                         invalidated=invalidated)
         elif 'miopen_perf_eval_result' in fin_json:
           status = process_fdb_w_kernels(session,
                                          fin_json,
@@ -784,7 +820,8 @@ class MIOpen(MITunaInterface):
                                          context['fdb_attr'],
                                          pending,
                                          result_str='miopen_perf_eval_result',
-                                         check_str='evaluated')
+                                         check_str='evaluated',
+                                         invalidated=invalidated)
 
         success, result_str = get_fin_result(status)
         failed_job = not success
@@ -805,7 +842,8 @@ class MIOpen(MITunaInterface):
       else:
         self.logger.info("\n\n Setting job state to evaluated")
         set_job_state(session, job, self.dbt, 'evaluated', result=result_str)
-        clean_cache_table(self.dbt, job)
+      #fin kernels of the job are only dropped once it is evaluated
+      self.clean_cache(invalidated, None if failed_job else job.id)  #pylint: disable=no-member
     except (OperationalError, IntegrityError) as err:
       self.logger.warning('FinBuild: Unable to update Database %s', err)
       session.rollback()
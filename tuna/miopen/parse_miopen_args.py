@@ -256,6 +256,19 @@ def get_export_db_parser(with_yaml: bool = True) -> jsonargparse.ArgumentParser:
                       dest='filename',
                       help='Custom filename for DB dump',
                       default=None)
+  parser.add_argument(
+      '--multi_skew',
+      dest='multi_skew',
+      action='store_true',
+      help='With --kern_db and --golden_v, export a kdb per num_cu of the arch',
+      default=False)
+  parser.add_argument(
+      '--shared_blobs',
+      dest='shared_blobs',
+      action='store_true',
+      help='With --multi_skew, write each blob once to <arch>.kblob and thin'
+      ' per num_cu kdbs referencing it',
+      default=False)
 
   group = parser.add_mutually_exclusive_group(required=True)
   group.add_argument('-k',
@@ -313,4 +326,53 @@ def get_update_golden_parser(
                       action='store_true',
                       default=False,
                       help='Create performance table.')
+  parser.add_argument(
+      '--incremental',
+      dest='incremental',
+      action='store_true',
+      default=False,
+      help='Only merge find_db rows of --session_id changed since the last'
+      ' update of this golden version.')
+  parser.add_argument(
+      '--report',
+      dest='report',
+      action='store_true',
+      default=False,
+      help='Report the golden entries --session_id would add or change,'
+      ' without writing them.')
+  return parser
+
+
+def get_archive_jobs_parser(
+    with_yaml: bool = True) -> jsonargparse.ArgumentParser:
+  "Return parser for archive jobs subcommand"
+  parser = setup_arg_parser(
+      'Move finished jobs of closed sessions into the job archive table.',
+      [TunaArgs.CONFIG_TYPE],
+      with_yaml=with_yaml)
+  parser.add_argument(
+      '--session_id',
+      dest='session_id',
+      type=int,
+      nargs='*',
+      default=None,
+      help='Sessions to archive, default all closed sessions. A session is'
+      ' closed when none of its jobs are pending or in flight.')
+  parser.add_argument(
+      '--min_age',
+      dest='min_age',
+      type=int,
+      default=7,
+      help='Only archive sessions whose jobs have not changed for this many'
+      ' days.')
+  parser.add_argument('--chunk_size',
+                      dest='chunk_size',
+                      type=int,
+                      default=10000,
+                      help='Number of jobs moved per transaction.')
+  parser.add_argument('--dry_run',
+                      dest='dry_run',
+                      action='store_true',
+                      default=False,
+                      help='Report the jobs that would be archived.')
   return parser
@@ -0,0 +1,291 @@
+#!/usr/bin/env python3
+
+###############################################################################
+#
+# MIT License
+#
+# Copyright (c) 2024 Advanced Micro Devices, Inc.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+"""Generate a synthetic tuning workload: MIOpenDriver config lines, jobs over
+a set of solvers and the fin JSON each job would return. The same seed always
+gives the same output, so benchmark runs on different commits see the same data.
+
+Output files in --out_dir:
+  configs.txt      driver lines, importable with import_configs --file_name
+  jobs.jsonl       one job per line, config is the 1-based line in configs.txt
+  <fin_step>.jsonl fin output per job, as consumed by json_to_sql
+
+Fin outputs are only generated for convolutions, json_to_sql expects a
+convolution find db key in db_key.
+"""
+
+import os
+import json
+import random
+from typing import Any, Dict, Iterator, List, Tuple
+
+from tuna.parse_args import TunaArgs, setup_arg_parser
+from tuna.miopen.driver.convolution import DriverConvolution
+from tuna.miopen.driver.batchnorm import DriverBatchNorm
+from tuna.miopen.utils.config_type import ConfigType
+from tuna.miopen.utils.metadata import ALG_SLV_MAP, SLV_ALG_MAP, CMD_TO_PREC
+from tuna.miopen.metadata import MIOPEN_CELERY_STEPS
+from tuna.miopen.utils.parsing import get_pdb_key
+
+#field domains of the generated configs
+CHANNELS = [1, 3, 4, 8, 16, 32, 64, 128, 192, 256, 512, 1024, 2048]
+SPATIAL = [7, 14, 17, 28, 35, 56, 73, 112, 224]
+BATCHES = [1, 2, 4, 8, 16, 32, 64, 128, 256, 512]
+FILTERS = [(1, 1), (3, 3), (5, 5), (7, 7), (1, 7), (7, 1), (11, 11)]
+CONV_CMDS = ['conv', 'convfp16', 'convbfp16']
+BN_CMDS = ['bnorm', 'bnormfp16']
+LAYOUTS = ['NCHW', 'NHWC']
+DIRECTIONS = ['F', 'B', 'W']
+
+CONV_SOLVERS = sorted(slv for slvs in ALG_SLV_MAP.values() for slv in slvs)
+BN_SOLVERS = [
+    'BnFwdTrainingSpatialSingle', 'BnFwdTrainingSpatialMultiple',
+    'BnFwdTrainingPerActivation', 'BnBwdTrainingSpatialSingle',
+    'BnBwdTrainingSpatialMultiple', 'BnBwdTrainingPerActivation',
+    'BnFwdInference'
+]
+
+#key in the fin result telling if the solver succeeded, per fin step
+STEP_CHECK = {
+    'miopen_find_compile': 'find_compiled',
+    'miopen_find_eval': 'evaluated',
+    'miopen_perf_compile': 'perf_compiled',
+    'miopen_perf_eval': 'evaluated'
+}
+
+
+def conv_config(rng: random.Random) -> DriverConvolution:
+  """Random 2D convolution with a valid output size"""
+  fil_h, fil_w = rng.choice(FILTERS)
+  in_h = rng.choice([x for x in SPATIAL if x >= fil_h])
+  #mostly square inputs, as in real networks
+  in_w = in_h if rng.random() < 0.8 else rng.choice(
+      [x for x in SPATIAL if x >= fil_w])
+  in_channels = rng.choice(CHANNELS)
+  out_channels = rng.choice(CHANNELS)
+  group_count = 1
+  if rng.random() < 0.1:
+    #depthwise
+    out_channels = group_count = in_channels
+  stride = rng.choice([1, 1, 2])
+  layout = rng.choice(LAYOUTS)
+  return DriverConvolution(cmd=rng.choice(CONV_CMDS),
+                           kwargs={
+                               'batchsize': rng.choice(BATCHES),
+                               'spatial_dim': 2,
+                               'in_channels': in_channels,
+                               'in_h': in_h,
+                               'in_w': in_w,
+                               'fil_h': fil_h,
+                               'fil_w': fil_w,
+                               'out_channels': out_channels,
+                               'pad_h': rng.choice([0, fil_h // 2]),
+                               'pad_w': rng.choice([0, fil_w // 2]),
+                               'conv_stride_h': stride,
+                               'conv_stride_w': stride,
+                               'dilation_h': 1,
+                               'dilation_w': 1,
+                               'group_count': group_count,
+                               'direction': rng.choice(DIRECTIONS),
+                               'in_layout': layout,
+                               'out_layout': layout,
+                               'fil_layout': layout
+                           })
+
+
+def bn_config(rng: random.Random) -> Tuple[DriverBatchNorm, str]:
+  """Random batch norm, with its driver line"""
+  spatial = rng.choice(SPATIAL)
+  forw = rng.choice([0, 1])
+  line = f'./bin/MIOpenDriver {rng.choice(BN_CMDS)} -n {rng.choice(BATCHES)}'\
+         f' -c {rng.choice(CHANNELS)} -H {spatial} -W {spatial}'\
+         f' -m {rng.choice([0, 1])} --forw {forw} -b {1 - forw}'\
+         f' -s {rng.choice([0, 1])} -r {rng.choice([0, 1])}'
+  return DriverBatchNorm(line), line
+
+
+def fdb_key(driver: DriverConvolution) -> str:
+  """Find db key fin returns for this convolution"""
+  key = get_pdb_key(vars(driver), CMD_TO_PREC[driver.cmd], driver.direction)
+  #encode_pdb_key always writes NCHW
+  return key.replace('-NCHW-', f'-{driver.out_layout}-')
+
+
+def gen_configs(seed: int, num: int,
+                config_type: ConfigType) -> List[Tuple[Any, str]]:
+  """@num (driver, driver line) pairs"""
+  rng = random.Random(f'{seed}-configs')
+  configs: List[Tuple[Any, str]] = []
+  for _ in range(num):
+    if config_type == ConfigType.batch_norm:
+      configs.append(bn_config(rng))
+    else:
+      driver = conv_config(rng)
+      configs.append((driver, str(driver)))
+  return configs
+
+
+def gen_jobs(seed: int, num_configs: int, num_solvers: int,
+             config_type: ConfigType) -> Iterator[Tuple[int, str]]:
+  """(config, solver) for @num_solvers distinct solvers per config, configs
+  count from 1 like the lines of configs.txt"""
+  rng = random.Random(f'{seed}-jobs')
+  solvers = BN_SOLVERS if config_type == ConfigType.batch_norm else CONV_SOLVERS
+  for config in range(1, num_configs + 1):
+    for solver in rng.sample(solvers, min(num_solvers, len(solvers))):
+      yield config, solver
+
+
+def gen_blob(rng: random.Random, size: int) -> str:
+  """Kernel blob text of @size bytes"""
+  return f'{rng.getrandbits(4 * size):0{size}x}' if size else ''
+
+
+def fin_result(seed: int, db_key: str, config: int, solver: str, fin_step: str,
+               blob_size: int) -> Dict[str, Any]:
+  """fin output of @fin_step for one solver, the result only depends on the
+  arguments so any subset of jobs can be generated alone"""
+  rng = random.Random(f'{seed}-{config}-{solver}-{fin_step}')
+  entry: Dict[str, Any] = {
+      'solver_name': solver,
+      STEP_CHECK[fin_step]: True,
+      'reason': 'Success',
+      'algorithm': SLV_ALG_MAP.get(solver, 'miopenConvolutionAlgoDirect'),
+      'params': ','.join(str(rng.randrange(1, 256)) for _ in range(6)),
+      'workspace': rng.choice([0, 0, 1024, 1 << 20]),
+      'kernel_objects': []
+  }
+  if 'eval' in fin_step:
+    entry['time'] = round(rng.uniform(0.01, 10.0), 4)
+  for idx in range(rng.randint(1, 3)):
+    blob = gen_blob(rng, blob_size)
+    entry['kernel_objects'].append({
+        'kernel_file': f'{solver}_{idx}.o',
+        'comp_options': f'-DSEED={seed} -DCONFIG={config} -DKERNEL={idx}',
+        'blob': blob,
+        'md5_sum': f'{rng.getrandbits(128):032x}',
+        'uncompressed_size': 2 * len(blob)
+    })
+
+  return {
+      'db_key': db_key,
+      'config_tuna_id': config,
+      f'{fin_step}_result': [entry]
+  }
+
+
+def write_workload(args) -> Dict[str, int]:
+  """Write configs, jobs and fin outputs to args.out_dir"""
+  os.makedirs(args.out_dir, exist_ok=True)
+  configs = gen_configs(args.seed, args.num_configs, args.config_type)
+  with open(os.path.join(args.out_dir, 'configs.txt'), 'w',
+            encoding='utf-8') as outfile:
+    outfile.writelines(f'{line}\n' for _, line in configs)
+
+  fin_files: Dict[str, Any] = {}
+  if args.config_type == ConfigType.convolution:
+    fin_files = {
+        step:
+            open(  #pylint: disable=consider-using-with
+                os.path.join(args.out_dir, f'{step}.jsonl'),
+                'w',
+                encoding='utf-8') for step in args.fin_steps
+    }
+  counts = {'configs': len(configs), 'jobs': 0}
+  try:
+    with open(os.path.join(args.out_dir, 'jobs.jsonl'), 'w',
+              encoding='utf-8') as job_file:
+      for config, solver in gen_jobs(args.seed, len(configs), args.solvers,
+                                     args.config_type):
+        job_file.write(
+            json.dumps({
+                'config': config,
+                'solver': solver,
+                'fin_step': args.fin_steps
+            }) + '\n')
+        counts['jobs'] += 1
+        for step, outfile in fin_files.items():
+          result = fin_result(args.seed, fdb_key(configs[config - 1][0]),
+                              config, solver, step, args.blob_size)
+          outfile.write(json.dumps(result) + '\n')
+  finally:
+    for outfile in fin_files.values():
+      outfile.close()
+
+  return counts
+
+
+def parse_args():
+  """Function to parse arguments"""
+  parser = setup_arg_parser('Generate a synthetic tuning workload',
+                            [TunaArgs.CONFIG_TYPE],
+                            with_yaml=False)
+  parser.add_argument('-n',
+                      '--num_configs',
+                      dest='num_configs',
+                      type=int,
+                      default=1000,
+                      help='Number of configs')
+  parser.add_argument('--solvers',
+                      dest='solvers',
+                      type=int,
+                      default=10,
+                      help='Solvers per config, one job each')
+  parser.add_argument('--fin_steps',
+                      dest='fin_steps',
+                      type=str,
+                      default='miopen_find_compile,miopen_find_eval',
+                      help='Fin steps to generate results for: '
+                      f'{",".join(MIOPEN_CELERY_STEPS)}')
+  parser.add_argument('--blob_size',
+                      dest='blob_size',
+                      type=int,
+                      default=4096,
+                      help='Bytes per kernel blob')
+  parser.add_argument('--seed', dest='seed', type=int, default=0)
+  parser.add_argument('-o',
+                      '--out_dir',
+                      dest='out_dir',
+                      default='workload',
+                      help='Output directory')
+  args = parser.parse_args()
+  args.fin_steps = [x.strip() for x in args.fin_steps.split(',') if x.strip()]
+  for step in args.fin_steps:
+    if step not in STEP_CHECK:
+      parser.error(f'Unsupported fin step: {step}')
+  return args
+
+
+def main():
+  """Main module function"""
+  args = parse_args()
+  counts = write_workload(args)
+  print(f"{counts['configs']} configs, {counts['jobs']} jobs written to"
+        f" {args.out_dir}")
+
+
+if __name__ == '__main__':
+  main()
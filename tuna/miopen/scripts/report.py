@@ -26,6 +26,8 @@
 ###############################################################################
 """Post tuning analysis report"""
 
+import os
+import json
 import numpy as np
 import pandas as pd
 from tuna.parse_args import TunaArgs, setup_arg_parser
@@ -54,38 +56,125 @@ def parse_args():
                       type=int,
                       default=None,
                       help='Target golden miopen version')
+  parser.add_argument(
+      '--cache_dir',
+      dest='cache_dir',
+      type=str,
+      default='report_cache',
+      help='Directory for the local parquet cache of session/golden data')
+  parser.add_argument('--no_cache',
+                      dest='no_cache',
+                      action='store_true',
+                      default=False,
+                      help='Always fetch the full data from the DB')
 
   args = parser.parse_args()
   return args
 
 
+def write_report(dfr, basename):
+  """Write @dfr as both csv and parquet"""
+  dfr.to_csv(f"{basename}.csv")
+  dfr.to_parquet(f"{basename}.parquet")
+
+
+def table_fingerprint(session, table, cond):
+  """Row count and latest update_ts of the rows in @table matching @cond"""
+  query = f"select count(*), max(update_ts) from {table} where {cond}"
+  count, max_ts = session.execute(query).fetchone()
+  return count, str(max_ts) if max_ts is not None else None
+
+
+def fetch_rows(session, table, cond):
+  """Fetch the report columns of @table for rows matching @cond"""
+  query = f"select id, config, solver, kernel_time from {table} where {cond}"
+  return pd.DataFrame(data=session.execute(query).fetchall(),
+                      columns=['id', 'config', 'solver', 'ktime'])
+
+
+def upsert_rows(cached, delta):
+  """Replace rows of @cached by id with those in @delta, append new ones"""
+  if delta.empty:
+    return cached
+  kept = cached.loc[~cached['id'].isin(delta['id'])]
+  return pd.concat([kept, delta], ignore_index=True)
+
+
+def load_cached(session, table, cond, cache_file):
+  """Return the rows of @table matching @cond. Rows are kept in the parquet
+     @cache_file, only rows updated since the cached fingerprint are fetched"""
+  meta_file = f"{cache_file}.json"
+  count, max_ts = table_fingerprint(session, table, cond)
+  fingerprint = {'count': count, 'max_update_ts': max_ts}
+
+  dfr = None
+  if os.path.isfile(cache_file) and os.path.isfile(meta_file):
+    with open(meta_file, 'r', encoding='utf-8') as meta:
+      cached_fp = json.load(meta)
+    dfr = pd.read_parquet(cache_file)
+    if cached_fp == fingerprint:
+      LOGGER.info("Using cached %s data: %s rows", table, count)
+      return dfr
+    if cached_fp['max_update_ts'] is not None:
+      delta = fetch_rows(
+          session, table,
+          f"{cond} and update_ts>='{cached_fp['max_update_ts']}'")
+      dfr = upsert_rows(dfr, delta)
+      LOGGER.info("Fetched %s updated rows from %s", delta.shape[0], table)
+    if dfr.shape[0] != count:
+      #rows were removed from the table, the delta can not account for that
+      dfr = None
+
+  if dfr is None:
+    dfr = fetch_rows(session, table, cond)
+    LOGGER.info("Fetched all %s rows from %s", dfr.shape[0], table)
+
+  dfr.to_parquet(cache_file, index=False)
+  with open(meta_file, 'w', encoding='utf-8') as meta:
+    json.dump(fingerprint, meta)
+  return dfr
+
+
 def get_data(args, dbt, arch, num_cu):
   """Get data from DB based on args.session_id and golden_v"""
+  find_table = dbt.find_db_table.__tablename__
+  sess_cond = f"session={args.session_id}"
+  #only the golden rows of configs tuned in the session, the cache directory
+  #is per session
+  gold_cond = f"golden_miopen_v={args.golden_v} and arch='{arch}' and num_cu={num_cu}"\
+              f" and config in (select config from {find_table} where {sess_cond})"
 
   with DbSession() as session:
-    query = f"select config, solver, kernel_time from {dbt.find_db_table.__tablename__} "\
-            f"where session={args.session_id} order by config"
-    pd.options.display.max_rows = 100
-    query_data = session.execute(query).fetchall()
-    all_cfgs = [x[0] for x in query_data]
-    configs = set(all_cfgs)
-    session_data = pd.DataFrame(data=query_data)
-    query = f"select config, solver, kernel_time from conv_golden where golden_miopen_v="\
-            f"{args.golden_v} and arch='{arch}' and num_cu={num_cu} and config in "\
-            f"{tuple(configs)} order by config"
-    golden_data = pd.DataFrame(data=session.execute(query).fetchall())
-    session_data.columns = golden_data.columns = ['config', 'solver', 'ktime']
-
-    dfr = pd.merge(session_data,
-                   golden_data,
-                   on=['config', 'solver'],
-                   how='outer')
-
-    db_data = f"db_data_sess{args.session_id}_gv{args.golden_v}.csv"
-    LOGGER.info("Raw DB data has been written to file: %s\n", db_data)
-    dfr.to_csv(db_data)
-
-    return dfr, session_data, golden_data
+    if args.no_cache:
+      session_data = fetch_rows(session, find_table, sess_cond)
+      golden_data = fetch_rows(session, 'conv_golden', gold_cond)
+    else:
+      cache_dir = os.path.join(args.cache_dir,
+                               f"sess{args.session_id}_gv{args.golden_v}")
+      os.makedirs(cache_dir, exist_ok=True)
+      session_data = load_cached(session, find_table, sess_cond,
+                                 os.path.join(cache_dir, 'find_db.parquet'))
+      golden_data = load_cached(session, 'conv_golden', gold_cond,
+                                os.path.join(cache_dir, 'golden.parquet'))
+
+  session_data = session_data.drop(columns='id').sort_values('config',
+                                                             kind='stable')
+  golden_data = golden_data.drop(columns='id').sort_values('config',
+                                                           kind='stable')
+  session_data.reset_index(drop=True, inplace=True)
+  golden_data.reset_index(drop=True, inplace=True)
+
+  dfr = pd.merge(session_data,
+                 golden_data,
+                 on=['config', 'solver'],
+                 how='outer')
+
+  db_data = f"db_data_sess{args.session_id}_gv{args.golden_v}"
+  LOGGER.info("Raw DB data has been written to file: %s.csv/.parquet\n",
+              db_data)
+  write_report(dfr, db_data)
+
+  return dfr, session_data, golden_data
 
 
 def check_missing_configs(args, dbt, session_data, golden_data):
@@ -155,33 +244,70 @@ def configs_report(args, dfr):
   LOGGER.info("Mean for configs with slower kernel_time: %s %%", avg_positive)
   LOGGER.info("Mean for all configs: %s %%", dfr['diff'].mean())
 
-  dfr['%speedup'] = (dfr['ktime_y'] - dfr['ktime_x']) / dfr['ktime_y'] * 100
+  dfr['%speedup'] = dfr['diff'] / dfr['ktime_y'] * 100
   LOGGER.info("Overall speed-up: %s %%", round(dfr['%speedup'].mean(), 4))
 
-  config_data = f"config_data_sess{args.session_id}_gv{args.golden_v}.csv"
-  LOGGER.info("Config report has been written to file: %s\n", config_data)
-  dfr.to_csv(config_data)
+  config_data = f"config_data_sess{args.session_id}_gv{args.golden_v}"
+  LOGGER.info("Config report has been written to file: %s.csv/.parquet\n",
+              config_data)
+  write_report(dfr, config_data)
 
 
-def solver_report(args, dfr):
-  """Print detailed fastest solvers report"""
+def fastest_idx(configs, ktime):
+  """Index of the smallest non-negative @ktime for each config, same as
+     groupby('config').idxmin() on valid kernel times but without the per
+     group python loop"""
+  valid = ktime.ne(-1).to_numpy() & ktime.notna().to_numpy()
+  cfg = configs.to_numpy()[valid]
+  order = np.lexsort((np.arange(cfg.shape[0]), ktime.to_numpy()[valid], cfg))
+  first = np.ones(order.shape[0], dtype=bool)
+  first[1:] = cfg[order][1:] != cfg[order][:-1]
+  fastest = pd.Series(configs.index[valid][order][first],
+                      index=cfg[order][first])
+  return fastest.reindex(np.sort(configs.unique()))
 
-  LOGGER.info('Detailed solver report:')
 
+def compare_fastest(dfr):
+  """Fastest solver and kernel time per config for session(x) and golden(y)"""
   #dataframe with fastest solvers(solver_x, solver_y)
-  df_compare = dfr.replace(-1, np.nan).groupby('config')[['ktime_x',
-                                                          'ktime_y']].idxmin()
-  df_compare.columns = ['idx_x', 'idx_y']
+  df_compare = pd.DataFrame({
+      'idx_x': fastest_idx(dfr['config'], dfr['ktime_x']),
+      'idx_y': fastest_idx(dfr['config'], dfr['ktime_y'])
+  })
+  df_compare.index.name = 'config'
 
-  df_compare['solver_x'] = df_compare['idx_x'].apply(dfr['solver'].get)
-  df_compare['solver_y'] = df_compare['idx_y'].apply(dfr['solver'].get)
+  df_compare['solver_x'] = dfr['solver'].reindex(df_compare['idx_x']).to_numpy()
+  df_compare['solver_y'] = dfr['solver'].reindex(df_compare['idx_y']).to_numpy()
+
+  df_compare['ktime_x'] = dfr['ktime_x'].reindex(df_compare['idx_x']).to_numpy()
+  df_compare['ktime_y'] = dfr['ktime_y'].reindex(df_compare['idx_y']).to_numpy()
+  return df_compare
 
-  df_compare['ktime_x'] = df_compare['idx_x'].apply(dfr['ktime_x'].get)
-  df_compare['ktime_y'] = df_compare['idx_y'].apply(dfr['ktime_y'].get)
 
-  #dataframe where solvers have changed
+def diff_solvers_summary(df_compare):
+  """Mean %change and count for each pair of changed fastest solvers"""
   dfr_diff_solvers = df_compare.loc[df_compare['solver_x'].ne(
       df_compare['solver_y'])]
+  #Percentage difference formula
+  pct_diff = (dfr_diff_solvers['ktime_y'] -
+              dfr_diff_solvers['ktime_x']) / dfr_diff_solvers['ktime_y'] * 100
+  grouped = pct_diff.groupby(
+      [dfr_diff_solvers['solver_x'], dfr_diff_solvers['solver_y']])
+  #one value per solver pair, np.mean keeps +-inf from a zero golden ktime
+  #where the cython groupby mean returns NaN
+  return pd.DataFrame({
+      'diff_mean%': grouped.apply(np.mean),
+      'count': grouped.size()
+  }).reset_index()
+
+
+def solver_report(args, dfr):
+  """Print detailed fastest solvers report"""
+
+  LOGGER.info('Detailed solver report:')
+
+  df_compare = compare_fastest(dfr)
+
   #dataframe where solvers are the same
   dfr_same_solvers = df_compare.loc[df_compare['solver_x'].eq(
       df_compare['solver_y'])]
@@ -189,37 +315,25 @@ def solver_report(args, dfr):
   dfr_same_solvers['%diff'] = (dfr_same_solvers['ktime_y'] - dfr_same_solvers['ktime_x'])\
                     / dfr_same_solvers['ktime_y']  * 100
   _, id_solver_map = get_id_solvers()
-  dfr_same_solvers['solver_x'] = dfr_same_solvers['solver_x'].apply(
-      id_solver_map.get)
-  dfr_same_solvers['solver_y'] = dfr_same_solvers['solver_y'].apply(
-      id_solver_map.get)
+  dfr_same_solvers['solver_x'] = dfr_same_solvers['solver_x'].map(id_solver_map)
+  dfr_same_solvers['solver_y'] = dfr_same_solvers['solver_y'].map(id_solver_map)
   LOGGER.info('Mean %%change for same fastest solvers: %s',
               dfr_same_solvers.loc[:, '%diff'].mean())
-  report_file = f"same_solvers_report_sess{args.session_id}_gv{args.golden_v}.csv"
+  report_file = f"same_solvers_report_sess{args.session_id}_gv{args.golden_v}"
   LOGGER.info("Same solvers detailed report has been written to file: %s",
               report_file)
-  dfr_same_solvers.to_csv(report_file)
+  write_report(dfr_same_solvers, report_file)
 
-  #Percentage difference formula
-  diff_mean = dfr_diff_solvers.groupby(['solver_x', 'solver_y'])\
-                  .apply(lambda grp: ((grp['ktime_y'] - grp['ktime_x'])
-                    / grp['ktime_y'] * 100 ).mean())
-  count = dfr_diff_solvers.groupby(['solver_x',
-                                    'solver_y']).apply(lambda grp: grp.shape[0])
   # pylint: disable=unsupported-assignment-operation
   # pylint: disable=unsubscriptable-object
-  dfr_detailed_summary = pd.DataFrame({
-      'diff_mean%': diff_mean,
-      'count': count
-  }).reset_index()
-
-  dfr_detailed_summary['solver_x'] = dfr_detailed_summary['solver_x'].apply(
-      id_solver_map.get)
-  dfr_detailed_summary['solver_y'] = dfr_detailed_summary['solver_y'].apply(
-      id_solver_map.get)
+  dfr_detailed_summary = diff_solvers_summary(df_compare)
+  dfr_detailed_summary['solver_x'] = dfr_detailed_summary['solver_x'].map(
+      id_solver_map)
+  dfr_detailed_summary['solver_y'] = dfr_detailed_summary['solver_y'].map(
+      id_solver_map)
   LOGGER.info('Mean %%change for the fastest solvers that have changed: %s',
               dfr_detailed_summary.loc[:, 'diff_mean%'].mean())
-  report_file = f"different_solvers_report_sess{args.session_id}_gv{args.golden_v}.csv"
+  report_file = f"different_solvers_report_sess{args.session_id}_gv{args.golden_v}"
   LOGGER.info("Diff solvers detailed report has been written to file: %s",
               report_file)
   dfr_detailed_summary.rename(columns={
@@ -227,7 +341,7 @@ def solver_report(args, dfr):
       'solver_y': 'golden_solver'
   },
                               inplace=True)
-  dfr_detailed_summary.to_csv(report_file)
+  write_report(dfr_detailed_summary, report_file)
 
   return df_compare
 
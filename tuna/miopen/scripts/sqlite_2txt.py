@@ -27,11 +27,11 @@
 """Module to dump SQLite entries to txt files"""
 import argparse
 import os
-import sqlite3
 
 from tuna.utils.logger import setup_logger
 from tuna.miopen.utils.metadata import SQLITE_CONFIG_COLS
 from tuna.miopen.utils.parsing import get_pdb_key
+from tuna.miopen.utils.sqlite_reader import SQLiteReader
 
 LOGGER = setup_logger('SQLite2Txt')
 
@@ -49,20 +49,19 @@ def parse_args():
 def main():
   """Main module function"""
   args = parse_args()
-  cnx = sqlite3.connect(args.sqlite_file)
-  cur = cnx.cursor()
+  reader = SQLiteReader(args.sqlite_file, build_index=False)
   # get all the arch/num_cu pairs
   for arch, num_cu in [('gfx803', 36), ('gfx803', 64), ('gfx900', 56),
                        ('gfx900', 64), ('gfx906', 60), ('gfx906', 64),
                        ('gfx908', 120), ('gfx1030', 36), ('gfx90a', 110)]:
     LOGGER.info('Processing %s_%s', arch, num_cu)
-    cur.execute(
+    rows = reader.query(
         "SELECT " + ','.join(SQLITE_CONFIG_COLS) +
         ",perf_db.solver, perf_db.params FROM config INNER JOIN perf_db ON \
         config.id = perf_db.config WHERE perf_db.arch = ? AND perf_db.num_cu = ? \
         ORDER by config.id;", (arch, num_cu))
     perf_db = {}
-    for vals in cur.fetchall():
+    for vals in rows:
       params = vals[-1]
       solver = vals[-2]
       vals = vals[:-2]
@@ -89,7 +88,7 @@ def main():
       LOGGER.info('Done writing %s lines for %s_%s', cnt, arch, num_cu)
       f_file.flush()
       os.fsync(f_file)
-  cur.close()
+  reader.close()
 
 
 if __name__ == '__main__':
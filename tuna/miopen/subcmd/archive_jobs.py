@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+
+###############################################################################
+#
+# MIT License
+#
+# Copyright (c) 2024 Advanced Micro Devices, Inc.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+"""! @brief Move finished jobs of closed sessions into the job archive table"""
+import functools
+import logging
+import argparse
+from typing import Dict, List, Optional
+
+from tuna.miopen.parse_miopen_args import get_archive_jobs_parser
+from tuna.dbBase.sql_alchemy import DbSession
+from tuna.dbBase.dialect import days_ago
+from tuna.miopen.db.tables import MIOpenDBTables
+from tuna.utils.db_utility import session_retry
+from tuna.utils.logger import setup_logger
+
+#jobs in these states are pending or in flight, a session holding any is open
+ACTIVE_STATES = [
+    'new', 'started', 'running', 'compile_start', 'compiling', 'compiled',
+    'eval_start', 'evaluating', 'compiled_pend', 'evaluated_pend'
+]
+
+
+def _in_list(values) -> str:
+  """quoted sql list"""
+  return ', '.join(f"'{val}'" for val in values)
+
+
+def closed_sessions(session: DbSession,
+                    dbt: MIOpenDBTables,
+                    min_age: int,
+                    session_ids: Optional[List[int]] = None) -> List[int]:
+  """sessions with no active jobs and no job change for min_age days"""
+  job_table = dbt.job_table.__tablename__
+  sess_cond = ''
+  if session_ids:
+    sess_cond = f" where session in ({', '.join(map(str, session_ids))})"
+  query = f"select session from {job_table}{sess_cond} group by session"\
+  f" having sum(state in ({_in_list(ACTIVE_STATES)}))=0"\
+  f" and max(update_ts) < {days_ago(min_age)}"\
+  " order by session;"
+  return [row[0] for row in session.execute(query).fetchall()]
+
+
+def count_archivable(session: DbSession, dbt: MIOpenDBTables,
+                     sess_id: int) -> int:
+  """number of finished jobs of a session"""
+  query = f"select count(*) from {dbt.job_table.__tablename__}"\
+  f" where session={sess_id} and state not in ({_in_list(ACTIVE_STATES)});"
+  return int(session.execute(query).scalar())
+
+
+def archive_chunk(session: DbSession, dbt: MIOpenDBTables, sess_id: int,
+                  last_id: int, chunk_size: int) -> List[int]:
+  """move the next chunk of finished jobs of a session after last_id,
+  returns the moved job ids"""
+  job_table = dbt.job_table.__tablename__
+  query = f"select id from {job_table} where session={sess_id}"\
+  f" and id>{last_id} and state not in ({_in_list(ACTIVE_STATES)})"\
+  f" order by id limit {chunk_size};"
+  ids = [row[0] for row in session.execute(query).fetchall()]
+  if not ids:
+    return ids
+
+  id_list = ', '.join(map(str, ids))
+  cols = ', '.join(col.name
+                   for col in dbt.job_table.__table__.columns
+                   if col.computed is None)
+  session.execute(f"insert into {dbt.job_archive.__tablename__} ({cols})"
+                  f" select {cols} from {job_table} where id in ({id_list});")
+  #compile results reference the job row, they are of no use once it is done
+  for cache in (dbt.cache_table, dbt.fin_cache_table):
+    session.execute(f"delete from {cache.__tablename__}"
+                    f" where job_id in ({id_list});")
+  session.execute(f"delete from {job_table} where id in ({id_list});")
+  session.commit()
+  return ids
+
+
+def archive_session(dbt: MIOpenDBTables, sess_id: int, chunk_size: int,
+                    logger: logging.Logger) -> int:
+  """move all finished jobs of a session chunk by chunk, each chunk in its
+  own transaction"""
+  moved = 0
+  last_id = 0
+  with DbSession() as session:
+
+    def actuator(func):
+      return func(session, dbt, sess_id, last_id, chunk_size)
+
+    while True:
+      ids = session_retry(session, archive_chunk, functools.partial(actuator),
+                          logger)
+      if not ids:
+        break
+      moved += len(ids)
+      last_id = ids[-1]
+      logger.info('Session %s: archived %s jobs', sess_id, moved)
+
+  return moved
+
+
+def run_archive_jobs(args: argparse.Namespace,
+                     logger: logging.Logger) -> Dict[int, int]:
+  """archive the finished jobs of all closed sessions, returns the number of
+  jobs per session"""
+  dbt = MIOpenDBTables(config_type=args.config_type)
+  with DbSession() as session:
+    sessions = closed_sessions(session, dbt, args.min_age, args.session_id)
+    if args.session_id:
+      for sess_id in set(args.session_id) - set(sessions):
+        logger.warning('Session %s is still open, skipping', sess_id)
+
+    if args.dry_run:
+      counts = {
+          sess_id: count_archivable(session, dbt, sess_id)
+          for sess_id in sessions
+      }
+      for sess_id, count in counts.items():
+        logger.info('Session %s: %s jobs to archive', sess_id, count)
+      return counts
+
+  counts = {}
+  for sess_id in sessions:
+    counts[sess_id] = archive_session(dbt, sess_id, args.chunk_size, logger)
+  logger.info('Archived %s jobs from %s sessions into %s', sum(counts.values()),
+              len(counts), dbt.job_archive.__tablename__)
+  return counts
+
+
+def main():
+  """! Main function"""
+  parser = get_archive_jobs_parser()
+  args = parser.parse_args()
+  run_archive_jobs(args, setup_logger('archive_jobs'))
+
+
+if __name__ == '__main__':
+  main()
@@ -28,8 +28,9 @@
 import sqlite3
 import os
 from collections import OrderedDict
-from typing import Dict, Any, Optional, Union, List, Tuple
+from typing import Dict, Any, Optional, Union, List, Tuple, Set, Iterable
 import base64
+import hashlib
 import argparse
 import logging
 
@@ -41,6 +42,7 @@ from tuna.miopen.utils.metadata import SQLITE_PERF_DB_COLS
 from tuna.utils.db_utility import DB_Type
 from tuna.miopen.db.solver import get_id_solvers
 from tuna.utils.logger import setup_logger
+from tuna.utils.profiling import profiled
 from tuna.miopen.utils.analyze_parse_db import get_config_sqlite, insert_solver_sqlite
 from tuna.miopen.utils.analyze_parse_db import get_sqlite_cfg_dict
 from tuna.miopen.parse_miopen_args import get_export_db_parser
@@ -61,6 +63,10 @@ def arg_export_db(args: argparse.Namespace, logger: logging.Logger):
   """export db args for exportdb"""
   if args.golden_v and not args.arch:
     logger.error('arch must be set with golden_v')
+  if args.multi_skew and (args.golden_v is None or not args.kern_db):
+    logger.error('multi_skew exports a kern_db from golden_v')
+  if args.shared_blobs and not args.multi_skew:
+    logger.error('shared_blobs must be set with multi_skew')
 
 
 def get_filename(arch: str,
@@ -266,6 +272,20 @@ def build_miopen_kdb(dbt: MIOpenDBTables, find_db, logger: logging.Logger):
   return kern_db
 
 
+def kdb_key(arch: str, kern) -> Tuple[str, str]:
+  """kernel_name and kernel_args of a kernel_cache row as MIOpen looks them up"""
+  name = kern.kernel_name
+  args = kern.kernel_args
+  #check if extensions should be added
+  if not name.endswith('.o'):
+    name += ".o"
+  if not "-mcpu=" in args:
+    if not name.endswith('.mlir.o'):
+      args += f" -mcpu={arch}"
+  return name, args
+
+
+@profiled('write_kdb')
 def write_kdb(arch, num_cu, kern_db, logger: logging.Logger, filename=None):
   """
   Write blob map to sqlite
@@ -283,20 +303,12 @@ def write_kdb(arch, num_cu, kern_db, logger: logging.Logger, filename=None):
   cur.execute(
       "CREATE UNIQUE INDEX `idx_kern_db` ON kern_db(kernel_name, kernel_args);")
 
-  ins_list: List[Tuple[str, str]] = []
+  ins_list: Set[Tuple[str, str]] = set()
   for kern in kern_db:
-    name = kern.kernel_name
-    args = kern.kernel_args
-    #check if extensions should be added
-    if not name.endswith('.o'):
-      name += ".o"
-    if not "-mcpu=" in args:
-      if not name.endswith('.mlir.o'):
-        args += f" -mcpu={arch}"
-
+    name, args = kdb_key(arch, kern)
     ins_key = (name, args)
     if ins_key not in ins_list:
-      ins_list.append(ins_key)
+      ins_list.add(ins_key)
       cur.execute(
           "INSERT INTO kern_db (kernel_name, kernel_args, kernel_blob, kernel_hash, "
           "uncompressed_size) VALUES(?, ?, ?, ?, ?);",
@@ -315,6 +327,17 @@ def build_miopen_fdb_skews(args: argparse.Namespace, query,
                            logger: logging.Logger) -> OrderedDict:
   """return dict with key: fdb_key + num_cu, val: list of fdb entries"""
   miopen_fdb: OrderedDict = OrderedDict()
+  for num_cu, miopen_fdb_skew in build_skew_fdbs(args, query, logger).items():
+    for key, value in miopen_fdb_skew.items():
+      miopen_fdb[f"{key}_cu{num_cu}"] = value
+
+  return miopen_fdb
+
+
+def build_skew_fdbs(args: argparse.Namespace, query,
+                    logger: logging.Logger) -> Dict[int, OrderedDict]:
+  """return dict with key: num_cu, val: fdb of that skew"""
+  skew_fdbs: Dict[int, OrderedDict] = {}
   with DbSession() as session:
     db_entries = query.all()
     fdb_ids = []
@@ -327,11 +350,9 @@ def build_miopen_fdb_skews(args: argparse.Namespace, query,
 
   for num_cu in skews:
     cu_query = query.filter(args.src_table.num_cu == num_cu)
-    miopen_fdb_skew = build_miopen_fdb(cu_query, logger)
-    for key, value in miopen_fdb_skew.items():
-      miopen_fdb[f"{key}_cu{num_cu}"] = value
+    skew_fdbs[num_cu] = build_miopen_fdb(cu_query, logger)
 
-  return miopen_fdb
+  return skew_fdbs
 
 
 def export_kdb(dbt: MIOpenDBTables,
@@ -356,6 +377,175 @@ def export_kdb(dbt: MIOpenDBTables,
   return write_kdb(args.arch, args.num_cu, kern_db, logger, args.filename)
 
 
+class KernelBlobs():
+  """Decoded kernel blobs by content hash, each kernel_cache row is decoded
+  and hashed once however many skews export it"""
+
+  def __init__(self) -> None:
+    self.row_hash: Dict[int, str] = {}
+    self.blobs: Dict[str, bytes] = {}
+
+  def content_hash(self, kern) -> str:
+    """sha256 of the decoded blob of kernel_cache row @kern"""
+    if kern.id not in self.row_hash:
+      blob = base64.b64decode(kern.kernel_blob)
+      digest = hashlib.sha256(blob).hexdigest()
+      self.blobs.setdefault(digest, blob)
+      self.row_hash[kern.id] = digest
+    return self.row_hash[kern.id]
+
+  def size(self) -> int:
+    """bytes of the distinct blobs"""
+    return sum(len(blob) for blob in self.blobs.values())
+
+
+def skew_kdb_rows(arch: str, kern_db, blobs: KernelBlobs) -> OrderedDict:
+  """return dict with key: (kernel_name, kernel_args),
+  val: (content hash, kernel_hash, uncompressed_size)"""
+  rows: OrderedDict = OrderedDict()
+  for kern in kern_db:
+    key = kdb_key(arch, kern)
+    if key not in rows:
+      rows[key] = (blobs.content_hash(kern), kern.kernel_hash,
+                   kern.uncompressed_size)
+  return rows
+
+
+def kdb_dup_matrix(skew_rows: Dict[int, OrderedDict],
+                   blobs: KernelBlobs) -> Dict[int, Dict[int, Tuple[int, int]]]:
+  """(blobs, bytes) two skews have in common, the diagonal holds the
+  unique blobs of each skew"""
+  hashes = {
+      num_cu: {row[0] for row in rows.values()}
+      for num_cu, rows in skew_rows.items()
+  }
+  matrix: Dict[int, Dict[int, Tuple[int, int]]] = {}
+  for num_cu, own in hashes.items():
+    matrix[num_cu] = {}
+    for other, theirs in hashes.items():
+      common = own & theirs
+      matrix[num_cu][other] = (len(common),
+                               sum(len(blobs.blobs[dig]) for dig in common))
+  return matrix
+
+
+def log_dup_matrix(matrix: Dict[int, Dict[int, Tuple[int, int]]],
+                   logger: logging.Logger) -> None:
+  """log the blobs shared between skews"""
+  skews = list(matrix)
+  logger.info("shared blobs  %s", ''.join(f'{cu:>10}' for cu in skews))
+  for num_cu in skews:
+    logger.info("num_cu %6s %s", num_cu,
+                ''.join(f'{matrix[num_cu][cu][0]:>10}' for cu in skews))
+
+
+def write_skew_kdb(file_name: str, rows: OrderedDict, blobs: KernelBlobs,
+                   thin: bool) -> str:
+  """write the kdb of one skew, a thin kdb names blobs by content hash in
+  place of holding them"""
+  if os.path.isfile(file_name):
+    os.remove(file_name)
+  blob_col = "`blob_hash` TEXT NOT NULL" if thin else "`kernel_blob` BLOB NOT NULL"
+  conn = sqlite3.connect(file_name)
+  conn.execute(
+      "CREATE TABLE `kern_db` (`id` INTEGER PRIMARY KEY ASC,`kernel_name` TEXT NOT NULL,"
+      f"`kernel_args` TEXT NOT NULL,{blob_col},`kernel_hash` TEXT NOT NULL,"
+      "`uncompressed_size` INT NOT NULL);")
+  conn.execute(
+      "CREATE UNIQUE INDEX `idx_kern_db` ON kern_db(kernel_name, kernel_args);")
+  conn.executemany(
+      "INSERT INTO kern_db (kernel_name, kernel_args,"
+      f" {'blob_hash' if thin else 'kernel_blob'}, kernel_hash,"
+      " uncompressed_size) VALUES(?, ?, ?, ?, ?);",
+      ((name, args, digest if thin else blobs.blobs[digest], kern_hash, size)
+       for (name, args), (digest, kern_hash, size) in rows.items()))
+  conn.commit()
+  conn.close()
+  return file_name
+
+
+def write_blob_file(file_name: str, hashes: Set[str],
+                    blobs: KernelBlobs) -> str:
+  """write each blob of @hashes once, keyed by content hash"""
+  if os.path.isfile(file_name):
+    os.remove(file_name)
+  conn = sqlite3.connect(file_name)
+  conn.execute("CREATE TABLE `blob_db` (`blob_hash` TEXT PRIMARY KEY,"
+               "`kernel_blob` BLOB NOT NULL) WITHOUT ROWID;")
+  conn.executemany("INSERT INTO blob_db (blob_hash, kernel_blob) VALUES(?, ?);",
+                   ((digest, blobs.blobs[digest]) for digest in sorted(hashes)))
+  conn.commit()
+  conn.close()
+  return file_name
+
+
+def expand_thin_kdb(thin_file: str, blob_file: str, file_name: str) -> str:
+  """rebuild the full kdb MIOpen reads from a thin kdb and its blob file"""
+  if os.path.isfile(file_name):
+    os.remove(file_name)
+  write_skew_kdb(file_name, OrderedDict(), KernelBlobs(), False)
+  conn = sqlite3.connect(file_name)
+  conn.execute("ATTACH DATABASE ? AS thin", (thin_file,))
+  conn.execute("ATTACH DATABASE ? AS shared", (blob_file,))
+  conn.execute(
+      "INSERT INTO kern_db (kernel_name, kernel_args, kernel_blob, kernel_hash,"
+      " uncompressed_size) SELECT k.kernel_name, k.kernel_args, b.kernel_blob,"
+      " k.kernel_hash, k.uncompressed_size FROM thin.kern_db k"
+      " INNER JOIN shared.blob_db b ON b.blob_hash=k.blob_hash ORDER BY k.id;")
+  conn.commit()
+  conn.close()
+  return file_name
+
+
+def export_kdb_skews(dbt: MIOpenDBTables,
+                     args: argparse.Namespace,
+                     logger: logging.Logger,
+                     shared_blobs: bool = False) -> List[str]:
+  """
+  Export a kdb per num_cu skew of args.arch from the golden table
+  """
+  query = get_fdb_query(dbt, args, logger)
+  skew_kdbs = (
+      (num_cu, build_miopen_kdb(dbt, miopen_fdb, logger))
+      for num_cu, miopen_fdb in build_skew_fdbs(args, query, logger).items())
+  return write_kdb_skews(args.arch, skew_kdbs, logger, shared_blobs)
+
+
+@profiled('write_kdb_skews')
+def write_kdb_skews(arch: str,
+                    skew_kdbs: Iterable[Tuple[int, List[Any]]],
+                    logger: logging.Logger,
+                    shared_blobs: bool = False) -> List[str]:
+  """
+  Write the (num_cu, kernel_cache rows) skews of @arch, hashing each kernel
+  once. With shared_blobs the blobs go to one <arch>.kblob file and each skew
+  gets a thin kdb, else each skew gets a full kdb.
+  """
+  blobs = KernelBlobs()
+  skew_rows: Dict[int, OrderedDict] = {}
+  for num_cu, kern_db in skew_kdbs:
+    skew_rows[num_cu] = skew_kdb_rows(arch, kern_db, blobs)
+
+  matrix = kdb_dup_matrix(skew_rows, blobs)
+  log_dup_matrix(matrix, logger)
+  total = sum(row[cu][1] for cu, row in matrix.items())
+  unique = blobs.size()
+  logger.warning("Blob bytes: %s over all skews, %s unique", total, unique)
+
+  files = []
+  for num_cu, rows in skew_rows.items():
+    file_name = get_filename(arch, num_cu, None, False, DB_Type.KERN_DB)
+    if shared_blobs:
+      file_name = file_name.replace('.kdb', '.thin.kdb')
+    files.append(write_skew_kdb(file_name, rows, blobs, shared_blobs))
+  if shared_blobs:
+    blob_file = get_filename(arch, None, None, False,
+                             DB_Type.KERN_DB).replace('.kdb', '.kblob')
+    files.append(write_blob_file(blob_file, set(blobs.blobs), blobs))
+
+  return files
+
+
 def create_sqlite_tables(arch, num_cu, filename=None):
   """create sqlite3 tables"""
   local_path = get_filename(arch, num_cu, filename, False, DB_Type.PERF_DB)
@@ -467,6 +657,9 @@ def run_export_db(args: argparse.Namespace, logger: logging.Logger):
 
   if args.find_db:
     result_file = export_fdb(dbt, args, logger)
+  elif args.kern_db and args.multi_skew:
+    result_file = '\n'.join(
+        export_kdb_skews(dbt, args, logger, args.shared_blobs))
   elif args.kern_db:
     result_file = export_kdb(dbt, args, logger)
   elif args.perf_db:
@@ -28,12 +28,15 @@
 import os
 import argparse
 import sqlite3
+from itertools import islice
 from shutil import copyfile
 
 from tuna.utils.logger import setup_logger
+from tuna.utils.profiling import profiled
 from tuna.miopen.utils.analyze_parse_db import parse_pdb_filename, insert_solver_sqlite
 from tuna.miopen.utils.analyze_parse_db import get_config_sqlite
-from tuna.miopen.utils.analyze_parse_db import get_sqlite_row, get_sqlite_table, get_sqlite_data
+from tuna.miopen.utils.analyze_parse_db import get_sqlite_data
+from tuna.miopen.utils.sqlite_reader import SQLiteReader, LOOKUP_BATCH
 from tuna.miopen.utils.helper import prune_cfg_dims
 
 LOGGER = setup_logger('merge_pdb')
@@ -291,17 +294,36 @@ def merge_text_file(master_file, copy_only, keep_keys, target_file=None):
   return final_file
 
 
-def merge_sqlite_pdb(cnx_to, local_paths):  # pylint: disable=too-many-locals
+@profiled('merge_sqlite_pdb')
+def merge_sqlite_pdb(cnx_to, local_paths):
   """sqlite merge for perf db"""
   for local_path in local_paths:
     LOGGER.info('Processing file: %s', local_path)
 
-    cnx_from = sqlite3.connect(local_path)
-    perf_rows, perf_cols = get_sqlite_table(cnx_from, 'perf_db')
-    for row in perf_rows:
-      perf = dict(zip(perf_cols, row))
-      cfg_row, cfg_cols = get_sqlite_row(cnx_from, 'config', perf['config'])
-      cfg = dict(zip(cfg_cols, cfg_row))
+    with SQLiteReader(local_path, build_index=False) as reader:
+      merge_sqlite_perf_rows(cnx_to, reader)
+
+  cur = cnx_to.cursor()
+  query = "delete from config where not id in (select distinct config from perf_db);"
+  LOGGER.info("query: %s", query)
+  cur.execute(query)
+  cnx_to.commit()
+  cur.execute("VACUUM;")
+  cnx_to.commit()
+  cur.close()
+
+
+def merge_sqlite_perf_rows(cnx_to, reader):  # pylint: disable=too-many-locals
+  """merge the perf_db rows of one pdb, looking up their configs in batches"""
+  perf_cols = [col for col in reader.columns('perf_db') if col != 'id']
+  cfg_cols = reader.columns('config')
+  perf_rows = reader.scan('perf_db', perf_cols)
+  for chunk in iter(lambda: list(islice(perf_rows, LOOKUP_BATCH)), []):
+    perfs = [dict(zip(perf_cols, row)) for row in chunk]
+    cfg_rows = reader.get_many('config', ['id'],
+                               [perf['config'] for perf in perfs], cfg_cols)
+    for perf in perfs:
+      cfg = dict(zip(cfg_cols, cfg_rows[perf['config']]))
       cfg.pop('id', None)
 
       res, col = get_sqlite_data(cnx_to, 'config', prune_cfg_dims(cfg))
@@ -327,17 +349,7 @@ def merge_sqlite_pdb(cnx_to, local_paths):  # pylint: disable=too-many-locals
       LOGGER.info("insert: %s", perf)
       insert_solver_sqlite(cnx_to, perf)
 
-    cnx_to.commit()
-    cnx_from.close()
-
-  cur = cnx_to.cursor()
-  query = "delete from config where not id in (select distinct config from perf_db);"
-  LOGGER.info("query: %s", query)
-  cur.execute(query)
   cnx_to.commit()
-  cur.execute("VACUUM;")
-  cnx_to.commit()
-  cur.close()
 
 
 def merge_sqlite_bin_cache(cnx_to, local_paths):
@@ -345,9 +357,10 @@ def merge_sqlite_bin_cache(cnx_to, local_paths):
   dup_count = 0
   for local_path in local_paths:
     LOGGER.info('Processing file: %s', local_path)
-    cnx_from = sqlite3.connect(local_path)
+    reader = SQLiteReader(local_path, build_index=False)
 
-    db_rows, db_cols = get_sqlite_table(cnx_from, 'kern_db', include_id=False)
+    db_cols = [col for col in reader.columns('kern_db') if col != 'id']
+    db_rows = reader.scan('kern_db', db_cols)
     cur_to = cnx_to.cursor()
     # pylint: disable-next=consider-using-f-string ; more readable
     query = "INSERT INTO `kern_db`({}) VALUES({})".format(
@@ -364,6 +377,7 @@ def merge_sqlite_bin_cache(cnx_to, local_paths):
         # pylint: enable=consider-using-f-string
     cnx_to.commit()
     cur_to.close()
+    reader.close()
     LOGGER.warning('Duplicate Count: %d', dup_count)
 
 
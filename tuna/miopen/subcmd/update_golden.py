@@ -36,9 +36,17 @@ from tuna.miopen.parse_miopen_args import get_update_golden_parser
 from tuna.dbBase.sql_alchemy import DbSession
 from tuna.miopen.db.tables import MIOpenDBTables
 from tuna.miopen.db.session import Session
+from tuna.miopen.db.convolutionjob_tables import ConvGoldenWatermark
+from tuna.miopen.db.find_db import ConvolutionFindDB
 from tuna.utils.db_utility import session_retry
 from tuna.utils.logger import setup_logger
 from tuna.db_engine import ENGINE
+from tuna.dbBase.dialect import is_sqlite, insert_ignore
+
+#conv_golden columns an update copies from the tuning data
+GOLD_UPDATE_COLS = [
+    'valid', 'params', 'workspace_sz', 'kernel_time', 'kernel_group', 'session'
+]
 
 
 def arg_update_golden(args: argparse.Namespace, logger: logging.Logger):
@@ -153,6 +161,13 @@ def create_perf_table(args: argparse.Namespace, logger: logging.Logger):
   return True
 
 
+def sqlite_gold_update(source: str, where: str) -> str:
+  """SQLite form of the conv_golden update joined to @source, which has no
+  multi-table UPDATE but UPDATE ... FROM"""
+  sets = ', '.join(f'{col}=ps.{col}' for col in GOLD_UPDATE_COLS)
+  return f"update conv_golden as cg set {sets} from {source} where {where};"
+
+
 def gold_base_update(session: DbSession,
                      gold_v: int,
                      base_gold_v: int,
@@ -168,11 +183,18 @@ def gold_base_update(session: DbSession,
     ", cg.kernel_time=ps.kernel_time, cg.kernel_group=ps.kernel_group, cg.session=ps.session"\
     f" where cg.golden_miopen_v={gold_v} and ps.golden_miopen_v={base_gold_v} and ps.valid=1"\
     " and ps.kernel_time>=0;"
+    if is_sqlite():
+      update_q = sqlite_gold_update(
+          "conv_golden as ps", "cg.config=ps.config and cg.fdb_key=ps.fdb_key"
+          " and cg.alg_lib=ps.alg_lib and cg.opencl=ps.opencl"
+          " and cg.solver=ps.solver and ps.arch=cg.arch and ps.num_cu=cg.num_cu"
+          f" and cg.golden_miopen_v={gold_v} and ps.golden_miopen_v={base_gold_v}"
+          " and ps.valid=1 and ps.kernel_time>=0")
     logger.info(update_q)
     session.execute(update_q)
 
   logger.info("Inserting golden version %s -> %s.", base_gold_v, gold_v)
-  insert_q = "insert ignore into conv_golden (valid, golden_miopen_v, arch, num_cu, config"\
+  insert_q = f"{insert_ignore()} into conv_golden (valid, golden_miopen_v, arch, num_cu, config"\
   ", fdb_key, params, kernel_time, workspace_sz, alg_lib, opencl, kernel_group, session, solver)"\
   f" select valid, {gold_v}, arch, num_cu, config, fdb_key, params, kernel_time"\
   ", workspace_sz, alg_lib, opencl, kernel_group, session, solver"\
@@ -188,8 +210,16 @@ def gold_session_update(session: DbSession,
                         gold_v: int,
                         tune_s: int,
                         logger: logging.Logger,
-                        overwrite: bool = True):
-  """copy data to conv_golden from tuning session in conv_find_db"""
+                        overwrite: bool = True,
+                        since=None,
+                        watermark: bool = False):
+  """copy data to conv_golden from tuning session in conv_find_db,
+  with since set only rows with update_ts >= since are merged, with watermark
+  set the high-water mark is recorded in the same transaction as the merge"""
+  merged = 0
+  #update_ts has one second resolution, rows written later within the second
+  #of the mark are newer, the rows merged at the mark are merged again
+  since_cond = f" and ps.update_ts>='{since}'" if since else ""
   if overwrite:
     logger.info("Gold %s Update with session %s.", gold_v, tune_s)
     update_q = "update conv_golden as cg inner join conv_find_db as ps on cg.config=ps.config"\
@@ -199,28 +229,136 @@ def gold_session_update(session: DbSession,
     " set cg.valid=ps.valid, cg.params=ps.params, cg.workspace_sz=ps.workspace_sz"\
     ", cg.kernel_time=ps.kernel_time, cg.kernel_group=ps.kernel_group, cg.session=ps.session"\
     f" where cg.golden_miopen_v={gold_v} and ps.session={tune_s} and ps.valid=1"\
-    " and ps.kernel_time>=0;"
-    session.execute(update_q)
+    f" and ps.kernel_time>=0{since_cond};"
+    if is_sqlite():
+      update_q = sqlite_gold_update(
+          "conv_find_db as ps inner join session as s on ps.session=s.id",
+          "cg.config=ps.config and cg.fdb_key=ps.fdb_key"
+          " and cg.alg_lib=ps.alg_lib and cg.opencl=ps.opencl"
+          " and cg.solver=ps.solver and s.arch=cg.arch and s.num_cu=cg.num_cu"
+          f" and cg.golden_miopen_v={gold_v} and ps.session={tune_s}"
+          f" and ps.valid=1 and ps.kernel_time>=0{since_cond}")
+    res = session.execute(update_q)
+    merged += res.rowcount
+    logger.info("Gold %s: updated %s rows.", gold_v, res.rowcount)
 
   logger.info("Gold %s Insert session %s.", gold_v, tune_s)
-  insert_q = "insert ignore into conv_golden (valid, golden_miopen_v, arch, num_cu, config"\
+  insert_q = f"{insert_ignore()} into conv_golden (valid, golden_miopen_v, arch, num_cu, config"\
   ", fdb_key, params, kernel_time, workspace_sz, alg_lib, opencl, kernel_group, session, solver)"\
-  f" select cfd.valid, {gold_v}, arch, num_cu, config, fdb_key, params, kernel_time"\
+  f" select ps.valid, {gold_v}, arch, num_cu, config, fdb_key, params, kernel_time"\
   ", workspace_sz, alg_lib, opencl, kernel_group, session, solver"\
-  " from conv_find_db as cfd inner join session as s on cfd.session=s.id"\
-  f" where session={tune_s} and cfd.valid=1 and kernel_time>=0;"
-  session.execute(insert_q)
+  " from conv_find_db as ps inner join session as s on ps.session=s.id"\
+  f" where session={tune_s} and ps.valid=1 and kernel_time>=0{since_cond};"
+  res = session.execute(insert_q)
+  merged += res.rowcount
+  logger.info("Gold %s: inserted %s rows.", gold_v, res.rowcount)
+  if watermark:
+    #the merge holds locks on the rows it read until the commit, so the mark
+    #covers exactly what was merged
+    set_watermark(session, gold_v, tune_s, session_update_ts(session, tune_s),
+                  merged, logger)
   session.commit()
 
   return True
 
 
+def get_watermark(session: DbSession, gold_v: int, tune_s: int):
+  """update_ts of the last conv_find_db row of tune_s merged into gold_v"""
+  query = session.query(ConvGoldenWatermark.last_update_ts)\
+          .filter(ConvGoldenWatermark.session == tune_s)\
+          .filter(ConvGoldenWatermark.golden_miopen_v == gold_v)
+  obj = query.first()
+  return obj[0] if obj else None
+
+
+def session_update_ts(session: DbSession, tune_s: int):
+  """latest update_ts of the conv_find_db rows of a tuning session"""
+  # pylint: disable=comparison-with-callable
+  query = session.query(sqlfunc.max(ConvolutionFindDB.update_ts))\
+          .filter(ConvolutionFindDB.session == tune_s)
+  # pylint: enable=comparison-with-callable
+  return query.scalar()
+
+
+def set_watermark(session: DbSession, gold_v: int, tune_s: int, mark, rows: int,
+                  logger: logging.Logger):
+  """record the high-water mark and the golden rows written by a merge of
+  tune_s into gold_v, committed by the caller together with the merge"""
+  if mark is None:
+    return False
+  logger.info("Gold %s: session %s merged %s rows up to %s.", gold_v, tune_s,
+              rows, mark)
+  upsert_q = "insert into conv_golden_watermark"\
+  " (session, golden_miopen_v, last_update_ts, merged_rows)"\
+  f" values ({tune_s}, {gold_v}, '{mark}', {rows})"\
+  " on duplicate key update last_update_ts=values(last_update_ts),"\
+  " merged_rows=merged_rows+values(merged_rows);"
+  if is_sqlite():
+    upsert_q = "insert into conv_golden_watermark"\
+    " (session, golden_miopen_v, last_update_ts, merged_rows)"\
+    f" values ({tune_s}, {gold_v}, '{mark}', {rows})"\
+    " on conflict(session, golden_miopen_v)"\
+    " do update set last_update_ts=excluded.last_update_ts,"\
+    " merged_rows=merged_rows+excluded.merged_rows;"
+  session.execute(upsert_q)
+  return True
+
+
+def golden_change_report(session: DbSession,
+                         gold_v: int,
+                         tune_s: int,
+                         since=None) -> Dict[str, int]:
+  """count the golden entries a session update would add or change,
+  without writing anything"""
+  since_cond = f" and ps.update_ts>='{since}'" if since else ""
+  #null-safe equality
+  nse = 'is' if is_sqlite() else '<=>'
+  report_q = "select count(*),"\
+  " coalesce(sum(cg.id is null), 0),"\
+  f" coalesce(sum(cg.id is not null and not (cg.valid {nse} ps.valid"\
+  f" and cg.params {nse} ps.params and cg.workspace_sz {nse} ps.workspace_sz"\
+  f" and cg.kernel_time {nse} ps.kernel_time and cg.kernel_group {nse} ps.kernel_group"\
+  f" and cg.session {nse} ps.session)), 0)"\
+  " from conv_find_db as ps inner join session as s on ps.session=s.id"\
+  f" left join conv_golden as cg on cg.golden_miopen_v={gold_v}"\
+  " and cg.config=ps.config and cg.solver=ps.solver"\
+  " and cg.arch=s.arch and cg.num_cu=s.num_cu"\
+  f" and cg.fdb_key {nse} ps.fdb_key and cg.alg_lib {nse} ps.alg_lib"\
+  " and cg.opencl=ps.opencl"\
+  f" where ps.session={tune_s} and ps.valid=1 and ps.kernel_time>=0"\
+  f"{since_cond};"
+  scanned, new, changed = session.execute(report_q).fetchone()
+  return {
+      'scanned': int(scanned),
+      'new': int(new),
+      'changed': int(changed),
+      'unchanged': int(scanned) - int(new) - int(changed)
+  }
+
+
 def run_update_golden(args: argparse.Namespace, logger: logging.Logger):
   """run update golden script"""
   dbt = MIOpenDBTables(session_id=args.session_id, config_type=args.config_type)
+  incremental = getattr(args, 'incremental', False)
+
+  if (incremental or getattr(args, 'report', False)) and not args.session_id:
+    raise ValueError('--incremental and --report require --session_id')
+
+  if getattr(args, 'report', False):
+    with DbSession() as session:
+      since = get_watermark(session, args.golden_v,
+                            args.session_id) if incremental else None
+      changes = golden_change_report(session, args.golden_v, args.session_id,
+                                     since)
+    logger.info(
+        'Golden %s from session %s (since %s): %s rows scanned, %s new,'
+        ' %s changed, %s unchanged', args.golden_v, args.session_id, since,
+        changes['scanned'], changes['new'], changes['changed'],
+        changes['unchanged'])
+    return changes
 
   gold_db = get_golden_query(dbt, args.golden_v).first()
-  if gold_db and not args.overwrite:
+  if gold_db and not args.overwrite and not incremental:
     raise ValueError(
         f'Target golden version {args.golden_v} exists, but --overwrite is not specified.'
     )
@@ -236,10 +374,12 @@ def run_update_golden(args: argparse.Namespace, logger: logging.Logger):
                     logger)
 
     if args.session_id:
+      since = get_watermark(session, args.golden_v,
+                            args.session_id) if incremental else None
 
       def actuator2(func):
         return func(session, args.golden_v, args.session_id, logger,
-                    args.overwrite)
+                    args.overwrite or incremental, since, True)
 
       session_retry(session, gold_session_update, functools.partial(actuator2),
                     logger)
@@ -250,6 +390,8 @@ def run_update_golden(args: argparse.Namespace, logger: logging.Logger):
     logger.info('Updating conv perf DB table')
     create_perf_table(args, logger)
 
+  return True
+
 
 def main():
   """! Main function"""
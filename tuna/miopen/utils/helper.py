@@ -37,10 +37,12 @@ from tuna.dbBase.sql_alchemy import DbSession
 from tuna.machine import Machine
 from tuna.miopen.db.solver import get_solver_ids
 from tuna.utils.utility import check_qts
-from tuna.miopen.utils.metadata import MYSQL_LOCK_WAIT_TIMEOUT, BN_DEFAULTS
+from tuna.miopen.utils.metadata import BN_DEFAULTS
 from tuna.miopen.utils.metadata import FUSION_DEFAULTS, CONV_2D_DEFAULTS, CONV_3D_DEFAULTS
 from tuna.utils.metadata import NUM_SQL_RETRIES
 from tuna.utils.db_utility import gen_update_query, session_retry
+from tuna.utils.metrics import count_jobs
+from tuna.utils.retry import RetryPolicy
 
 LOGGER = setup_logger('helper')
 
@@ -126,6 +128,7 @@ def prune_cfg_dims(in_perf_cfg):
 def mysqldb_insert_dict(table, in_dict, filter_dict):
   """insert/update dict obj to mysql table"""
   with DbSession() as session:
+    policy = RetryPolicy('mysqldb_insert_dict', logger=LOGGER)
     for idx in range(NUM_SQL_RETRIES):
       try:
         query = session.query(table).filter_by(**filter_dict)
@@ -147,7 +150,7 @@ def mysqldb_insert_dict(table, in_dict, filter_dict):
         return True, entry.id
 
       except OperationalError as error:
-        handle_op_error(LOGGER, error)
+        handle_op_error(LOGGER, error, policy)
       except IntegrityError as error:
         session.rollback()
         LOGGER.warning('insert failed (%s) attempt %s, retrying ... ', error,
@@ -178,12 +181,12 @@ def mysqldb_overwrite_table(table, dict_list, filter_cols):
   return ret, insert_ids
 
 
-def handle_op_error(logger, error):
-  """error handling for sql OperationalError"""
-  if error.orig.args[0] == MYSQL_LOCK_WAIT_TIMEOUT:
-    logger.warning('Db contention, sleeping ...')
-    sleep(random.randint(1, 30))
-  else:
+def handle_op_error(logger, error, policy=None):
+  """error handling for sql OperationalError, sleeps before the next attempt
+  or raises errors the policy gives up on"""
+  if policy is None:
+    policy = RetryPolicy('handle_op_error', logger=logger)
+  if not policy.wait(error):
     raise error
 
 
@@ -234,4 +237,8 @@ def set_job_state(session, job, dbt, state, increment_retries=False, result=""):
     return True
 
   assert session_retry(session, callback, lambda x: x(), LOGGER)
+  if state in ('errored', 'error'):
+    count_jobs('failed')
+  if increment_retries:
+    count_jobs('retried')
   return True
@@ -26,7 +26,6 @@
 ###############################################################################
 """Utility module for parsing fin json results"""
 import functools
-from sqlalchemy.exc import OperationalError
 
 from tuna.utils.logger import setup_logger
 from tuna.dbBase.sql_alchemy import DbSession
@@ -50,7 +49,8 @@ def __update_fdb_w_kernels(  #pylint: disable=too-many-arguments,too-many-locals
     fdb_attr,
     pending,
     result_str: str = 'miopen_find_compile_result',
-    check_str: str = 'find_compiled') -> list:
+    check_str: str = 'find_compiled',
+    invalidated: list = None) -> list:
   """update find db + kernels from json results"""
   status = []
   solver_id_map = get_solver_ids()
@@ -63,7 +63,7 @@ def __update_fdb_w_kernels(  #pylint: disable=too-many-arguments,too-many-locals
         #returned entry is added to the table
         fdb_entry = __compose_fdb_entry(session, fin_json, fdb_obj, session_id,
                                         dbt, config, job, fdb_attr,
-                                        solver_id_map, pending)
+                                        solver_id_map, pending, invalidated)
         __check_layout_mismatch(fdb_entry, slv_stat, config)
         if not pending:
           query = gen_update_query(fdb_entry, fdb_attr,
@@ -190,9 +190,18 @@ def __compose_kernel_entry(session, fdb_obj, fdb_entry, dbt):
   return True
 
 
-def __update_fdb_entry(session, solver, session_id, dbt, config, job, fdb_attr,
-                       pending):
-  """ Add a new entry to fdb if there isnt one already """
+def __update_fdb_entry(  #pylint: disable=too-many-arguments
+    session,
+    solver,
+    session_id,
+    dbt,
+    config,
+    job,
+    fdb_attr,
+    pending,
+    invalidated=None):
+  """ Add a new entry to fdb if there isnt one already, kernel groups of
+  replaced entries are appended to invalidated for clean-up """
   obj, fdb_entry = get_fdb_entry(session, solver, session_id, dbt, config,
                                  fdb_attr)
   if obj:  # existing entry in db
@@ -205,6 +214,8 @@ def __update_fdb_entry(session, solver, session_id, dbt, config, job, fdb_attr,
           .filter(dbt.kernel_cache.kernel_group ==
                                         fdb_entry.kernel_group)\
           .update({'valid': 0})
+      if invalidated is not None:
+        invalidated.append(fdb_entry.kernel_group)
   else:
     # Bundle Insert for later
     pending.append((job, fdb_entry))
@@ -241,12 +252,21 @@ def get_fdb_entry(session, solver, session_id, dbt, config, fdb_attr):
 
 
 def __compose_fdb_entry(  #pylint: disable=too-many-arguments
-    session, fin_json, fdb_obj, session_id, dbt, config, job, fdb_attr,
-    solver_id_map, pending):
+    session,
+    fin_json,
+    fdb_obj,
+    session_id,
+    dbt,
+    config,
+    job,
+    fdb_attr,
+    solver_id_map,
+    pending,
+    invalidated=None):
   """Compose a FindDB table entry from fin_output"""
   solver = solver_id_map[fdb_obj['solver_name']]
   fdb_entry = __update_fdb_entry(session, solver, session_id, dbt, config, job,
-                                 fdb_attr, pending)
+                                 fdb_attr, pending, invalidated)
   fdb_entry.fdb_key = fin_json['db_key']
   fdb_entry.alg_lib = fdb_obj['algorithm']
   fdb_entry.params = fdb_obj['params']
@@ -262,25 +282,29 @@ def __compose_fdb_entry(  #pylint: disable=too-many-arguments
   return fdb_entry
 
 
-def process_fdb_w_kernels(session,
-                          fin_json,
-                          context,
-                          dbt,
-                          fdb_attr,
-                          pending,
-                          result_str='miopen_find_compile_result',
-                          check_str='find_compiled'):
-  """initiate find db update"""
+def process_fdb_w_kernels(  #pylint: disable=too-many-arguments
+    session,
+    fin_json,
+    context,
+    dbt,
+    fdb_attr,
+    pending,
+    result_str='miopen_find_compile_result',
+    check_str='find_compiled',
+    invalidated=None):
+  """initiate find db update, kernel groups replaced by the results are
+  appended to invalidated"""
   job = SimpleDict(**context['job'])
   #get_db_obj_by_id(context['job']['id'], dbt.job_table)
   config = SimpleDict(**context['config'])
+
   #get_db_obj_by_id(context['config']['id'], dbt.config_table)
 
-  callback = __update_fdb_w_kernels
-  status = session_retry(
-      session, callback,
-      lambda x: x(session, fin_json, config, context['kwargs']['session_id'],
-                  dbt, job, fdb_attr, pending, result_str, check_str), LOGGER)
+  def actuator(func):
+    return func(session, fin_json, config, context['kwargs']['session_id'], dbt,
+                job, fdb_attr, pending, result_str, check_str, invalidated)
+
+  status = session_retry(session, __update_fdb_w_kernels, actuator, LOGGER)
 
   if not status:
     LOGGER.warning('Fin: Unable to update Database')
@@ -291,22 +315,3 @@ def process_fdb_w_kernels(session,
     }]
 
   return status
-
-
-def clean_cache_table(dbt, job):
-  """Remove the fin cache kernel entries for this job"""
-  with DbSession() as session:
-    try:
-      LOGGER.info('Delete kernel cache entries job(%s)', job.id)
-      job_cache = session.query(dbt.fin_cache_table)\
-          .filter(dbt.fin_cache_table.job_id == job.id)
-      job_cache.delete()
-      invalid_fdb_cache = session.query(dbt.kernel_cache)\
-          .filter(dbt.kernel_cache.valid == 0)
-      invalid_fdb_cache.delete()
-      session.commit()
-    except OperationalError as err:
-      session.rollback()
-      LOGGER.warning('FinEval: Unable to clean %s / %s: %s',
-                     dbt.fin_cache_table.__tablename__,
-                     dbt.kernel_cache.__tablename__, err)
@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+
+###############################################################################
+#
+# MIT License
+#
+# Copyright (c) 2024 Advanced Micro Devices, Inc.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+"""Deferred clean-up of kernel cache rows left behind by processed jobs"""
+
+import time
+from typing import Dict, Iterable, List, Optional, Set
+
+from tuna.dbBase.sql_alchemy import DbSession
+from tuna.utils.db_utility import session_retry
+from tuna.utils.logger import setup_logger
+from tuna.utils.metrics import count_reclaimed
+from tuna.miopen.utils.metadata import KERNEL_GC_BATCH, KERNEL_GC_INTERVAL
+
+LOGGER = setup_logger('kernel_gc')
+
+
+def id_ranges(ids: List[int]) -> str:
+  """sql condition matching sorted ids, contiguous runs become one range"""
+  ranges = []
+  start = prev = ids[0]
+  for idx in ids[1:]:
+    if idx != prev + 1:
+      ranges.append((start, prev))
+      start = idx
+    prev = idx
+  ranges.append((start, prev))
+  return ' or '.join(f"id={lo}" if lo == hi else f"id between {lo} and {hi}"
+                     for lo, hi in ranges)
+
+
+class KernelCacheGC():
+  """Collects the kernel groups invalidated by new find_db results and the jobs
+  whose fin kernels are no longer needed, deletes their rows in batches keyed
+  by primary key ranges once per interval instead of after every job"""
+
+  def __init__(self,
+               dbt,
+               logger=LOGGER,
+               batch_size: int = KERNEL_GC_BATCH,
+               interval: float = KERNEL_GC_INTERVAL):
+    """Constructor
+      @param dbt MIOpenDBTables holding the cache tables
+      @param logger Logger for the sweep reports
+      @param batch_size Rows deleted per transaction, a sweep also starts once
+        this many groups or jobs are pending
+      @param interval Seconds between timed sweeps
+    """
+    self.dbt = dbt
+    self.logger = logger
+    self.batch_size = batch_size
+    self.interval = interval
+    self.groups: Set[int] = set()
+    self.jobs: Set[int] = set()
+    self.last_sweep = time.monotonic()
+
+  def record(self,
+             kernel_groups: Iterable[int] = (),
+             job_id: Optional[int] = None) -> None:
+    """Queue invalidated kernel groups and the fin cache of a finished job"""
+    self.groups.update(kernel_groups)
+    if job_id is not None:
+      self.jobs.add(job_id)
+
+  def due(self) -> bool:
+    """Sweep interval elapsed or a full batch is pending"""
+    if not self.groups and not self.jobs:
+      return False
+    return (time.monotonic() - self.last_sweep >= self.interval or
+            max(len(self.groups), len(self.jobs)) >= self.batch_size)
+
+  def maybe_sweep(self) -> Optional[Dict[str, int]]:
+    """Sweep if due, returns the rows reclaimed per table"""
+    if self.due():
+      return self.sweep()
+    return None
+
+  def __delete_batch(self, session, table: str, cond: str) -> int:
+    """Delete up to batch_size rows of table matching cond by id"""
+    query = f"select id from {table} where {cond}"\
+    f" order by id limit {self.batch_size};"
+    ids = [row[0] for row in session.execute(query).fetchall()]
+    if ids:
+      session.execute(f"delete from {table} where {id_ranges(ids)};")
+      session.commit()
+    return len(ids)
+
+  def __delete(self, session, table: str, cond_fmt: str, keys: List[int],
+               queue: Set[int]) -> int:
+    """Delete the rows of table matching cond_fmt for keys, returns the rows
+    deleted, keys of a failed batch go back to queue for the next sweep"""
+    deleted = 0
+    for start in range(0, len(keys), self.batch_size):
+      chunk = keys[start:start + self.batch_size]
+      cond = cond_fmt.format(keys=', '.join(map(str, chunk)))
+
+      while True:
+
+        def actuator(func, cond=cond):
+          return func(session, table, cond)
+
+        num = session_retry(session, self.__delete_batch, actuator, self.logger)
+        if num is False:
+          queue.update(chunk)
+          break
+        deleted += num
+        if num < self.batch_size:
+          break
+    return deleted
+
+  def sweep(self) -> Dict[str, int]:
+    """Delete all queued rows now, returns the rows reclaimed per table"""
+    groups, self.groups = sorted(self.groups), set()
+    jobs, self.jobs = sorted(self.jobs), set()
+    kernel_table = self.dbt.kernel_cache.__tablename__
+    fin_table = self.dbt.fin_cache_table.__tablename__
+    start = time.monotonic()
+    with DbSession() as session:
+      reclaimed = {
+          kernel_table:
+              self.__delete(session, kernel_table,
+                            'kernel_group in ({keys}) and valid=0', groups,
+                            self.groups),
+          fin_table:
+              self.__delete(session, fin_table, 'job_id in ({keys})', jobs,
+                            self.jobs)
+      }
+    self.last_sweep = time.monotonic()
+
+    for table, num in reclaimed.items():
+      count_reclaimed(table, num)
+    self.logger.info(
+        'Cache sweep of %s kernel groups and %s jobs reclaimed %s in %.2fs',
+        len(groups), len(jobs), reclaimed, self.last_sweep - start)
+    return reclaimed
@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+###############################################################################
+#
+# MIT License
+#
+# Copyright (c) 2022 Advanced Micro Devices, Inc.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+###############################################################################
+"""Memoized codec for MIOpen perf/find db keys. A handful of distinct keys
+is decoded millions of times during merges and imports, decoded keys are
+kept in a bounded LRU keyed by the raw key string. Returned values are
+tuples shared between callers and must not be modified."""
+
+from functools import lru_cache
+
+from tuna.miopen.utils.metadata import FDS_2D, FDS_3D, INVERS_DIR_MAP
+
+KEY_CACHE_SIZE = 1 << 16
+
+FDS_2D_KEY = tuple(FDS_2D) + ('spatial_dim',)
+FDS_3D_KEY = tuple(FDS_3D) + ('spatial_dim',)
+#columns returned by parse_many
+KEY_COLUMNS = FDS_3D_KEY + ('precision', 'direction')
+#fds values making up a 2D key, see encode_pdb_key
+ENCODE_FIELDS = ('in_channels', 'in_h', 'in_w', 'fil_h', 'fil_w',
+                 'out_channels', 'batchsize', 'pad_h', 'pad_w', 'conv_stride_h',
+                 'conv_stride_w', 'dilation_h', 'dilation_w', 'group_count')
+
+#key tokens after splitting on '-' and 'x', the output sizes are ignored
+_TOKENS_2D = ('fil_h', 'fil_w', 'batchsize', 'pad_h', 'pad_w', 'conv_stride_h',
+              'conv_stride_w', 'dilation_h', 'dilation_w', 'bias')
+_TOKENS_3D = ('fil_d', 'fil_h', 'fil_w', 'batchsize', 'pad_d', 'pad_h', 'pad_w',
+              'conv_stride_d', 'conv_stride_h', 'conv_stride_w', 'dilation_d',
+              'dilation_h', 'dilation_w', 'bias')
+_LAYOUTS_1 = ('layout',)
+_LAYOUTS_3 = ('in_layout', 'fil_layout', 'out_layout')
+
+
+def _key_tokens(dims, layouts, fwd):
+  """Token names of a key, forward keys start with the input tensor"""
+  in_t = ('in_channels',) + tuple(f'in_{dim}' for dim in dims)
+  out_t = ('out_channels',) + tuple(f'out_{dim}' for dim in dims)
+  fil, rest = (_TOKENS_2D[:2],
+               _TOKENS_2D[2:]) if len(dims) == 2 else (_TOKENS_3D[:3],
+                                                       _TOKENS_3D[3:])
+  first, second = (in_t, out_t) if fwd else (out_t, in_t)
+  return first + fil + second + rest + layouts + ('precision', 'direction')
+
+
+def _field_index(tokens, fields):
+  """Token position of each of @fields, group_count is appended last"""
+  idx = []
+  for field in fields:
+    if field == 'group_count':
+      idx.append(len(tokens))
+    elif field.endswith('_layout') and field not in tokens:
+      idx.append(tokens.index('layout'))
+    else:
+      idx.append(tokens.index(field))
+  return tuple(idx)
+
+
+def _build_formats():
+  """(fields, 'F' index, non 'F' index) keyed by the number of key tokens"""
+  formats = {}
+  for dims, fields in ((('h', 'w'), FDS_2D), (('d', 'h', 'w'), FDS_3D)):
+    for layouts in (_LAYOUTS_1, _LAYOUTS_3):
+      fwd = _key_tokens(dims, layouts, True)
+      bwd = _key_tokens(dims, layouts, False)
+      formats[len(fwd)] = (str(len(dims)), _field_index(fwd, fields),
+                           _field_index(bwd, fields))
+  return formats
+
+
+#number of tokens -> (spatial dim, index for F, index for B/W)
+_FORMATS = _build_formats()
+
+
+def _as_int(val):
+  return int(val) if val.isdigit() else val
+
+
+@lru_cache(maxsize=KEY_CACHE_SIZE)
+def decode_pdb_key(key):
+  """return (fields, values, precision, direction) for a perf/find db key,
+  direction is numeric as in INVERS_DIR_MAP"""
+  if '=' in key:
+    raise ValueError(f'Invalid 2D PDB key: {key}')
+
+  key, sep, optional_prt = key.partition('_')
+  group_count = '1'
+  if sep:
+    if optional_prt[:1] != 'g':
+      raise ValueError('Only group count in optional part is supported')
+    group_count = optional_prt[1:]
+    if not group_count.isdigit():
+      raise ValueError('Group count has to be integer')
+
+  tokens = key.replace('x', '-').split('-')
+  if len(tokens) not in _FORMATS:
+    raise ValueError(f'Invalid PDB key: {key}')
+  spatial_dim, fwd_idx, bwd_idx = _FORMATS[len(tokens)]
+  direction = tokens[-1]
+  tokens.append(group_count)
+  vals = tuple(
+      _as_int(tokens[i])
+      for i in (fwd_idx if direction == 'F' else bwd_idx)) + (int(spatial_dim),)
+  fds = FDS_2D_KEY if spatial_dim == '2' else FDS_3D_KEY
+  return fds, vals, tokens[-3], INVERS_DIR_MAP[direction]
+
+
+@lru_cache(maxsize=KEY_CACHE_SIZE)
+def _key_row(key):
+  """decoded key as one value per KEY_COLUMNS entry, None where not set"""
+  fds, vals, precision, direction = decode_pdb_key(key)
+  if fds is FDS_3D_KEY:
+    return vals + (precision, direction)
+  row = dict(zip(fds, vals))
+  return tuple(row.get(col) for col in FDS_3D_KEY) + (precision, direction)
+
+
+def parse_many(keys):
+  """Decode a sequence of keys into columns, returns a dict of
+  KEY_COLUMNS to lists with one entry per key"""
+  rows = {key: _key_row(key) for key in dict.fromkeys(keys)}
+  columns = {}
+  for i, col in enumerate(KEY_COLUMNS):
+    col_vals = {key: row[i] for key, row in rows.items()}
+    columns[col] = list(map(col_vals.__getitem__, keys))
+  return columns
+
+
+@lru_cache(maxsize=KEY_CACHE_SIZE)
+def encode_pdb_key(values, precision, direction):  #pylint: disable=too-many-locals
+  """key for a 2D network description, @values holds the fds values of
+  ENCODE_FIELDS in that order"""
+  (in_channels, in_h, in_w, fil_h, fil_w, out_channels, batchsize, pad_h, pad_w,
+   stride_h, stride_w, dil_h, dil_w, group_count) = values
+  if precision not in ('FP32', 'FP16', 'BF16'):
+    raise ValueError('Invalid precision specified for PDB key generation')
+  if direction not in ('F', 'W', 'B'):
+    raise ValueError('Incorrect direction')
+  try:
+    output_h = int(((int(in_h) - int(fil_h) + 2 * int(pad_h)) / int(stride_h)) +
+                   1)
+    output_w = int(((int(in_w) - int(fil_w) + 2 * int(pad_w)) / int(stride_w)) +
+                   1)
+  except ZeroDivisionError as zerr:
+    raise ValueError('Zero Division Error caught') from zerr
+
+  if direction == 'F':
+    tensors = f'{in_channels}-{in_h}-{in_w}-{fil_h}x{fil_w}-{out_channels}'\
+              f'-{output_h}-{output_w}'
+  else:
+    tensors = f'{out_channels}-{output_h}-{output_w}-{fil_h}x{fil_w}'\
+              f'-{in_channels}-{in_h}-{in_w}'
+  key = f'{tensors}-{batchsize}-{pad_h}x{pad_w}-{stride_h}x{stride_w}'\
+        f'-{dil_h}x{dil_w}-0-NCHW-{precision}-{direction}'
+  if int(group_count) != 1:
+    return f'{key}_g{group_count}'
+  return key
@@ -47,6 +47,14 @@ if 'TUNA_DOCKER_NAME' in os.environ:
   TUNA_DOCKER_NAME = os.environ['TUNA_DOCKER_NAME']
 if 'FIN_CACHE' in os.environ:
   FIN_CACHE = os.environ['FIN_CACHE']
+FIN_INPUT_CACHE = "/tmp/tuna_fin_input"
+if 'FIN_INPUT_CACHE' in os.environ:
+  FIN_INPUT_CACHE = os.environ['FIN_INPUT_CACHE']
+#seconds a cached fin input is kept on local disk
+FIN_INPUT_TTL = 24 * 3600
+#rows per delete of the kernel cache clean-up and seconds between sweeps
+KERNEL_GC_BATCH = 1000
+KERNEL_GC_INTERVAL = 60
 
 MYSQL_LOCK_WAIT_TIMEOUT = 1205
 
@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+
+###############################################################################
+#
+# MIT License
+#
+# Copyright (c) 2024 Advanced Micro Devices, Inc.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+"""Read-only access to MIOpen SQLite kdb and pdb files. The file is memory
+mapped and opened immutable, so SQLite skips locking and change detection,
+and lookups go through an index on their key columns, built on open if the
+file lacks one."""
+
+import os
+import sqlite3
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from tuna.utils.logger import setup_logger
+from tuna.miopen.utils.metadata import SQLITE_CONFIG_COLS
+
+LOGGER = setup_logger('sqlite_reader')
+
+#lookup key columns per table
+KDB_KEYS: Dict[str, List[str]] = {'kern_db': ['kernel_name', 'kernel_args']}
+PDB_KEYS: Dict[str, List[str]] = {
+    'config': SQLITE_CONFIG_COLS,
+    'perf_db': ['solver', 'config']
+}
+
+#keys per lookup statement, well below SQLITE_MAX_VARIABLE_NUMBER
+LOOKUP_BATCH = 500
+SCAN_BATCH = 1000
+
+
+class SQLiteReader():
+  """Read-only kdb/pdb file with batched key lookups and table scans"""
+
+  def __init__(self,
+               path: str,
+               keys: Optional[Dict[str, List[str]]] = None,
+               mmap_size: Optional[int] = None,
+               build_index: bool = True) -> None:
+    """@keys maps tables to the key columns lookups use, an index on them is
+    built when missing and build_index is set, @mmap_size defaults to the
+    file size"""
+    if not os.path.isfile(path):
+      raise FileNotFoundError(path)
+    self.path = path
+    self.mmap_size = os.path.getsize(path) if mmap_size is None else mmap_size
+    self.keys = keys or {}
+    if build_index:
+      self.build_indexes()
+    self.cnx = self.connect()
+    for table, cols in self.keys.items():
+      if not self.has_index(table, cols):
+        LOGGER.warning('%s: no index on %s(%s), lookups scan the table', path,
+                       table, ', '.join(cols))
+
+  def connect(self) -> sqlite3.Connection:
+    """Immutable memory mapped connection"""
+    cnx = sqlite3.connect(f'file:{self.path}?mode=ro&immutable=1',
+                          uri=True,
+                          check_same_thread=False)
+    cnx.execute(f'PRAGMA mmap_size={int(self.mmap_size)}')
+    return cnx
+
+  def build_indexes(self) -> None:
+    """Add the missing key indexes, the file must be writable"""
+    cnx = sqlite3.connect(self.path)
+    try:
+      for table, cols in self.keys.items():
+        if not has_index(cnx, table, cols):
+          LOGGER.info('%s: indexing %s(%s)', self.path, table, ', '.join(cols))
+          cnx.execute(f"CREATE INDEX IF NOT EXISTS `idx_{table}_lookup`"
+                      f" ON {table}({', '.join(cols)});")
+      cnx.commit()
+    except sqlite3.OperationalError as err:
+      LOGGER.warning('%s: cannot build indexes: %s', self.path, err)
+    finally:
+      cnx.close()
+
+  def has_index(self, table: str, cols: Sequence[str]) -> bool:
+    """An index leads with @cols"""
+    return has_index(self.cnx, table, cols)
+
+  def columns(self, table: str) -> List[str]:
+    """Column names of @table"""
+    return [row[1] for row in self.cnx.execute(f'PRAGMA table_info({table})')]
+
+  def get_many(self,
+               table: str,
+               key_cols: Sequence[str],
+               keys: Iterable[Any],
+               columns: Optional[Sequence[str]] = None,
+               batch: int = LOOKUP_BATCH) -> Dict[Any, Tuple]:
+    """Map each found key to its row of @columns, default all. Keys of a
+    single key column are values, else tuples in key_cols order."""
+    columns = list(columns or self.columns(table))
+    sel = ', '.join(list(key_cols) + columns)
+    nkey = len(key_cols)
+    found: Dict[Any, Tuple] = {}
+    keys = list(dict.fromkeys(keys))
+    for idx in range(0, len(keys), batch):
+      cond, params = key_cond(key_cols, keys[idx:idx + batch])
+      for res in self.cnx.execute(f'SELECT {sel} FROM {table} WHERE {cond}',
+                                  params):
+        found[res[0] if nkey == 1 else res[:nkey]] = res[nkey:]
+    return found
+
+  def get(self,
+          table: str,
+          key_cols: Sequence[str],
+          key: Any,
+          columns: Optional[Sequence[str]] = None) -> Optional[Tuple]:
+    """Row of a single key or None"""
+    sel = ', '.join(columns or self.columns(table))
+    cond = ' AND '.join(f'{col}=?' for col in key_cols)
+    params = key if len(key_cols) > 1 else (key,)
+    return self.cnx.execute(f'SELECT {sel} FROM {table} WHERE {cond}',
+                            params).fetchone()
+
+  def query(self,
+            query: str,
+            params: Sequence[Any] = (),
+            batch: int = SCAN_BATCH) -> Iterator[Tuple]:
+    """Iterate the rows of @query without loading them all"""
+    cur = self.cnx.execute(query, params)
+    try:
+      while True:
+        rows = cur.fetchmany(batch)
+        if not rows:
+          return
+        yield from rows
+    finally:
+      cur.close()
+
+  def scan(self,
+           table: str,
+           columns: Optional[Sequence[str]] = None,
+           where: str = '',
+           params: Sequence[Any] = (),
+           batch: int = SCAN_BATCH) -> Iterator[Tuple]:
+    """Iterate the rows of @table, optionally filtered by @where"""
+    sel = ', '.join(columns) if columns else '*'
+    cond = f' WHERE {where}' if where else ''
+    return self.query(f'SELECT {sel} FROM {table}{cond}', params, batch)
+
+  def close(self) -> None:
+    """Close the connection"""
+    self.cnx.close()
+
+  def __enter__(self) -> 'SQLiteReader':
+    return self
+
+  def __exit__(self, *_exc: Any) -> None:
+    self.close()
+
+
+def key_cond(key_cols: Sequence[str], keys: List[Any]) -> Tuple[str, List[Any]]:
+  """WHERE condition and parameters matching any of @keys"""
+  if len(key_cols) == 1:
+    return f"{key_cols[0]} in ({', '.join(['?'] * len(keys))})", keys
+  #a bare VALUES list on the right of IN is not searched by index
+  row = f"({', '.join(['?'] * len(key_cols))})"
+  vals = f"select {', '.join(f'column{i + 1}' for i in range(len(key_cols)))}"\
+         f" from (values {', '.join([row] * len(keys))})"
+  return f"({', '.join(key_cols)}) in ({vals})", [
+      val for key in keys for val in key
+  ]
+
+
+def has_index(cnx: sqlite3.Connection, table: str, cols: Sequence[str]) -> bool:
+  """Some index of @table leads with @cols, in any order"""
+  want = set(cols)
+  for idx in cnx.execute(f'PRAGMA index_list({table})').fetchall():
+    idx_cols = [row[2] for row in cnx.execute(f'PRAGMA index_info(`{idx[1]}`)')]
+    if set(idx_cols[:len(want)]) == want:
+      return True
+  return False
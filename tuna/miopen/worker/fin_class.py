@@ -28,30 +28,92 @@
 
 import json
 import os
+import hashlib
 import tempfile
 import functools
-from typing import List, Dict, Tuple
-import paramiko
+from typing import Any, List, Dict, Optional, Tuple
 try:
   import queue
 except ImportError:
   import Queue as queue  #type: ignore
 
 from sqlalchemy import func as sqlalchemy_func
+from sqlalchemy import or_, case
 from sqlalchemy.exc import IntegrityError, InvalidRequestError  #pylint: disable=wrong-import-order
 from sqlalchemy.inspection import inspect
 
 from tuna.worker_interface import WorkerInterface
 from tuna.dbBase.sql_alchemy import DbSession
+from tuna.dbBase.dialect import insert_ignore
 from tuna.miopen.utils.metadata import FIN_CACHE
 from tuna.miopen.utils.metadata import INVERS_DIR_MAP
 from tuna.miopen.worker.fin_utils import compose_config_obj
 from tuna.miopen.utils.config_type import ConfigType
+from tuna.miopen.db.mixin_tables import APP_CACHE_KEY, APP_CACHE_CHECKED
+from tuna.miopen.db.mixin_tables import fin_step_cond
 from tuna.utils.db_utility import session_retry
 from tuna.miopen.db.solver import get_solver_ids, get_id_solvers
 from tuna.utils.db_utility import gen_select_objs, get_class_by_tablename
 from tuna.utils.utility import split_packets
 from tuna.utils.utility import SimpleDict
+from tuna.utils.lazy_import import lazy_import
+from tuna.utils.tracing import traced
+from tuna.utils.profiling import profiled
+
+paramiko = lazy_import('paramiko')
+
+
+def app_cfg_query(query: Any, dbt: Any, label: Optional[str] = None):
+  """Limit query to the valid configs, optionally to those tagged label"""
+  query = query.filter(dbt.config_table.valid == 1)
+  if label:
+    query = query.filter(dbt.config_table.id == dbt.config_tags_table.config)\
+        .filter(dbt.config_tags_table.tag == label)
+  return query
+
+
+def app_delta_join(session: DbSession, query: Any, dbt: Any, session_id: int):
+  """Outer join query to the latest applicability update of each config in
+  session_id, returns the query and the condition of configs to update"""
+  app = dbt.solver_app
+  app_ts = session.query(app.config,
+                         sqlalchemy_func.max(app.update_ts).label('update_ts'))
+  app_ts = app_ts.filter(app.session == session_id)  # pylint: disable=W0143
+  app_ts = app_ts.group_by(app.config).subquery()
+  query = query.outerjoin(app_ts, app_ts.c.config == dbt.config_table.id)
+  return query, or_(app_ts.c.config.is_(None), app_ts.c.update_ts
+                    < dbt.config_table.update_ts)
+
+
+def query_app_cfgs(session: DbSession,
+                   dbt: Any,
+                   session_id: int,
+                   label: Optional[str] = None,
+                   delta: bool = False):
+  """Query of the valid configs, optionally limited by label, with delta only
+  the configs missing applicability in session_id or updated since it was set"""
+  query = app_cfg_query(session.query(dbt.config_table), dbt, label)
+
+  if delta:
+    query, stale = app_delta_join(session, query, dbt, session_id)
+    query = query.filter(stale)
+
+  #order by id for splitting configs into blocks
+  return query.order_by(dbt.config_table.id)
+
+
+def count_app_cfgs(session: DbSession,
+                   dbt: Any,
+                   session_id: int,
+                   label: Optional[str] = None) -> Tuple[int, int]:
+  """Number of valid configs and of those query_app_cfgs selects with delta,
+  counted in one query"""
+  query = session.query(dbt.config_table.id).select_from(dbt.config_table)
+  query, stale = app_delta_join(session, query, dbt, session_id)
+  query = query.with_entities(sqlalchemy_func.count(dbt.config_table.id),
+                              sqlalchemy_func.sum(case([(stale, 1)], else_=0)))
+  total, delta = app_cfg_query(query, dbt, label).one()
+  return total, int(delta or 0)
 
 
 class FinClass(WorkerInterface):
@@ -65,7 +127,7 @@ class FinClass(WorkerInterface):
     """Constructor"""
     allowed_keys = set([
         'fin_steps', 'local_file', 'fin_infile', 'fin_outfile', 'config_type',
-        'dynamic_solvers_only'
+        'dynamic_solvers_only', 'delta_applicability'
     ])
     self.__dict__.update((key, None) for key in allowed_keys)
 
@@ -83,7 +145,9 @@ class FinClass(WorkerInterface):
     self.multiproc = False
     self.first_pass = True
     self.dynamic_solvers_only = False
+    self.delta_applicability = False
     self.solver_id_map = get_solver_ids()
+    self.app_cache_stats = (0, 0)
 
     self.__dict__.update(
         (key, value) for key, value in kwargs.items() if key in allowed_keys)
@@ -177,10 +241,7 @@ class FinClass(WorkerInterface):
       conds: List[str]) -> List[Tuple[SimpleDict, SimpleDict]]:
     """query for job and config tuple"""
     ret = []
-    if self.fin_steps:
-      conds.append(f"fin_step like '%{self.fin_steps[0]}%'")
-    else:
-      conds.append("fin_step='not_fin'")
+    conds.append(fin_step_cond(self.fin_steps))
 
     job_entries = super().compose_work_objs(session, conds)
 
@@ -298,35 +359,41 @@ class FinClass(WorkerInterface):
   def applicability(self):
     """Getting applicability from MIOpen to update Tuna DB"""
     self.fin_steps = ['applicability']
+    self.app_cache_stats = (0, 0)
     applic_res = self.__get_fin_results()
     if applic_res is None:
-      return False
+      #nothing left for fin when every config was found in the cache
+      hits, total = self.app_cache_stats
+      return total > 0 and hits == total
 
     self.__parse_applicability(applic_res)
 
     return True
 
-  def query_cfgs(self, label=None):
-    """query all configs from table, optionally limit by label"""
+  def query_cfgs(self, label=None, delta=False):
+    """query all configs from table, optionally limit by label, with delta
+    only configs missing applicability or updated since it was set"""
     with DbSession() as session:
-      query = session.query(self.dbt.config_table)\
-                        .filter(self.dbt.config_table.valid == 1)
-
-      if label:
-        query = query.filter(self.dbt.config_table.id == self.dbt.config_tags_table.config)\
-            .filter(self.dbt.config_tags_table.tag == label)
+      return query_app_cfgs(session, self.dbt, self.session_id, label, delta)
 
-      #order by id for splitting configs into blocks
-      query = query.order_by(self.dbt.config_table.id)
-      return query
+  def __log_delta_counts(self) -> None:
+    """Log the configs delta applicability updates and skips"""
+    with DbSession() as session:
+      total, delta = count_app_cfgs(session, self.dbt, self.session_id,
+                                    self.label)
+    self.logger.warning(
+        'Delta applicability: %s of %s configs to update, %s skipped', delta,
+        total, total - delta)
 
   def __set_all_configs(self, idx: int = 0, num_blk: int = 1) -> bool:
     """Gathering all configs from Tuna DB to set up fin input file"""
     if idx == 0:
-      query = self.query_cfgs(self.label)
+      query = self.query_cfgs(self.label, self.delta_applicability)
       rows = query.all()
 
       len_rows = len(rows)
+      if self.delta_applicability:
+        self.__log_delta_counts()
       master_cfg_list = []
       for row in rows:
         r_dict = compose_config_obj(row, self.config_type)
@@ -383,6 +450,9 @@ class FinClass(WorkerInterface):
 
       if not self.__set_all_configs(idx, num_blk):
         return False
+      self.__use_applicability_cache()
+      if not self.all_configs:
+        return False
       return self.__compose_fin_list()
 
     self.logger.error("Fin steps not recognized: %s", self.fin_steps)
@@ -442,6 +512,104 @@ class FinClass(WorkerInterface):
 
     return ret
 
+  def __app_cache_key(self) -> Dict[str, Any]:
+    """Applicability cache key, less the config hash"""
+    solvers = json.dumps(sorted(self.solver_id_map.items()))
+    return {
+        'arch': self.dbt.session.arch,
+        'num_cu': self.dbt.session.num_cu,
+        'miopen_v': self.dbt.session.miopen_v,
+        'solver_hash': hashlib.md5(solvers.encode('utf-8')).hexdigest()
+    }
+
+  def __cfg_md5(self) -> str:
+    """SQL expression of the hash of config table row c"""
+    if self.config_type == ConfigType.batch_norm:
+      #bn_config has no md5 column, hash its unique key instead
+      cols = [
+          f"c.{col.name}"
+          for col in self.dbt.config_table.__table_args__[0].columns
+      ]
+      return f"MD5(CONCAT_WS(',', {', '.join(cols)}))"
+    return "c.md5"
+
+  def __app_cache_join(self, cfg_ids: str) -> str:
+    """Cached applicability rows of the configs in cfg_ids"""
+    key_cond = " and ".join(f"ac.{col}=:{col}" for col in APP_CACHE_KEY[1:])
+    return f" from {self.dbt.config_table.__tablename__} c"\
+           f" join {self.dbt.app_cache.__tablename__} ac"\
+           f" on ac.config_md5={self.__cfg_md5()}"\
+           f" where c.id in ({cfg_ids}) and {key_cond}"
+
+  def __use_applicability_cache(self) -> None:
+    """Copy the applicability of cached configs into this session, only the
+    misses are left in all_configs for fin"""
+    total = len(self.all_configs)
+    if not total:
+      return
+    key = self.__app_cache_key()
+    cfg_ids = ", ".join(str(cfg["id"]) for cfg in self.all_configs)
+
+    with DbSession() as session:
+      query = f"select distinct c.id {self.__app_cache_join(cfg_ids)}"
+      hits = {row[0] for row in session.execute(query, key)}
+      if hits:
+        hit_ids = ", ".join(str(cfg_id) for cfg_id in sorted(hits))
+
+        def actuator(func):
+          return func(session, hit_ids, key)
+
+        session_retry(session, self.__insert_cached_applicability, actuator,
+                      self.logger)
+
+    self.all_configs = [
+        cfg for cfg in self.all_configs if cfg["id"] not in hits
+    ]
+    self.app_cache_stats = (len(hits), total)
+    self.logger.warning('Applicability cache hits: %s of %s configs (%.1f%%)',
+                        len(hits), total, 100 * len(hits) / total)
+
+  def __insert_cached_applicability(self, session: DbSession, cfg_ids: str,
+                                    key: Dict[str, Any]) -> bool:
+    """write applicability of cached configs to sql"""
+    app_table = self.dbt.solver_app.__tablename__
+    cleanup = f"delete from {app_table} where session={self.session_id}"\
+              f" and config in ({cfg_ids});"
+    ins_str = f"{insert_ignore()} into {app_table}"\
+              " (session, config, solver, applicable)"\
+              f" select {self.session_id}, c.id, ac.solver, ac.applicable"\
+              f" {self.__app_cache_join(cfg_ids)}"\
+              f" and ac.solver!={APP_CACHE_CHECKED};"
+
+    with self.job_queue_lock:
+      session.execute(cleanup)
+      session.execute(ins_str, key)
+      session.commit()
+
+    return True
+
+  def __cache_applicability(self, session: DbSession, cfg_ids: str) -> None:
+    """Store the applicability fin returned for cfg_ids in the cache"""
+    key = self.__app_cache_key()
+    cache_table = self.dbt.app_cache.__tablename__
+    cols = ", ".join(APP_CACHE_KEY + ["solver", "applicable"])
+    vals = ", ".join(f":{col}" for col in APP_CACHE_KEY[1:])
+    cfg_from = f" from {self.dbt.config_table.__tablename__} c"
+
+    session.execute(f"delete ac {self.__app_cache_join(cfg_ids)};", key)
+    #the checked row marks the config as cached, even without solvers
+    session.execute(
+        f"{insert_ignore()} into {cache_table} ({cols})"
+        f" select {self.__cfg_md5()}, {vals}, {APP_CACHE_CHECKED}, 0"
+        f" {cfg_from}"
+        f" where c.id in ({cfg_ids});", key)
+    session.execute(
+        f"{insert_ignore()} into {cache_table} ({cols})"
+        f" select {self.__cfg_md5()}, {vals}, sa.solver, sa.applicable"
+        f" {cfg_from} join {self.dbt.solver_app.__tablename__} sa"
+        f" on sa.config=c.id where sa.session={self.session_id}"
+        f" and c.id in ({cfg_ids});", key)
+
   def __insert_applicability(self, session: DbSession,
                              json_in: List[Dict]) -> bool:
     """write applicability to sql"""
@@ -468,7 +636,7 @@ class FinClass(WorkerInterface):
 
     cleanup = f"delete from {self.dbt.solver_app.__tablename__} where session={self.session_id}"\
                " and config in (" + ", ".join(app_cfgs) + ");"
-    ins_str = f"insert ignore into {self.dbt.solver_app.__tablename__}"\
+    ins_str = f"{insert_ignore()} into {self.dbt.solver_app.__tablename__}"\
                " (session, config, solver, applicable)"\
                " values " + ", ".join(app_values) + ";"
     inserts.append(cleanup)
@@ -479,6 +647,8 @@ class FinClass(WorkerInterface):
                        len(app_cfgs), len(app_values))
       for sql_str in inserts:
         session.execute(sql_str)
+      if app_cfgs:
+        self.__cache_applicability(session, ", ".join(app_cfgs))
       session.commit()
       self.logger.info('End bulk inserts')
 
@@ -623,6 +793,8 @@ class FinClass(WorkerInterface):
         return False
     return True
 
+  @profiled('run_fin_cmd')
+  @traced('run_fin_cmd')
   def run_fin_cmd(self):
     """Run a fin command after generating the JSON"""
     fin_output = self.machine.make_temp_file()
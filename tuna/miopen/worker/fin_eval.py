@@ -32,8 +32,8 @@ from typing import List, Dict
 
 from tuna.miopen.worker.fin_class import FinClass
 from tuna.miopen.worker.fin_utils import fin_job
+from tuna.miopen.worker.fin_input import FinInputBuilder, COMPILE_RESULT
 from tuna.dbBase.sql_alchemy import DbSession
-from tuna.utils.db_utility import session_retry
 
 
 class FinEvaluator(FinClass):
@@ -45,6 +45,11 @@ class FinEvaluator(FinClass):
     if self.gpu_id != -1:
       self.envmt.append(f"HIP_VISIBLE_DEVICES={self.gpu_id}")
 
+  @property
+  def input_builder(self) -> FinInputBuilder:
+    """Fin input builder on the current tables of the worker"""
+    return FinInputBuilder(self.dbt, self.id_solver_map, self.logger)
+
   def check_gpu(self):
     """Function to check gpu heartbeat"""
     for _ in range(5):
@@ -60,114 +65,16 @@ class FinEvaluator(FinClass):
     """prepare perf db command input for fin"""
     fjob = _fjob.copy()
     with DbSession() as session:
-      perf_compile_res = []
-
-      # pylint: disable=comparison-with-callable
-      query = session.query(self.dbt.solver_app).filter(
-          self.dbt.solver_app.session == self.dbt.session.id,
-          self.dbt.solver_app.config == self.job.config,
-          self.dbt.solver_app.applicable == 1)
-      # pylint: enable=comparison-with-callable
-
-      res = session_retry(session, query.all, lambda x: x(), self.logger)
-      for slv_entry in res:
-        slv_name = self.id_solver_map[slv_entry.solver]
-        if not self.job.solver or slv_name == self.job.solver:
-          compile_entry = {
-              'solver_name': slv_name,
-              'perf_compiled': False,
-              'kernel_objects': []
-          }
-          perf_compile_res.append(compile_entry)
-
-      solvers = [x['solver_name'] for x in perf_compile_res]
-
-      query = session.query(self.dbt.fin_cache_table).filter(
-          self.dbt.fin_cache_table.job_id == self.job.id)
-
-      res = session_retry(session, query.all, lambda x: x(), self.logger)
-      for cache_entry in res:
-        slv_name = self.id_solver_map[cache_entry.solver_id]
-        #if job solver is defined limit entries to that solver
-        if not self.job.solver or slv_name == self.job.solver:
-          compile_entry = perf_compile_res[solvers.index(slv_name)]
-          compile_entry['perf_compiled'] = True
-
-          compile_entry['kernel_objects'].append({
-              'blob': cache_entry.kernel_blob.decode('utf-8'),
-              'comp_options': cache_entry.kernel_args,
-              'kernel_file': cache_entry.kernel_name,
-              'md5_sum': cache_entry.kernel_hash,
-              'uncompressed_size': cache_entry.uncompressed_size
-          })
-
-      assert perf_compile_res
-      fjob['miopen_perf_compile_result'] = perf_compile_res
+      fjob['miopen_perf_compile_result'] = self.input_builder.compile_result(
+          session, self.job, 'miopen_perf_eval')
     return [fjob]
 
   def fin_fdb_input(self, _fjob: Dict) -> List[Dict]:
     """prepare find db command input for fin"""
     fjob = _fjob.copy()
     with DbSession() as session:
-      find_compile_res = []
-
-      # pylint: disable=comparison-with-callable
-      query = session.query(self.dbt.solver_app).filter(
-          self.dbt.solver_app.session == self.dbt.session.id,
-          self.dbt.solver_app.config == self.job.config,
-          self.dbt.solver_app.applicable == 1)
-      # pylint: enable=comparison-with-callable
-
-      res = session_retry(session, query.all, lambda x: x(), self.logger)
-      for slv_entry in res:
-        slv_name = self.id_solver_map[slv_entry.solver]
-        if not self.job.solver or slv_name == self.job.solver:
-          compile_entry = {
-              'solver_name': slv_name,
-              'find_compiled': False,
-              'kernel_objects': []
-          }
-          find_compile_res.append(compile_entry)
-
-      solvers = [x['solver_name'] for x in find_compile_res]
-
-      fdb_entry = self.dbt.find_db_table()
-      fdb_entry.num_cu = self.dbt.session.num_cu
-      fdb_entry.config = self.config.id
-      fdb_entry.arch = self.dbt.session.arch
-      fdb_entry.opencl = False
-      fdb_entry.session = self.dbt.session.id
-      fdb_entry.logger = self.logger
-      fdb_query = fdb_entry.get_query(session, self.dbt.find_db_table,
-                                      self.dbt.session.id)
-      # JD: The solvers which throw on GetSolution are marked with
-      # negative workspace
-      fdb_query = fdb_query.filter(self.dbt.find_db_table.workspace_sz != -1,
-                                   self.dbt.find_db_table.valid == 1)
-
-      res = session_retry(session, fdb_query.all, lambda x: x(), self.logger)
-
-      for fdb_rec in res:
-        slv_name = self.id_solver_map[fdb_rec.solver]
-        if not self.job.solver or slv_name == self.job.solver:
-          compile_entry = find_compile_res[solvers.index(slv_name)]
-          compile_entry['find_compiled'] = True
-
-          blobs = session.query(self.dbt.kernel_cache).filter(
-              self.dbt.kernel_cache.valid == 1,
-              self.dbt.kernel_cache.kernel_group == fdb_rec.kernel_group)
-          res = session_retry(session, blobs.all, lambda x: x(), self.logger)
-          for obj in res:
-            compile_entry['kernel_objects'].append({
-                'blob': obj.kernel_blob.decode('utf-8'),
-                'comp_options': obj.kernel_args,
-                'kernel_file': obj.kernel_name,
-                'md5_sum': obj.kernel_hash,
-                'uncompressed_size': obj.uncompressed_size
-            })
-
-      assert find_compile_res
-      fjob['miopen_find_compile_result'] = find_compile_res
+      fjob['miopen_find_compile_result'] = self.input_builder.compile_result(
+          session, self.job, 'miopen_find_eval')
     return [fjob]
 
   def get_fin_input(self):
@@ -178,17 +85,17 @@ class FinEvaluator(FinClass):
                    self.dbt)
 
     try:
-      if self.fin_steps[0] == 'miopen_perf_eval':
-        fjob = self.fin_pdb_input(fjob)
-      elif self.fin_steps[0] == 'miopen_find_eval':
-        fjob = self.fin_fdb_input(fjob)
+      if self.fin_steps[0] in COMPILE_RESULT:
+        fin_input = self.input_builder.fin_input(self.job, fjob,
+                                                 self.fin_steps[0])
+      else:
+        fin_input = json.dumps([fjob], separators=(',', ':')).encode()
     except (AssertionError, ValueError) as err:
       self.logger.error('Unable to get compiled objects for job %s : %s',
                         self.job.id, err)
       raise AssertionError from err
 
-    return self.machine.write_file(json.dumps(fjob, indent=2).encode(),
-                                   is_temp=True)
+    return self.machine.write_file(fin_input, is_temp=True)
 
   def get_job(self, find_state, set_state, imply_end):
     """Polling to see if job available"""
@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+
+###############################################################################
+#
+# MIT License
+#
+# Copyright (c) 2024 Advanced Micro Devices, Inc.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+"""Builds the fin input of the eval steps from the compiled kernels in the DB"""
+
+import os
+import json
+import time
+import hashlib
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import and_, func as sqla_func
+
+from tuna.dbBase.sql_alchemy import DbSession
+from tuna.utils.db_utility import session_retry
+from tuna.miopen.utils.metadata import FIN_INPUT_CACHE, FIN_INPUT_TTL
+
+#fin step: (compile result key, compiled flag of a solver entry)
+COMPILE_RESULT = {
+    'miopen_find_eval': ('miopen_find_compile_result', 'find_compiled'),
+    'miopen_perf_eval': ('miopen_perf_compile_result', 'perf_compiled')
+}
+
+
+class FinInputBuilder():
+  """Compose compile results with one joined query per job, decode each kernel
+  blob once and keep the serialized input on local disk for job retries"""
+
+  def __init__(self,
+               dbt,
+               id_solver_map: Dict[int, str],
+               logger,
+               cache_dir: Optional[str] = FIN_INPUT_CACHE):
+    """Constructor
+      @param dbt MIOpenDBTables of the worker
+      @param id_solver_map Solver id to fin solver name
+      @param logger Logger of the worker
+      @param cache_dir Local directory for built inputs, None disables it
+    """
+    self.dbt = dbt
+    self.id_solver_map = id_solver_map
+    self.logger = logger
+    self.cache_dir = cache_dir
+
+  def __query(self, session, job, step: str, cols: List[Any]):
+    """Applicable solvers of the job config, outer joined with the compiled
+    rows of step"""
+    # pylint: disable=comparison-with-callable
+    app = self.dbt.solver_app
+    query = session.query(*cols).select_from(app)
+    if step == 'miopen_perf_eval':
+      fcache = self.dbt.fin_cache_table
+      query = query.outerjoin(
+          fcache, and_(fcache.job_id == job.id, fcache.solver_id == app.solver))
+    else:
+      fdb = self.dbt.find_db_table
+      kcache = self.dbt.kernel_cache
+      # solvers which throw on GetSolution have a negative workspace
+      query = query.outerjoin(
+          fdb,
+          and_(fdb.session == app.session, fdb.config == app.config,
+               fdb.solver == app.solver, fdb.opencl == 0, fdb.valid == 1,
+               fdb.workspace_sz != -1))
+      query = query.outerjoin(
+          kcache,
+          and_(kcache.kernel_group == fdb.kernel_group, kcache.valid == 1))
+    return query.filter(app.session == self.dbt.session.id,
+                        app.config == job.config, app.applicable == 1)
+
+  def __kernel_table(self, step: str):
+    """Table holding the compiled kernels of step"""
+    if step == 'miopen_perf_eval':
+      return self.dbt.fin_cache_table
+    return self.dbt.kernel_cache
+
+  def __compile_rows(self, session, job, step: str) -> List[Any]:
+    """Solver, id of the compiled row and kernel columns of each kernel"""
+    kernel = self.__kernel_table(step)
+    found = self.dbt.fin_cache_table.id if step == 'miopen_perf_eval'\
+        else self.dbt.find_db_table.id
+    cols = [
+        self.dbt.solver_app.solver, found, kernel.kernel_blob,
+        kernel.kernel_args, kernel.kernel_name, kernel.kernel_hash,
+        kernel.uncompressed_size
+    ]
+    query = self.__query(session, job, step, cols)
+    query = query.order_by(self.dbt.solver_app.id, kernel.id)
+    return session_retry(session, query.all, lambda x: x(), self.logger)
+
+  def compile_result(self, session, job, step: str) -> List[Dict]:
+    """Compile result entries of step for every applicable solver"""
+    compiled = COMPILE_RESULT[step][1]
+    entries: Dict[int, Dict] = {}
+    blobs: Dict[str, str] = {}
+    for row in self.__compile_rows(session, job, step):
+      slv_name = self.id_solver_map[row.solver]
+      #if job solver is defined limit entries to that solver
+      if job.solver and slv_name != job.solver:
+        continue
+      entry = entries.setdefault(row.solver, {
+          'solver_name': slv_name,
+          compiled: False,
+          'kernel_objects': []
+      })
+      if row.id is None:
+        continue
+      entry[compiled] = True
+      if row.kernel_blob is None:
+        continue
+      #kernels shared between solvers are only decoded once
+      if row.kernel_hash not in blobs:
+        blobs[row.kernel_hash] = row.kernel_blob.decode('utf-8')
+      entry['kernel_objects'].append({
+          'blob': blobs[row.kernel_hash],
+          'comp_options': row.kernel_args,
+          'kernel_file': row.kernel_name,
+          'md5_sum': row.kernel_hash,
+          'uncompressed_size': row.uncompressed_size
+      })
+
+    assert entries
+    return list(entries.values())
+
+  def __cache_file(self, session, job, step: str) -> Optional[str]:
+    """Local file of the job input, named by the last update of its rows"""
+    if not self.cache_dir:
+      return None
+    kernel = self.__kernel_table(step)
+    cols = [
+        sqla_func.count(kernel.id),
+        sqla_func.max(kernel.update_ts),
+        sqla_func.max(self.dbt.solver_app.update_ts)
+    ]
+    if step == 'miopen_find_eval':
+      cols.append(sqla_func.max(self.dbt.find_db_table.update_ts))
+    query = self.__query(session, job, step, cols)
+    stamp = session_retry(session, query.one, lambda x: x(), self.logger)
+    version = hashlib.md5(
+        f"{job.solver}-{'-'.join(str(val) for val in stamp)}".encode(
+            'utf-8')).hexdigest()
+    return os.path.join(
+        self.cache_dir,
+        f"{self.dbt.job_table.__tablename__}-{job.id}-{step}-{version}.json")
+
+  def __prune_cache(self) -> None:
+    """Remove inputs older than FIN_INPUT_TTL"""
+    oldest = time.time() - FIN_INPUT_TTL
+    with os.scandir(self.cache_dir) as entries:
+      for entry in entries:
+        try:
+          if entry.stat().st_mtime < oldest:
+            os.remove(entry.path)
+        except FileNotFoundError:
+          pass
+
+  def fin_input(self, job, fjob: Dict, step: str) -> bytes:
+    """Serialized fin input of the eval step, from the local cache if the
+    compiled rows of the job did not change"""
+    with DbSession() as session:
+      cache_file = self.__cache_file(session, job, step)
+      if cache_file and os.path.exists(cache_file):
+        self.logger.info('Using cached fin input %s', cache_file)
+        with open(cache_file, 'rb') as fin_file:
+          return fin_file.read()
+
+      fin_job = fjob.copy()
+      fin_job[COMPILE_RESULT[step][0]] = self.compile_result(session, job, step)
+
+    fin_input = json.dumps([fin_job], separators=(',', ':')).encode()
+    if cache_file:
+      os.makedirs(os.path.dirname(cache_file), exist_ok=True)
+      self.__prune_cache()
+      tmp_file = f"{cache_file}.{os.getpid()}"
+      with open(tmp_file, 'wb') as fin_file:
+        fin_file.write(fin_input)
+      os.replace(tmp_file, cache_file)
+    return fin_input
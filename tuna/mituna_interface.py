@@ -27,7 +27,7 @@
 """Interface class to set up and launch tuning functionality"""
 import os
 from multiprocessing import Value, Lock, Queue as mpQueue, Process
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, List, TYPE_CHECKING
 from io import StringIO
 from functools import lru_cache
 import json
@@ -40,9 +40,7 @@ import asyncio
 from datetime import timedelta
 from sqlalchemy.exc import NoInspectionAvailable
 from sqlalchemy.inspection import inspect
-import aioredis
 import kombu
-from paramiko.channel import ChannelFile
 
 from tuna.worker_interface import WorkerInterface
 from tuna.machine import Machine
@@ -50,13 +48,29 @@ from tuna.libraries import Library
 from tuna.utils.logger import setup_logger
 from tuna.utils.utility import get_env_vars, SimpleDict
 from tuna.dbBase.sql_alchemy import DbSession
+from tuna.db_engine import use_engine_pool
 from tuna.celery_app.celery_app import stop_active_workers, stop_named_worker
 from tuna.celery_app.celery_app import get_backend_env, purge_queue
 from tuna.celery_app.utility import get_q_name
 from tuna.celery_app.celery_workers import launch_celery_worker
+from tuna.celery_app.backpressure import get_backpressure
 from tuna.libraries import Operation
 from tuna.custom_errors import CustomError
 from tuna.utils.db_utility import gen_update_query, session_retry
+from tuna.utils.lazy_import import lazy_import
+from tuna.utils.metrics import count_jobs, db_timer, observe_batch
+from tuna.utils.metrics import set_redis_backlog, setup_metrics, mark_process_dead
+from tuna.utils.tracing import setup_tracing, flush_tracing, span, traced
+from tuna.utils.profiling import profiled
+from tuna.utils.result_spool import ResultSpool, spool_path, FAILED
+from tuna.utils.metadata import ENQUEUE_POLL_INTERVAL, ASYNC_TUNE_THREADS
+from tuna.tune_loop import AsyncTuneLoop
+
+if TYPE_CHECKING:
+  import aioredis
+  from paramiko.channel import ChannelFile
+else:
+  aioredis = lazy_import('aioredis')
 
 job_counter_lock = threading.Lock()
 
@@ -79,6 +93,7 @@ class MITunaInterface():  #pylint:disable=too-many-instance-attributes,too-many-
     self.operation = None
     self.db_name = os.environ['TUNA_DB_NAME']
     self.prefix = None
+    self.spool: Optional[ResultSpool] = None
 
   def check_docker(self,
                    worker: WorkerInterface,
@@ -251,6 +266,7 @@ class MITunaInterface():  #pylint:disable=too-many-instance-attributes,too-many-
     """Get list of jobs"""
     raise NotImplementedError("Not implemented")
 
+  @traced('get_jobs')
   def get_jobs(self,
                session: DbSession,
                find_state: List[str],
@@ -264,7 +280,8 @@ class MITunaInterface():  #pylint:disable=too-many-instance-attributes,too-many-
     row: SimpleDict
 
     self.logger.info('Fetching DB rows...')
-    job_list = self.get_job_list(session, find_state, claim_num)
+    with db_timer('get_job_list'):
+      job_list = self.get_job_list(session, find_state, claim_num)
 
     if not self.check_jobs_found(job_list, find_state, session_id):
       return []
@@ -275,16 +292,18 @@ class MITunaInterface():  #pylint:disable=too-many-instance-attributes,too-many-
     ids = [row.id for row in job_list]
     self.logger.info("%s jobs %s", find_state, ids)
     self.logger.info('Updating job state to %s', set_state)
-    for job in job_list:
-      job.state = set_state
-      if self.dbt is not None:
-        query: str = gen_update_query(job, ['state'],
-                                      self.dbt.job_table.__tablename__)
-      else:
-        raise CustomError('DBTable must be set')
-      session.execute(query)
+    with db_timer('claim_jobs'):
+      for job in job_list:
+        job.state = set_state
+        if self.dbt is not None:
+          query: str = gen_update_query(job, ['state'],
+                                        self.dbt.job_table.__tablename__)
+        else:
+          raise CustomError('DBTable must be set')
+        session.execute(query)
 
-    session.commit()
+      session.commit()
+    count_jobs('claimed', len(job_list))
 
     return job_list
 
@@ -329,53 +348,61 @@ class MITunaInterface():  #pylint:disable=too-many-instance-attributes,too-many-
     """Wrapper function for celery enqueue func"""
     raise NotImplementedError('Not implemented')
 
+  def get_backpressure(self, q_name, job_batch_size):
+    """Backpressure on the celery queue and the results of this library"""
+    return get_backpressure(q_name, self.prefix, job_batch_size)
+
   def enqueue_jobs(self, job_counter, job_batch_size, q_name):
     """Enqueue celery jobs"""
     self.logger.info('Starting enqueue')
+    backpressure = self.get_backpressure(q_name, job_batch_size)
     with DbSession() as session:
       while True:
-        job_list = []
-        #get all the jobs from mySQL
-        job_list = self.get_jobs(
-            session,
-            self.fetch_state,
-            self.set_state,  #pylint: disable=no-member
-            self.args.session_id,  #pylint: disable=no-member
-            job_batch_size)
-
-        with job_counter_lock:
-          job_counter.value = job_counter.value + len(job_list)
-
-        for i in range(0, len(job_list), job_batch_size):
-          batch_jobs = job_list[i:min(i + job_batch_size, len(job_list))]
-          context_list = self.get_context_list(session, batch_jobs)
-          for context in context_list:
-            #calling celery task, enqueuing to celery queue
-            self.celery_enqueue_call(context, q_name=q_name)
+        #wait for the queue to drain below its low-water mark
+        claim_num = backpressure.wait_batch()
+        with span('enqueue_jobs', queue=q_name):
+          job_list = []
+          #get all the jobs from mySQL
+          job_list = self.get_jobs(
+              session,
+              self.fetch_state,
+              self.set_state,  #pylint: disable=no-member
+              self.args.session_id,  #pylint: disable=no-member
+              claim_num)
+
+          with job_counter_lock:
+            job_counter.value = job_counter.value + len(job_list)
+
+          for i in range(0, len(job_list), job_batch_size):
+            batch_jobs = job_list[i:min(i + job_batch_size, len(job_list))]
+            context_list = self.get_context_list(session, batch_jobs)
+            observe_batch(len(context_list))
+            if len(context_list) < len(batch_jobs):
+              #jobs dropped while serializing get no result to consume
+              with job_counter_lock:
+                job_counter.value = job_counter.value - (len(batch_jobs) -
+                                                         len(context_list))
+            for context in context_list:
+              #calling celery task, enqueuing to celery queue
+              self.celery_enqueue_call(context, q_name=q_name)
+            count_jobs('enqueued', len(context_list))
+            backpressure.record_enqueued(len(context_list))
 
         self.logger.info('Job counter: %s', job_counter.value)
         if not job_list:
           self.logger.info('All tasks added to queue')
           break
+    flush_tracing()
 
-  async def cleanup_redis_results(self, prefix):
-    """Remove stale redis results by key"""
-    backend_port, backend_host = get_backend_env()
-    redis = await aioredis.from_url(f"redis://{backend_host}:{backend_port}/15")
+  async def cleanup_redis_results(self, prefix, redis=None):
+    """Remove stale redis results by key, after storing the results a
+    previous consume spooled but did not commit"""
+    self.replay_spool()
+    if redis is None:
+      redis = await self.get_redis()
 
-    keys = []
-    cursor = "0"
-    if prefix:
-      #a prefix is necessary when the need to different results in redis based on operation
-      #withough a prefix the redis key defaults to: "celery-task-meta-<unique kombu hash>"
-      #with a prefix the key will look like: "celery-task-meta-<prefix>-<unique kombu hash>"
-      #the prefix can be applied when filtering the redis keys as bellow
-      cursor, results = await redis.scan(cursor, match=f"*{prefix}*")
-    else:
-      #no prefix, match any key
-      cursor, results = await redis.scan(cursor, match="*")
-    keys.extend(results)
-    self.logger.info('Found %s old results', len(results))
+    keys = await self.scan_results(redis, prefix)
+    self.logger.info('Found %s old results', len(keys))
     for key in keys:
       try:
         await redis.delete(key)
@@ -388,33 +415,44 @@ class MITunaInterface():  #pylint:disable=too-many-instance-attributes,too-many-
 
     return True
 
+  async def get_redis(self):
+    """Client of the redis db holding the celery results"""
+    backend_port, backend_host = get_backend_env()
+    return await aioredis.from_url(f"redis://{backend_host}:{backend_port}/15")
+
+  async def scan_results(self, redis, prefix) -> list:
+    """Keys of all celery results in redis for prefix"""
+    cursor = "0"
+    keys = []
+    while cursor != 0:
+      if prefix:
+        #a prefix is necessary when the need to different results in redis based on operation
+        #withough a prefix the redis key defaults to: "celery-task-meta-<unique kombu hash>"
+        #with a prefix the key will look like: "celery-task-meta-<prefix>-<unique kombu hash>"
+        #the prefix can be applied when filtering the redis keys as bellow
+        cursor, results = await redis.scan(cursor, match=f"*{prefix}*")
+      else:
+        #no prefix, match any key
+        cursor, results = await redis.scan(cursor, match="*")
+      keys.extend(results)
+    return keys
+
   async def consume(self, job_counter, prefix):
     """Retrieve celery results from redis db"""
 
-    backend_port, backend_host = get_backend_env()
-    redis = await aioredis.from_url(f"redis://{backend_host}:{backend_port}/15")
+    redis = await self.get_redis()
 
     while job_counter.value > 0:
-      cursor = "0"
-      keys = []
-      while cursor != 0:
-        if prefix:
-          #a prefix is necessary when the need to different results in redis based on operation
-          #withough a prefix the redis key defaults to: "celery-task-meta-<unique kombu hash>"
-          #with a prefix the key will look like: "celery-task-meta-<prefix>-<unique kombu hash>"
-          #the prefix can be applied when filtering the redis keys as bellow
-          cursor, results = await redis.scan(cursor, match=f"*{prefix}*")
-        else:
-          #no prefix, match any key
-          cursor, results = await redis.scan(cursor, match="*")
-        keys.extend(results)
-      self.logger.info('Found %s results', len(results))
+      keys = await self.scan_results(redis, prefix)
+      self.logger.info('Found %s results', len(keys))
+      set_redis_backlog(len(keys))
       for key in keys:
         try:
           data = await redis.get(key)
           if data:
-            _ = await self.parse_result(data.decode('utf-8'))
+            _ = await self.parse_result(data.decode('utf-8'), key)
             await redis.delete(key)
+            count_jobs('consumed')
             with job_counter_lock:
               job_counter.value = job_counter.value - 1
         except aioredis.exceptions.ResponseError as red_err:
@@ -424,6 +462,8 @@ class MITunaInterface():  #pylint:disable=too-many-instance-attributes,too-many-
       await asyncio.sleep(1)
     self.logger.info('Job counter reached 0')
     await redis.close()
+    self.close_spool()
+    self.consume_done()
 
     return True
 
@@ -464,6 +504,8 @@ class MITunaInterface():  #pylint:disable=too-many-instance-attributes,too-many-
       stop_active_workers()
       return True
 
+    setup_metrics()
+    setup_tracing(service=f'tuna-{self.logger.name}')
     try:
       q_name, subp_list = self.prep_tuning()
     except CustomError as verr:
@@ -483,20 +525,49 @@ class MITunaInterface():  #pylint:disable=too-many-instance-attributes,too-many-
 
     start = time.time()
 
+    if self.args.async_tune:
+      self.async_tune(job_batch_size, q_name)
+    else:
+      self.process_tune(job_batch_size, q_name)
+
+    self.cancel_consumer(q_name)
+    end = time.time()
+    self.logger.info("Took {:0>8} to tune".format(  #pylint: disable=consider-using-f-string
+        str(timedelta(seconds=end - start))))
+
+    return True
+
+  def async_tune(self, job_batch_size, q_name):
+    """enqueue, consume and result cleanup as asyncio tasks of this process"""
+    try:
+      use_engine_pool(ASYNC_TUNE_THREADS)
+      asyncio.run(
+          AsyncTuneLoop(self,
+                        q_name,
+                        job_batch_size,
+                        threads=ASYNC_TUNE_THREADS).run())
+    except (KeyboardInterrupt, Exception) as exp:  #pylint: disable=broad-exception-caught
+      self.logger.error('Error ocurred %s', exp)
+      purge_queue([q_name])
+      self.cancel_consumer(q_name)
+      self.reset_job_state_on_ctrl_c()
+
+  def process_tune(self, job_batch_size, q_name):
+    """enqueue, consume and result cleanup in separate processes"""
     #set job count to 1 until first job fetch is finished
     job_counter = Value('i', 1)
     try:
-      enqueue_proc = Process(target=self.enqueue_jobs,
-                             args=[job_counter, job_batch_size, q_name])
-      #Start enqueue proc
-      enqueue_proc.start()
-
-      #cleanup old results
+      #cleanup old results before any new ones can arrive
       cleanup_proc = Process(target=self.async_wrap,
                              args=(self.cleanup_redis_results, self.prefix))
       cleanup_proc.start()
       cleanup_proc.join()
 
+      enqueue_proc = Process(target=self.enqueue_jobs,
+                             args=[job_counter, job_batch_size, q_name])
+      #Start enqueue proc
+      enqueue_proc.start()
+
       #start async consume thread, blocking
       consume_proc = Process(target=self.async_wrap,
                              args=(self.consume, job_counter, self.prefix))
@@ -514,9 +585,10 @@ class MITunaInterface():  #pylint:disable=too-many-instance-attributes,too-many-
                                args=[job_counter, job_batch_size, q_name])
         enqueue_proc.start()
         enqueue_proc.join()
-        time.sleep(10)
+        time.sleep(ENQUEUE_POLL_INTERVAL)
 
       consume_proc.join()
+      mark_process_dead(consume_proc.pid)
 
     except (KeyboardInterrupt, Exception) as exp:  #pylint: disable=broad-exception-caught
       self.logger.error('Error ocurred %s', exp)
@@ -526,13 +598,6 @@ class MITunaInterface():  #pylint:disable=too-many-instance-attributes,too-many-
       with job_counter_lock:
         job_counter.value = 0
 
-    self.cancel_consumer(q_name)
-    end = time.time()
-    self.logger.info("Took {:0>8} to tune".format(  #pylint: disable=consider-using-f-string
-        str(timedelta(seconds=end - start))))
-
-    return True
-
   async def async_callback(self, async_func, *args):
     """Wrapper function to await on async function"""
     await async_func(*args)
@@ -543,6 +608,7 @@ class MITunaInterface():  #pylint:disable=too-many-instance-attributes,too-many-
       asyncio.run(self.async_callback(async_func, *args))
     except KeyboardInterrupt:
       self.logger.warning('Keyboard interrupt caught, terminating')
+    flush_tracing()
 
   def reset_job_state_on_ctrl_c(self):
     """Reset job state for jobs in flight"""
@@ -629,8 +695,55 @@ class MITunaInterface():  #pylint:disable=too-many-instance-attributes,too-many-
 
     return context_list
 
-  async def parse_result(self, data):
-    """Function callback for celery async jobs to store results"""
+  async def parse_result(self, data, key=None):
+    """Function callback for celery async jobs to store results, spooled
+    locally until committed if the redis key is given"""
+    if key is None:
+      return self.store_result(data)
+    return self.store_spooled(key, data)
+
+  def get_spool(self) -> ResultSpool:
+    """Result spool of this process, opened on first use"""
+    if self.spool is None:
+      self.spool = ResultSpool(spool_path(self.prefix))
+    return self.spool
+
+  def close_spool(self) -> None:
+    """Drop stored results from the spool and close it"""
+    if self.spool is not None:
+      self.spool.purge()
+      self.spool.close()
+      self.spool = None
+
+  def store_spooled(self, key, data):
+    """Store a result, recorded in the spool until the DB commit"""
+    spool = self.get_spool()
+    spool.add(key, data)
+    ret = self.store_result(data)
+    spool.mark(key)
+    return ret
+
+  def replay_spool(self) -> int:
+    """Store the results left pending in the spool by an earlier consume"""
+    count = 0
+    spool = self.get_spool()
+    for key, data in spool.pending():
+      try:
+        self.store_result(data)
+        spool.mark(key)
+        count += 1
+      except Exception as err:  #pylint: disable=broad-exception-caught
+        self.logger.error('Could not replay spooled result %s: %s', key, err)
+        spool.mark(key, FAILED)
+    if count:
+      self.logger.warning('Replayed %s spooled results', count)
+    #the spool is opened again after fork by the consumer
+    self.close_spool()
+    return count
+
+  @profiled('parse_result')
+  def store_result(self, data):
+    """Store a celery result read from redis"""
     data = json.loads(data)
 
     with DbSession() as session:
@@ -641,13 +754,16 @@ class MITunaInterface():  #pylint:disable=too-many-instance-attributes,too-many-
         self.logger.error(kerr)
         return False
 
-      self.logger.info('Parsing: %s', fin_json)
-      if self.operation == Operation.COMPILE:
-        self.process_compile_results(session, fin_json, context)
-      elif self.operation == Operation.EVAL:
-        self.process_eval_results(session, fin_json, context)
-      else:
-        raise CustomError('Unsupported tuning operation')
+      #continue the trace of the worker that produced the result
+      with span('parse_result', data['result'].get('trace')):
+        self.logger.info('Parsing: %s', fin_json)
+        with db_timer('store_results'), span('process_results'):
+          if self.operation == Operation.COMPILE:
+            self.process_compile_results(session, fin_json, context)
+          elif self.operation == Operation.EVAL:
+            self.process_eval_results(session, fin_json, context)
+          else:
+            raise CustomError('Unsupported tuning operation')
 
       return True
 
@@ -655,6 +771,9 @@ class MITunaInterface():  #pylint:disable=too-many-instance-attributes,too-many-
     """Process result from fin_build worker"""
     raise NotImplementedError("Not implemented")
 
+  def consume_done(self):
+    """Called once consume has processed all results"""
+
   def process_eval_results(self, session, fin_json, context):
     """Process fin_json result"""
     raise NotImplementedError("Not implemented")
@@ -49,6 +49,7 @@ class TunaArgs(Enum):
   DOCKER_NAME: str = 'docker_name'
   SHUTDOWN_WORKERS: str = 'shutdown_workers'
   ENQUEUE_ONLY: str = 'enqueue_only'
+  ASYNC_TUNE: str = 'async_tune'
 
 
 # pylint: disable=too-many-branches
@@ -157,6 +158,13 @@ def setup_arg_parser(desc: str,
                           action='store_true',
                           dest='enqueue_only',
                           help='Enqueue jobs to celery queue')
+    if TunaArgs.ASYNC_TUNE in arg_list:
+      parser.add_argument(
+          '--async_tune',
+          action='store_true',
+          dest='async_tune',
+          help='Run enqueue, consume and result cleanup as asyncio tasks of'
+          ' one process instead of one process each')
 
   return parser
 
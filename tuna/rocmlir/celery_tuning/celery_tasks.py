@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+
+###############################################################################
+#
+# MIT License
+#
+# Copyright (c) 2024 Advanced Micro Devices, Inc.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+"""Module to register rocMLIR celery tasks"""
+from celery.utils.log import get_task_logger
+from tuna.celery_app.celery_app import get_app
+from tuna.utils.celery_utils import prep_config_kwargs, prep_cached_worker
+from tuna.utils.celery_utils import connect_worker_signals, set_worker_gpu
+from tuna.utils.celery_utils import run_worker
+from tuna.rocmlir.config_type import ConfigType
+from tuna.rocmlir.rocmlir_lib import Q_NAME
+from tuna.rocmlir.rocmlir_worker import RocMLIRWorker
+
+logger = get_task_logger(__name__)
+app = get_app()
+connect_worker_signals(app)
+
+
+def prep_kwargs(kwargs, args):
+  """Populate kwargs with serialized job, config and machine"""
+  kwargs = prep_config_kwargs(kwargs, args[0], args[1])
+  kwargs["config_type"] = ConfigType[kwargs["config_type"]]
+
+  return kwargs
+
+
+cached_worker = {}
+
+
+def new_worker(context):
+  """Create the rocMLIR worker for context"""
+  kwargs = prep_kwargs(context['kwargs'], [context['job'], context['config']])
+  return RocMLIRWorker(**kwargs)
+
+
+def prep_worker(context):
+  """Creating tuna worker object based on context"""
+  return prep_cached_worker(context, cached_worker, new_worker)
+
+
+@app.task(trail=True, reply_to=Q_NAME)
+def celery_enqueue(context):
+  """Defines a celery task"""
+  gpu_id = set_worker_gpu(context, app.worker_name)
+  logger.info("Enqueueing worker %s: gpu(%s), job %s", app.worker_name, gpu_id,
+              context['job'])
+
+  return run_worker(celery_enqueue, context, prep_worker)
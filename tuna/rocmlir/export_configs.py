@@ -28,6 +28,7 @@
 
 from tuna.parse_args import TunaArgs, setup_arg_parser
 from tuna.rocmlir.rocmlir_tables import RocMLIRDBTables
+from tuna.rocmlir.config_type import ConfigType
 
 
 def main():
@@ -40,14 +41,36 @@ def main():
                       type=str,
                       dest='file_name',
                       required=True,
-                      help='File to import')
+                      help='File to export to, compressed if it ends in .gz')
   parser.add_argument('--append',
                       dest='append',
                       action='store_true',
                       help='Append to file instead of overwriting')
+  parser.add_argument('--arch',
+                      dest='arch',
+                      type=str,
+                      default=None,
+                      help='Only export results from sessions on this arch')
+  parser.add_argument('--best_only',
+                      dest='best_only',
+                      action='store_true',
+                      help='Only export the fastest perf-config per config')
+  parser.add_argument('--config_type',
+                      dest='config_type',
+                      help='Results table to export without --session_id',
+                      default=None,
+                      choices=[ct.name for ct in ConfigType],
+                      type=ConfigType)
   args = parser.parse_args()
-  dbt = RocMLIRDBTables(session_id=args.session_id)
-  dbt.results().export_as_tsv(args.file_name, dbt, args.append)
+  if args.session_id is None and args.config_type is None:
+    parser.error('--config_type is required without --session_id')
+  dbt = RocMLIRDBTables(session_id=args.session_id,
+                        config_type=args.config_type)
+  dbt.results().export_as_tsv(args.file_name,
+                              dbt,
+                              args.append,
+                              arch=args.arch,
+                              best_only=args.best_only)
 
 
 if __name__ == '__main__':
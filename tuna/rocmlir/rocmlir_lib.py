@@ -31,20 +31,29 @@ import argparse
 from multiprocessing import Value
 
 from typing import Dict, Any, List, Optional
+from sqlalchemy.inspection import inspect
 from tuna.mituna_interface import MITunaInterface
 from tuna.parse_args import TunaArgs, setup_arg_parser, args_check
 from tuna.utils.machine_utility import load_machines
 from tuna.machine import Machine
 
-from tuna.libraries import Library
-from tuna.utils.db_utility import create_tables
+from tuna.libraries import Library, Operation
+from tuna.utils.db_utility import create_tables, gen_select_objs
+from tuna.utils.db_utility import gen_update_query, session_retry
+from tuna.utils.utility import SimpleDict
+from tuna.utils.tracing import span, trace_headers
+from tuna.miopen.utils.helper import set_job_state
 from tuna.rocmlir.rocmlir_tables import get_tables, SessionRocMLIR
+from tuna.rocmlir.rocmlir_tables import RocMLIRDBTables
 from tuna.rocmlir.rocmlir_worker import RocMLIRWorker
+from tuna.rocmlir.rocmlir_worker import get_result_attr, insert_result
 from tuna.miopen.db.build_schema import recreate_triggers
 from tuna.rocmlir.triggers import get_timestamp_trigger
 from tuna.rocmlir.config_type import ConfigType
 from tuna.dbBase.sql_alchemy import DbSession
 
+Q_NAME = None
+
 
 class RocMLIR(MITunaInterface):
   """Class to support a rocMLIR tuning run"""
@@ -52,6 +61,7 @@ class RocMLIR(MITunaInterface):
   def __init__(self):
     super().__init__(library=Library.ROCMLIR)
     self.args: argparse.Namespace = None
+    self.set_state = None
 
   def parse_args(self) -> None:
     # pylint: disable=too-many-statements
@@ -61,7 +71,8 @@ class RocMLIR(MITunaInterface):
     parser = setup_arg_parser('RocMLIR library integrated with MITuna', [
         TunaArgs.ARCH, TunaArgs.NUM_CU, TunaArgs.VERSION, TunaArgs.SESSION_ID,
         TunaArgs.MACHINES, TunaArgs.REMOTE_MACHINE, TunaArgs.LABEL,
-        TunaArgs.RESTART_MACHINE, TunaArgs.DOCKER_NAME
+        TunaArgs.RESTART_MACHINE, TunaArgs.DOCKER_NAME, TunaArgs.ENQUEUE_ONLY,
+        TunaArgs.ASYNC_TUNE, TunaArgs.SHUTDOWN_WORKERS
     ])
     parser.add_argument('--config_type',
                         dest='config_type',
@@ -80,9 +91,16 @@ class RocMLIR(MITunaInterface):
         default='exhaustive',
         choices=['quick', 'full', 'exhaustive'],
         help='Which space of tuning configs should be used while tuning')
+    parser.add_argument(
+        '--batch_size',
+        dest='batch_size',
+        default=1,
+        type=int,
+        help='With --execute, number of configs each worker passes to a single'
+        ' tuningRunner.py call')
 
     group: argparse._MutuallyExclusiveGroup = parser.add_mutually_exclusive_group(
-        required=True)
+    )
     group.add_argument('--add_tables',
                        dest='add_tables',
                        action='store_true',
@@ -101,12 +119,54 @@ class RocMLIR(MITunaInterface):
                        dest='init_session',
                        help='Set up a new tuning session.')
 
+    group.add_argument(
+        '--tune',
+        dest='tune',
+        action='store_true',
+        help='Run jobs from the job tables through celery workers, one per GPU')
+
     self.args = parser.parse_args()
     if len(sys.argv) == 1:
       parser.print_help()
       sys.exit(-1)
 
     args_check(self.args, parser)
+    if not (self.args.add_tables or self.args.execute or self.args.init_session
+            or self.args.tune or self.args.shutdown_workers):
+      parser.error('one of the arguments --add_tables --execute'
+                   ' --init_session --tune is required')
+    if self.args.enqueue_only and not self.args.tune:
+      parser.error('--enqueue_only can only be used with --tune')
+
+    if self.args.tune:
+      if self.args.session_id is None:
+        parser.error('session_id must be specified with --tune')
+      self.dbt = RocMLIRDBTables(session_id=self.args.session_id,
+                                 config_type=self.args.config_type)
+      self.update_operation()
+      self.set_prefix()
+
+  def update_operation(self):
+    """! Set worker operation type. Compile and benchmark are a single
+    tuningRunner.py call, which needs a GPU, so this is an eval operation
+    """
+    self.operation = Operation.EVAL
+    self.fetch_state.add('new')
+    self.set_state = 'running'
+
+  def set_prefix(self):
+    """Set redis key prefix"""
+    self.prefix = f"d_{self.db_name}_sess_{self.args.session_id}_"\
+                  f"{self.dbt.config_type.name}"
+    self.logger.info('redis prefix: %s', self.prefix)
+
+  def has_tunable_operation(self):
+    """! Check if its a tuning loop operation
+    @return Bool value that represents if operation is tuning
+    """
+    if self.args is None:
+      self.parse_args()
+    return self.args.tune or self.args.shutdown_workers
 
   def launch_worker(self, gpu_idx: int, f_vals: Dict[str, Any], \
                     worker_lst: List[RocMLIRWorker]) -> List[RocMLIRWorker]:
@@ -170,7 +230,8 @@ class RocMLIR(MITunaInterface):
     # pylint: disable=duplicate-code
     """Main run function of example_lib"""
     res: Optional[List[RocMLIRWorker]]
-    self.parse_args()
+    if self.args is None:
+      self.parse_args()
     if self.args.add_tables:
       self.add_tables()
       return None
@@ -185,8 +246,8 @@ class RocMLIR(MITunaInterface):
         SessionRocMLIR().add_new_session(self.args, worker)
       return None
 
-    # Must be --execute, because the mutually-exclusive-group argument is
-    # required, and we just checked for --add_tables and --init_session.
+    # Must be --execute, --tune is handled by go_fish through tune() and
+    # we just checked for --add_tables and --init_session.
     res = self.compose_worker_list(machines)
     return res
 
@@ -205,28 +266,158 @@ class RocMLIR(MITunaInterface):
     """! Helper function to set up kwargs for worker instances
       @param gpu_idx Unique ID of the GPU
       @param f_vals Dict containing process specific runtime information
+      @param tuning Kwargs are serialized into a celery context
     """
-    kwargs: Dict[str, Any] = super().get_kwargs(gpu_idx, f_vals)
-    kwargs['config_type'] = self.args.config_type
+    kwargs: Dict[str, Any] = super().get_kwargs(gpu_idx, f_vals, tuning)
+    if tuning:
+      #the celery context is json, the task maps the name back to ConfigType
+      kwargs['config_type'] = self.dbt.config_type.name
+    else:
+      kwargs['config_type'] = self.args.config_type
+      kwargs['batch_size'] = self.args.batch_size
 
     return kwargs
 
-  def get_jobs(self,
-               session: DbSession,
-               find_state: List[str],
-               set_state: str,
-               session_id: int,
-               claim_num: int = None,
-               no_update: bool = False):
-    """Get jobs based on find_state"""
-    self.logger.info('Placeholder')
+  def get_job_list(self, session, find_state, claim_num):
+    """! Get list of jobs, locked for update
+    @param session DB session
+    @param find_state DB job state
+    @param claim_num Number of DB jobs to pick up
+    @return List of DB jobs
+    """
+    conds: List[str] = [f"session={self.dbt.session.id}", "valid=1"]
+    if self.args.label:
+      conds.append(f"reason='{self.args.label}'")
+    conds.append(f"retries<{self.max_job_retries}")
+    conds.append("state in (" + str(find_state).strip('{').strip('}') + ")")
 
-    return True
+    cond_str = f"WHERE {' AND '.join(conds)} ORDER BY retries,config ASC"
+    if claim_num:
+      cond_str += f" LIMIT {claim_num}"
+    cond_str += " FOR UPDATE SKIP LOCKED"
+
+    return gen_select_objs(session, self.get_job_attr(),
+                           self.dbt.job_table.__tablename__, cond_str)
 
-  def get_context_list(self, session, batch_jobs):
-    """Get a list of context items to be used for celery task"""
-    raise NotImplementedError("Not implemented in rocmlir")
+  def serialize_jobs(self, session: DbSession, batch_jobs: List[Any]):
+    """! Return list of serialized (job, config) pairs
+    @param session DB session
+    @param batch_jobs List of DB jobs
+    @return DB jobs and their configs, serialized
+    """
+    if not batch_jobs:
+      return []
+
+    id_str = ','.join({str(job.config) for job in batch_jobs})
+    cfg_attr = [column.name for column in inspect(self.dbt.config_table).c]
+    cfg_entries = gen_select_objs(session, cfg_attr,
+                                  self.dbt.config_table.__tablename__,
+                                  f"WHERE id in ({id_str})")
+    cfg_map = {cfg.id: cfg for cfg in cfg_entries}
+
+    entries = []
+    for job in batch_jobs:
+      if job.config not in cfg_map:
+        #already claimed, fail it here or it is never released
+        msg = f"Config {job.config} not found"
+        self.logger.warning('%s for job %s', msg, job.id)
+        set_job_state(session, job, self.dbt, 'error', result=msg)
+        continue
+      entries.append((job.to_dict(), cfg_map[job.config].to_dict()))
+
+    return entries
+
+  def build_context(self, serialized_jobs):
+    """! Build context list for enqueue job
+    @param serialized_jobs List of (job, config) pairs, serialized for Celery
+    """
+    context_list = []
+    kwargs = self.get_context_items()
+    for job, config in serialized_jobs:
+      context = {
+          'job': job,
+          'config': config,
+          'operation': self.operation,
+          'arch': self.dbt.session.arch,
+          'num_cu': self.dbt.session.num_cu,
+          'kwargs': kwargs,
+      }
+      context_list.append(context)
+
+    return context_list
 
   def celery_enqueue_call(self, context, q_name, task_id=False):
-    """Wrapper function for celery enqueue func"""
-    raise NotImplementedError('Not implemented')
+    """! Enqueue job (context) for queue:q_name
+    @param context Context for Celery job
+    @param q_name Custom Celery queue name
+    @param task_id Custom Redis Key
+    """
+    #same trick as miopen_lib, the task decorator needs Q_NAME at import time
+    Q_NAME = q_name  #pylint: disable=import-outside-toplevel,unused-variable,invalid-name,redefined-outer-name
+    from tuna.rocmlir.celery_tuning.celery_tasks import celery_enqueue  #pylint: disable=import-outside-toplevel
+    from kombu.utils.uuid import uuid  #pylint: disable=import-outside-toplevel
+
+    with span('celery_enqueue_call', queue=q_name, job=context['job']['id']):
+      return celery_enqueue.apply_async(
+          (context,),
+          task_id=('-').join([self.prefix, uuid()]),
+          queue=q_name,
+          reply_to=q_name,
+          headers=trace_headers())
+
+  def process_compile_results(self, session, fin_json, context):
+    """! rocMLIR has no separate compile step, see process_eval_results"""
+    return self.process_eval_results(session, fin_json, context)
+
+  def process_eval_results(self, session, fin_json, context):
+    """! Store the tuningRunner.py output returned by a celery task
+    @param session DB session
+    @param fin_json Dict with the retcode and output of tuningRunner.py
+    @param context Context for Celery job
+    @return Boolean value
+    """
+    job = SimpleDict(**context['job'])
+    if not fin_json:
+      set_job_state(session, job, self.dbt, 'error', result='No result')
+      return False
+
+    retcode = fin_json['retcode']
+    cmd_output = fin_json['output']
+    if retcode != 0:
+      quoted_output = cmd_output.replace("'", r"\'").replace(':', r'\:')
+      msg = f"Error code {retcode}, output {quoted_output}"
+      self.logger.info(msg)
+      set_job_state(session, job, self.dbt, 'error', result=msg)
+      return False
+
+    # https://stackoverflow.com/questions/49902843/avoid-parameter-binding-when-executing-query-with-sqlalchemy
+    string = cmd_output.replace(':', r'\:')
+    set_job_state(session, job, self.dbt, 'completed', result=string)
+
+    def actuator(func):
+      return func(session, self.dbt, job, string, get_result_attr(self.dbt),
+                  self.logger)
+
+    return session_retry(session, insert_result, actuator, self.logger)
+
+  def reset_job_state_on_ctrl_c(self):
+    """Reset job state for jobs in flight, the rocMLIR job enum has no
+    *_start states"""
+    temp_obj = SimpleDict()
+    temp_obj.state = 'new'
+    query = gen_update_query(temp_obj, ['state'],
+                             self.dbt.job_table.__tablename__,
+                             [('session', self.args.session_id),
+                              ('state', "'running'")])
+    self.logger.info('Resetting job state in DB for in flight jobs')
+    with DbSession() as session:
+
+      def callback() -> bool:
+        session.execute(query)
+        session.commit()
+        return True
+
+      assert session_retry(session, callback, lambda x: x(), self.logger)
+      self.logger.info('Sucessfully reset job state')
+
+    return True
@@ -28,6 +28,7 @@
 """
 
 import sys
+import gzip
 import enum
 import itertools
 
@@ -50,6 +51,17 @@ from tuna.rocmlir.tuning_space import TuningSpace
 
 #pylint: disable=too-few-public-methods
 
+EXPORT_CHUNK_SIZE = 10000
+EXPORT_PROGRESS_ROWS = 100000
+
+
+def open_tsv(filename, append=False):
+  """Open a buffered text file for writing, gzip compressed for .gz names"""
+  mode = 'a' if append else 'w'
+  if filename.endswith('.gz'):
+    return gzip.open(filename, mode + 't', encoding='utf8')
+  return open(filename, mode, encoding='utf8', buffering=1 << 20)  # pylint: disable=consider-using-with
+
 
 class SessionRocMLIR(BASE, SessionMixin):
   """Session table to keep track of tuning sessions"""
@@ -373,28 +385,74 @@ class ResultsMixin():  # pylint: disable=too-many-instance-attributes
     print(f"line being parsed is '{line}'", file=sys.stderr)
     return line.split('\t')
 
-  def export_as_tsv(self, filename, dbt, append=False):
-    """Write the contents of the table as a .tsv file for perfRunner.py."""
-    arch = dbt.session.arch_full
-    num_cu = dbt.session.num_cu
-    session_id = dbt.session_id
-
-    with open(filename, 'a' if append else 'w', encoding='utf8') as out:
-      print("# arch\tnumCUs\ttestVector\tperfConfig (tuna)", file=out)
-      with DbSession() as sess:
-        tbl = dbt.results
-        query = sess.query(tbl).filter(tbl.session == session_id,
-                                       tbl.valid == 1)
-        res = query.all()
-        for row in res:
-          # For detailed compatibility, downcase False and True.
-          config_str = row.config_str.replace("False",
-                                              "false").replace("True", "true")
-          print(f"Arch = {arch}({num_cu} CUs), vector = '{config_str}', \
-                perfConfig = {row.perf_config}",
-                file=sys.stderr)
-          print(f"{arch}\t{num_cu}\t{config_str}\t{row.perf_config}", file=out)
-        return len(res)
+  def export_as_tsv(self,
+                    filename,
+                    dbt,
+                    append=False,
+                    arch=None,
+                    best_only=False,
+                    session_ids=None):
+    """Write the contents of the table as a .tsv file for perfRunner.py.
+    Rows are streamed from the DB, a filename ending in .gz is compressed.
+      @param arch only export results from sessions on this arch
+      @param best_only only export the fastest perf_config per config and arch
+      @param session_ids sessions to export, defaults to dbt.session_id
+    """
+    logger = setup_logger('export_tsv')
+    if session_ids is None and dbt.session_id is not None:
+      session_ids = [dbt.session_id]
+
+    count = 0
+    with open_tsv(filename, append) as out, DbSession() as sess:
+      out.write("# arch\tnumCUs\ttestVector\tperfConfig (tuna)\n")
+      query = self.get_export_query(sess, dbt.results, arch, best_only,
+                                    session_ids)
+      for row in query.yield_per(EXPORT_CHUNK_SIZE):
+        # For detailed compatibility, downcase False and True.
+        config_str = row.config_str.replace("False",
+                                            "false").replace("True", "true")
+        out.write(f"{row.arch_full}\t{row.num_cu}\t{config_str}\t"
+                  f"{row.perf_config}\n")
+        count += 1
+        if count % EXPORT_PROGRESS_ROWS == 0:
+          logger.info('Exported %s rows to %s', count, filename)
+
+    logger.info('Exported %s rows to %s', count, filename)
+    return count
+
+  @staticmethod
+  def get_export_query(sess, tbl, arch=None, best_only=False, session_ids=None):
+    """Query the exported columns, the best perf_config per config is picked
+    by the DB with a window function"""
+    sess_tbl = SessionRocMLIR
+    cols = [
+        sess_tbl.arch_full.label('arch_full'),
+        sess_tbl.num_cu.label('num_cu'),
+        tbl.config.label('config'),
+        tbl.config_str.label('config_str'),
+        tbl.perf_config.label('perf_config')
+    ]
+    query = sess.query(*cols).join(sess_tbl, tbl.session == sess_tbl.id)\
+        .filter(tbl.valid == 1)
+    if session_ids:
+      query = query.filter(tbl.session.in_(session_ids))
+    if arch:
+      query = query.filter(sess_tbl.arch == arch)
+
+    if best_only:
+      rank = sqla_func.row_number().over(
+          partition_by=[sess_tbl.arch_full, sess_tbl.num_cu, tbl.config],
+          order_by=[tbl.kernel_tflops.desc(), tbl.id]).label('rank')
+      subq = query.add_columns(rank).subquery()
+      query = sess.query(subq.c.arch_full, subq.c.num_cu, subq.c.config,
+                         subq.c.config_str,
+                         subq.c.perf_config).filter(subq.c.rank == 1)
+      return query.order_by(
+          subq.c.arch_full, subq.c.num_cu,
+          subq.c.config).execution_options(stream_results=True)
+
+    return query.order_by(sess_tbl.arch_full, sess_tbl.num_cu,
+                          tbl.config).execution_options(stream_results=True)
 
 
 class ConvolutionResults(BASE, ResultsMixin):  # pylint: disable=too-many-instance-attributes
@@ -34,6 +34,7 @@ import functools
 import logging
 import traceback
 
+from sqlalchemy import bindparam
 from sqlalchemy.inspection import inspect
 
 from tenacity import Retrying, stop_after_attempt, before_sleep_log, wait_random
@@ -42,21 +43,97 @@ from tuna.dbBase.sql_alchemy import DbSession
 from tuna.worker_interface import WorkerInterface
 from tuna.rocmlir.rocmlir_tables import RocMLIRDBTables
 from tuna.utils.db_utility import session_retry, gen_insert_query
+from tuna.utils.db_utility import gen_select_objs
+from tuna.utils.utility import SimpleDict
+from tuna.utils.metadata import MAX_JOB_RETRIES
 from tuna.rocmlir.config_type import ConfigType
 
 
+def get_result_attr(dbt):
+  """Columns of the results table that are written on insert"""
+  result_attr = [column.name for column in inspect(dbt.results).c]
+  result_attr.remove("insert_ts")
+  result_attr.remove("update_ts")
+  return result_attr
+
+
+def insert_result(session, dbt, job, result_str, result_attr, logger):
+  """Parse tuningRunner.py output for a job and insert it in the results table"""
+  obj = dbt.results()
+
+  arch, num_cu, config, perf_config, tflops = obj.parse(result_str)
+
+  print(f"arch = '{arch}', num_cu = '{num_cu}', config = '{config}', \
+        perf_config = '{perf_config}', tflops = {tflops}",
+        file=sys.stderr)
+
+  # Sanity checks.
+  if not perf_config or perf_config == 'None' or tflops == '-inf':
+    logger.warning('Bad data for job_id=%s, skipping', job.id)
+    return True  # To avoid an update retry.
+
+  obj.valid = 1
+  obj.session = dbt.session.id
+  obj.arch = arch
+  obj.config = job.config
+  obj.config_str = config
+  obj.perf_config = perf_config
+  obj.kernel_tflops = tflops
+
+  logger.info('Inserting results for job_id=%s', job.id)
+  query = gen_insert_query(obj, result_attr, dbt.results.__tablename__)
+  session.execute(query)
+  session.commit()
+  return True
+
+
+def parse_batch_output(output):
+  """Parse the multi-line TSV printed by tuningRunner.py --configs_file,
+  returns (config string, perf_config, tflops) per result line in order"""
+  rows = []
+  for line in output.splitlines():
+    if not line.strip() or line.startswith('#'):
+      continue
+    fields = line.split('\t')
+    if len(fields) != 5:
+      continue
+    _, _, config, perf_config, tflops = fields
+    rows.append((config, perf_config, tflops))
+  return rows
+
+
+def match_batch_results(job_configs, rows):
+  """Assign each result row to the first job without a result that ran the
+  same config, so jobs sharing a config string each get their own row
+    @param job_configs (job id, config string) in tuningRunner.py input order
+    @param rows output of parse_batch_output
+  returns a dict of job id to (perf_config, tflops)"""
+  pending = {}
+  for job_id, config in job_configs:
+    pending.setdefault(' '.join(config.split()), []).append(job_id)
+
+  results = {}
+  for config, perf_config, tflops in rows:
+    job_ids = pending.get(' '.join(config.split()))
+    if job_ids:
+      results[job_ids.pop(0)] = (perf_config, tflops)
+  return results
+
+
 class RocMLIRWorker(WorkerInterface):
   """ The RocMLIR class implements the worker class. Its purpose is to run a command. It picks up
   new jobs and when completed, sets the state to completed. """
 
-  def __init__(self, *, config_type=None, **kwargs):
+  def __init__(self, *, config_type=None, batch_size=1, **kwargs):
     """Constructor"""
     self.dbt = None
     self.config_type = config_type
+    self.batch_size = batch_size
     super().__init__(config_type=config_type, **kwargs)
-    self.result_attr = [column.name for column in inspect(self.dbt.results).c]
-    self.result_attr.remove("insert_ts")
-    self.result_attr.remove("update_ts")
+    self.result_attr = get_result_attr(self.dbt)
+    #a job handed over at construction time comes from a celery task context,
+    #such a worker never claims jobs from the DB itself
+    self.claim_jobs = self.job is None
 
 
 # Can either have one of these, or --device below, but no combinations.
@@ -70,33 +147,8 @@ class RocMLIRWorker(WorkerInterface):
 
   def update_result_table(self, session, result_str):
     """update results table with individual result entry"""
-    obj = self.dbt.results()
-
-    arch, num_cu, config, perf_config, tflops = obj.parse(result_str)
-
-    print(f"arch = '{arch}', num_cu = '{num_cu}', config = '{config}', \
-          perf_config = '{perf_config}', tflops = {tflops}",
-          file=sys.stderr)
-
-    # Sanity checks.
-    if not perf_config or perf_config == 'None' or tflops == '-inf':
-      self.logger.warning('Bad data for job_id=%s, skipping', self.job.id)
-      return True  # To avoid an update retry.
-
-    obj.valid = 1
-    obj.session = self.dbt.session.id
-    obj.arch = arch
-    obj.config = self.job.config
-    obj.config_str = config
-    obj.perf_config = perf_config
-    obj.kernel_tflops = tflops
-
-    self.logger.info('Inserting results for job_id=%s', self.job.id)
-    query = gen_insert_query(obj, self.result_attr,
-                             self.dbt.results.__tablename__)
-    session.execute(query)
-    session.commit()
-    return True
+    return insert_result(session, self.dbt, self.job, result_str,
+                         self.result_attr, self.logger)
 
   def process_result(self, result_str: str):
     """process tuning-run results"""
@@ -119,6 +171,10 @@ class RocMLIRWorker(WorkerInterface):
 
   def step(self):
     """Main functionality of the worker class. It picks up jobs in new state and executes them"""
+    if not self.claim_jobs:
+      return self.celery_step()
+    if self.batch_size > 1:
+      return self.batch_step()
 
     if not self.get_job("new", "running", False):
       #Sleep in case of DB contention
@@ -161,15 +217,37 @@ class RocMLIRWorker(WorkerInterface):
 
     return True
 
-  def run_cmd(self):
-    """Run the actual workload"""
-    env_str = " ".join(self.envmt)
+  def celery_step(self):
+    """Run the job handed over by a celery task. The DB is not touched here,
+    the returned dict is stored by RocMLIR.process_eval_results on the
+    consumer side"""
+    self.logger.info('Running job: job_id=%s', self.job.id)
+    try:
+      retcode, cmd_output = self.run_cmd()
+    except (ValueError, OSError) as err:
+      self.logger.error('Error running job %s:  %s', self.job.id, err)
+      return {'retcode': -1, 'output': str(err)}
+
+    return {'retcode': retcode, 'output': cmd_output}
+
+  def get_config_string(self):
+    """Config string for the current job, taken from the celery context when
+    available to avoid a DB round trip"""
+    if self.config is not None:
+      config = self.config
+      if isinstance(config, SimpleDict):
+        config = config.to_dict()
+      return self.dbt.config_table(**config).config_string()
+
     with DbSession() as session:
       cft = self.dbt.config_table
       config = session.query(cft).filter(cft.id == self.job.config).all()
       if len(config) > 1:
         raise ValueError(f"More than one config matching ID {self.job.config}")
-      config_string = config[0].config_string()
+      return config[0].config_string()
+
+  def get_special_args(self):
+    """tuningRunner.py arguments for the config type and tuning space"""
     if self.dbt.config_type == ConfigType.convolution:
       special_args = "--operation conv"
     elif self.dbt.config_type == ConfigType.gemm:
@@ -180,20 +258,164 @@ class RocMLIRWorker(WorkerInterface):
       raise ValueError(f"Config type {self.dbt.config_type} not yet supported.")
     if self.dbt.session.tuning_space:
       special_args += f" --tuning-space={self.dbt.session.tuning_space.name}"
+    return special_args
+
+  def tuning_runner_cmd(self, config_arg):
+    """Compose the tuningRunner.py command line
+      @param config_arg either --config='...' or --configs_file=...
+    """
+    env_str = " ".join(self.envmt)
+    special_args = self.get_special_args()
 
     if not os.path.exists("./bin/tuningRunner.py"):
       raise FileNotFoundError("tuningRunner.py not found;"
                               "  wrong directory or missing setup")
 
-    cmd = env_str + f" python3 ./bin/tuningRunner.py -q {special_args} \
-                     --config='{config_string}' --mlir-build-dir `pwd` \
+    return env_str + f" python3 ./bin/tuningRunner.py -q {special_args} \
+                     {config_arg} --mlir-build-dir `pwd` \
                      --output=- --tflops \
                      --rocmlir_gen_flags='--device={self.gpu_id}' 2>/dev/null"
 
+  def run_cmd(self):
+    """Run the actual workload"""
+    config_string = self.get_config_string()
+    cmd = self.tuning_runner_cmd(f"--config='{config_string}'")
+
     retcode, out = super().run_command(cmd)
 
     return retcode, out
 
+  def claim_batch(self, session):
+    """Claim up to batch_size new jobs in one query"""
+    job_table = self.dbt.job_table.__tablename__
+    conds = [
+        f"session={self.dbt.session.id}", "valid=1", "state='new'",
+        f"retries<{MAX_JOB_RETRIES}"
+    ]
+    if self.label:
+      conds.append(f"reason='{self.label}'")
+    cond_str = f"WHERE {' AND '.join(conds)} ORDER BY retries,config ASC"\
+               f" LIMIT {self.batch_size} FOR UPDATE SKIP LOCKED"
+    jobs = gen_select_objs(session, self.job_attr, job_table, cond_str)
+    if not jobs:
+      return jobs
+
+    id_str = ','.join(str(job.id) for job in jobs)
+    session.execute(f"UPDATE {job_table} SET state='running',"
+                    f" gpu_id={self.gpu_id} WHERE id IN ({id_str})")
+    session.commit()
+    return jobs
+
+  def batch_step(self):
+    """Tune up to batch_size jobs with a single tuningRunner.py call, so the
+    process and MLIR context startup is paid once per batch"""
+    with DbSession() as session:
+      jobs = session_retry(session, self.claim_batch, lambda x: x(session),
+                           self.logger)
+      if not jobs:
+        #Sleep in case of DB contention
+        sleep(random.randint(1, 10))
+        return False
+      self.logger.info('Acquired %s jobs: %s', len(jobs),
+                       [job.id for job in jobs])
+
+      cft = self.dbt.config_table
+      configs = session.query(cft).filter(
+          cft.id.in_([job.config for job in jobs])).all()
+      config_strs = {cfg.id: cfg.config_string() for cfg in configs}
+    job_configs = [(job.id, config_strs[job.config])
+                   for job in jobs
+                   if job.config in config_strs]
+
+    try:
+      retcode, out = self.run_batch([config for _, config in job_configs])
+    # pylint: disable=broad-exception-caught
+    except Exception as exc:
+      self.logger.error('Exception occurred while running batch:  %s',
+                        traceback.format_exc())
+      retcode, out = -1, str(exc)
+
+    if retcode != 0:
+      error = f"Error code {retcode}, output {out}"
+      self.logger.info(error)
+      job_rows, result_rows = self.compose_batch_rows(jobs, config_strs, {},
+                                                      error)
+    else:
+      results = match_batch_results(job_configs, parse_batch_output(out))
+      job_rows, result_rows = self.compose_batch_rows(jobs, config_strs,
+                                                      results)
+    self.store_batch(job_rows, result_rows)
+
+    return True
+
+  def run_batch(self, config_strs):
+    """Write the configs to a temp file and run tuningRunner.py on all of them"""
+    filename = self.machine.write_file('\n'.join(config_strs).encode(),
+                                       is_temp=True)
+    try:
+      cmd = self.tuning_runner_cmd(f"--configs_file={filename}")
+      return super().run_command(cmd)
+    finally:
+      self.exec_docker_cmd(f"rm -f {filename}")
+
+  def compose_batch_rows(self, jobs, config_strs, results, error=None):
+    """Job state rows and results table rows of a batch, results maps job ids
+    to (perf_config, tflops)"""
+    result_rows = []
+    job_rows = []
+    for job in jobs:
+      config_str = config_strs.get(job.config)
+      perf_config, tflops = results.get(job.id, (None, None))
+      if error:
+        job_rows.append({'job_id': job.id, 'state': 'error', 'result': error})
+      elif perf_config is None:
+        job_rows.append({
+            'job_id': job.id,
+            'state': 'error',
+            'result': 'No result in batch output'
+        })
+      else:
+        job_rows.append({
+            'job_id': job.id,
+            'state': 'completed',
+            'result': f"{config_str}\t{perf_config}\t{tflops}"
+        })
+        # Sanity checks.
+        if not perf_config or perf_config == 'None' or tflops == '-inf':
+          self.logger.warning('Bad data for job_id=%s, skipping', job.id)
+          continue
+        result_rows.append({
+            'valid': 1,
+            'session': self.dbt.session.id,
+            'config': job.config,
+            'config_str': config_str,
+            'perf_config': perf_config,
+            'kernel_tflops': float(tflops)
+        })
+
+    return job_rows, result_rows
+
+  def store_batch(self, job_rows, result_rows):
+    """Set the job states and insert the results of a batch, one executemany
+    per statement"""
+    job_table = self.dbt.job_table.__table__
+    update = job_table.update().where(
+        job_table.c.id == bindparam('job_id')).values(
+            state=bindparam('state'), result=bindparam('result'))
+
+    with DbSession() as session:
+
+      def callback() -> bool:
+        session.execute(update, job_rows)
+        if result_rows:
+          session.execute(self.dbt.results.__table__.insert(), result_rows)
+        session.commit()
+        return True
+
+      assert session_retry(session, callback, lambda x: x(), self.logger)
+    self.logger.info('Stored %s results for %s jobs', len(result_rows),
+                     len(job_rows))
+
   def get_mlir_v(self) -> str:
     """Interface function to get mlir version info"""
     _, mlir_hash, _ = self.exec_docker_cmd("git rev-parse HEAD")
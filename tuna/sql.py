@@ -25,6 +25,9 @@
 #
 ###############################################################################
 """ Database resource manager """
+import sqlite3
+from typing import Any, Optional, Union
+
 import mysql.connector  # pylint: disable=unused-import
 
 from mysql.connector.connection import MySQLConnection
@@ -66,10 +69,20 @@ class DbConnection():
       self.db_name = ''
 
     self.connection: MySQLConnection = None
+    self.sqlite_connection: Optional[sqlite3.Connection] = None
 
-  def get_connection(self) -> MySQLConnection:
+  def get_connection(self) -> Union[MySQLConnection, sqlite3.Connection]:
     """ return a cached connection if one exists, else create a new one
     and return that instead """
+    #tuna.utils.utility imports this module and tuna.dbBase.dialect imports it
+    # pylint: disable-next=import-outside-toplevel
+    from tuna.dbBase.dialect import is_sqlite, sqlite_path, setup_sqlite
+    if is_sqlite():
+      if self.sqlite_connection is None:
+        self.sqlite_connection = sqlite3.connect(sqlite_path())
+        setup_sqlite(self.sqlite_connection, None)
+      return self.sqlite_connection
+
     if self.connection is not None and self.connection.is_connected():
       return self.connection
 
@@ -84,6 +97,11 @@ class DbConnection():
 
   def close_connection(self) -> bool:
     """ Close a SQL connection after commiting the changes """
+    if self.sqlite_connection is not None:
+      self.sqlite_connection.commit()
+      self.sqlite_connection.close()
+      self.sqlite_connection = None
+      return True
     self.connection.commit()
     self.connection.close()
     return True
@@ -95,18 +113,29 @@ class DbConnection():
     self.close_connection()
 
 
+class FormatCursor(sqlite3.Cursor):  #pylint: disable=too-few-public-methods
+  """SQLite cursor taking the %s placeholders of the MySQL queries"""
+
+  def execute(self, sql: str, parameters: Any = ()) -> 'FormatCursor':
+    """execute sql after swapping %s for the sqlite ? placeholder"""
+    return super().execute(sql.replace('%s', '?'), parameters)
+
+
 class DbCursor():
   """Resource manager class for a SQL cursor"""
 
   def __init__(self):
     self.cnx: DbConnection = None
-    self.sql_connection: MySQLConnection = None
-    self.cur: MySQLCursor = None
+    self.sql_connection: Union[MySQLConnection, sqlite3.Connection] = None
+    self.cur: Union[MySQLCursor, sqlite3.Cursor] = None
 
-  def __enter__(self) -> MySQLCursor:
+  def __enter__(self) -> Union[MySQLCursor, sqlite3.Cursor]:
     self.cnx = DbConnection()
     self.sql_connection = self.cnx.get_connection()
-    self.cur = self.sql_connection.cursor()
+    if isinstance(self.sql_connection, sqlite3.Connection):
+      self.cur = self.sql_connection.cursor(factory=FormatCursor)
+    else:
+      self.cur = self.sql_connection.cursor()
     return self.cur
 
   def __exit__(self, type_t, value, traceback):
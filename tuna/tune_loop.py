@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+
+###############################################################################
+#
+# MIT License
+#
+# Copyright (c) 2024 Advanced Micro Devices, Inc.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+"""Asyncio variant of the MITunaInterface.tune enqueue/consume loop"""
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, List, Set, TYPE_CHECKING
+
+from tuna.dbBase.sql_alchemy import DbSession
+from tuna.utils.metrics import count_jobs, observe_batch, set_redis_backlog
+from tuna.utils.metadata import ENQUEUE_POLL_INTERVAL, ASYNC_TUNE_QUEUE
+from tuna.utils.metadata import ASYNC_TUNE_THREADS
+from tuna.utils.metadata import BACKPRESSURE_POLL
+from tuna.utils.tracing import span
+from tuna.utils.lazy_import import lazy_import
+
+if TYPE_CHECKING:
+  import aioredis
+else:
+  aioredis = lazy_import('aioredis')
+
+
+class AsyncTuneLoop():  #pylint: disable=too-many-instance-attributes
+  """Runs job fetch, celery enqueue, result consume and result storing as
+  cooperating tasks of one process. Blocking DB and celery calls go to a fixed
+  set of worker threads, MITunaInterface.async_tune gives them a pooled engine
+  of the same size. Bounded queues between the tasks and the broker
+  backpressure hold back fetching while the broker or the DB fall behind."""
+
+  def __init__(self,
+               lib,
+               q_name: str,
+               job_batch_size: int = 1000,
+               queue_size: int = ASYNC_TUNE_QUEUE,
+               poll_interval: float = ENQUEUE_POLL_INTERVAL,
+               threads: int = ASYNC_TUNE_THREADS):
+    """Constructor
+      @param lib MITunaInterface library being tuned
+      @param q_name Celery queue to enqueue to
+      @param job_batch_size Jobs claimed per DB fetch
+      @param queue_size Contexts and results held between tasks
+      @param poll_interval Seconds between fetches once no jobs are left
+      @param threads Worker threads for blocking DB and celery calls
+    """
+    self.lib = lib
+    self.q_name = q_name
+    self.job_batch_size = job_batch_size
+    self.poll_interval = poll_interval
+    self.threads = threads
+    #jobs enqueued and not yet stored, held at 1 until the session has been
+    #fetched empty once
+    self.pending = 1
+    self.in_flight: Set[Any] = set()
+    self.contexts: asyncio.Queue = asyncio.Queue(queue_size)
+    self.results: asyncio.Queue = asyncio.Queue(queue_size)
+    self.done = asyncio.Event()
+    self.backpressure = lib.get_backpressure(q_name, job_batch_size)
+
+  def __claim(self, claim_num: int) -> List[dict]:
+    """Claim up to claim_num jobs and build their celery contexts"""
+    with DbSession() as session, span('enqueue_jobs', queue=self.q_name):
+      job_list = self.lib.get_jobs(session, self.lib.fetch_state,
+                                   self.lib.set_state, self.lib.args.session_id,
+                                   claim_num)
+      if not job_list:
+        return []
+      context_list = self.lib.get_context_list(session, job_list)
+    observe_batch(len(context_list))
+    return context_list
+
+  def __enqueue(self, context_list: List[dict]) -> None:
+    """Send contexts to the celery queue"""
+    for context in context_list:
+      self.lib.celery_enqueue_call(context, q_name=self.q_name)
+    count_jobs('enqueued', len(context_list))
+    self.backpressure.record_enqueued(len(context_list))
+
+  async def wait_done(self, timeout: float) -> None:
+    """Sleep for timeout seconds or until consume is done"""
+    try:
+      await asyncio.wait_for(self.done.wait(), timeout)
+    except asyncio.TimeoutError:
+      pass
+
+  async def fetch(self) -> None:
+    """Claim jobs until consume is done, polling once none are left and
+    while the broker queue is above its low-water mark"""
+    held = True
+    while not self.done.is_set():
+      claim_num = await asyncio.to_thread(self.backpressure.next_batch)
+      if not claim_num:
+        await self.wait_done(min(BACKPRESSURE_POLL, self.poll_interval))
+        continue
+      context_list = await asyncio.to_thread(self.__claim, claim_num)
+      self.pending += len(context_list)
+      for context in context_list:
+        await self.contexts.put(context)
+      if not context_list:
+        self.lib.logger.info('All tasks added to queue')
+        if held:
+          self.pending -= 1
+          held = False
+        await self.wait_done(self.poll_interval)
+    await self.contexts.put(None)
+
+  async def publish(self) -> None:
+    """Enqueue fetched contexts, whatever is queued goes out in one call"""
+    while True:
+      context_list = [await self.contexts.get()]
+      while not self.contexts.empty() and len(
+          context_list) < self.job_batch_size:
+        context_list.append(self.contexts.get_nowait())
+      last = context_list[-1] is None
+      context_list = [ctx for ctx in context_list if ctx is not None]
+      if context_list:
+        await asyncio.to_thread(self.__enqueue, context_list)
+      if last:
+        break
+
+  async def consume(self, redis) -> None:
+    """Hand new redis results to store until every job is stored"""
+    while self.pending > 0:
+      keys = await self.lib.scan_results(redis, self.lib.prefix)
+      self.lib.logger.info('Found %s results', len(keys))
+      set_redis_backlog(len(keys))
+      for key in keys:
+        if key in self.in_flight:
+          continue
+        data = await redis.get(key)
+        if data:
+          self.in_flight.add(key)
+          await self.results.put((key, data))
+      await asyncio.sleep(1)
+    self.lib.logger.info('Job counter reached 0')
+    self.done.set()
+    await self.results.put(None)
+
+  async def store(self, redis) -> None:
+    """Write results to the DB and drop them from redis"""
+    while True:
+      item = await self.results.get()
+      if item is None:
+        break
+      key, data = item
+      await asyncio.to_thread(self.lib.store_spooled, key, data.decode('utf-8'))
+      try:
+        await redis.delete(key)
+      except aioredis.exceptions.ResponseError as red_err:
+        self.lib.logger.error(red_err)
+        self.lib.logger.info(key.decode('utf-8'))
+      self.in_flight.discard(key)
+      count_jobs('consumed')
+      self.pending -= 1
+    await asyncio.to_thread(self.lib.close_spool)
+    await asyncio.to_thread(self.lib.consume_done)
+
+  async def run(self) -> None:
+    """Remove stale results, then run all tasks until the first error or
+    until every job is stored"""
+    asyncio.get_running_loop().set_default_executor(
+        ThreadPoolExecutor(self.threads, thread_name_prefix='tune_loop'))
+    redis = await self.lib.get_redis()
+    try:
+      await self.lib.cleanup_redis_results(self.lib.prefix, redis)
+      tasks = [
+          asyncio.create_task(coro)
+          for coro in (self.fetch(), self.publish(), self.consume(redis),
+                       self.store(redis))
+      ]
+      finished, running = await asyncio.wait(
+          tasks, return_when=asyncio.FIRST_EXCEPTION)
+      for task in running:
+        task.cancel()
+      for task in finished:
+        task.result()
+    finally:
+      await redis.close()
@@ -25,7 +25,14 @@
 #
 ###############################################################################
 """Utility module for celery helper functions"""
+import copy
+from functools import lru_cache
+from celery.signals import celeryd_after_setup, worker_process_init
+from tuna.machine import Machine
 from tuna.utils.utility import SimpleDict
+from tuna.utils.tracing import span, trace_headers, request_headers
+from tuna.utils.tracing import setup_tracing
+from tuna.utils.profiling import setup_profiling
 
 
 def prep_default_kwargs(kwargs, job, machine):
@@ -36,6 +43,14 @@ def prep_default_kwargs(kwargs, job, machine):
   return kwargs
 
 
+def prep_config_kwargs(kwargs, job, config):
+  """Populate kwargs with serialized job, config and the cached machine"""
+  kwargs = prep_default_kwargs(kwargs, job, get_cached_machine())
+  kwargs["config"] = SimpleDict(**config)
+
+  return kwargs
+
+
 def get_cached_worker(context, cached_worker):
   """Get worker from cache"""
   worker = cached_worker[context['operation']]
@@ -43,3 +58,59 @@ def get_cached_worker(context, cached_worker):
   worker.gpu_id = context['kwargs']['gpu_id']
 
   return worker
+
+
+def prep_cached_worker(context, cached_worker, new_worker):
+  """Worker for @context, new_worker(context) creates one per operation which
+  is reused for the following jobs"""
+  operation = context['operation']
+  if operation in cached_worker:
+    worker = get_cached_worker(context, cached_worker)
+    worker.config = SimpleDict(**context['config'])
+  else:
+    worker = new_worker(context)
+    cached_worker[operation] = worker
+  return worker
+
+
+def set_worker_gpu(context, worker_name):
+  """Run the job of @context on the GPU of celery worker @worker_name"""
+  gpu_id = int(worker_name.split('gpu_id_')[1])
+  context['kwargs']['gpu_id'] = gpu_id
+  context['job']['gpu_id'] = gpu_id
+  return gpu_id
+
+
+def connect_worker_signals(app):
+  """Record the worker name on @app and set up span export and profiling in
+  each pool process"""
+
+  def capture_worker_name(sender, instance, **kwargs):  #pylint: disable=unused-argument
+    app.worker_name = sender
+
+  def init_process(**kwargs):  #pylint: disable=unused-argument
+    setup_tracing(service='tuna-celery')
+    setup_profiling()
+
+  #the handlers are closures, keep strong references to them
+  celeryd_after_setup.connect(capture_worker_name, weak=False)
+  worker_process_init.connect(init_process, weak=False)
+
+
+@lru_cache(1)
+def get_cached_machine():
+  """Local machine shared by the celery tasks of a worker process, created on
+  first use since probing the GPUs shells out to rocminfo"""
+  return Machine(local_machine=True)
+
+
+def run_worker(task, context, prep_worker):
+  """Run the worker for @context inside the trace started by celery_enqueue_call,
+  the result carries the trace context on to parse_result"""
+  with span('celery_enqueue',
+            request_headers(task.request),
+            job=context['job']['id']):
+    worker = prep_worker(copy.deepcopy(context))
+    ret = worker.run()
+    trace = trace_headers()
+  return {"ret": ret, "context": context, "trace": trace}
@@ -28,19 +28,19 @@
 
 import os
 import enum
-import random
 import logging
-from time import sleep
 from datetime import datetime
 from typing import Callable, Any, List, Dict
 import pymysql
 from sqlalchemy.exc import OperationalError, IntegrityError, ProgrammingError
-from sqlalchemy import create_engine
 
 from tuna.dbBase.sql_alchemy import DbSession
 from tuna.dbBase.base_class import BASE
-from tuna.utils.metadata import NUM_SQL_RETRIES
+from tuna.dbBase.dialect import create_db_engine, is_sqlite, claim_lock
 from tuna.utils.logger import setup_logger
+from tuna.utils.metrics import db_timer
+from tuna.utils.retry import RetryPolicy
+from tuna.utils.profiling import profiled
 from tuna.utils.utility import get_env_vars
 from tuna.utils.utility import SimpleDict
 
@@ -48,9 +48,7 @@ LOGGER = setup_logger('db_utility')
 
 ENV_VARS = get_env_vars()
 
-ENGINE = create_engine(f"mysql+pymysql://{ENV_VARS['user_name']}:{ENV_VARS['user_password']}" +\
-                         f"@{ENV_VARS['db_hostname']}:3306/{ENV_VARS['db_name']}",
-                       encoding="utf8")
+ENGINE = create_db_engine(encoding="utf8")
 
 
 def connect_db():
@@ -61,6 +59,10 @@ def connect_db():
   else:
     raise ValueError('DB name must be specified in env variable: TUNA_DB_NAME')
 
+  if is_sqlite():
+    #the DB file is created on first connect
+    return
+
   try:
     ENGINE.execute(f'Use {db_name}')
     return
@@ -110,19 +112,19 @@ def create_indices(all_indices):
 def session_retry(session: DbSession,
                   callback: Callable,
                   actuator: Callable,
-                  logger: logging.Logger = LOGGER) -> Any:
-  """retry handling for a callback function using an actuator (lamda function with params)"""
-  for idx in range(NUM_SQL_RETRIES):
+                  logger: logging.Logger = LOGGER,
+                  operation: str = 'session_retry') -> Any:
+  """retry handling for a callback function using an actuator (lamda function with params)
+  @param operation: label of the DB latency and retry metrics"""
+  policy = RetryPolicy(operation, logger=logger)
+  while True:
     try:
-      return actuator(callback)
-    except OperationalError as error:
-      logger.warning('%s, DB contention sleeping (%s)...', error, idx)
-      session.rollback()
-      sleep(random.randint(1, 30))
-    except pymysql.err.OperationalError as error:
-      logger.warning('%s, DB contention sleeping (%s)...', error, idx)
+      with db_timer(operation):
+        return actuator(callback)
+    except (OperationalError, pymysql.err.OperationalError) as error:
       session.rollback()
-      sleep(random.randint(1, 30))
+      if not policy.wait(error):
+        break
     except IntegrityError as error:
       logger.error('Query failed: %s', error)
       session.rollback()
@@ -150,6 +152,7 @@ def get_attr_vals(obj, attr_list):
   return attr_vals
 
 
+@profiled('gen_update_query')
 def gen_update_query(obj, attribs, tablename, where_clause_tuples_lst=None):
   """Create an update query string to table with tablename for an object (obj)
   for the attributes in attribs"""
@@ -205,14 +208,15 @@ def get_job_rows(session, attribs, tablename, cond_str):
   else:
     attr_str = '*'
 
-  if cond_str:
-    query = f"SELECT {attr_str} FROM {tablename}"\
-            f" {cond_str};"
-  else:
-    query = f"SELECT {attr_str} FROM {tablename};"
-
-  LOGGER.info('Query Select: %s', query)
   try:
+    #SQLite takes a DB lock in place of FOR UPDATE row locks
+    cond_str = claim_lock(session, tablename, cond_str)
+    if cond_str:
+      query = f"SELECT {attr_str} FROM {tablename}"\
+              f" {cond_str};"
+    else:
+      query = f"SELECT {attr_str} FROM {tablename};"
+    LOGGER.info('Query Select: %s', query)
     ret = session.execute(query)
   except (Exception, KeyboardInterrupt) as ex:  #pylint: disable=broad-except
     LOGGER.warning(ex)
@@ -222,6 +226,7 @@ def get_job_rows(session, attribs, tablename, cond_str):
   return ret
 
 
+@profiled('db_rows_to_obj')
 def db_rows_to_obj(ret, attribs):
   """Compose SimpleDict list of db jobs"""
   entries = []
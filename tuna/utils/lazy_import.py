@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+###############################################################################
+#
+# MIT License
+#
+# Copyright (c) 2024 Advanced Micro Devices, Inc.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+###############################################################################
+"""Deferred imports for heavy third party packages"""
+import sys
+import importlib
+from types import ModuleType
+from typing import Any, Optional
+
+
+class LazyModule():  #pylint: disable=too-few-public-methods
+  """Stand-in for a module that is imported on first attribute access. It is
+  kept out of sys.modules, tools walking sys.modules (inspect.getmodule via
+  jsonargparse) would otherwise trigger the import"""
+
+  def __init__(self, name: str) -> None:
+    self._name: str = name
+    self._module: Optional[ModuleType] = None
+
+  def __getattr__(self, attr: str) -> Any:
+    if self._module is None:
+      self._module = importlib.import_module(self._name)
+    return getattr(self._module, attr)
+
+
+def lazy_import(name: str) -> Any:
+  """Return module @name if already imported, a LazyModule for it otherwise"""
+  module = sys.modules.get(name)
+  return module if module is not None else LazyModule(name)
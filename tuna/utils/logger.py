@@ -28,8 +28,6 @@
 import logging
 import os
 from typing import Union
-from logstash_async.handler import AsynchronousLogstashHandler
-from logstash_async.handler import LogstashFormatter
 from tuna.utils.metadata import TUNA_LOG_DIR
 
 
@@ -45,6 +43,8 @@ def get_logstash_config():
 def add_logstash_handler(logger: logging.Logger, host: str, port: int,
                          path: str):
   """add logstash handker for logs streams"""
+  # pylint: disable-next=import-outside-toplevel
+  from logstash_async.handler import AsynchronousLogstashHandler, LogstashFormatter
   logstash_handler = AsynchronousLogstashHandler(host=host,
                                                  port=port,
                                                  database_path=path)
@@ -35,5 +35,13 @@ if 'TUNA_LOG_DIR' in os.environ:
   TUNA_LOG_DIR = os.environ['TUNA_LOG_DIR']
 
 NUM_SQL_RETRIES = 10
+RETRY_BUDGET = 600  # seconds of backoff per operation
 LOG_TIMEOUT = 10 * 60.0  # seconds
 MAX_JOB_RETRIES = 10
+ENQUEUE_POLL_INTERVAL = 10  # seconds between job fetches once none are left
+ASYNC_TUNE_QUEUE = 1000  # contexts or results held between async tune tasks
+ASYNC_TUNE_THREADS = 8  # worker threads and pooled DB connections of async tune
+BACKPRESSURE_LOW_WATER = 2000  # queued tasks and results below which jobs are claimed
+BACKPRESSURE_HIGH_WATER = 10000  # queued tasks and results a claim may fill up to
+BACKPRESSURE_HORIZON = 120  # seconds of draining a claim is sized for
+BACKPRESSURE_POLL = 5  # seconds between queue depth reads while held back
@@ -0,0 +1,209 @@
+#!/usr/bin/env python3
+###############################################################################
+#
+# MIT License
+#
+# Copyright (c) 2024 Advanced Micro Devices, Inc.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+###############################################################################
+"""Prometheus metrics for the celery tuning loop. Metrics are created on first
+use so prometheus_client picks up multiprocess mode set by setup_metrics().
+With TUNA_METRICS_PORT set, tune() serves /metrics on that port and aggregates
+the samples written by its enqueue/consume subprocesses."""
+
+import os
+import atexit
+import shutil
+import sys
+import time
+import tempfile
+import threading
+from contextlib import contextmanager
+from functools import lru_cache
+from typing import Any, Dict, Iterator, Optional
+
+from tuna.utils.logger import setup_logger
+
+LOGGER = setup_logger('metrics')
+
+METRICS_PORT_ENV = 'TUNA_METRICS_PORT'
+MULTIPROC_DIR_ENV = 'PROMETHEUS_MULTIPROC_DIR'
+
+JOB_EVENTS = ('claimed', 'enqueued', 'consumed', 'failed', 'retried')
+BATCH_BUCKETS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+DB_BUCKETS = (.001, .0025, .005, .01, .025, .05, .1, .25, .5, 1, 2.5, 5, 10, 30)
+
+#threads of the async tune loop may all make the first get_metrics() call
+METRICS_LOCK = threading.Lock()
+
+
+class TunaMetrics():  #pylint: disable=too-few-public-methods,too-many-instance-attributes
+  """Counters, histograms and gauges of the tuning loop
+  @param registry: CollectorRegistry to register with, prometheus default if None
+  """
+
+  def __init__(self, registry: Optional[Any] = None) -> None:
+    #pylint: disable=import-outside-toplevel
+    from prometheus_client import Counter, Gauge, Histogram
+    from prometheus_client import REGISTRY
+
+    registry = REGISTRY if registry is None else registry
+    self.jobs: Dict[str, Any] = {
+        event:
+            Counter(f'tuna_jobs_{event}',
+                    f'Number of jobs {event}',
+                    registry=registry) for event in JOB_EVENTS
+    }
+    self.batch_size: Any = Histogram('tuna_job_batch_size',
+                                     'Number of jobs per enqueued batch',
+                                     buckets=BATCH_BUCKETS,
+                                     registry=registry)
+    self.db_latency: Any = Histogram('tuna_db_latency_seconds',
+                                     'DB round-trip latency', ['op'],
+                                     buckets=DB_BUCKETS,
+                                     registry=registry)
+    self.redis_backlog: Any = Gauge('tuna_redis_backlog',
+                                    'Celery results waiting in redis',
+                                    multiprocess_mode='livemax',
+                                    registry=registry)
+    self.queue_depth: Any = Gauge('tuna_queue_depth',
+                                  'Celery tasks waiting in the broker queue',
+                                  multiprocess_mode='livemax',
+                                  registry=registry)
+    self.retries: Any = Counter('tuna_retries',
+                                'Retries by operation and error class',
+                                ['op', 'error'],
+                                registry=registry)
+    self.retry_giveups: Any = Counter(
+        'tuna_retry_giveups',
+        'Operations that stopped retrying, by error class', ['op', 'error'],
+        registry=registry)
+    self.gc_reclaimed: Any = Counter('tuna_gc_reclaimed_rows',
+                                     'Cache rows deleted by clean-up sweeps',
+                                     ['table'],
+                                     registry=registry)
+
+
+@lru_cache(1)
+def _new_metrics() -> TunaMetrics:
+  return TunaMetrics()
+
+
+def get_metrics() -> TunaMetrics:
+  """Process wide metrics, registered with the default registry"""
+  with METRICS_LOCK:
+    return _new_metrics()
+
+
+def count_jobs(event: str, num: int = 1) -> None:
+  """Increment the job counter for @event by @num"""
+  if num:
+    get_metrics().jobs[event].inc(num)
+
+
+def observe_batch(num: int) -> None:
+  """Record the size of an enqueued batch"""
+  get_metrics().batch_size.observe(num)
+
+
+def set_redis_backlog(num: int) -> None:
+  """Record the number of results pending in redis"""
+  get_metrics().redis_backlog.set(num)
+
+
+def set_queue_depth(num: int) -> None:
+  """Record the number of tasks waiting in the broker queue"""
+  get_metrics().queue_depth.set(num)
+
+
+def count_retry(operation: str, error: str, gave_up: bool = False) -> None:
+  """Count a retry of @operation after an @error class error, or giving up"""
+  if gave_up:
+    get_metrics().retry_giveups.labels(operation, error).inc()
+  else:
+    get_metrics().retries.labels(operation, error).inc()
+
+
+def count_reclaimed(table: str, num: int) -> None:
+  """Count @num rows of @table deleted by a clean-up sweep"""
+  if num:
+    get_metrics().gc_reclaimed.labels(table).inc(num)
+
+
+def metrics_enabled() -> bool:
+  """Metrics are served, $TUNA_METRICS_PORT is set"""
+  return bool(os.environ.get(METRICS_PORT_ENV))
+
+
+@contextmanager
+def db_timer(operation: str) -> Iterator[None]:
+  """Time the enclosed DB round trip under label @operation, no-op unless
+  metrics are enabled"""
+  if not metrics_enabled():
+    yield
+    return
+  start = time.perf_counter()
+  try:
+    yield
+  finally:
+    get_metrics().db_latency.labels(operation).observe(time.perf_counter() -
+                                                       start)
+
+
+def setup_metrics(port: Optional[int] = None) -> Optional[int]:
+  """Serve /metrics on @port, or on $TUNA_METRICS_PORT. Enables multiprocess
+  mode so samples from forked processes are collected, must run before the
+  first metric is used. Returns the port or None if metrics are not served."""
+  if port is None:
+    port_env = os.environ.get(METRICS_PORT_ENV)
+    if not port_env:
+      return None
+    port = int(port_env)
+
+  #prometheus_client fixes the value class on import
+  if (MULTIPROC_DIR_ENV not in os.environ and
+      'prometheus_client' not in sys.modules):
+    os.environ[MULTIPROC_DIR_ENV] = tempfile.mkdtemp(prefix='tuna_metrics_')
+    atexit.register(shutil.rmtree, os.environ[MULTIPROC_DIR_ENV], True)
+
+  #pylint: disable=import-outside-toplevel
+  from prometheus_client import start_http_server, CollectorRegistry
+  from prometheus_client import multiprocess, values
+
+  if values.ValueClass is values.MutexValue:
+    LOGGER.warning('prometheus_client imported before setup, serving this '
+                   'process only')
+    start_http_server(port)
+  else:
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+    start_http_server(port, registry=registry)
+
+  LOGGER.info('Serving metrics on port %s', port)
+  return port
+
+
+def mark_process_dead(pid: Optional[int]) -> None:
+  """Drop live gauge samples of a finished subprocess"""
+  if pid is not None and MULTIPROC_DIR_ENV in os.environ:
+    #pylint: disable-next=import-outside-toplevel
+    from prometheus_client import multiprocess
+    multiprocess.mark_process_dead(pid)
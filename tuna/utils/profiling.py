@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+###############################################################################
+#
+# MIT License
+#
+# Copyright (c) 2024 Advanced Micro Devices, Inc.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+###############################################################################
+"""Opt-in profiling of hot paths. With TUNA_PROFILE unset @profiled returns the
+function untouched. Otherwise wall time, CPU time and call counts are kept per
+process and written out on SIGUSR1 and at exit, with TUNA_PROFILE set to:
+  stats    - the @profiled registry only
+  cprofile - plus a cProfile of the whole process (.pstats)
+  sample   - plus a sampling profiler writing collapsed stacks for
+             flamegraph.pl / speedscope (.collapsed)"""
+
+import os
+import sys
+import time
+import atexit
+import signal
+import cProfile
+import functools
+import threading
+import inspect
+from collections import Counter
+from typing import Any, Callable, Dict, List, Optional
+
+from tuna.utils.logger import setup_logger
+
+LOGGER = setup_logger('profiling')
+
+PROFILE_ENV = 'TUNA_PROFILE'
+PROFILE_DIR_ENV = 'TUNA_PROFILE_DIR'
+PROFILE_MODES = ('stats', 'cprofile', 'sample')
+SAMPLE_INTERVAL = 0.005
+
+
+class ProfileStat():  #pylint: disable=too-few-public-methods
+  """Accumulated timings of one profiled function"""
+
+  __slots__ = ('calls', 'wall', 'cpu')
+
+  def __init__(self) -> None:
+    self.calls: int = 0
+    self.wall: float = 0.0
+    self.cpu: float = 0.0
+
+  def add(self, wall: float, cpu: float) -> None:
+    """Record one call"""
+    self.calls += 1
+    self.wall += wall
+    self.cpu += cpu
+
+
+PROFILE_STATS: Dict[str, ProfileStat] = {}
+#reentrant, the SIGUSR1 dump runs in the main thread and may interrupt _record
+_STATS_LOCK = threading.RLock()
+
+
+class StackSampler(threading.Thread):
+  """Daemon thread counting the stacks of all other threads every @interval
+  seconds, the counts are kept in collapsed stack form"""
+
+  def __init__(self, interval: float = SAMPLE_INTERVAL) -> None:
+    super().__init__(name='tuna-stack-sampler', daemon=True)
+    self.interval: float = interval
+    self.stacks: Counter = Counter()
+    self._stop_event = threading.Event()
+
+  def run(self) -> None:
+    own_id = threading.get_ident()
+    while not self._stop_event.wait(self.interval):
+      #pylint: disable-next=protected-access
+      for thread_id, frame in sys._current_frames().items():
+        if thread_id == own_id:
+          continue
+        self.stacks[collapse_stack(frame)] += 1
+
+  def stop(self) -> None:
+    """Stop sampling"""
+    self._stop_event.set()
+
+
+_PROFILER: Dict[str, Any] = {'cprofile': None, 'sampler': None, 'dump': False}
+
+
+def profile_mode() -> Optional[str]:
+  """Profiling mode from $TUNA_PROFILE, None when profiling is off"""
+  mode = os.environ.get(PROFILE_ENV, '').strip().lower()
+  if not mode or mode in ('0', 'false', 'off'):
+    return None
+  return mode if mode in PROFILE_MODES else 'stats'
+
+
+def _record(name: str, wall_start: float, cpu_start: float) -> None:
+  wall = time.perf_counter() - wall_start
+  cpu = time.process_time() - cpu_start
+  with _STATS_LOCK:
+    stat = PROFILE_STATS.get(name)
+    if stat is None:
+      stat = PROFILE_STATS[name] = ProfileStat()
+    stat.add(wall, cpu)
+
+
+def profiled(name: str) -> Callable:
+  """Decorator recording wall/CPU time and calls of the function under @name.
+  $TUNA_PROFILE is checked when the function is decorated, i.e. on import"""
+
+  def decorator(func: Callable) -> Callable:
+    if profile_mode() is None:
+      return func
+
+    if inspect.iscoroutinefunction(func):
+
+      @functools.wraps(func)
+      async def async_wrapper(*args, **kwargs):
+        wall_start, cpu_start = time.perf_counter(), time.process_time()
+        try:
+          return await func(*args, **kwargs)
+        finally:
+          _record(name, wall_start, cpu_start)
+
+      return async_wrapper
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+      wall_start, cpu_start = time.perf_counter(), time.process_time()
+      try:
+        return func(*args, **kwargs)
+      finally:
+        _record(name, wall_start, cpu_start)
+
+    return wrapper
+
+  return decorator
+
+
+def collapse_stack(frame: Any) -> str:
+  """Stack of @frame as 'outer;...;inner' with file:function entries"""
+  names: List[str] = []
+  while frame is not None:
+    code = frame.f_code
+    names.append(f'{os.path.basename(code.co_filename)}:{code.co_name}')
+    frame = frame.f_back
+  return ';'.join(reversed(names))
+
+
+def format_profile_stats() -> str:
+  """Registry as a table, slowest total wall time first"""
+  with _STATS_LOCK:
+    items = sorted(PROFILE_STATS.items(), key=lambda x: x[1].wall, reverse=True)
+    lines = [f"{'name':<32} {'calls':>10} {'wall_s':>12} {'cpu_s':>12}"]
+    lines.extend(f'{name:<32} {stat.calls:>10} {stat.wall:>12.4f} '
+                 f'{stat.cpu:>12.4f}' for name, stat in items)
+  return '\n'.join(lines) + '\n'
+
+
+def dump_profile(out_dir: Optional[str] = None) -> List[str]:
+  """Write the registry, and the cProfile or stack samples if running, to
+  @out_dir ($TUNA_PROFILE_DIR or cwd). Returns the files written"""
+  out_dir = out_dir or os.environ.get(PROFILE_DIR_ENV, os.getcwd())
+  base = os.path.join(out_dir, f'tuna_profile_{os.getpid()}')
+  files = [f'{base}.txt']
+  with open(files[0], 'w', encoding='utf-8') as out:
+    out.write(format_profile_stats())
+
+  if _PROFILER['cprofile'] is not None:
+    files.append(f'{base}.pstats')
+    #dump_stats disables the profiler
+    _PROFILER['cprofile'].dump_stats(files[-1])
+    _PROFILER['cprofile'].enable()
+
+  sampler = _PROFILER['sampler']
+  if sampler is not None:
+    files.append(f'{base}.collapsed')
+    with open(files[-1], 'w', encoding='utf-8') as out:
+      for stack, count in list(sampler.stacks.items()):
+        out.write(f'{stack} {count}\n')
+
+  LOGGER.info('Profile written to %s', ', '.join(files))
+  return files
+
+
+def _on_signal(_signum, _frame) -> None:
+  dump_profile()
+
+
+def setup_profiling() -> bool:
+  """Start the profilers selected by $TUNA_PROFILE and dump on SIGUSR1 and at
+  exit. Must run in the main thread. Returns False when profiling is off"""
+  mode = profile_mode()
+  if mode is None:
+    return False
+
+  if mode == 'cprofile' and _PROFILER['cprofile'] is None:
+    profiler = cProfile.Profile()
+    profiler.enable()
+    _PROFILER['cprofile'] = profiler
+  elif mode == 'sample' and _PROFILER['sampler'] is None:
+    sampler = StackSampler()
+    sampler.start()
+    _PROFILER['sampler'] = sampler
+
+  signal.signal(signal.SIGUSR1, _on_signal)
+  if not _PROFILER['dump']:
+    _PROFILER['dump'] = True
+    atexit.register(dump_profile)
+  LOGGER.info('Profiling (%s) enabled, kill -USR1 %s to dump', mode,
+              os.getpid())
+  return True
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+
+###############################################################################
+#
+# MIT License
+#
+# Copyright (c) 2024 Advanced Micro Devices, Inc.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+"""Local spool of celery results between their redis GET and the DB commit of
+parse_result. A result is written to a SQLite WAL file before it is stored and
+marked done after the commit, so a consumer that dies in between, or a restart
+whose cleanup drops the stale redis keys, does not lose it. Results still
+pending are replayed on the next start. Delivery is at-least-once, a result
+whose commit went through just before a crash is stored again on replay."""
+
+import os
+import time
+import sqlite3
+import threading
+from typing import Iterator, Optional, Tuple, Union
+
+from tuna.utils.logger import setup_logger
+from tuna.utils.metadata import TUNA_LOG_DIR
+
+LOGGER = setup_logger('result_spool')
+
+PENDING = 0
+DONE = 1
+FAILED = 2
+
+
+def spool_path(prefix: Optional[str]) -> str:
+  """Spool file of the results with redis key prefix @prefix"""
+  spool_dir = os.environ.get('TUNA_SPOOL_DIR', TUNA_LOG_DIR)
+  os.makedirs(spool_dir, exist_ok=True)
+  return os.path.join(spool_dir, f'result_spool_{prefix or "all"}.db')
+
+
+class ResultSpool():
+  """Append-only result spool in a SQLite WAL file, safe to share between the
+  threads of one process
+  @param path: spool file
+  @param synchronous: SQLite synchronous level, NORMAL survives a crash of the
+                      process, FULL also one of the host
+  """
+
+  def __init__(self, path: str, synchronous: str = 'NORMAL') -> None:
+    self.path = path
+    self.lock = threading.Lock()
+    self.conn = sqlite3.connect(path, check_same_thread=False)
+    self.conn.execute('PRAGMA journal_mode=WAL')
+    self.conn.execute(f'PRAGMA synchronous={synchronous}')
+    self.conn.execute('CREATE TABLE IF NOT EXISTS spool (key TEXT PRIMARY KEY,'
+                      ' data BLOB NOT NULL, state INTEGER NOT NULL DEFAULT 0,'
+                      ' added REAL NOT NULL)')
+    self.conn.commit()
+
+  def add(self, key: Union[str, bytes], data: Union[str, bytes]) -> None:
+    """Record a result before it is stored"""
+    if isinstance(key, bytes):
+      key = key.decode('utf-8')
+    if isinstance(data, str):
+      data = data.encode('utf-8')
+    with self.lock:
+      self.conn.execute(
+          'INSERT OR IGNORE INTO spool (key, data, added) VALUES (?, ?, ?)',
+          (key, data, time.time()))
+      self.conn.commit()
+
+  def mark(self, key: Union[str, bytes], state: int = DONE) -> None:
+    """Mark a result stored, or failed to store"""
+    if isinstance(key, bytes):
+      key = key.decode('utf-8')
+    with self.lock:
+      self.conn.execute('UPDATE spool SET state=? WHERE key=?', (state, key))
+      self.conn.commit()
+
+  def pending(self) -> Iterator[Tuple[str, str]]:
+    """Results recorded but not marked, oldest first"""
+    with self.lock:
+      rows = self.conn.execute(
+          'SELECT key, data FROM spool WHERE state=? ORDER BY added',
+          (PENDING,)).fetchall()
+    for key, data in rows:
+      yield key, data.decode('utf-8')
+
+  def purge(self) -> int:
+    """Drop the stored results, failed ones are kept for inspection"""
+    with self.lock:
+      cur = self.conn.execute('DELETE FROM spool WHERE state=?', (DONE,))
+      self.conn.commit()
+      self.conn.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+    return cur.rowcount
+
+  def close(self) -> None:
+    """Close the spool file"""
+    with self.lock:
+      self.conn.close()
@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+
+###############################################################################
+#
+# MIT License
+#
+# Copyright (c) 2024 Advanced Micro Devices, Inc.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+"""Retry policies shared by DB, command and connection retries. Errors are
+classified, mostly by MySQL error code, each class backs off exponentially with
+decorrelated jitter up to its cap, and an operation gives up when its retry
+count or total sleep budget is spent."""
+
+import random
+import logging
+from time import sleep
+from typing import Any, Callable, Dict, Optional
+
+from tuna.utils.logger import setup_logger
+from tuna.utils.metadata import NUM_SQL_RETRIES, RETRY_BUDGET
+from tuna.utils.metrics import count_retry
+
+LOGGER = setup_logger('retry')
+
+
+class RetryClass():  #pylint: disable=too-few-public-methods
+  """Backoff of one error class
+  @param base: first sleep in seconds
+  @param cap: longest sleep in seconds
+  @param max_retries: retries of this class per operation, 0 never retries,
+                     None leaves the limit to the policy
+  """
+
+  def __init__(self,
+               base: float,
+               cap: float,
+               max_retries: Optional[int] = None) -> None:
+    self.base = base
+    self.cap = cap
+    self.max_retries = max_retries
+
+
+RETRY_CLASSES: Dict[str, RetryClass] = {
+    'deadlock': RetryClass(0.05, 2),
+    'lock_wait': RetryClass(1, 30),
+    'connection': RetryClass(1, 60),
+    'transient': RetryClass(1, 10),
+    'unknown': RetryClass(1, 30, 2),
+    'fatal': RetryClass(0, 0, 0)
+}
+
+MYSQL_ERRORS: Dict[int, str] = {
+    1213: 'deadlock',
+    1205: 'lock_wait',
+    1040: 'connection',  #too many connections
+    1053: 'connection',  #server shutdown in progress
+    2003: 'connection',  #can't connect
+    2006: 'connection',  #server has gone away
+    2013: 'connection',  #lost connection during query
+    1044: 'fatal',  #access denied to database
+    1045: 'fatal',  #access denied for user
+    1049: 'fatal',  #unknown database
+    1054: 'fatal',  #unknown column
+    1064: 'fatal',  #syntax error
+    1146: 'fatal'  #table doesn't exist
+}
+
+#command output that is worth retrying
+TRANSIENT_CMD_ERRORS = ('disk I/O error',)
+
+
+def mysql_code(error: Any) -> Optional[int]:
+  """MySQL error code of a pymysql error or a sqlalchemy error wrapping one"""
+  orig = getattr(error, 'orig', error)
+  args = getattr(orig, 'args', None)
+  if args and isinstance(args[0], int):
+    return args[0]
+  return None
+
+
+def classify_error(error: Any) -> str:
+  """Retry class of a DB or socket error"""
+  code = mysql_code(error)
+  if code is not None:
+    return MYSQL_ERRORS.get(code, 'unknown')
+  if isinstance(error, OSError):
+    return 'connection'
+  return 'unknown'
+
+
+def classify_cmd_error(err_str: str) -> str:
+  """Retry class of the error output of a failed command"""
+  if any(msg in err_str for msg in TRANSIENT_CMD_ERRORS):
+    return 'transient'
+  return 'fatal'
+
+
+class RetryPolicy():  #pylint: disable=too-many-instance-attributes
+  """Retry state of one operation
+  @param name: operation name for logs and metrics
+  @param classify: maps an error to a key of RETRY_CLASSES
+  @param max_retries: retries over all error classes
+  @param budget: seconds the operation may sleep in total
+  """
+
+  def __init__(self,
+               name: str,
+               classify: Callable[[Any], str] = classify_error,
+               max_retries: int = NUM_SQL_RETRIES,
+               budget: float = RETRY_BUDGET,
+               logger: logging.Logger = LOGGER) -> None:
+    self.name = name
+    self.classify = classify
+    self.max_retries = max_retries
+    self.budget = budget
+    self.logger = logger
+    self.retries = 0
+    self.slept = 0.0
+    #retries and last sleep per error class
+    self.class_retries: Dict[str, int] = {}
+    self.last_sleep: Dict[str, float] = {}
+
+  def backoff(self, error: Any) -> Optional[float]:
+    """Seconds to sleep before retrying after @error, None to give up"""
+    err_class = self.classify(error)
+    retry_class = RETRY_CLASSES[err_class]
+    num = self.class_retries.get(err_class, 0)
+    if self.retries >= self.max_retries or (retry_class.max_retries is not None
+                                            and num >= retry_class.max_retries):
+      self.give_up(err_class, error)
+      return None
+
+    #decorrelated jitter: uniform between base and three times the last sleep
+    last = self.last_sleep.get(err_class, retry_class.base)
+    delay = min(retry_class.cap, random.uniform(retry_class.base, last * 3))
+    if self.slept + delay > self.budget:
+      self.give_up(err_class, error)
+      return None
+
+    self.class_retries[err_class] = num + 1
+    self.last_sleep[err_class] = delay
+    self.retries += 1
+    self.slept += delay
+    count_retry(self.name, err_class)
+    self.logger.warning('%s: %s (%s), retry %s in %.2fs', self.name, error,
+                        err_class, self.retries, delay)
+    return delay
+
+  def give_up(self, err_class: str, error: Any) -> None:
+    """Record that the operation stopped retrying"""
+    count_retry(self.name, err_class, gave_up=True)
+    self.logger.error('%s: giving up after %s retries (%.1fs) on %s error: %s',
+                      self.name, self.retries, self.slept, err_class, error)
+
+  def wait(self, error: Any) -> bool:
+    """Sleep before the next attempt, False if the operation should give up"""
+    delay = self.backoff(error)
+    if delay is None:
+      return False
+    sleep(delay)
+    return True
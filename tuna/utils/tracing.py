@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+###############################################################################
+#
+# MIT License
+#
+# Copyright (c) 2024 Advanced Micro Devices, Inc.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+###############################################################################
+"""OpenTelemetry spans for the job lifecycle. Spans go to the no-op API tracer
+unless setup_tracing() installed an exporter. Trace context travels from
+go_fish to the celery workers in the task message headers and back to the
+consumer with the task result."""
+
+import os
+import functools
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, Optional, TYPE_CHECKING
+
+from tuna.utils.logger import setup_logger
+from tuna.utils.lazy_import import lazy_import
+
+if TYPE_CHECKING:
+  from opentelemetry import trace, propagate
+else:
+  trace = lazy_import('opentelemetry.trace')
+  propagate = lazy_import('opentelemetry.propagate')
+
+LOGGER = setup_logger('tracing')
+
+TRACE_EXPORTER_ENV = 'TUNA_TRACE_EXPORTER'
+TRACER_NAME = 'tuna'
+
+_PROVIDER: Any = None
+
+
+def _named_exporter(name: str) -> Any:
+  """Span exporter for $TUNA_TRACE_EXPORTER"""
+  #pylint: disable=import-outside-toplevel
+  if name == 'console':
+    from opentelemetry.sdk.trace.export import ConsoleSpanExporter
+    return ConsoleSpanExporter()
+  if name == 'otlp':
+    #endpoint and headers are read from the OTEL_EXPORTER_OTLP_* variables
+    from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+    return OTLPSpanExporter()
+  raise ValueError(f'Unknown trace exporter: {name}')
+
+
+def setup_tracing(exporter: Any = None, service: str = 'tuna') -> bool:
+  """Install an SDK tracer provider sending spans to @exporter, or to the
+  exporter named by $TUNA_TRACE_EXPORTER (console|otlp). An explicit
+  exporter is flushed per span, as tests use for in-memory exporters.
+  Returns False when tracing stays disabled."""
+  global _PROVIDER  #pylint: disable=global-statement
+  #pylint: disable=import-outside-toplevel
+  from opentelemetry.sdk.resources import Resource
+  from opentelemetry.sdk.trace import TracerProvider
+  from opentelemetry.sdk.trace.export import BatchSpanProcessor, SimpleSpanProcessor
+
+  if exporter is None:
+    name = os.environ.get(TRACE_EXPORTER_ENV)
+    if not name:
+      return False
+    processor = BatchSpanProcessor(_named_exporter(name))
+  else:
+    processor = SimpleSpanProcessor(exporter)
+
+  if _PROVIDER is None:
+    _PROVIDER = TracerProvider(
+        resource=Resource.create({'service.name': service}))
+    trace.set_tracer_provider(_PROVIDER)
+  _PROVIDER.add_span_processor(processor)
+  LOGGER.info('Tracing enabled for %s', service)
+  return True
+
+
+def get_tracer() -> Any:
+  """Tracer for tuna spans, a proxy until a provider is installed"""
+  return trace.get_tracer(TRACER_NAME)
+
+
+@contextmanager
+def span(name: str,
+         carrier: Optional[Dict[str, Any]] = None,
+         **attributes: Any) -> Iterator[Any]:
+  """Run the enclosed block in span @name, a child of the current span or
+  of the trace context in @carrier. None valued attributes are dropped"""
+  context = propagate.extract(carrier) if carrier else None
+  attributes = {key: val for key, val in attributes.items() if val is not None}
+  with get_tracer().start_as_current_span(name,
+                                          context=context,
+                                          attributes=attributes) as cur:
+    yield cur
+
+
+def traced(name: str) -> Callable:
+  """Decorator running the function in span @name"""
+
+  def decorator(func: Callable) -> Callable:
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+      with span(name):
+        return func(*args, **kwargs)
+
+    return wrapper
+
+  return decorator
+
+
+def trace_headers() -> Dict[str, str]:
+  """Trace context of the current span as message headers"""
+  carrier: Dict[str, str] = {}
+  propagate.inject(carrier)
+  return carrier
+
+
+def request_headers(request: Any) -> Dict[str, Any]:
+  """Trace context sent with a celery task, custom message headers end up as
+  attributes of the task request"""
+  headers = getattr(request, 'headers', None) or vars(request)
+  return {
+      key: headers[key]
+      for key in propagate.get_global_textmap().fields
+      if key in headers
+  }
+
+
+def flush_tracing() -> None:
+  """Export pending spans, forked processes exit without running atexit"""
+  if _PROVIDER is not None:
+    _PROVIDER.force_flush()
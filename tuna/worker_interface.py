@@ -56,6 +56,8 @@ from tuna.utils.db_utility import gen_select_objs, gen_update_query, has_attr_se
 from tuna.connection import Connection
 from tuna.utils.utility import SimpleDict
 from tuna.utils.logger import set_usr_logger
+from tuna.utils.tracing import span
+from tuna.utils.retry import RetryPolicy, classify_cmd_error
 from tuna.db.tuna_tables import JobMixin
 
 
@@ -452,7 +454,8 @@ class WorkerInterface(Process):
           self.logger.warning('Used space overflow detected')
           return False  #type: ignore
         # the step member is defined in the derived class
-        ret = self.step()
+        with span('worker.step', job=getattr(self.job, 'id', None)):
+          ret = self.step()
         self.logger.info("proc %s step %s", self.gpu_id, ret)
         return ret  #type: ignore
     except KeyboardInterrupt as err:
@@ -466,7 +469,11 @@ class WorkerInterface(Process):
     ret_code: int
     out: str
     err: StringIO
-    for i in range(MAX_JOB_RETRIES):
+    policy = RetryPolicy('run_command',
+                         classify=classify_cmd_error,
+                         max_retries=MAX_JOB_RETRIES - 1,
+                         logger=self.logger)
+    while True:
       ret_code, out, err = self.exec_docker_cmd(cmd)
 
       if ret_code != 0:
@@ -474,10 +481,7 @@ class WorkerInterface(Process):
         if err:
           err_str: str = err.read()
           self.logger.error('%s : %s', ret_code, err_str)
-          if "disk I/O error" in err_str:
-            self.logger.error('fin retry : %u', i)
-            sleep(random.randint(1, 10))
-          else:
+          if not policy.wait(err_str):
             break
         else:
           self.logger.error('err code : %s', ret_code)